@@ -0,0 +1,88 @@
+# autosave.py
+# for license info (GPL3), see license.txt from font_hyper package
+
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class AutosaveWorker:
+    """
+    Saves the application state in the background a while after the last catalog edit.
+
+    Edits restart a debounce timer on the Tk thread. When it fires and the FontManager
+    is dirty, a snapshot of the state (plain dicts and list copies) is taken on the Tk
+    thread and handed to a worker thread, which serializes and writes it through
+    StateManager.write_state_file (atomic, skipped if the content did not change).
+    Without listen, edits do not schedule saves and only save_snapshot() calls write
+    (used to compact the edit journal).
+    """
+    def __init__(self, root, state_manager, delay_ms, listen=True):
+        self.root = root
+        self.state_manager = state_manager
+        self.font_manager = state_manager.font_manager
+        self.delay_ms = delay_ms
+        self._after_id = None
+        self._pending = None  # (change_count, snapshot) waiting for the worker thread
+        self._stopped = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="autosave", daemon=True)
+        self._thread.start()
+        if listen:
+            self.font_manager.add_change_listener(self.on_change)
+
+    def on_change(self, event, details):
+        """FontManager change listener, (re)starts the debounce timer."""
+        if event == 'batch_started' or self._stopped:
+            return
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+        self._after_id = self.root.after(self.delay_ms, self.save_snapshot)
+
+    def save_snapshot(self, force=False):
+        """Takes a snapshot of the state on the Tk thread and queues it for writing (with force even if clean)."""
+        self._after_id = None
+        if not (force or self.font_manager.dirty):
+            return
+        try:
+            change_count = self.font_manager.change_count
+            snapshot = self.state_manager.build_state_snapshot()
+        except Exception as e:
+            logger.error(f"Error taking autosave snapshot: {str(e)}")
+            return
+        with self._condition:
+            # Only the newest snapshot matters
+            self._pending = (change_count, snapshot)
+            self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._pending is None and not self._stopped:
+                    self._condition.wait()
+                if self._pending is None:
+                    return
+                change_count, snapshot = self._pending
+                self._pending = None
+            try:
+                if self.state_manager.write_state_file(snapshot, change_count):
+                    logger.debug(f"Autosaved state (edit {change_count})")
+            except Exception as e:
+                logger.error(f"Error autosaving state: {str(e)}")
+
+    def stop(self, flush=True):
+        """Stops the worker; with flush, a pending or due save is written first."""
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+            if flush:
+                self.save_snapshot()
+        self.font_manager.remove_change_listener(self.on_change)
+        with self._condition:
+            self._stopped = True
+            if not flush:
+                self._pending = None
+            self._condition.notify()
+        self._thread.join(timeout=10)
+#
@@ -0,0 +1,90 @@
+# background_scan.py
+# for license info (GPL3), see license.txt from font_hyper package
+
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Defaults, the application uses the settings in path_config.py
+SCAN_SLICE_MS = 50
+
+
+class BackgroundScan:
+    """
+    Runs a FontManager scan between GUI events, so the application is usable while fonts
+    are found. The steps of FontManager.start_scan() run on the Tk thread in slices of
+    about slice_ms, each slice one batch of catalog edits, with the event loop running in
+    between; steps waiting for fc-list or the parser processes give up the thread after
+    a few milliseconds (fontconfig_source.LOAD_POLL_S, font_parse_pool.POLL_INTERVAL_S).
+    on_progress(phase) is called when a phase of the scan has finished (see
+    font_manager.SCAN_PHASES) and with None when the scan is over; a scan stopped by
+    FontManager.stop_scan() or search_fonts() is over as well.
+    """
+    def __init__(self, root, font_manager, on_progress=None, slice_ms=SCAN_SLICE_MS):
+        self.root = root
+        self.font_manager = font_manager
+        self.on_progress = on_progress
+        self.slice_ms = slice_ms
+        self._steps = None
+        self._phase = None
+        self._after_id = None
+
+    @property
+    def running(self):
+        return self._steps is not None
+
+    def start(self):
+        """Starts a scan, stopping one that is still running (it is continued by the new one)."""
+        self.stop()
+        self._steps = self.font_manager.start_scan()
+        self._phase = None
+        self._after_id = self.root.after_idle(self._run_slice)
+
+    def stop(self):
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+        if self._steps is not None:
+            self._steps = None
+            self.font_manager.stop_scan()
+
+    def _run_slice(self):
+        self._after_id = None
+        if self._steps is None:
+            return
+        finished_phases = []
+        done = False
+        deadline = time.perf_counter() + self.slice_ms / 1000
+        try:
+            with self.font_manager.batch_changes():
+                while time.perf_counter() < deadline:
+                    phase = next(self._steps)
+                    if phase != self._phase:
+                        if self._phase is not None:
+                            finished_phases.append(self._phase)
+                        self._phase = phase
+        except StopIteration:
+            done = True
+        except Exception as e:
+            logger.error(f"Error in background scan: {str(e)}")
+            done = True
+
+        for phase in finished_phases:
+            logger.debug(f"Background scan finished the '{phase}' phase, {len(self.font_manager.fonts)} fonts")
+            self._report(phase)
+        if done:
+            self._steps = None
+            self.font_manager.stop_scan()
+            self._report(None)
+        else:
+            self._after_id = self.root.after(1, self._run_slice)
+
+    def _report(self, phase):
+        if self.on_progress is None:
+            return
+        try:
+            self.on_progress(phase)
+        except Exception as e:
+            logger.error(f"Error reporting scan progress: {str(e)}")
+#
@@ -0,0 +1,305 @@
+# category_suggestions.py
+# for license info (GPL3), see license.txt from font_hyper package
+
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Rows processed per block; bounds the float32 working set to chunk_size x vector_size
+DEFAULT_CHUNK_SIZE = 2048
+
+
+def _squared_distances(block, centroids, centroid_norms):
+    """Squared euclidean distances between the rows of block (float32) and centroids."""
+    block_norms = np.einsum('ij,ij->i', block, block)[:, None]
+    distances = block_norms - 2.0 * block @ centroids.T + centroid_norms[None, :]
+    return np.maximum(distances, 0.0)
+
+
+def iter_chunks(vectors, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yields (start, float32 block) pairs of a uint8 matrix."""
+    for start in range(0, vectors.shape[0], chunk_size):
+        yield start, vectors[start:start + chunk_size].astype(np.float32)
+
+
+def kmeans(vectors, k, iterations=20, chunk_size=DEFAULT_CHUNK_SIZE, seed=0):
+    """
+    Chunked k-means over the rows of a (n, d) matrix.
+
+    Only one chunk is converted to float32 at a time, so memory stays bounded
+    by chunk_size x d plus the k centroids.
+
+    Returns:
+        tuple: (labels, centroids, distances) with labels (n,) int, centroids (k, d) float32
+               and distances (n,) float32 squared distance of each row to its centroid
+    """
+    n = vectors.shape[0]
+    k = max(1, min(k, n))
+    rng = np.random.default_rng(seed)
+
+    # k-means++ seeding on a bounded sample
+    sample_idx = rng.choice(n, size=min(n, 10000), replace=False)
+    sample = vectors[sample_idx].astype(np.float32)
+    centroids = np.empty((k, vectors.shape[1]), dtype=np.float32)
+    centroids[0] = sample[rng.integers(len(sample))]
+    closest = _squared_distances(sample, centroids[:1], np.einsum('ij,ij->i', centroids[:1], centroids[:1]))[:, 0]
+    for i in range(1, k):
+        total = closest.sum()
+        pick = rng.integers(len(sample)) if total <= 0 else rng.choice(len(sample), p=closest / total)
+        centroids[i] = sample[pick]
+        new_dist = _squared_distances(sample, centroids[i:i + 1], np.einsum('ij,ij->i', centroids[i:i + 1], centroids[i:i + 1]))[:, 0]
+        closest = np.minimum(closest, new_dist)
+
+    labels = np.full(n, -1, dtype=np.int32)
+    distances = np.zeros(n, dtype=np.float32)
+    for iteration in range(iterations):
+        sums = np.zeros(centroids.shape, dtype=np.float64)
+        counts = np.zeros(k, dtype=np.int64)
+        centroid_norms = np.einsum('ij,ij->i', centroids, centroids)
+        changed = 0
+        for start, block in iter_chunks(vectors, chunk_size):
+            dist = _squared_distances(block, centroids, centroid_norms)
+            block_labels = dist.argmin(axis=1)
+            stop = start + len(block)
+            changed += int(np.count_nonzero(labels[start:stop] != block_labels))
+            labels[start:stop] = block_labels
+            distances[start:stop] = dist[np.arange(len(block)), block_labels]
+            onehot = np.zeros((len(block), k), dtype=np.float32)
+            onehot[np.arange(len(block)), block_labels] = 1.0
+            sums += onehot.T @ block
+            counts += np.bincount(block_labels, minlength=k)
+
+        non_empty = counts > 0
+        centroids[non_empty] = (sums[non_empty] / counts[non_empty, None]).astype(np.float32)
+        logger.debug(f"k-means iteration {iteration}: {changed} assignments changed")
+        if changed == 0:
+            break
+
+    return labels, centroids, distances
+
+
+def agglomerate(vectors, distance_threshold, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Single-linkage agglomerative clustering with a distance cut-off.
+
+    Pairwise distances are computed block by block and merged with a union-find,
+    so the full n x n matrix is never materialized. Intended for a few thousand rows.
+
+    Returns:
+        np.ndarray: (n,) cluster label per row
+    """
+    n = vectors.shape[0]
+    parent = np.arange(n)
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    threshold = float(distance_threshold) ** 2
+    for start, block in iter_chunks(vectors, chunk_size):
+        for other_start, other in iter_chunks(vectors, chunk_size):
+            if other_start < start:
+                continue
+            dist = _squared_distances(block, other, np.einsum('ij,ij->i', other, other))
+            rows, cols = np.nonzero(dist <= threshold)
+            for r, c in zip(rows + start, cols + other_start):
+                if r < c:
+                    root_r, root_c = find(r), find(c)
+                    if root_r != root_c:
+                        parent[root_c] = root_r
+
+    roots = np.array([find(i) for i in range(n)])
+    _, labels = np.unique(roots, return_inverse=True)
+    return labels
+
+
+class CategorySuggestion:
+    """
+    A reviewable proposal: either a new category or new members for an existing one.
+    """
+    KIND_NEW = "new"
+    KIND_EXTEND = "extend"
+
+    def __init__(self, kind, label, font_paths, scores=None, note=""):
+        self.kind = kind
+        self.label = label
+        self.font_paths = list(font_paths)
+        self.scores = list(scores) if scores is not None else []
+        self.note = note
+        self.accepted = True
+
+    def __repr__(self):
+        return f"CategorySuggestion({self.kind!r}, {self.label!r}, {len(self.font_paths)} fonts)"
+
+
+class CategorySuggester:
+    """
+    Proposes categories from glyph signature vectors.
+
+    Works on a GlyphSignatureIndex; results are collected in self.suggestions and
+    only change the FontManager when apply() is called.
+    """
+    def __init__(self, font_manager, signature_index, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.font_manager = font_manager
+        self.signature_index = signature_index
+        self.chunk_size = chunk_size
+        self.suggestions = []
+
+    def _categorized_paths(self):
+        paths = set()
+        for category in self.font_manager.categories.values():
+            paths.update(category.fonts_list)
+        return paths
+
+    def _category_centroids(self):
+        """Returns {label: (centroid, member_rows)} for categories with indexed members."""
+        vectors = self.signature_index.vectors()
+        centroids = {}
+        for label, category in self.font_manager.categories.items():
+            rows = [self.signature_index.row_of(p) for p in category.fonts_list]
+            rows = [r for r in rows if r is not None]
+            if rows:
+                centroids[label] = (vectors[rows].astype(np.float32).mean(axis=0), rows)
+        return centroids
+
+    def suggest_new_categories(self, n_clusters=None, min_size=3, max_categorized_share=0.4,
+                               method="kmeans", distance_threshold=None):
+        """
+        Clusters all indexed fonts and proposes clusters of mostly uncategorized fonts as new categories.
+
+        Args:
+            n_clusters (int): Number of k-means clusters, default ~ sqrt(n / 2)
+            min_size (int): Smallest cluster that is proposed
+            max_categorized_share (float): Clusters with a larger share of already categorized fonts are skipped
+            method (str): "kmeans" or "agglomerative"
+            distance_threshold (float): Linkage cut-off for agglomerative clustering
+
+        Returns:
+            list: New CategorySuggestion objects of kind KIND_NEW
+        """
+        index = self.signature_index
+        n = len(index)
+        if n < min_size:
+            return []
+        vectors = index.vectors()
+        if method == "agglomerative":
+            if distance_threshold is None:
+                distance_threshold = 0.15 * 255 * np.sqrt(index.vector_size)
+            labels = agglomerate(vectors, distance_threshold, self.chunk_size)
+            distances = np.zeros(n, dtype=np.float32)
+        else:
+            if n_clusters is None:
+                n_clusters = max(2, int(np.sqrt(n / 2)))
+            labels, _, distances = kmeans(vectors, n_clusters, chunk_size=self.chunk_size)
+
+        categorized = self._categorized_paths()
+        centroids = self._category_centroids()
+        new_suggestions = []
+        for cluster in np.unique(labels):
+            rows = np.flatnonzero(labels == cluster)
+            if len(rows) < min_size:
+                continue
+            paths = [index.paths[r] for r in rows]
+            share = sum(1 for p in paths if p in categorized) / len(paths)
+            if share > max_categorized_share:
+                continue
+            candidates = [p for p in paths if p not in categorized]
+            order = np.argsort(distances[rows])
+            ordered = [paths[i] for i in order if paths[i] in candidates]
+
+            # Name the proposal after the closest existing category, if any
+            note = ""
+            if centroids:
+                center = vectors[rows].astype(np.float32).mean(axis=0)
+                nearest = min(centroids, key=lambda lbl: float(np.sum((centroids[lbl][0] - center) ** 2)))
+                note = f"closest existing category: {nearest}"
+            label = f"Suggested {len(new_suggestions) + 1:02d}"
+            new_suggestions.append(CategorySuggestion(
+                CategorySuggestion.KIND_NEW, label, ordered,
+                scores=np.sqrt(distances[rows][order]).tolist(), note=note))
+
+        self.suggestions.extend(new_suggestions)
+        return new_suggestions
+
+    def suggest_category_members(self, max_per_category=20, radius_factor=1.0):
+        """
+        Proposes non-member fonts lying within the spread of each category around its centroid.
+
+        The radius of a category is radius_factor times the largest member distance
+        to the centroid; categories with a single member use the nearest fonts only.
+
+        Returns:
+            list: New CategorySuggestion objects of kind KIND_EXTEND
+        """
+        index = self.signature_index
+        if len(index) == 0:
+            return []
+        centroids = self._category_centroids()
+        if not centroids:
+            return []
+        labels = list(centroids)
+        center_matrix = np.stack([centroids[lbl][0] for lbl in labels]).astype(np.float32)
+        center_norms = np.einsum('ij,ij->i', center_matrix, center_matrix)
+
+        # Distances of every font to every category centroid, computed chunk by chunk
+        distances = np.empty((len(index), len(labels)), dtype=np.float32)
+        for start, block in iter_chunks(index.vectors(), self.chunk_size):
+            distances[start:start + len(block)] = _squared_distances(block, center_matrix, center_norms)
+
+        new_suggestions = []
+        for j, label in enumerate(labels):
+            member_rows = centroids[label][1]
+            column = distances[:, j]
+            candidate_mask = np.ones(len(index), dtype=bool)
+            candidate_mask[member_rows] = False
+            limit = max_per_category
+            if len(member_rows) > 1:
+                radius = float(column[member_rows].max()) * radius_factor ** 2
+                candidate_mask &= column <= radius
+            else:
+                limit = min(limit, 5)
+            candidates = np.flatnonzero(candidate_mask)
+            if candidates.size == 0:
+                continue
+            candidates = candidates[np.argsort(column[candidates])][:limit]
+            new_suggestions.append(CategorySuggestion(
+                CategorySuggestion.KIND_EXTEND, label,
+                [index.paths[r] for r in candidates],
+                scores=np.sqrt(column[candidates]).tolist(),
+                note=f"{len(member_rows)} current members"))
+
+        self.suggestions.extend(new_suggestions)
+        return new_suggestions
+
+    def run(self, **kwargs):
+        """Computes both kinds of suggestions; kwargs go to suggest_new_categories()."""
+        self.suggestions = []
+        self.suggest_new_categories(**kwargs)
+        self.suggest_category_members()
+        return self.suggestions
+
+    def apply(self, suggestions=None):
+        """
+        Applies accepted suggestions through the FontManager category API.
+
+        Returns:
+            int: Number of font assignments made
+        """
+        suggestions = self.suggestions if suggestions is None else suggestions
+        assigned = 0
+        for suggestion in suggestions:
+            if not suggestion.accepted or not suggestion.font_paths:
+                continue
+            label = suggestion.label
+            if suggestion.kind == CategorySuggestion.KIND_NEW:
+                while label in self.font_manager.categories:
+                    label += "+"
+                self.font_manager.add_category(label)
+            elif label not in self.font_manager.categories:
+                continue
+            assigned += self.font_manager.assign_fonts_to_category(label, suggestion.font_paths)
+        return assigned
+#
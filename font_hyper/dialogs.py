@@ -60,4 +60,49 @@ class ScrollableDialog:
         self.window.grab_release()  # Release modal state
         self.window.destroy()
         self.window = None  # Clear the reference
+
+
+class ProgressDialog:
+    """
+    Modal window showing the progress of work done in steps between GUI events;
+    the Cancel button (and closing the window) calls on_cancel.
+    """
+    def __init__(self, parent, title, text, on_cancel=None, width=400):
+        self.parent = parent
+        self.on_cancel = on_cancel
+        self.window = tk.Toplevel(parent)
+        self.window.title(title)
+        self.window.transient(parent)
+        self.window.resizable(False, False)
+        self.window.protocol("WM_DELETE_WINDOW", self.cancel)
+
+        frame = ttk.Frame(self.window, padding=15)
+        frame.pack(fill=tk.BOTH, expand=True)
+        self.label = ttk.Label(frame, text=text, wraplength=width - 30)
+        self.label.pack(fill=tk.X)
+        self.progressbar = ttk.Progressbar(frame, length=width - 30, mode='determinate')
+        self.progressbar.pack(fill=tk.X, pady=10)
+        self.status = ttk.Label(frame, text="")
+        self.status.pack(fill=tk.X)
+        ttk.Button(frame, text="Cancel", command=self.cancel).pack(pady=(10, 0))
+
+        self.window.grab_set()
+
+    def update(self, done, total, status=""):
+        if self.window is None:
+            return
+        self.progressbar.configure(maximum=max(1, total), value=done)
+        self.status.configure(text=status)
+
+    def cancel(self):
+        on_cancel = self.on_cancel
+        self.close()
+        if on_cancel:
+            on_cancel()
+
+    def close(self):
+        if self.window is not None:
+            self.window.grab_release()
+            self.window.destroy()
+            self.window = None
 #
@@ -0,0 +1,243 @@
+# edit_journal.py
+# for license info (GPL3), see license.txt from font_hyper package
+
+import os
+import json
+import time
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Attributes of FontCategory recorded by 'update_category' entries
+CATEGORY_ATTRIBUTES = ('image_path', 'user_note', 'is_installed', 'category_icon_file')
+
+
+def journal_entry(event, details, font_manager):
+    """Translates a FontManager change event into a journal entry dict (None if not journaled)."""
+    category = details.get('category')
+    if event == 'category_added':
+        return {'op': 'add_category', 'label': category.label, 'idx': category.idx}
+    if event == 'category_removed':
+        return {'op': 'remove_category', 'label': category.label}
+    if event == 'category_renamed':
+        return {'op': 'rename_category', 'old': details['old_label'], 'new': category.label}
+    if event == 'category_fonts_added':
+        return {'op': 'assign', 'label': category.label, 'font_paths': list(details['font_paths'])}
+    if event == 'category_font_removed':
+        return {'op': 'remove_font_from_category', 'label': category.label, 'font_path': details['font_path']}
+    if event == 'category_font_replaced':
+        return {'op': 'replace_in_category', 'label': category.label, 'old': details['old_path'],
+                'new': details['new_path']}
+    if event == 'category_cleared':
+        return {'op': 'clear_category', 'label': category.label}
+    if event == 'category_updated':
+        return {'op': 'update_category', 'label': category.label,
+                'attributes': {name: getattr(category, name) for name in CATEGORY_ATTRIBUTES}}
+    if event == 'font_note_changed':
+        return {'op': 'note', 'font_path': details['font_path'], 'note': details['note']}
+    if event == 'paths_changed':
+        return {'op': 'paths', 'predefined': list(font_manager.font_paths_predefined),
+                'user': list(font_manager.font_paths_user),
+                'policies': {root: policy.to_dict() for root, policy in font_manager.scan_policies.items()}}
+    # Fonts are rescanned at startup and not part of the snapshot
+    return None
+
+
+def apply_entry(font_manager, entry):
+    """Applies one journal entry to a FontManager; entries referring to missing categories are skipped."""
+    op = entry.get('op')
+    label = entry.get('label')
+    if op == 'add_category':
+        if label not in font_manager.categories:
+            category = font_manager.add_category(label)
+            category.idx = entry.get('idx') or category.idx
+    elif op == 'remove_category':
+        font_manager.remove_category(label)
+    elif op == 'rename_category':
+        font_manager.rename_category(entry['old'], entry['new'])
+    elif op == 'assign':
+        font_manager.assign_fonts_to_category(label, entry.get('font_paths', []))
+    elif op == 'remove_font_from_category':
+        category = font_manager.categories.get(label)
+        if category and entry['font_path'] in category.fonts_list:
+            category.fonts_list.remove(entry['font_path'])
+    elif op == 'replace_in_category':
+        category = font_manager.categories.get(label)
+        if category and entry['old'] in category.fonts_list:
+            position = category.fonts_list.index(entry['old'])
+            if entry['new'] in category.fonts_list:
+                del category.fonts_list[position]
+            else:
+                category.fonts_list[position] = entry['new']
+    elif op == 'clear_category':
+        category = font_manager.categories.get(label)
+        if category:
+            category.fonts_list.clear()
+    elif op == 'update_category':
+        category = font_manager.categories.get(label)
+        if category:
+            for name, value in entry.get('attributes', {}).items():
+                if name in CATEGORY_ATTRIBUTES:
+                    setattr(category, name, value)
+    elif op == 'note':
+        font_manager.set_note_by_path(entry['font_path'], entry.get('note', ""))
+    elif op == 'paths':
+        font_manager.font_paths_predefined = list(entry.get('predefined', []))
+        font_manager.font_paths_user = list(entry.get('user', []))
+        if 'policies' in entry:
+            from .font_walker import ScanPolicy
+            font_manager.scan_policies = {root: ScanPolicy.from_dict(policy)
+                                          for root, policy in entry['policies'].items()}
+    else:
+        logger.warning(f"Unknown journal entry skipped: {entry}")
+
+
+class EditJournal:
+    """
+    Append-only log (JSON lines) of catalog edits, kept next to contents.json.
+
+    Every entry carries an increasing sequence number; a snapshot written to
+    contents.json stores the last sequence number it contains ('journal_seq'),
+    so startup replays only newer entries. Lines are flushed at once and fsynced
+    in small batches: after sync_batch entries or sync_delay_ms after the first
+    unsynced one. When the file exceeds compact_bytes, on_compact is called to
+    write a new snapshot, after which discard_through() drops the old entries.
+    """
+    def __init__(self, journal_path, root=None, sync_batch=16, sync_delay_ms=1000,
+                 compact_bytes=1024 * 1024, on_compact=None):
+        self.journal_path = journal_path
+        self.root = root
+        self.sync_batch = sync_batch
+        self.sync_delay_ms = sync_delay_ms
+        self.compact_bytes = compact_bytes
+        self.on_compact = on_compact
+        self.font_manager = None
+        self.seq = self._last_seq()
+        self._lock = threading.Lock()
+        self._unsynced = 0
+        self._sync_after_id = None
+        self._compaction_requested = False
+        self._file = open(self.journal_path, 'a', encoding='utf-8')
+
+    def _last_seq(self):
+        seq = 0
+        for entry in self.read_entries():
+            seq = max(seq, entry.get('seq', 0))
+        return seq
+
+    def read_entries(self, after_seq=0):
+        """Entries with a sequence number above after_seq; a torn last line (crash mid-write) ends the log."""
+        if not os.path.exists(self.journal_path):
+            return []
+        entries = []
+        with open(self.journal_path, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    logger.warning(f"Journal {self.journal_path} is damaged at line {line_number}, "
+                                   "ignoring the rest")
+                    break
+                if entry.get('seq', 0) > after_seq:
+                    entries.append(entry)
+        return entries
+
+    @property
+    def size(self):
+        with self._lock:
+            return self._file.tell()
+
+    def replay(self, font_manager, after_seq=0):
+        """Applies the entries newer than the snapshot (after_seq) to font_manager; returns their number."""
+        entries = self.read_entries(after_seq)
+        for entry in entries:
+            try:
+                apply_entry(font_manager, entry)
+            except Exception as e:
+                logger.error(f"Error replaying journal entry {entry}: {e}")
+        if entries:
+            logger.info(f"Replayed {len(entries)} journal entries")
+        return len(entries)
+
+    def record(self, entry):
+        """Appends an entry; returns its sequence number."""
+        with self._lock:
+            self.seq += 1
+            entry = dict(entry, seq=self.seq, time=round(time.time(), 3))
+            self._file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            self._file.flush()
+            self._unsynced += 1
+            if self._unsynced >= self.sync_batch:
+                self._sync_locked()
+            size = self._file.tell()
+        if self._unsynced and self.root is not None and self._sync_after_id is None:
+            self._sync_after_id = self.root.after(self.sync_delay_ms, self.sync)
+        if size > self.compact_bytes and not self._compaction_requested and self.on_compact:
+            self._compaction_requested = True
+            logger.debug(f"Journal has {size} bytes, requesting compaction")
+            self.on_compact()
+        return entry['seq']
+
+    def _sync_locked(self):
+        if self._unsynced:
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+
+    def sync(self):
+        self._sync_after_id = None
+        with self._lock:
+            self._sync_locked()
+
+    def discard_through(self, seq):
+        """Drops the entries up to seq after they were written to a snapshot; may run on a worker thread."""
+        from .utils import atomic_write
+        with self._lock:
+            self._file.flush()
+            remaining = [line for line in self._iter_lines() if json.loads(line).get('seq', 0) > seq]
+            self._file.close()
+            atomic_write(self.journal_path, "".join(remaining))
+            self._file = open(self.journal_path, 'a', encoding='utf-8')
+            self._unsynced = 0
+            self._compaction_requested = False
+        logger.debug(f"Journal compacted through entry {seq}, {len(remaining)} entries left")
+
+    def _iter_lines(self):
+        with open(self.journal_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    json.loads(line)
+                except ValueError:
+                    break
+                yield line
+
+    def attach(self, font_manager):
+        """Records the edits of font_manager from now on."""
+        self.font_manager = font_manager
+        font_manager.add_change_listener(self.handle_change)
+
+    def handle_change(self, event, details):
+        """FontManager change listener."""
+        if event == 'catalog_replaced':
+            # A loaded collection cannot be expressed as entries, it needs a new snapshot
+            if self.on_compact and not self._compaction_requested:
+                self._compaction_requested = True
+                self.on_compact()
+            return
+        entry = journal_entry(event, details, self.font_manager)
+        if entry is not None:
+            self.record(entry)
+
+    def close(self):
+        if self.font_manager is not None:
+            self.font_manager.remove_change_listener(self.handle_change)
+            self.font_manager = None
+        if self._sync_after_id is not None and self.root is not None:
+            self.root.after_cancel(self._sync_after_id)
+            self._sync_after_id = None
+        with self._lock:
+            self._sync_locked()
+            self._file.close()
+#
@@ -4,6 +4,7 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 import os
+import time
 import traceback
 import logging
 import subprocess
@@ -12,6 +13,9 @@ from .dialogs import ScrollableDialog
 
 logger = logging.getLogger(__name__)
 
+# Identify Font asks before computing more missing glyph signatures than this
+IDENTIFY_ASK_MISSING = 500
+
 class EventManager:
     """
     Centralizes event handling for the application, including menu events,
@@ -246,10 +250,9 @@ class EventManager:
                                    f"category '{category_label}'.")
                 return "break"
 
-            category.fonts_list.remove(font_info.font_path)
+            self.font_manager.remove_font_from_category(category_label, font_info.font_path)
             self.gui.treeview_manager.populate_fonts_in_category(category_label)
             self.gui.treeview_manager.update_category_count(category_label)
-            self.font_manager.update_category_info(category_label)
             self.gui.treeview_manager.populate_categories()
 
             new_category_item = self.gui.treeview_manager.get_category_item_by_id(category_id)
@@ -280,6 +283,8 @@ class EventManager:
     def install_category_fonts(self, event=None):
         """Installs all fonts in the selected category."""
         from .path_config import get_install_path
+        from .font_info import split_font_key
+        from .font_archives import is_archive_path, ExtractedFonts
         
         category_label = self.gui.treeview_manager.get_selected_category()
         if not category_label:
@@ -296,15 +301,25 @@ class EventManager:
             os.makedirs(fonts_dir, exist_ok=True)
 
             installed_count = 0
-            for font_path in category.fonts_list:
-                if os.path.exists(font_path):
-                    dest_path = os.path.join(fonts_dir, os.path.basename(font_path))
-                    if not os.path.exists(dest_path):
-                        os.symlink(font_path, dest_path)
-                        installed_count += 1
+            extracted = ExtractedFonts(fonts_dir)
+            # Faces of a collection are installed with their file, once
+            file_paths = dict.fromkeys(split_font_key(font_path)[0] for font_path in category.fonts_list)
+            try:
+                for font_path in file_paths:
+                    if is_archive_path(font_path):
+                        # Only the members in the category are extracted, the fonts are not symlinked
+                        if extracted.extract(font_path):
+                            installed_count += 1
+                    elif os.path.exists(font_path):
+                        dest_path = os.path.join(fonts_dir, os.path.basename(font_path))
+                        if not os.path.lexists(dest_path):
+                            os.symlink(font_path, dest_path)
+                            installed_count += 1
+            finally:
+                extracted.save()
 
             if installed_count > 0:
-                category.is_installed = True
+                self.font_manager.set_category_installed(category_label, True)
                 selected_items = self.gui.categories_treeview.selection()
                 if selected_items:
                     item = selected_items[0]
@@ -328,6 +343,8 @@ class EventManager:
     def remove_category_fonts(self, event=None):
         """Uninstalls all fonts in the selected category."""
         from .path_config import get_install_path
+        from .font_info import split_font_key
+        from .font_archives import is_archive_path, ExtractedFonts
         
         category_label = self.gui.treeview_manager.get_selected_category()
         if not category_label:
@@ -342,14 +359,25 @@ class EventManager:
         try:
             fonts_dir = os.path.expanduser(get_install_path())
             removed_count = 0
-            for font_path in category.fonts_list:
-                dest_path = os.path.join(fonts_dir, os.path.basename(font_path))
-                if os.path.exists(dest_path) and os.path.islink(dest_path):
-                    os.unlink(dest_path)
-                    removed_count += 1
+            extracted = ExtractedFonts(fonts_dir)
+            file_paths = dict.fromkeys(split_font_key(font_path)[0] for font_path in category.fonts_list)
+            try:
+                for font_path in file_paths:
+                    if is_archive_path(font_path):
+                        # Only files install_category_fonts() extracted, see ExtractedFonts
+                        if extracted.remove(font_path):
+                            removed_count += 1
+                        continue
+                    dest_path = os.path.join(fonts_dir, os.path.basename(font_path))
+                    # Only the symlink to this font, not a file or link of the user's with that name
+                    if os.path.islink(dest_path) and os.readlink(dest_path) == font_path:
+                        os.unlink(dest_path)
+                        removed_count += 1
+            finally:
+                extracted.save()
 
             if removed_count > 0:
-                category.is_installed = False
+                self.font_manager.set_category_installed(category_label, False)
                 selected_items = self.gui.categories_treeview.selection()
                 if selected_items:
                     item = selected_items[0]
@@ -423,11 +451,235 @@ class EventManager:
                              f"An error occurred while setting up font cache update:\n{str(e)}")
         return "break"
 
+    def _glyph_signature_cache(self):
+        """The glyph signature index, loaded from its cache file if empty, and the cache file path."""
+        from .path_config import get_config_path
+
+        signatures = self.font_manager.glyph_signatures
+        cache_file = os.path.join(get_config_path(), "glyph_signatures.npz")
+        if len(signatures) == 0:
+            signatures.load(cache_file)
+        return signatures, cache_file
+
+    def update_glyph_signatures(self, on_ready, title="Glyph Signatures"):
+        """
+        Loads the glyph signature cache and computes the signatures of new and changed fonts
+        in slices between GUI events, with a progress window; on_ready(signatures) is called
+        when they are complete, not if the user cancels (what was computed is kept).
+        """
+        from .path_config import SCAN_SLICE_MS
+        from .dialogs import ProgressDialog
+        from .glyph_signatures import signature_time_estimate
+
+        signatures, cache_file = self._glyph_signature_cache()
+        font_paths = self.font_manager.get_columns().values('font_path')
+        steps = signatures.update_steps(font_paths)
+        state = {'after_id': None, 'added': False, 'started': time.perf_counter()}
+
+        def finish(completed):
+            if state['after_id'] is not None:
+                self.root.after_cancel(state['after_id'])
+                state['after_id'] = None
+            steps.close()
+            dialog.close()
+            if state['added']:
+                signatures.save(cache_file)
+            if completed:
+                on_ready(signatures)
+
+        def run_slice():
+            state['after_id'] = None
+            deadline = time.perf_counter() + SCAN_SLICE_MS / 1000
+            indexed = len(signatures)
+            try:
+                while time.perf_counter() < deadline:
+                    done, total = next(steps)
+            except StopIteration:
+                state['added'] |= len(signatures) > indexed
+                finish(True)
+                return
+            except Exception as e:
+                logger.error(f"Error computing glyph signatures: {str(e)}")
+                finish(False)
+                return
+            state['added'] |= len(signatures) > indexed
+            elapsed = time.perf_counter() - state['started']
+            remaining = elapsed / done * (total - done)
+            dialog.update(done, total, f"{done} of {total} fonts, about {remaining:.0f} s left")
+            state['after_id'] = self.root.after(1, run_slice)
+
+        missing = signatures.missing_count(font_paths)
+        dialog = ProgressDialog(self.root, title,
+                                f"Checking the glyph signatures of {len(font_paths)} fonts, "
+                                f"{missing} of them are rendered for the first time "
+                                f"({signature_time_estimate(missing)}), later runs use the cache.",
+                                on_cancel=lambda: finish(False))
+        state['after_id'] = self.root.after_idle(run_slice)
+
+    def suggest_categories(self, event=None):
+        """Clusters glyph signatures and opens the category suggestions review window."""
+        from .category_suggestions import CategorySuggester
+        from .gui_category_suggestions import CategorySuggestionsDialog
+
+        def suggest(signatures):
+            try:
+                suggester = CategorySuggester(self.font_manager, signatures)
+                suggester.run()
+                if not suggester.suggestions:
+                    messagebox.showinfo("Info", "No category suggestions found.")
+                    return
+
+                def refresh_categories():
+                    self.gui.treeview_manager.populate_categories()
+
+                CategorySuggestionsDialog(self.root, suggester, on_applied=refresh_categories)
+
+            except Exception as e:
+                traceback.print_exc()
+                logger.error(f"Error suggesting categories: {str(e)}")
+                messagebox.showerror("Suggestion Error",
+                                 f"An error occurred while suggesting categories:\n{str(e)}")
+
+        try:
+            self.update_glyph_signatures(suggest, "Suggest Categories")
+        except Exception as e:
+            traceback.print_exc()
+            logger.error(f"Error suggesting categories: {str(e)}")
+            messagebox.showerror("Suggestion Error",
+                             f"An error occurred while suggesting categories:\n{str(e)}")
+        return "break"
+
+    def show_duplicate_report(self, event=None):
+        """Groups exact and near-duplicate font files and opens the duplicate report window."""
+        from .path_config import get_config_path, QUARANTINE_DIR
+        from .gui_duplicates import DuplicatesDialog
+
+        try:
+            # Only near-duplicate candidates need glyph signatures, the finder computes the missing ones
+            signatures, cache_file = self._glyph_signature_cache()
+            indexed = len(signatures)
+            groups = self.font_manager.get_duplicate_groups(signatures)
+            if len(signatures) > indexed:
+                signatures.save(cache_file)
+            if not groups:
+                messagebox.showinfo("Info", "No duplicate fonts found.")
+                return "break"
+
+            def refresh():
+                self.gui.treeview_manager.populate_font_table()
+                self.gui.treeview_manager.populate_categories()
+
+            quarantine_dir = os.path.join(get_config_path(), QUARANTINE_DIR, time.strftime("%Y%m%d-%H%M%S"))
+            DuplicatesDialog(self.root, self.font_manager, groups, quarantine_dir, on_resolved=refresh)
+
+        except Exception as e:
+            traceback.print_exc()
+            logger.error(f"Error finding duplicate fonts: {str(e)}")
+            messagebox.showerror("Duplicate Report Error",
+                             f"An error occurred while finding duplicate fonts:\n{str(e)}")
+        return "break"
+
+    def show_font_health_report(self, event=None):
+        """Opens the report of the font files quarantined for crashing or hanging the font parser."""
+        from .gui_font_health import FontHealthDialog
+
+        try:
+            quarantine = self.font_manager.parse_quarantine
+            if len(quarantine) == 0:
+                messagebox.showinfo("Info", "No font files are quarantined.")
+                return "break"
+
+            def rescan():
+                self.font_manager.search_fonts()
+                self.gui.treeview_manager.populate_font_table()
+
+            FontHealthDialog(self.root, quarantine, on_retry=rescan)
+
+        except Exception as e:
+            traceback.print_exc()
+            logger.error(f"Error opening font health report: {str(e)}")
+            messagebox.showerror("Font Health Error",
+                             f"An error occurred while opening the font health report:\n{str(e)}")
+        return "break"
+
+    def identify_font_from_image(self, event=None):
+        """Ranks catalog fonts by similarity to the text in a user-selected image."""
+        from tkinter import simpledialog
+        from .glyph_signatures import signature_time_estimate
+
+        try:
+            image_path = filedialog.askopenfilename(
+                title="Select an image of text",
+                filetypes=[('Image files', ('*.png', '*.jpg', '*.jpeg', '*.webp', '*.bmp')),
+                           ('All files', '*.*')]
+            )
+            if not image_path:
+                return "break"
+            text = simpledialog.askstring("Identify Font",
+                                          "Text shown in the image (optional, improves matching):",
+                                          parent=self.root)
+
+            def identify(signatures):
+                self._identify_font(image_path, text, signatures)
+
+            # A cold signature cache costs minutes for a large catalog: say so, and offer the fonts indexed so far
+            signatures, _ = self._glyph_signature_cache()
+            missing = signatures.missing_count(self.font_manager.get_columns().values('font_path'))
+            if missing > IDENTIFY_ASK_MISSING and len(signatures):
+                answer = messagebox.askyesnocancel(
+                    "Identify Font",
+                    f"{missing} fonts have no glyph signature yet. Computing them takes "
+                    f"{signature_time_estimate(missing)} this time, later runs use the cache.\n\n"
+                    f"Yes: compute them now (with progress)\n"
+                    f"No: identify among the {len(signatures)} fonts that have one",
+                    parent=self.root)
+                if answer is None:
+                    return "break"
+                if not answer:
+                    identify(signatures)
+                    return "break"
+            self.update_glyph_signatures(identify, "Identify Font")
+
+        except Exception as e:
+            traceback.print_exc()
+            logger.error(f"Error identifying font: {str(e)}")
+            messagebox.showerror("Identify Error",
+                             f"An error occurred while identifying the font:\n{str(e)}")
+        return "break"
+
+    def _identify_font(self, image_path, text, signatures):
+        """Shows the fonts matching the image best, once the glyph signatures are complete."""
+        from .font_identify import FontIdentifier
+
+        try:
+            identifier = FontIdentifier(signatures)
+            results = identifier.identify(image_path, text=text or None)
+            if not results:
+                messagebox.showinfo("Info", "No glyphs or no candidate fonts found.")
+                return
+
+            lines = [f"Best matches for {os.path.basename(image_path)} (lower score is better):\n"]
+            for rank, (font_path, score) in enumerate(results, start=1):
+                font_info = self.font_manager.get_font_info_by_path(font_path)
+                name = f"{font_info.font_name} - {font_info.font_style}" if font_info else os.path.basename(font_path)
+                lines.append(f"{rank:2d}. {score:.3f}  {name}\n    {font_path}")
+            ScrollableDialog(self.root, width=600).show("Identify Font - Results", "\n".join(lines))
+
+            best = self.font_manager.get_font_info_by_path(results[0][0])
+            if best:
+                self.gui.treeview_manager.select_matching_font_in_table(best)
+
+        except Exception as e:
+            traceback.print_exc()
+            logger.error(f"Error identifying font: {str(e)}")
+            messagebox.showerror("Identify Error",
+                             f"An error occurred while identifying the font:\n{str(e)}")
+
     # Search and Filter Operations
     def filter_fonts(self, event=None):
-        """Handles filtering of fonts based on search text and flags."""
+        """Handles filtering of fonts based on the search query (see font_query.py) and flags."""
         try:
-            query = self.gui.search_entry.get().lower()
+            query = self.gui.search_entry.get()
 
             logger.debug(f"Filtering fonts with query='{query}', "
                       f"hide_sys_fonts_flag={getattr(self.gui, 'hide_sys_fonts_flag', False)}, "
@@ -435,36 +687,31 @@ class EventManager:
 
             self.gui.font_table_tree.delete(*self.gui.font_table_tree.get_children())
 
+            # Indexes of fonts matching the query: in catalog order, or by relevance for the fuzzy search
+            fuzzy = bool(query.strip()) and self.is_fuzzy_search()
+            if fuzzy:
+                rows, highlights = self.font_manager.fuzzy_query_fonts(query)
+            else:
+                rows, highlights = self.font_manager.query_fonts(query), {}
+            self.show_match_column(fuzzy)
+
+            # Metric range filters, evaluated for all fonts at once (keeps the order of rows)
+            metrics_filters = getattr(self.gui, 'metrics_filters', None)
+            if metrics_filters:
+                metrics_mask = self.font_manager.get_metrics_table().mask(metrics_filters)
+                rows = rows[metrics_mask[rows]]
+
+            # Origins are classified at scan time, hiding is a mask operation
+            if getattr(self.gui, 'hide_sys_fonts_flag', False):
+                rows = rows[~self.font_manager.get_origin_mask('system')[rows]]
+            if getattr(self.gui, 'hide_user_fonts_flag', False):
+                rows = rows[~self.font_manager.get_origin_mask('user')[rows]]
+
+            # Values come from the column store, fonts of a snapshot are not decoded for display
             matching_fonts = 0
-            for font in self.font_manager.fonts:
-                font_name = font.font_name.lower()
-                font_file = font.font_file.lower()
-                font_path = font.font_path.lower()
-
-                from .utils import is_system_font, is_user_font
-                is_sys_font = is_system_font(font_path)
-                is_user = is_user_font(font_path, self.font_manager)
-
-                should_hide = False
-                if getattr(self.gui, 'hide_sys_fonts_flag', False) and is_sys_font:
-                    should_hide = True
-                if getattr(self.gui, 'hide_user_fonts_flag', False) and is_user:
-                    should_hide = True
-
-                if query and query not in font_name and query not in font_file and query not in font_path:
-                    should_hide = True
-
-                if not should_hide:
-                    self.gui.font_table_tree.insert('', 'end', values=(
-                        font.font_name,
-                        font.font_style,
-                        font.user_note,
-                        font.license,
-                        font.font_file,
-                        font.font_path,
-                        font.id
-                    ))
-                    matching_fonts += 1
+            for index, values in zip(rows.tolist(), self.font_manager.font_table_values(rows)):
+                self.gui.font_table_tree.insert('', 'end', values=values + (highlights.get(index, ""),))
+                matching_fonts += 1
 
             logger.debug(f"Found {matching_fonts} matching fonts after filtering")
 
@@ -473,6 +720,22 @@ class EventManager:
             logger.error(f"Error filtering fonts: {str(e)}")
         return "break"
 
+    def is_fuzzy_search(self):
+        fuzzy_var = getattr(self.gui, 'fuzzy_search_var', None)
+        return bool(fuzzy_var is not None and fuzzy_var.get())
+
+    def show_match_column(self, show):
+        """Shows the Match column (highlighted name matches) of the font table only for fuzzy results."""
+        from .treeviews_and_treeview_events import FONT_TABLE_DISPLAY_COLUMNS, FONT_TABLE_FUZZY_DISPLAY_COLUMNS
+        columns = FONT_TABLE_FUZZY_DISPLAY_COLUMNS if show else FONT_TABLE_DISPLAY_COLUMNS
+        self.gui.font_table_tree.configure(displaycolumns=columns)
+
+    def open_metrics_filter(self, event=None):
+        """Opens the metrics range filter dialog for the font table."""
+        from .gui_metrics_filter import MetricsFilterDialog
+        MetricsFilterDialog(self.root, self.gui)
+        return "break"
+
     def clear_search(self, event=None):
         """Clears the search entry and resets filters."""
         self.gui.search_entry.delete(0, tk.END)
@@ -622,7 +885,7 @@ class EventManager:
         selected = self.gui.font_table_tree.selection()
         if selected:
             font_id = self.gui.font_table_tree.set(selected[0], "id")
-            font_info = next((f for f in self.font_manager.fonts if f.id == font_id), None)
+            font_info = self.font_manager.get_font_by_id(font_id)
             if font_info:
                 font_info_dict = font_info.to_dict()
                 font_info_json = json.dumps(font_info_dict, indent=4)
@@ -655,7 +918,7 @@ class EventManager:
             for item in selected:
                 values = self.gui.font_table_tree.item(item, 'values')
                 font_id = values[6]  # "id" is the 7th column
-                font = next((f for f in self.font_manager.fonts if f.id == font_id), None)
+                font = self.font_manager.get_font_by_id(font_id)
                 if font:
                     fonts.append(font)
             return fonts
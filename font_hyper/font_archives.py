@@ -0,0 +1,224 @@
+# font_archives.py
+# for license info (GPL3), see license.txt from font_hyper package
+
+import io
+import os
+import json
+import shutil
+import logging
+import zipfile
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_EXTENSIONS = ('.zip',)
+# Fonts in an archive have the virtual path "<archive path>!/<member name>"
+ARCHIVE_SEPARATOR = "!/"
+# Upper bound of the archive member contents kept in memory, see FontBytesCache
+MEMBER_CACHE_BYTES = 64 * 1024 * 1024
+# Archive members larger than this (uncompressed) are not read, so a zip bomb can't exhaust memory
+MAX_MEMBER_BYTES = 64 * 1024 * 1024
+# Kept in the install directory: the fonts extracted from archives into it, see ExtractedFonts
+EXTRACTED_FONTS_FILE = ".font_hyper_extracted.json"
+
+
+def is_archive_path(file_path):
+    """True for the virtual path of a font inside an archive."""
+    return ARCHIVE_SEPARATOR in file_path
+
+
+def archive_member_path(archive_path, member):
+    return f"{archive_path}{ARCHIVE_SEPARATOR}{member}"
+
+
+def split_archive_path(file_path):
+    """(archive path, member name) of a virtual path; (file_path, None) for ordinary files."""
+    archive_path, separator, member = file_path.partition(ARCHIVE_SEPARATOR)
+    return (archive_path, member) if separator else (file_path, None)
+
+
+class FontBytesCache:
+    """
+    Bounded LRU cache of font file contents read from archives, so faces of
+    archive members can be opened from memory repeatedly (rendering, previews)
+    without decompressing the member every time. Thread safe.
+    """
+    def __init__(self, max_bytes=MEMBER_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._data = OrderedDict()  # virtual path -> bytes
+        self._lock = threading.Lock()
+
+    def get(self, file_path):
+        """Content of an archive member, read and cached on a miss; raises OSError if it can't be read."""
+        with self._lock:
+            data = self._data.get(file_path)
+            if data is not None:
+                self._data.move_to_end(file_path)
+                return data
+        archive_path, member = split_archive_path(file_path)
+        try:
+            with zipfile.ZipFile(archive_path) as archive:
+                info = archive.getinfo(member)
+                if info.file_size > MAX_MEMBER_BYTES:
+                    raise OSError(f"{member} in {archive_path} is too large ({info.file_size} bytes)")
+                data = archive.read(info)
+        except (zipfile.BadZipFile, KeyError, RuntimeError) as e:
+            raise OSError(f"Cannot read {member} from {archive_path}: {e}") from e
+        self.put(file_path, data)
+        return data
+
+    def put(self, file_path, data):
+        with self._lock:
+            previous = self._data.pop(file_path, None)
+            if previous is not None:
+                self.size -= len(previous)
+            if len(data) > self.max_bytes:
+                return
+            self._data[file_path] = data
+            self.size += len(data)
+            while self.size > self.max_bytes:
+                _, evicted = self._data.popitem(last=False)
+                self.size -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.size = 0
+
+
+# Shared by everything that opens fonts of archives
+member_cache = FontBytesCache()
+
+
+def font_source(file_path):
+    """
+    What freetype.Face, fontTools TTFont and PIL ImageFont.truetype are opened with:
+    the path of an ordinary font file, an in-memory stream for a font inside an archive.
+    """
+    if not is_archive_path(file_path):
+        return file_path
+    return io.BytesIO(member_cache.get(file_path))
+
+
+def font_exists(file_path):
+    """True if the font file, or the archive holding it, exists."""
+    return os.path.isfile(split_archive_path(file_path)[0])
+
+
+def iter_archive_fonts(archive_path, extensions, skip=None):
+    """
+    Reads the font members of a zip archive, opening the archive once. The contents
+    are not cached: a scan reads every member once, the cache is kept for rendering.
+    Members larger than MAX_MEMBER_BYTES are skipped.
+
+    Args:
+        archive_path (str): Path to the archive
+        extensions (tuple): Lowercase file extensions of the members to read
+        skip (callable): Optional predicate on the virtual path, True skips the member unread
+
+    Yields:
+        tuple: (virtual path, bytes) per font member
+    """
+    try:
+        archive = zipfile.ZipFile(archive_path)
+    except (OSError, zipfile.BadZipFile) as e:
+        logger.warning(f"Cannot open archive {archive_path}: {e}")
+        return
+    with archive:
+        for info in archive.infolist():
+            if info.is_dir() or not info.filename.lower().endswith(extensions):
+                continue
+            file_path = archive_member_path(archive_path, info.filename)
+            if skip is not None and skip(file_path):
+                continue
+            if info.file_size > MAX_MEMBER_BYTES:
+                logger.warning(f"Skipped {info.filename} from {archive_path}: {info.file_size} bytes")
+                continue
+            try:
+                data = archive.read(info)
+            except (zipfile.BadZipFile, RuntimeError, OSError) as e:
+                # RuntimeError: encrypted member
+                logger.warning(f"Cannot read {info.filename} from {archive_path}: {e}")
+                continue
+            yield file_path, data
+
+
+def _unique_path(dest_dir, name):
+    """dest_dir/name, or dest_dir/stem-N.ext with the first N that doesn't exist."""
+    dest_path = os.path.join(dest_dir, name)
+    stem, ext = os.path.splitext(name)
+    number = 1
+    while os.path.lexists(dest_path):
+        number += 1
+        dest_path = os.path.join(dest_dir, f"{stem}-{number}{ext}")
+    return dest_path
+
+
+class ExtractedFonts:
+    """
+    The fonts of archives extracted into an install directory (file name -> virtual
+    path of the member), persisted as JSON in that directory. Uninstalling removes only
+    files recorded here, never other files that happen to share a member's name.
+    """
+    def __init__(self, dest_dir):
+        self.dest_dir = dest_dir
+        self.file_path = os.path.join(dest_dir, EXTRACTED_FONTS_FILE)
+        self.files = {}
+        try:
+            with open(self.file_path, 'r', encoding='utf-8') as f:
+                self.files = json.load(f)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logger.error(f"Error loading {self.file_path}: {e}")
+
+    def find(self, file_path):
+        """Path of the extracted file of an archive member, None if it isn't installed."""
+        for name, member_path in self.files.items():
+            if member_path == file_path and os.path.isfile(os.path.join(self.dest_dir, name)):
+                return os.path.join(self.dest_dir, name)
+        return None
+
+    def extract(self, file_path):
+        """
+        Extracts one font of an archive, under its base name or, if that is taken, a
+        numbered one (see _unique_path()); streamed from the archive.
+
+        Returns:
+            str: Path of the extracted file, None if the member is installed already
+        """
+        if self.find(file_path) is not None:
+            return None
+        archive_path, member = split_archive_path(file_path)
+        dest_path = _unique_path(self.dest_dir, os.path.basename(member))
+        with zipfile.ZipFile(archive_path) as archive, archive.open(member) as source, open(dest_path, 'xb') as target:
+            shutil.copyfileobj(source, target)
+        self.files[os.path.basename(dest_path)] = file_path
+        return dest_path
+
+    def remove(self, file_path):
+        """Deletes the extracted file of an archive member; returns True if there was one."""
+        dest_path = self.find(file_path)
+        if dest_path is None:
+            return False
+        os.unlink(dest_path)
+        del self.files[os.path.basename(dest_path)]
+        return True
+
+    def save(self):
+        from .utils import atomic_write
+        # Entries whose file was deleted outside font_hyper are dropped
+        self.files = {name: member_path for name, member_path in self.files.items()
+                      if os.path.isfile(os.path.join(self.dest_dir, name))}
+        try:
+            if self.files:
+                atomic_write(self.file_path, json.dumps(self.files, indent=1, sort_keys=True))
+            elif os.path.exists(self.file_path):
+                os.unlink(self.file_path)
+            return True
+        except OSError as e:
+            logger.error(f"Error saving {self.file_path}: {e}")
+            return False
+#
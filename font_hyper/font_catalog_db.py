@@ -0,0 +1,428 @@
+# font_catalog_db.py
+# for license info (GPL3), see license.txt from font_hyper package
+
+import os
+import json
+import sqlite3
+import logging
+from contextlib import contextmanager
+
+from .font_metrics import METRIC_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION = 2
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS fonts (
+    font_path TEXT PRIMARY KEY,
+    id TEXT NOT NULL,
+    font_file TEXT NOT NULL,
+    font_name TEXT,
+    font_family TEXT,
+    font_style TEXT,
+    font_styles TEXT,
+    license TEXT,
+    font_info TEXT
+);
+CREATE INDEX IF NOT EXISTS fonts_name ON fonts (font_name);
+CREATE INDEX IF NOT EXISTS fonts_file ON fonts (font_file COLLATE NOCASE);
+CREATE TABLE IF NOT EXISTS notes (
+    font_path TEXT PRIMARY KEY,
+    note TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS metrics (
+    font_path TEXT PRIMARY KEY REFERENCES fonts (font_path) ON DELETE CASCADE,
+    {", ".join(f"{name} {'REAL' if name == 'italic_angle' else 'INTEGER'}" for name in METRIC_COLUMNS)},
+    panose TEXT
+);
+CREATE INDEX IF NOT EXISTS metrics_weight ON metrics (weight);
+CREATE TABLE IF NOT EXISTS categories (
+    idx TEXT PRIMARY KEY,
+    label TEXT NOT NULL UNIQUE,
+    position INTEGER NOT NULL,
+    image_path TEXT,
+    user_note TEXT,
+    font_info TEXT,
+    license TEXT,
+    is_installed INTEGER NOT NULL DEFAULT 0,
+    category_icon_file TEXT,
+    preview_font_size INTEGER
+);
+CREATE TABLE IF NOT EXISTS category_fonts (
+    category_idx TEXT NOT NULL REFERENCES categories (idx) ON DELETE CASCADE,
+    font_path TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (category_idx, font_path)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS category_fonts_path ON category_fonts (font_path);
+"""
+
+FONT_COLUMNS = ('font_path', 'id', 'font_file', 'font_name', 'font_family', 'font_style',
+                'font_styles', 'license', 'font_info')
+CATEGORY_COLUMNS = ('idx', 'label', 'position', 'image_path', 'user_note', 'font_info', 'license',
+                    'is_installed', 'category_icon_file', 'preview_font_size')
+
+# Fonts added during a batch (scan) are written in chunks of this size
+FONT_WRITE_CHUNK = 2000
+
+
+def _upsert_statement(table, columns, key):
+    """INSERT statement updating the existing row on a key conflict (keeps rows referencing it)."""
+    updates = ", ".join(f"{c} = excluded.{c}" for c in columns if c != key)
+    return (f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+            f"ON CONFLICT ({key}) DO UPDATE SET {updates}")
+
+
+# Upserts instead of INSERT OR REPLACE, which would cascade-delete metrics
+UPSERT_FONT = _upsert_statement('fonts', FONT_COLUMNS, 'font_path')
+UPSERT_METRICS = _upsert_statement('metrics', ('font_path',) + tuple(METRIC_COLUMNS) + ('panose',), 'font_path')
+UPSERT_CATEGORY = _upsert_statement('categories', CATEGORY_COLUMNS, 'idx')
+
+
+class CatalogDatabase:
+    """
+    SQLite storage of the catalog: fonts, notes, metrics, categories and their members.
+    Notes are stored by font path, independent of the fonts table: a font removed
+    because its file is unavailable gets its note back when it is found again.
+
+    Attached to a FontManager as change listener, every edit is written in its own
+    transaction (bulk operations such as a scan in one), so saving never rewrites the
+    whole catalog. export_dict()/import_dict() convert from/to the contents.json format.
+    """
+    def __init__(self, db_path):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        # Autocommit mode, transactions are opened explicitly by transaction()
+        self.connection = sqlite3.connect(db_path, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("PRAGMA foreign_keys=ON")
+        self._depth = 0  # nesting level of transaction()
+        self._batches = []  # open transactions of FontManager.batch_changes()
+        self._pending_fonts = []  # fonts added during a batch, not written yet
+        self.font_manager = None
+        self.create_schema()
+
+    def create_schema(self):
+        with self.transaction() as db:
+            for statement in SCHEMA.split(';'):
+                if statement.strip():
+                    db.execute(statement)
+            version = self.get_meta('schema_version')
+            if version is not None and version < 2:
+                # Notes referenced the fonts table and went with removed fonts; they are kept by path now
+                db.execute("CREATE TABLE notes_by_path (font_path TEXT PRIMARY KEY, note TEXT NOT NULL)")
+                db.execute("INSERT INTO notes_by_path SELECT font_path, note FROM notes")
+                db.execute("DROP TABLE notes")
+                db.execute("ALTER TABLE notes_by_path RENAME TO notes")
+            if version != SCHEMA_VERSION:
+                self.set_meta('schema_version', SCHEMA_VERSION)
+
+    def close(self):
+        if self.font_manager is not None:
+            self.detach()
+        self.connection.close()
+
+    @contextmanager
+    def transaction(self):
+        """Runs the enclosed statements in one transaction; nested uses join the outer one."""
+        if self._depth == 0:
+            self.connection.execute("BEGIN")
+        self._depth += 1
+        try:
+            yield self.connection
+        except Exception:
+            self._depth -= 1
+            if self._depth == 0:
+                self.connection.execute("ROLLBACK")
+            raise
+        self._depth -= 1
+        if self._depth == 0:
+            self.connection.execute("COMMIT")
+
+    # -- meta ------------------------------------------------------------------------------
+
+    def get_meta(self, key, default=None):
+        row = self.connection.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set_meta(self, key, value):
+        with self.transaction() as db:
+            db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, json.dumps(value)))
+
+    def is_empty(self):
+        return self.connection.execute(
+            "SELECT NOT EXISTS (SELECT 1 FROM fonts) AND NOT EXISTS (SELECT 1 FROM categories)"
+            " AND NOT EXISTS (SELECT 1 FROM meta WHERE key = 'font_paths_predefined')").fetchone()[0] == 1
+
+    # -- fonts -----------------------------------------------------------------------------
+
+    @staticmethod
+    def _font_row(font):
+        return (font.font_path, font.id, font.font_file, font.font_name, font.font_family, font.font_style,
+                json.dumps(list(font.font_styles or [])), font.license, font.font_info)
+
+    @staticmethod
+    def _metrics_row(font):
+        metrics = getattr(font, 'metrics', None) or {}
+        panose = metrics.get('panose')
+        return (font.font_path, *(metrics.get(name) for name in METRIC_COLUMNS),
+                json.dumps(panose) if panose else None)
+
+    def upsert_fonts(self, fonts):
+        """Inserts or replaces fonts together with their metrics and notes (stored notes are not cleared here)."""
+        fonts = list(fonts)
+        with self.transaction() as db:
+            db.executemany(UPSERT_FONT, (self._font_row(f) for f in fonts))
+            db.executemany(UPSERT_METRICS, (self._metrics_row(f) for f in fonts if getattr(f, 'metrics', None)))
+            db.executemany("INSERT OR REPLACE INTO notes (font_path, note) VALUES (?, ?)",
+                           ((f.font_path, f.user_note) for f in fonts if f.user_note))
+
+    def delete_font(self, font_path):
+        """Removes a font with its metrics; its note and category memberships are kept, by path."""
+        with self.transaction() as db:
+            db.execute("DELETE FROM fonts WHERE font_path = ?", (font_path,))
+
+    def clear_fonts(self):
+        with self.transaction() as db:
+            db.execute("DELETE FROM fonts")
+
+    def set_note(self, font_path, note):
+        with self.transaction() as db:
+            if note:
+                db.execute("INSERT OR REPLACE INTO notes (font_path, note) VALUES (?, ?)", (font_path, note))
+            else:
+                db.execute("DELETE FROM notes WHERE font_path = ?", (font_path,))
+
+    # -- categories ------------------------------------------------------------------------
+
+    def upsert_category(self, category):
+        """Inserts or updates the attributes of a category (members are stored separately)."""
+        with self.transaction() as db:
+            row = db.execute("SELECT position FROM categories WHERE idx = ?", (category.idx,)).fetchone()
+            if row:
+                position = row[0]
+            else:
+                position = db.execute("SELECT COALESCE(MAX(position), -1) + 1 FROM categories").fetchone()[0]
+            db.execute(UPSERT_CATEGORY,
+                       (category.idx, category.label, position, category.image_path, category.user_note,
+                        category.font_info, category.license, int(bool(category.is_installed)),
+                        category.category_icon_file, category.preview_font_size))
+
+    def delete_category(self, category_idx):
+        with self.transaction() as db:
+            db.execute("DELETE FROM category_fonts WHERE category_idx = ?", (category_idx,))
+            db.execute("DELETE FROM categories WHERE idx = ?", (category_idx,))
+
+    def add_members(self, category_idx, font_paths):
+        """Appends fonts to a category, keeping their order."""
+        with self.transaction() as db:
+            start = db.execute("SELECT COALESCE(MAX(position), -1) + 1 FROM category_fonts WHERE category_idx = ?",
+                               (category_idx,)).fetchone()[0]
+            db.executemany("INSERT OR IGNORE INTO category_fonts (category_idx, font_path, position) VALUES (?, ?, ?)",
+                           ((category_idx, path, start + i) for i, path in enumerate(font_paths)))
+
+    def replace_member(self, category_idx, old_path, new_path):
+        """Puts new_path in place of old_path in a category, at its position."""
+        with self.transaction() as db:
+            db.execute("UPDATE category_fonts SET font_path = ? WHERE category_idx = ? AND font_path = ?",
+                       (new_path, category_idx, old_path))
+
+    def remove_member(self, category_idx, font_path):
+        with self.transaction() as db:
+            db.execute("DELETE FROM category_fonts WHERE category_idx = ? AND font_path = ?", (category_idx, font_path))
+
+    def clear_members(self, category_idx):
+        with self.transaction() as db:
+            db.execute("DELETE FROM category_fonts WHERE category_idx = ?", (category_idx,))
+
+    def fonts_in_category(self, label):
+        """Font paths of a category in their stored order."""
+        return [row[0] for row in self.connection.execute(
+            "SELECT m.font_path FROM category_fonts m JOIN categories c ON c.idx = m.category_idx "
+            "WHERE c.label = ? ORDER BY m.position", (label,))]
+
+    def categories_of_font(self, font_path):
+        """Labels of the categories containing a font."""
+        return [row[0] for row in self.connection.execute(
+            "SELECT c.label FROM category_fonts m JOIN categories c ON c.idx = m.category_idx "
+            "WHERE m.font_path = ? ORDER BY c.position", (font_path,))]
+
+    # -- whole catalog ---------------------------------------------------------------------
+
+    def export_dict(self):
+        """
+        The catalog in the contents.json format of FontManager.to_dict(), plus a 'fonts' list
+        (FontInfo.to_dict() entries) that FontManager.from_dict() reads as well.
+        """
+        db = self.connection
+        fonts = []
+        query = (f"SELECT {', '.join('f.' + c for c in FONT_COLUMNS)}, n.note, "
+                 f"m.font_path, {', '.join('m.' + c for c in METRIC_COLUMNS)}, m.panose "
+                 "FROM fonts f LEFT JOIN notes n ON n.font_path = f.font_path "
+                 "LEFT JOIN metrics m ON m.font_path = f.font_path ORDER BY f.rowid")
+        count = len(FONT_COLUMNS)
+        # Style lists and panose values repeat a lot, decode every distinct text once
+        decoded = {}
+
+        def decode(text):
+            value = decoded.get(text)
+            if value is None:
+                value = decoded[text] = json.loads(text)
+            return value
+
+        for row in db.execute(query):
+            font = dict(zip(FONT_COLUMNS, row[:count]))
+            font['font_styles'] = decode(font['font_styles']) if font['font_styles'] else []
+            font['user_note'] = row[count] or ""
+            metrics = {}
+            if row[count + 1] is not None:
+                for name, value in zip(METRIC_COLUMNS, row[count + 2:count + 2 + len(METRIC_COLUMNS)]):
+                    if value is not None:
+                        metrics[name] = bool(value) if name == 'fixed_pitch' else value
+                if row[-1]:
+                    metrics['panose'] = decode(row[-1])
+            font['metrics'] = metrics
+            fonts.append(font)
+
+        # Notes of all fonts, loaded or not (FontManager keeps the others until they are found)
+        font_notes = dict(db.execute("SELECT font_path, note FROM notes ORDER BY font_path"))
+
+        members = {}
+        for category_idx, font_path in db.execute(
+                "SELECT category_idx, font_path FROM category_fonts ORDER BY category_idx, position"):
+            members.setdefault(category_idx, []).append(font_path)
+
+        categories = {}
+        for row in db.execute(f"SELECT {', '.join(CATEGORY_COLUMNS)} FROM categories ORDER BY position"):
+            category = dict(zip(CATEGORY_COLUMNS, row))
+            del category['position']
+            category['is_installed'] = bool(category['is_installed'])
+            category['fonts_list'] = members.get(category['idx'], [])
+            category['preview_image'] = None
+            categories[category['label']] = category
+
+        data = {
+            'font_paths_predefined': self.get_meta('font_paths_predefined', ['/usr/share/fonts/TTF']),
+            'font_paths_user': self.get_meta('font_paths_user', []),
+            'scan_policies': self.get_meta('scan_policies', {}),
+            'categories': categories,
+            'fonts': fonts,
+            'font_notes': font_notes,
+        }
+        for key in ('render_text', 'font_color'):
+            value = self.get_meta(key)
+            if value is not None:
+                data[key] = value
+        return data
+
+    def import_dict(self, data):
+        """Replaces the stored catalog with data in the contents.json format, in one transaction."""
+        from .font_info import FontInfo
+        from .font_category import FontCategory
+
+        categories = data.get('categories', {})
+        if isinstance(categories, dict):
+            categories = list(categories.values())
+        with self.transaction() as db:
+            for table in ('category_fonts', 'categories', 'notes', 'metrics', 'fonts'):
+                db.execute(f"DELETE FROM {table}")
+            self.set_meta('font_paths_predefined', data.get('font_paths_predefined', ['/usr/share/fonts/TTF']))
+            self.set_meta('font_paths_user', data.get('font_paths_user', []))
+            self.set_meta('scan_policies', data.get('scan_policies', {}))
+            for key in ('render_text', 'font_color'):
+                if key in data:
+                    self.set_meta(key, data[key])
+            self.upsert_fonts(FontInfo.from_dict(f) for f in data.get('fonts', []) if f.get('font_path'))
+            db.executemany("INSERT OR REPLACE INTO notes (font_path, note) VALUES (?, ?)",
+                           ((path, note) for path, note in data.get('font_notes', {}).items() if note))
+            for category_data in categories:
+                category = FontCategory.from_dict(category_data)
+                self.upsert_category(category)
+                self.add_members(category.idx, category.fonts_list)
+        logger.info(f"Imported catalog with {len(data.get('fonts', []))} fonts and {len(categories)} categories")
+
+    def save_font_manager(self, font_manager):
+        """Replaces the stored catalog with the current state of a FontManager."""
+        data = font_manager.to_dict()
+        with self.transaction():
+            self.import_dict(data)
+            self.upsert_fonts(font_manager.fonts)
+
+    def export_json(self, file_path):
+        with open(file_path, 'w', encoding='utf-8') as f:
+            json.dump(self.export_dict(), f, indent=4, ensure_ascii=False)
+
+    def import_json(self, file_path):
+        with open(file_path, 'r', encoding='utf-8') as f:
+            self.import_dict(json.load(f))
+
+    # -- FontManager change listener -------------------------------------------------------
+
+    def attach(self, font_manager):
+        """Keeps the database in sync with the edits of font_manager from now on."""
+        self.font_manager = font_manager
+        font_manager.add_change_listener(self.handle_change)
+
+    def detach(self):
+        self.font_manager.remove_change_listener(self.handle_change)
+        self.font_manager = None
+
+    def flush_pending_fonts(self):
+        if self._pending_fonts:
+            fonts, self._pending_fonts = self._pending_fonts, []
+            self.upsert_fonts(fonts)
+
+    def handle_change(self, event, details):
+        """FontManager change listener, writes one edit (see FontManager.add_change_listener)."""
+        if event == 'font_added' and self._batches:
+            self._pending_fonts.append(details['font'])
+            if len(self._pending_fonts) >= FONT_WRITE_CHUNK:
+                self.flush_pending_fonts()
+            return
+        # Keep the order of edits
+        self.flush_pending_fonts()
+
+        if event == 'batch_started':
+            # Keep a transaction open until the bulk operation has finished
+            batch = self.transaction()
+            batch.__enter__()
+            self._batches.append(batch)
+        elif event == 'batch_finished':
+            if self._batches:
+                self._batches.pop().__exit__(None, None, None)
+        elif event == 'font_added':
+            self.upsert_fonts([details['font']])
+        elif event == 'font_removed':
+            self.delete_font(details['font_path'])
+        elif event == 'fonts_cleared':
+            self.clear_fonts()
+        elif event == 'font_note_changed':
+            # Stored by path, also for fonts that are not loaded
+            self.set_note(details['font_path'], details['note'])
+        elif event in ('category_added', 'category_updated', 'category_renamed'):
+            self.upsert_category(details['category'])
+        elif event == 'category_removed':
+            self.delete_category(details['category'].idx)
+        elif event == 'category_fonts_added':
+            self.add_members(details['category'].idx, details['font_paths'])
+        elif event == 'category_font_removed':
+            self.remove_member(details['category'].idx, details['font_path'])
+        elif event == 'category_font_replaced':
+            self.replace_member(details['category'].idx, details['old_path'], details['new_path'])
+        elif event == 'category_cleared':
+            self.clear_members(details['category'].idx)
+        elif event == 'paths_changed':
+            with self.transaction():
+                self.set_meta('font_paths_predefined', self.font_manager.font_paths_predefined)
+                self.set_meta('font_paths_user', self.font_manager.font_paths_user)
+                self.set_meta('scan_policies', {root: policy.to_dict()
+                                                for root, policy in self.font_manager.scan_policies.items()})
+        elif event == 'catalog_replaced':
+            self.save_font_manager(self.font_manager)
+#
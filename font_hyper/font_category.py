@@ -45,6 +45,7 @@ class FontCategory:
         self.preview_image_size = (0, 0)
         self.preview_font_size = 24  # The font size used for rendering the preview image
         self.is_installed = False  # Set to true if the font category was installed, or false if removed
+        self.dirty = False  # Edited since the last save, maintained by FontManager
         
         # Update to use path_config
         from .path_config import get_config_path
@@ -125,7 +126,9 @@ class FontCategory:
             return
 
         try:
-            font = ImageFont.truetype(font_info.font_path, self.preview_font_size)
+            from .font_archives import font_source
+            font = ImageFont.truetype(font_source(font_info.file_path), self.preview_font_size,
+                                      index=font_info.face_index)
             # Create a temporary image to calculate text size
             temp_image = Image.new('RGB', (1, 1))
             draw = ImageDraw.Draw(temp_image)
@@ -155,7 +158,7 @@ class FontCategory:
             'idx': self.idx,
             'label': self.label,
             'image_path': self.image_path,
-            'fonts_list': self.fonts_list,
+            'fonts_list': list(self.fonts_list),  # copy, snapshots are serialized in the background
             'user_note': self.user_note,
             'font_info': self.font_info,
             'license': self.license,
@@ -0,0 +1,179 @@
+# font_columns.py
+# for license info (GPL3), see license.txt from font_hyper package
+
+import logging
+import numpy as np
+from .font_metrics import FontMetricsTable, METRIC_COLUMNS, PANOSE_FIELDS
+from .font_snapshot import LazyFontList
+
+logger = logging.getLogger(__name__)
+
+# FontInfo attributes read from the font file; they never change once a font is loaded
+FILE_FIELDS = ('font_name', 'font_file', 'font_family', 'font_style', 'font_path', 'license', 'font_info')
+# Set by FontManager.classify_font, re-computed when the search paths change
+ORIGIN_FIELDS = ('font_root', 'origin')
+STRING_FIELDS = FILE_FIELDS + ORIGIN_FIELDS
+
+
+class StringDictionary:
+    """
+    Distinct strings of a column in Arrow layout: int64 offsets (count + 1) into one
+    UTF-8 data buffer. Strings are decoded on first use.
+    """
+    def __init__(self, offsets, data, values=None):
+        self.offsets = offsets
+        self.data = data
+        self._values = values if values is not None else [None] * (len(offsets) - 1)
+        self._index = None
+
+    @classmethod
+    def encode(cls, strings):
+        """
+        Dictionary-encodes a list of strings.
+
+        Returns:
+            tuple: (int32 codes, one per string, StringDictionary of the distinct strings)
+        """
+        codes_of = {}
+        codes = np.fromiter((codes_of.setdefault(text, len(codes_of)) for text in strings),
+                            dtype=np.int32, count=len(strings))
+        values = list(codes_of)
+        encoded = [text.encode('utf-8') for text in values]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+        return codes, cls(offsets, b"".join(encoded), values)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, code):
+        text = self._values[code]
+        if text is None:
+            text = bytes(self.data[int(self.offsets[code]):int(self.offsets[code + 1])]).decode('utf-8')
+            self._values[code] = text
+        return text
+
+    def take(self, codes):
+        """Strings of a sequence of codes."""
+        return [self[code] for code in codes.tolist()]
+
+    def values(self):
+        """All distinct strings."""
+        return [self[code] for code in range(len(self))]
+
+    def code_of(self, text):
+        """Code of a string, -1 if it does not occur."""
+        if self._index is None:
+            self._index = {value: code for code, value in enumerate(self.values())}
+        return self._index.get(text, -1)
+
+
+class FontColumns:
+    """
+    Struct-of-arrays view of a font list; row i belongs to fonts[i].
+
+    Every string attribute is a dictionary-encoded column (int32 codes into a
+    StringDictionary), ids and metrics are NumPy arrays. Filters, sorting and
+    export run as column operations without building FontInfo objects, which
+    matters for a list backed by a snapshot (see font_snapshot.py), where fonts
+    are only decoded on access. User notes are edited in place and are not part
+    of the columns.
+    """
+    def __init__(self, size, ids, codes, dictionaries, metrics):
+        self.size = size
+        self.ids = ids
+        self.codes = codes  # field -> codes
+        self.dictionaries = dictionaries  # field -> StringDictionary (shared by snapshot columns)
+        self.metrics = metrics  # FontMetricsTable
+        self._row_of_id = None
+
+    @classmethod
+    def from_fonts(cls, fonts):
+        """Builds the columns of a font list; snapshot-backed lists are read without decoding fonts."""
+        if isinstance(fonts, LazyFontList):
+            return cls._from_lazy_list(fonts)
+        ids = np.fromiter((f.id for f in fonts), dtype=np.int64, count=len(fonts))
+        codes, dictionaries = {}, {}
+        for field in STRING_FIELDS:
+            codes[field], dictionaries[field] = StringDictionary.encode([getattr(f, field) or "" for f in fonts])
+        return cls(len(fonts), ids, codes, dictionaries, FontMetricsTable.from_fonts(fonts))
+
+    @classmethod
+    def _from_lazy_list(cls, fonts):
+        snapshot = fonts.snapshot
+        ids = np.array(fonts.column('id'), dtype=np.int64)
+        codes, dictionaries = {}, {}
+        if fonts.pristine:
+            # Same rows as the snapshot: file columns and metrics are views on the mapped records
+            shared = StringDictionary(*snapshot.string_buffers())
+            for field in FILE_FIELDS:
+                codes[field], dictionaries[field] = snapshot.records[field], shared
+            metrics = metrics_from_records(snapshot.records)
+        else:
+            for field in FILE_FIELDS:
+                codes[field], dictionaries[field] = StringDictionary.encode(fonts.column(field))
+            metrics = FontMetricsTable.from_fonts(fonts)
+        for field in ORIGIN_FIELDS:
+            codes[field], dictionaries[field] = StringDictionary.encode(fonts.column(field))
+        return cls(len(fonts), ids, codes, dictionaries, metrics)
+
+    def values(self, field, rows=None):
+        """Strings of a column, for all rows or the given ones."""
+        codes = self.codes[field] if rows is None else self.codes[field][rows]
+        return self.dictionaries[field].take(codes)
+
+    def mask_equal(self, field, text):
+        """Boolean mask of the rows whose field equals text."""
+        code = self.dictionaries[field].code_of(text)
+        if code < 0:
+            return np.zeros(self.size, dtype=bool)
+        return self.codes[field] == code
+
+    def mask_contains(self, field, substring):
+        """Boolean mask of the rows whose field contains substring (case-insensitive)."""
+        substring = substring.lower()
+        dictionary = self.dictionaries[field]
+        codes = self.codes[field]
+        matched = np.zeros(len(dictionary), dtype=bool)
+        for code in np.unique(codes).tolist():
+            matched[code] = substring in dictionary[code].lower()
+        return matched[codes]
+
+    def order(self, field, rows=None, descending=False):
+        """
+        Rows sorted by a column (case-insensitive, stable); the distinct values are
+        sorted once and the rows ordered by the rank of their code.
+        """
+        rows = np.arange(self.size, dtype=np.int32) if rows is None else np.asarray(rows)
+        codes = self.codes[field]
+        used = np.unique(codes[rows])
+        dictionary = self.dictionaries[field]
+        rank = np.zeros(len(dictionary), dtype=np.int64)
+        rank[used] = np.argsort(np.argsort([dictionary[code].lower() for code in used.tolist()], kind='stable'))
+        keys = rank[codes[rows]]
+        order = np.argsort(-keys if descending else keys, kind='stable')
+        return rows[order]
+
+    def row_of_id(self, font_id):
+        if self._row_of_id is None:
+            self._row_of_id = {font_id: row for row, font_id in enumerate(self.ids.tolist())}
+        return self._row_of_id.get(font_id)
+
+    def export(self, fields, rows=None):
+        """Column values of the given rows as tuples, in the order of fields ('id' for the ids)."""
+        columns = [(self.ids if rows is None else self.ids[rows]).tolist() if field == 'id'
+                   else self.values(field, rows) for field in fields]
+        return list(zip(*columns))
+
+
+def metrics_from_records(records):
+    """FontMetricsTable of snapshot records (RECORD_DTYPE), by column copies."""
+    table = FontMetricsTable(len(records))
+    mask = records['metric_mask']
+    for bit, (name, dtype) in enumerate(METRIC_COLUMNS.items()):
+        table.columns[name] = records[name].astype(dtype)
+        table.present[name] = (mask & (1 << bit)) != 0
+    table.present['panose'] = records['has_panose'] != 0
+    table.panose = records['panose'].reshape(len(records), len(PANOSE_FIELDS)).copy()
+    return table
+#
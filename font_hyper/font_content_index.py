@@ -0,0 +1,208 @@
+# font_content_index.py
+# for license info (GPL3), see license.txt from font_hyper package
+
+import os
+import hashlib
+import logging
+from collections import defaultdict
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_SIZE = 64 * 1024  # bytes hashed from the start and the end of a file in the first pass
+HASH_CHUNK = 1024 * 1024
+
+
+def sample_digest(file_path, size):
+    """
+    blake2b over the size and the first and last SAMPLE_SIZE bytes of a file.
+    Equal files have equal samples; files up to 2 * SAMPLE_SIZE are hashed completely.
+    """
+    h = hashlib.blake2b(str(size).encode('ascii'), digest_size=16)
+    with open(file_path, 'rb') as f:
+        h.update(f.read(SAMPLE_SIZE))
+        if size > SAMPLE_SIZE:
+            f.seek(max(SAMPLE_SIZE, size - SAMPLE_SIZE))
+            h.update(f.read(SAMPLE_SIZE))
+    return h.hexdigest()
+
+
+def file_digest(file_path):
+    """blake2b over the whole file."""
+    h = hashlib.blake2b(digest_size=32)
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class FileEntry:
+    __slots__ = ('path', 'size', 'mtime', 'inode', 'is_link', 'sample', 'digest')
+
+    def __init__(self, path, st, is_link):
+        self.path = path
+        self.size = st.st_size
+        self.mtime = st.st_mtime_ns
+        self.inode = (st.st_dev, st.st_ino)
+        self.is_link = is_link
+        self.sample = None
+        self.digest = None
+
+
+class ContentIndex:
+    """
+    Identity of font files by content, for duplicate detection.
+
+    Files are recorded with their stat data; hashes are computed only when needed
+    and only for files whose size collides with another file: a sampled digest
+    first, the full blake2b digest when the samples are equal as well. Paths of
+    the same file (hard links, symlinks) share (st_dev, st_ino) and are told apart
+    from copies.
+    """
+    def __init__(self):
+        self.entries = {}  # path -> FileEntry
+        self._by_size = defaultdict(set)  # size -> paths
+        self._by_inode = defaultdict(set)  # (st_dev, st_ino) -> paths
+        self.by_digest = defaultdict(set)  # full digest -> paths, filled as digests are computed
+
+    def __contains__(self, path):
+        return path in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add(self, path, st=None):
+        """Records a file (st: its os.stat result, if known); returns its FileEntry, None if it is gone."""
+        try:
+            st = st or os.stat(path)
+            is_link = os.path.islink(path)
+        except OSError:
+            return None
+        entry = self.entries.get(path)
+        if entry is not None:
+            if entry.size == st.st_size and entry.mtime == st.st_mtime_ns:
+                return entry
+            self.remove(path)
+        entry = FileEntry(path, st, is_link)
+        self.entries[path] = entry
+        self._by_size[entry.size].add(path)
+        self._by_inode[entry.inode].add(path)
+        return entry
+
+    def remove(self, path):
+        entry = self.entries.pop(path, None)
+        if entry is None:
+            return
+        for table, key in ((self._by_size, entry.size), (self._by_inode, entry.inode),
+                           (self.by_digest, entry.digest)):
+            paths = table.get(key)
+            if paths is not None:
+                paths.discard(path)
+                if not paths:
+                    del table[key]
+
+    def clear(self):
+        self.entries.clear()
+        self._by_size.clear()
+        self._by_inode.clear()
+        self.by_digest.clear()
+
+    def same_file(self, path, st):
+        """Other recorded paths of the same file (hard links, symlinks and their targets)."""
+        return sorted(other for other in self._by_inode.get((st.st_dev, st.st_ino), ()) if other != path)
+
+    def _sample(self, entry):
+        if entry.sample is None:
+            entry.sample = sample_digest(entry.path, entry.size)
+        return entry.sample
+
+    def _digest(self, entry):
+        if entry.digest is None:
+            entry.digest = file_digest(entry.path)
+            self.by_digest[entry.digest].add(entry.path)
+        return entry.digest
+
+    def content_key(self, path):
+        """Key equal for files with equal content: the size if it is unique, else the full digest."""
+        entry = self.entries[path]
+        if len({self.entries[p].inode for p in self._by_size[entry.size]}) < 2:
+            return ('size', entry.size)
+        return ('digest', self._digest(entry))
+
+    def duplicate_groups(self, paths=None):
+        """
+        Groups of distinct files (one path per inode) with identical content.
+
+        Args:
+            paths (set): Only consider these paths (e.g. the loaded fonts); all if None
+
+        Returns:
+            list: (digest, size, [paths]) per group, largest wasted space first
+        """
+        groups = []
+        for size, same_size in self._by_size.items():
+            candidates = {}
+            for path in sorted(same_size):
+                if paths is None or path in paths:
+                    candidates.setdefault(self.entries[path].inode, path)
+            if len(candidates) < 2:
+                continue
+            by_sample = defaultdict(list)
+            for path in candidates.values():
+                try:
+                    by_sample[self._sample(self.entries[path])].append(path)
+                except OSError as e:
+                    logger.warning(f"Cannot hash {path}: {e}")
+            for sampled in by_sample.values():
+                if len(sampled) < 2:
+                    continue
+                by_digest = defaultdict(list)
+                for path in sampled:
+                    try:
+                        by_digest[self._digest(self.entries[path])].append(path)
+                    except OSError as e:
+                        logger.warning(f"Cannot hash {path}: {e}")
+                groups.extend((digest, size, group) for digest, group in by_digest.items() if len(group) > 1)
+        groups.sort(key=lambda group: group[1] * (len(group[2]) - 1), reverse=True)
+        return groups
+
+    def name_conflicts(self, paths=None):
+        """
+        File names (case-insensitive) used by files with different content.
+
+        Returns:
+            dict: lowercase file name -> [paths], sorted by name
+        """
+        by_name = defaultdict(list)
+        for path, entry in self.entries.items():
+            if paths is None or path in paths:
+                by_name[os.path.basename(path).lower()].append(path)
+        conflicts = {}
+        for name, same_name in by_name.items():
+            if len(same_name) < 2:
+                continue
+            keys = set()
+            for path in same_name:
+                try:
+                    keys.add(self.content_key(path))
+                except OSError as e:
+                    logger.warning(f"Cannot hash {path}: {e}")
+            if len(keys) > 1:
+                conflicts[name] = sorted(same_name)
+        return dict(sorted(conflicts.items()))
+
+    def link_groups(self):
+        """
+        Paths that are the same file.
+
+        Returns:
+            list: (kind, [paths]) per file with several paths; kind is 'hardlink', 'symlink'
+                  or 'hardlink+symlink'
+        """
+        groups = []
+        for paths in self._by_inode.values():
+            if len(paths) > 1:
+                links = sum(1 for p in paths if self.entries[p].is_link)
+                kinds = (['hardlink'] if len(paths) - links > 1 else []) + (['symlink'] if links else [])
+                groups.append(("+".join(kinds), sorted(paths)))
+        return sorted(groups, key=lambda group: group[1])
+#
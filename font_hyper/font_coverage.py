@@ -0,0 +1,198 @@
+# font_coverage.py
+# for license info (GPL3), see license.txt from font_hyper package
+
+import io
+import os
+import logging
+from array import array
+import numpy as np
+
+from .glyph_signatures import font_file_stamp
+
+logger = logging.getLogger(__name__)
+
+# Codepoints take 21 bits; lookup keys are (cache row << CODEPOINT_BITS) | codepoint
+CODEPOINT_BITS = 21
+
+
+def font_coverage(font_path):
+    """
+    The codepoints a font has glyphs for, as sorted, disjoint inclusive ranges
+    (starts, ends); read from the cmap with the sfnt reader, through freetype for
+    other formats. Empty lists if the font can't be read.
+    """
+    from .sfnt_reader import SfntFont, SfntError, merge_ranges
+    try:
+        coverage = SfntFont.open(font_path).coverage()
+        if coverage is not None:
+            return coverage
+    except SfntError:
+        pass
+    try:
+        from .font_info import open_freetype_face
+        face = open_freetype_face(font_path)
+        return merge_ranges((code, code) for code, glyph in face.get_chars() if glyph)
+    except Exception as e:
+        logger.debug(f"Cannot read the character coverage of {font_path}: {e}")
+        return [], []
+
+
+class CoverageCache:
+    """
+    Unicode coverage of fonts for `covers:` queries, kept across sessions: each font
+    file's cmap is read once (see font_coverage()) and stored as codepoint ranges with
+    the size and mtime of the file, in flat arrays. Lookups for many fonts are
+    vectorized binary searches over all ranges, so a query never opens a font whose
+    coverage is known. A cached font is checked against its file once per session.
+    """
+    def __init__(self):
+        self.paths = []  # row -> font path
+        self._rows = {}  # font path -> current row (replaced fonts leave unused rows until saved)
+        self._stamps = []  # row -> (size, mtime_ns)
+        self._offsets = array('q', [0])  # row -> first range; row + 1 -> end of its ranges
+        self._starts = array('I')
+        self._ends = array('I')
+        self._verified = set()  # font paths whose stamp was checked this session
+        self._lookup = None  # (keys, ends, row of each range) as NumPy arrays, rebuilt after additions
+        self.dirty = False
+
+    def __len__(self):
+        return len(self._rows)
+
+    def _add(self, font_path, stamp, starts, ends):
+        row = len(self.paths)
+        self.paths.append(font_path)
+        self._stamps.append(stamp)
+        self._starts.extend(starts)
+        self._ends.extend(ends)
+        self._offsets.append(len(self._starts))
+        self._rows[font_path] = row
+        self._lookup = None
+        self.dirty = True
+        return row
+
+    def put(self, font_path, starts, ends):
+        """Stores coverage known without reading the font (fontconfig charsets), unless it is cached already."""
+        if font_path in self._verified:
+            return
+        stamp = font_file_stamp(font_path)
+        if stamp is None:
+            return
+        row = self._rows.get(font_path)
+        if row is None or self._stamps[row] != stamp:
+            from .sfnt_reader import merge_ranges
+            self._add(font_path, stamp, *merge_ranges(zip(starts, ends)))
+        self._verified.add(font_path)
+
+    def rows(self, font_paths):
+        """
+        Cache rows of fonts, reading the coverage of the ones not cached yet or whose
+        file changed; fonts whose file is gone get -1.
+
+        Returns:
+            np.ndarray: int64 row per font path
+        """
+        rows = np.empty(len(font_paths), dtype=np.int64)
+        added = 0
+        for i, font_path in enumerate(font_paths):
+            row = self._rows.get(font_path)
+            if row is not None and font_path in self._verified:
+                rows[i] = row
+                continue
+            stamp = font_file_stamp(font_path)
+            if stamp is None:
+                rows[i] = -1
+                continue
+            if row is None or self._stamps[row] != stamp:
+                row = self._add(font_path, stamp, *font_coverage(font_path))
+                added += 1
+            self._verified.add(font_path)
+            rows[i] = row
+        if added:
+            logger.info(f"Read the character coverage of {added} fonts ({len(self)} cached)")
+        return rows
+
+    def _get_lookup(self):
+        if self._lookup is None:
+            counts = np.diff(np.frombuffer(self._offsets, dtype=np.int64))
+            range_rows = np.repeat(np.arange(len(counts), dtype=np.int64), counts)
+            starts = np.frombuffer(self._starts, dtype=np.uint32).astype(np.int64)
+            # Rows are appended with sorted ranges, so the keys are sorted
+            self._lookup = ((range_rows << CODEPOINT_BITS) | starts,
+                            np.frombuffer(self._ends, dtype=np.uint32).astype(np.int64), range_rows)
+        return self._lookup
+
+    def covers(self, rows, chars):
+        """
+        Boolean mask: True where the font of a cache row (see rows()) has glyphs for all chars.
+
+        Args:
+            rows (np.ndarray): Cache rows, -1 for fonts that are never covered
+            chars (str): Characters
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        result = rows >= 0
+        if not chars or not result.any():
+            return result
+        keys, ends, range_rows = self._get_lookup()
+        if len(keys) == 0:
+            return np.zeros(len(rows), dtype=bool)
+        for char in chars:
+            codepoint = ord(char)
+            found = np.searchsorted(keys, (rows << CODEPOINT_BITS) | codepoint, side='right') - 1
+            valid = found >= 0
+            found = np.maximum(found, 0)
+            result &= valid & (range_rows[found] == rows) & (ends[found] >= codepoint)
+        return result
+
+    def save(self, file_path):
+        """Saves the current rows to a .npz file, atomically; unused rows are left out."""
+        from .utils import atomic_write
+        try:
+            current = sorted(self._rows.values())
+            offsets = np.frombuffer(self._offsets, dtype=np.int64)
+            starts = np.frombuffer(self._starts, dtype=np.uint32)
+            ends = np.frombuffer(self._ends, dtype=np.uint32)
+            ranges = [np.arange(offsets[row], offsets[row + 1]) for row in current]
+            taken = np.concatenate(ranges) if ranges else np.zeros(0, dtype=np.int64)
+            counts = np.array([offsets[row + 1] - offsets[row] for row in current], dtype=np.int64)
+            buffer = io.BytesIO()
+            np.savez(buffer,
+                     paths=np.array([self.paths[row] for row in current], dtype=str),
+                     stamps=np.array([self._stamps[row] for row in current], dtype=np.int64).reshape(-1, 2),
+                     counts=counts,
+                     starts=starts[taken],
+                     ends=ends[taken])
+            atomic_write(file_path, buffer.getvalue())
+            self.dirty = False
+            return True
+        except Exception as e:
+            logger.error(f"Error saving character coverage cache: {e}")
+            return False
+
+    def load(self, file_path):
+        """Loads the cache written by save(); the stamps are checked when the fonts are first looked up."""
+        try:
+            if not os.path.exists(file_path):
+                return False
+            with np.load(file_path) as data:
+                paths = data['paths'].tolist()
+                stamps = [tuple(stamp) for stamp in data['stamps'].tolist()]
+                counts = data['counts'].astype(np.int64)
+                starts = data['starts'].astype(np.uint32)
+                ends = data['ends'].astype(np.uint32)
+            if len(paths) != len(stamps) or len(paths) != len(counts) or int(counts.sum()) != len(starts):
+                raise ValueError("inconsistent arrays")
+            self.__init__()
+            self.paths = paths
+            self._stamps = stamps
+            self._rows = {path: row for row, path in enumerate(paths)}
+            self._offsets = array('q', [0])
+            self._offsets.extend(np.cumsum(counts).tolist())
+            self._starts = array('I', starts.tobytes())
+            self._ends = array('I', ends.tobytes())
+            return True
+        except Exception as e:
+            logger.error(f"Error loading character coverage cache: {e}")
+            return False
+#
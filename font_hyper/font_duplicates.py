@@ -0,0 +1,228 @@
+# font_duplicates.py
+# for license info (GPL3), see license.txt from font_hyper package
+
+import re
+import logging
+from collections import Counter, defaultdict
+import numpy as np
+
+from .font_file_access import open_reader
+from .font_info import COLLECTION_EXTENSIONS, split_font_key
+from .glyph_signatures import compute_glyph_signature, font_file_stamp
+from .sfnt_reader import SfntFont, SfntError
+
+logger = logging.getLogger(__name__)
+
+# Near-duplicates must render alike: largest RMS difference of their glyph signatures, per pixel (0..255)
+NEAR_DUPLICATE_MAX_DISTANCE = 0.08 * 255
+# Family names of fonts freetype could not read; they say nothing about the design
+UNKNOWN_FAMILIES = {"", "unknown"}
+
+_VERSION_NUMBER = re.compile(r'\d+(?:\.\d+)*')
+
+
+def read_font_version(font_path):
+    """
+    Version of a font: the number in its name table version string (name ID 5),
+    head.fontRevision if there is none; "" if the font can't be read.
+    """
+    try:
+        sfnt = SfntFont.open(font_path)
+        version, revision = sfnt.name(5), sfnt.font_revision()
+    except SfntError as e:
+        logger.debug(f"sfnt reader failed on {font_path}, using fontTools: {e}")
+        version, revision = _read_version_fonttools(font_path)
+    if version:
+        match = _VERSION_NUMBER.search(version)
+        return match.group(0) if match else version.strip()
+    return f"{revision:.3f}" if revision is not None else ""
+
+
+def _read_version_fonttools(font_path):
+    """(name ID 5, head.fontRevision) read with fontTools, (None, None) if the font can't be read."""
+    try:
+        from fontTools.ttLib import TTFont
+        file_path, face_index = split_font_key(font_path)
+        font = TTFont(open_reader(file_path), lazy=True, fontNumber=face_index)
+        version = font['name'].getDebugName(5) if 'name' in font else None
+        return version, (font['head'].fontRevision if 'head' in font else None)
+    except Exception as e:
+        logger.debug(f"Could not read the version of {font_path}: {e}")
+    return None, None
+
+
+def signature_distance(a, b):
+    """RMS difference of two glyph signatures, per pixel."""
+    diff = a.astype(np.float32) - b.astype(np.float32)
+    return float(np.sqrt(np.mean(diff * diff)))
+
+
+class DuplicateGroup:
+    """
+    Font files that are copies of each other: identical files (KIND_EXACT) or the
+    same family, style and version in different files (KIND_NEAR).
+    keep is the path that stays, the others are resolved by FontManager.resolve_duplicates().
+    """
+    KIND_EXACT = "exact"
+    KIND_NEAR = "near"
+
+    def __init__(self, kind, label, font_paths, sizes, distances=None, keep=None):
+        self.kind = kind
+        self.label = label
+        self.font_paths = list(font_paths)
+        self.sizes = sizes  # font path -> file size in bytes
+        # Glyph signature distance of each path to the first one, None where no signature exists
+        self.distances = list(distances) if distances is not None else [None] * len(self.font_paths)
+        self.keep = keep or self.font_paths[0]
+        self.accepted = False
+
+    @property
+    def duplicate_paths(self):
+        return [path for path in self.font_paths if path != self.keep]
+
+    @property
+    def wasted_bytes(self):
+        """Disk space used by the copies that are not kept."""
+        return sum(self.sizes.get(path, 0) for path in self.duplicate_paths)
+
+
+class DuplicateFinder:
+    """
+    Groups the loaded fonts of a FontManager into exact and near-duplicates.
+
+    Exact duplicates come from the content index (files grouped by size, then by
+    sampled and full digest). Near-duplicate candidates are rows with equal
+    (case-folded) family and style codes in the font columns, found with one
+    np.unique over the integer keys; only these candidates have their version read
+    from the name table and their glyph signatures compared, so the cost stays
+    close to linear in the number of fonts.
+    """
+    def __init__(self, font_manager, signatures=None, max_distance=NEAR_DUPLICATE_MAX_DISTANCE):
+        self.font_manager = font_manager
+        self.signatures = signatures if signatures is not None else font_manager.glyph_signatures
+        self.max_distance = max_distance
+        self.groups = []
+        self._columns = None
+        self._row_of_path = None
+        self._references = None  # font path -> number of categories it is in
+
+    def run(self):
+        """Computes self.groups, the groups with the most wasted space first."""
+        fm = self.font_manager
+        fm.index_font_files()
+        self._columns = fm.get_columns()
+        self._row_of_path = {path: row for row, path in enumerate(self._columns.values('font_path'))}
+        self._references = Counter(path for category in fm.categories.values() for path in category.fonts_list)
+        self.groups = self._exact_groups() + self._near_groups()
+        self.groups.sort(key=lambda group: group.wasted_bytes, reverse=True)
+        logger.info(f"Found {len(self.groups)} duplicate groups, "
+                    f"{sum(group.wasted_bytes for group in self.groups)} bytes in copies")
+        return self.groups
+
+    def _label(self, font_path):
+        row = self._row_of_path[font_path]
+        name, style = self._columns.values('font_name', [row])[0], self._columns.values('font_style', [row])[0]
+        return f"{name} {style}"
+
+    def _default_keep(self, font_paths):
+        """The path in most categories, the shortest path among equals."""
+        return min(font_paths, key=lambda path: (-self._references[path], len(path), path))
+
+    def _sizes(self, font_paths):
+        entries = self.font_manager.content_index.entries
+        return {path: entries[path].size for path in font_paths if path in entries}
+
+    def _exact_groups(self):
+        groups = []
+        for _, size, paths in self.font_manager.content_index.duplicate_groups(self.font_manager._font_paths_set):
+            groups.append(DuplicateGroup(DuplicateGroup.KIND_EXACT, self._label(paths[0]), paths,
+                                         {path: size for path in paths}, keep=self._default_keep(paths)))
+        return groups
+
+    def _folded_codes(self, field):
+        """Codes of a string column, with values that are equal when case-folded sharing one code."""
+        dictionary = self._columns.dictionaries[field]
+        folded = {}
+        mapping = np.fromiter((folded.setdefault(text.casefold().strip(), len(folded)) for text in dictionary.values()),
+                              dtype=np.int64, count=len(dictionary))
+        unknown = [folded[text] for text in UNKNOWN_FAMILIES if text in folded]
+        return mapping[self._columns.codes[field]], len(folded), unknown
+
+    def _candidate_buckets(self):
+        """Row lists of fonts sharing family and style, one list per (family, style) with at least two fonts."""
+        families, _, unknown = self._folded_codes('font_name')
+        styles, style_count, _ = self._folded_codes('font_style')
+        keys = families * style_count + styles
+        valid = ~np.isin(families, unknown)
+        rows = np.flatnonzero(valid)
+        if rows.size < 2:
+            return []
+        _, inverse, counts = np.unique(keys[rows], return_inverse=True, return_counts=True)
+        shared = counts[inverse] > 1
+        rows, inverse = rows[shared], inverse[shared]
+        order = np.argsort(inverse, kind='stable')
+        rows, inverse = rows[order], inverse[order]
+        bounds = np.flatnonzero(np.diff(inverse)) + 1
+        return [bucket.tolist() for bucket in np.split(rows, bounds)] if rows.size else []
+
+    def _signature(self, font_path):
+        stamp = font_file_stamp(font_path)
+        if self.signatures.is_current(font_path, stamp):
+            return self.signatures.get(font_path)
+        signature = compute_glyph_signature(font_path, self.signatures.chars, self.signatures.cell)
+        if signature is not None:
+            self.signatures.add(font_path, signature, stamp)
+        return signature
+
+    def _near_groups(self):
+        content_index = self.font_manager.content_index
+        paths = self._columns.codes['font_path']
+        path_values = self._columns.dictionaries['font_path']
+        groups = []
+        for bucket in self._candidate_buckets():
+            by_version = defaultdict(lambda: defaultdict(list))  # version -> content key -> paths
+            for row in bucket:
+                font_path = path_values[int(paths[row])]
+                # Collections are only compared as whole files (exact duplicates)
+                if font_path not in content_index or font_path.lower().endswith(COLLECTION_EXTENSIONS):
+                    continue
+                try:
+                    content = content_index.content_key(font_path)
+                except OSError as e:
+                    logger.warning(f"Cannot hash {font_path}: {e}")
+                    continue
+                by_version[read_font_version(font_path)][content].append(font_path)
+            for version, variants in by_version.items():
+                # Identical files are reported as exact duplicates; the copy kept there represents them here
+                if len(variants) > 1:
+                    representatives = sorted(self._default_keep(same) for same in variants.values())
+                    groups.extend(self._split_by_glyphs(representatives, version))
+        return groups
+
+    def _split_by_glyphs(self, font_paths, version):
+        """Splits fonts of equal names into groups that also render alike."""
+        signatures = {path: self._signature(path) for path in font_paths}
+        groups = []
+        remaining = font_paths
+        while len(remaining) > 1:
+            reference = signatures[remaining[0]]
+            members, distances, rest = [remaining[0]], [0.0 if reference is not None else None], []
+            for path in remaining[1:]:
+                if reference is None or signatures[path] is None:
+                    # Nothing to compare with: the name table match decides
+                    members.append(path)
+                    distances.append(None)
+                    continue
+                distance = signature_distance(reference, signatures[path])
+                if distance <= self.max_distance:
+                    members.append(path)
+                    distances.append(distance)
+                else:
+                    rest.append(path)
+            if len(members) > 1:
+                label = self._label(members[0]) + (f" {version}" if version else "")
+                groups.append(DuplicateGroup(DuplicateGroup.KIND_NEAR, label, members, self._sizes(members),
+                                             distances, keep=self._default_keep(members)))
+            remaining = rest
+        return groups
+#
@@ -0,0 +1,191 @@
+# font_file_access.py
+# for license info (GPL3), see license.txt from font_hyper package
+
+import io
+import os
+import mmap
+import struct
+import ctypes
+import logging
+import threading
+from collections import OrderedDict
+import freetype
+
+from .font_archives import is_archive_path, member_cache, font_source
+
+logger = logging.getLogger(__name__)
+
+# Font files kept mapped at a time, see FontFileMaps
+MAX_MAPPED_FILES = 256
+
+SFNT_HEADER = struct.Struct('>IHHHH')  # sfntVersion, numTables, searchRange, entrySelector, rangeShift
+TABLE_RECORD = struct.Struct('>4sIII')  # tag, checksum, offset, length
+TTC_HEADER = struct.Struct('>4sHHI')  # 'ttcf', major version, minor version, numFonts
+
+
+class FontFileMaps:
+    """
+    Font files mapped into memory once and shared by everything that reads them:
+    table parsing (fontTools over a MappedReader, struct), freetype faces and the
+    renderer. Pages come from the OS page cache, so a file read by several faces,
+    threads or processes is held in memory once and only the pages actually
+    touched are loaded. Mappings are copy-on-write (freetype wants a writable
+    buffer, but never writes), validated by size and mtime, and the least recently
+    used one is dropped beyond max_files; a mapping lives on while faces use it.
+    """
+    def __init__(self, max_files=MAX_MAPPED_FILES):
+        self.max_files = max_files
+        self._maps = OrderedDict()  # file path -> (size, mtime_ns, mmap)
+        self._lock = threading.Lock()
+
+    def get(self, file_path):
+        """The mapping of a font file; raises OSError (or ValueError for empty files) if it can't be mapped."""
+        st = os.stat(file_path)
+        with self._lock:
+            cached = self._maps.get(file_path)
+            if cached is not None and cached[:2] == (st.st_size, st.st_mtime_ns):
+                self._maps.move_to_end(file_path)
+                return cached[2]
+        with open(file_path, 'rb') as f:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        with self._lock:
+            self._maps[file_path] = (st.st_size, st.st_mtime_ns, mapping)
+            self._maps.move_to_end(file_path)
+            while len(self._maps) > self.max_files:
+                self._maps.popitem(last=False)
+        return mapping
+
+    def discard(self, file_path):
+        with self._lock:
+            self._maps.pop(file_path, None)
+
+    def clear(self):
+        with self._lock:
+            self._maps.clear()
+
+
+# Shared by the scanner, the renderer and the other readers of font files
+file_maps = FontFileMaps()
+
+
+class MappedReader(io.RawIOBase):
+    """Read-only file object over a buffer with its own position, so fontTools can share one mapping."""
+    def __init__(self, buffer, name=""):
+        super().__init__()
+        self._buffer = memoryview(buffer)
+        self._position = 0
+        self.name = name
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, target):
+        start = min(self._position, len(self._buffer))
+        end = min(start + len(target), len(self._buffer))
+        target[:end - start] = self._buffer[start:end]
+        self._position = end
+        return end - start
+
+    def read(self, size=-1):
+        start = min(self._position, len(self._buffer))
+        end = len(self._buffer) if size is None or size < 0 else min(start + size, len(self._buffer))
+        self._position = end
+        return self._buffer[start:end].tobytes()
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._position, io.SEEK_END: len(self._buffer)}[whence]
+        self._position = max(0, base + offset)
+        return self._position
+
+    def tell(self):
+        return self._position
+
+    def close(self):
+        # The buffer belongs to FontFileMaps; only the view is released
+        if not self.closed:
+            self._buffer.release()
+        super().close()
+
+
+def font_buffer(file_path):
+    """Content of a font file as a buffer: the shared mapping, or the cached bytes of an archive member."""
+    if is_archive_path(file_path):
+        return member_cache.get(file_path)
+    return file_maps.get(file_path)
+
+
+def open_reader(file_path):
+    """A file object over the content of a font file, for fontTools TTFont and TTCollection."""
+    try:
+        return MappedReader(font_buffer(file_path), file_path)
+    except (OSError, ValueError) as e:
+        logger.debug(f"Cannot map {file_path}, reading it as a file: {e}")
+        return font_source(file_path)
+
+
+class MappedFace(freetype.Face):
+    """freetype face created with FT_New_Memory_Face over a mapped font file, without copying it."""
+    def __init__(self, mapping, index=0):
+        # Same set-up as freetype.Face.__init__, with the mapping as the memory block
+        library = freetype.get_handle()
+        face = freetype.FT_Face()
+        self._FT_Face = None
+        self._filebodys = []
+        buffer = (ctypes.c_ubyte * len(mapping)).from_buffer(mapping)
+        error = self._init_from_memory(library, face, index, buffer)  # keeps buffer (and mapping) alive
+        if error:
+            raise freetype.FT_Exception(error)
+        self._index = index
+        self._FT_Face = face
+        self._name_strings = dict()
+
+
+def open_face(file_path, face_index=0):
+    """
+    freetype face of a font file: over the shared mapping for files on disk, from
+    the cached bytes for archive members; opened by path if the file can't be mapped.
+    """
+    if is_archive_path(file_path):
+        return freetype.Face(font_source(file_path), face_index)
+    try:
+        return MappedFace(file_maps.get(file_path), face_index)
+    except (OSError, ValueError, TypeError, AttributeError) as e:
+        logger.debug(f"Cannot open {file_path} from its mapping: {e}")
+        return freetype.Face(file_path, face_index)
+
+
+def read_table_directory(buffer, face_index=0):
+    """
+    Table directory of a face of an sfnt (TrueType/OpenType) or collection buffer.
+
+    Returns:
+        dict: table tag (str) -> (offset, length); raises ValueError for malformed data
+    """
+    try:
+        offset = 0
+        if bytes(buffer[:4]) == b'ttcf':
+            _, _, _, num_fonts = TTC_HEADER.unpack_from(buffer, 0)
+            if not 0 <= face_index < num_fonts:
+                raise ValueError(f"face {face_index} not in a collection of {num_fonts}")
+            offset = struct.unpack_from('>I', buffer, TTC_HEADER.size + 4 * face_index)[0]
+        _, num_tables, _, _, _ = SFNT_HEADER.unpack_from(buffer, offset)
+        tables = {}
+        for i in range(num_tables):
+            tag, _, table_offset, length = TABLE_RECORD.unpack_from(buffer, offset + SFNT_HEADER.size + i * TABLE_RECORD.size)
+            if table_offset + length > len(buffer):
+                raise ValueError(f"table {tag!r} exceeds the file")
+            tables[tag.decode('latin-1')] = (table_offset, length)
+    except struct.error as e:
+        raise ValueError(f"malformed table directory: {e}") from e
+    return tables
+
+
+def face_count(buffer):
+    """Number of faces of an sfnt or collection buffer."""
+    if bytes(buffer[:4]) == b'ttcf':
+        return TTC_HEADER.unpack_from(buffer, 0)[3]
+    return 1
+#
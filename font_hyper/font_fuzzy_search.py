@@ -0,0 +1,242 @@
+# font_fuzzy_search.py
+# for license info (GPL3), see license.txt from font_hyper package
+
+import logging
+import numpy as np
+
+from .font_search_index import trigrams
+
+logger = logging.getLogger(__name__)
+
+# Highlight markers around matched characters in the Match column
+HIGHLIGHT_OPEN = "["
+HIGHLIGHT_CLOSE = "]"
+# Extra score for a match that does not start at the beginning of a word
+INFIX_PENALTY = 0.3
+# Above this many candidate names the trigram threshold of a token is raised step by step
+MAX_CANDIDATES = 2000
+
+
+def max_typos(token):
+    """Number of edits tolerated for a query token."""
+    if len(token) <= 3:
+        return 0
+    if len(token) <= 6:
+        return 1
+    return 2
+
+
+def fuzzy_find(pattern, text, max_distance):
+    """
+    Best approximate occurrence of pattern anywhere in text.
+
+    Sellers' algorithm with Ukkonen's cutoff: only the rows of the DP column that
+    can still be within max_distance are computed, so the cost is O(k * len(text)).
+
+    Returns:
+        tuple: (distance, end) of the best occurrence (first one on ties), or None
+               if every occurrence needs more than max_distance edits
+    """
+    m = len(pattern)
+    if m == 0:
+        return 0, 0
+    k = max_distance
+    col = list(range(m + 1))
+    last = min(k, m)  # deepest row of the column that is <= k
+    best = (col[m], 0) if last == m else None
+
+    for j, ch in enumerate(text, 1):
+        diag = 0  # D[i-1][j-1]
+        up = 0    # D[i-1][j]; row 0 is always 0, any text position may start a match
+        for i in range(1, min(last + 1, m) + 1):
+            left = col[i]
+            value = diag + (pattern[i - 1] != ch)
+            if left + 1 < value:
+                value = left + 1
+            if up + 1 < value:
+                value = up + 1
+            col[i] = value
+            diag = left
+            up = value
+        last = min(last + 1, m)
+        while last > 0 and col[last] > k:
+            last -= 1
+        if last == m and (best is None or col[m] < best[0]):
+            best = (col[m], j)
+            if best[0] == 0:
+                break
+    return best
+
+
+def match_positions(pattern, text, end, max_distance):
+    """
+    Positions in text aligned to equal characters of pattern for an occurrence ending at end.
+
+    Runs a full DP on a small window before end and backtracks it.
+
+    Returns:
+        tuple: (start of the occurrence, list of matched text positions)
+    """
+    m = len(pattern)
+    offset = max(0, end - m - max_distance)
+    window = text[offset:end]
+    n = len(window)
+    dp = [[0] * (n + 1) for _ in range(m + 1)]
+    for i in range(1, m + 1):
+        dp[i][0] = i
+        for j in range(1, n + 1):
+            dp[i][j] = min(dp[i - 1][j - 1] + (pattern[i - 1] != window[j - 1]),
+                           dp[i - 1][j] + 1, dp[i][j - 1] + 1)
+
+    positions = []
+    i, j = m, n
+    while i > 0 and j > 0:
+        if dp[i][j] == dp[i - 1][j - 1] + (pattern[i - 1] != window[j - 1]):
+            if pattern[i - 1] == window[j - 1]:
+                positions.append(offset + j - 1)
+            i -= 1
+            j -= 1
+        elif dp[i][j] == dp[i - 1][j] + 1:
+            i -= 1
+        else:
+            j -= 1
+    positions.reverse()
+    return offset + j, positions
+
+
+def highlight(text, positions):
+    """Wraps runs of the given character positions of text in highlight markers."""
+    marked = set(positions)
+    parts = []
+    inside = False
+    for i, ch in enumerate(text):
+        if (i in marked) != inside:
+            parts.append(HIGHLIGHT_OPEN if not inside else HIGHLIGHT_CLOSE)
+            inside = not inside
+        parts.append(ch)
+    if inside:
+        parts.append(HIGHLIGHT_CLOSE)
+    return "".join(parts)
+
+
+class FuzzyNameSearch:
+    """
+    Typo tolerant, ranked search over font names of a FontSearchIndex.
+
+    Candidates come from the 'name' trigram index: a distinct name is only looked
+    at if it shares enough trigrams with every query token (q-gram lemma, at least
+    one). The bounded edit distance is then computed for the candidates only, so
+    ranking cost grows with the number of candidates, not with the catalog.
+    """
+    def __init__(self, search_index):
+        self.index = search_index
+        self.names = search_index.trigram_index('name')
+
+    def candidate_values(self, token):
+        """Ids of the distinct lowercase names that may contain token within its typo budget."""
+        names = self.names
+        if len(token) < 3:
+            return names.matching_values(token)
+        token_trigrams = trigrams(token)
+        postings = [names.posting(t) for t in token_trigrams]
+        postings = [p for p in postings if len(p)]
+        if not postings:
+            return np.zeros(0, dtype=np.int32)
+        values, counts = np.unique(np.concatenate(postings), return_counts=True)
+        # Every edit destroys at most 3 trigrams of the token
+        required = max(1, len(token_trigrams) - 3 * max_typos(token))
+        candidates = values[counts >= required]
+        # Loose thresholds of long tokens can select most of the catalog; names sharing
+        # only a single trigram are poor matches anyway, so keep the better ones
+        while len(candidates) > MAX_CANDIDATES and required < len(token_trigrams):
+            required += 1
+            candidates = values[counts >= required]
+        return candidates
+
+    @staticmethod
+    def exact_start(token, name):
+        """Start of an exact occurrence of token in name, preferring word starts; -1 if there is none."""
+        start = name.find(token)
+        first = start
+        while start > 0 and name[start - 1].isalnum():
+            start = name.find(token, start + 1)
+        return start if start >= 0 else first
+
+    def score_value(self, value, tokens):
+        """
+        Score of one distinct name for all tokens (lower is better) or None if a token does not match.
+
+        Returns:
+            tuple: (score, matched character positions)
+        """
+        name = self.names.values[value]
+        score = 0.0
+        positions = []
+        for token in tokens:
+            start = self.exact_start(token, name)
+            if start >= 0:
+                # Exact occurrence, no edit distance needed
+                distance = 0
+                matched = range(start, start + len(token))
+            else:
+                budget = max_typos(token)
+                found = fuzzy_find(token, name, budget)
+                if found is None:
+                    return None
+                distance, end = found
+                start, matched = match_positions(token, name, end, budget)
+            score += distance
+            if start > 0 and name[start - 1].isalnum():
+                score += INFIX_PENALTY
+            positions.extend(matched)
+        if name == " ".join(tokens):
+            score -= 1.0
+        # Shorter names first among equally good matches
+        score += len(name) / 1000.0
+        return score, positions
+
+    def search(self, query, rows=None):
+        """
+        Ranks fonts by how well their names match the query.
+
+        Args:
+            query (str): Words to look for, typos allowed
+            rows (np.ndarray): Optional rows to restrict the result to (e.g. of other query terms)
+
+        Returns:
+            tuple: (rows ordered by relevance, dict row -> name with highlighted matches)
+        """
+        tokens = query.lower().split()
+        if not tokens:
+            rows = self.index.all_rows() if rows is None else rows
+            return rows, {}
+
+        candidates = None
+        for token in sorted(tokens, key=len, reverse=True):
+            values = self.candidate_values(token)
+            candidates = values if candidates is None else np.intersect1d(candidates, values, assume_unique=True)
+            if len(candidates) == 0:
+                break
+
+        value_scores = np.full(len(self.names.values), np.inf, dtype=np.float64)
+        value_positions = {}
+        for value in candidates:
+            result = self.score_value(value, tokens)
+            if result is not None:
+                value_scores[value], value_positions[value] = result
+        logger.debug(f"Fuzzy search for {tokens}: {len(candidates)} candidate names, "
+                     f"{len(value_positions)} matches")
+
+        value_of_row = self.names.value_of_row
+        if rows is None:
+            rows = np.flatnonzero(np.isfinite(value_scores[value_of_row])).astype(np.int32)
+        else:
+            rows = rows[np.isfinite(value_scores[value_of_row[rows]])]
+        rows = rows[np.argsort(value_scores[value_of_row[rows]], kind='stable')]
+
+        highlights = {}
+        for row in rows.tolist():
+            # Positions were found on the lowercase name, the original has the same length
+            highlights[row] = highlight(self.index.value('font_name', row), value_positions[value_of_row[row]])
+        return rows, highlights
+#
@@ -0,0 +1,258 @@
+# font_identify.py
+# for license info (GPL3), see license.txt from font_hyper package
+
+import logging
+from collections import OrderedDict
+import numpy as np
+import freetype
+from PIL import Image
+
+from .font_info import open_freetype_face
+from .glyph_signatures import fit_bitmap_to_cell
+
+logger = logging.getLogger(__name__)
+
+# Fonts scored per block in the coarse stage
+COARSE_CHUNK_SIZE = 4096
+# Edge length used for the pixel-level comparison of a glyph
+REFINE_CELL = 32
+
+
+def load_ink_image(image_path):
+    """
+    Loads an image as a binary ink mask (True = ink).
+    Dark text on light background and light text on dark background are both handled.
+    """
+    image = Image.open(image_path).convert('L')
+    gray = np.asarray(image, dtype=np.uint8)
+
+    # Otsu threshold
+    histogram = np.bincount(gray.ravel(), minlength=256).astype(np.float64)
+    total = gray.size
+    cumulative = np.cumsum(histogram)
+    cumulative_mean = np.cumsum(histogram * np.arange(256))
+    global_mean = cumulative_mean[-1] / total
+    with np.errstate(divide='ignore', invalid='ignore'):
+        between = (global_mean * cumulative - cumulative_mean) ** 2 / (cumulative * (total - cumulative))
+    threshold = int(np.nanargmax(between))
+
+    ink = gray <= threshold
+    # The background is the majority of pixels
+    if ink.mean() > 0.5:
+        ink = ~ink
+    return ink
+
+
+def segment_glyphs(ink, min_pixels=4):
+    """
+    Splits the main text line of an ink mask into glyphs by column projection.
+
+    Args:
+        ink (np.ndarray): Boolean ink mask
+        min_pixels (int): Glyphs with fewer ink pixels are treated as noise
+
+    Returns:
+        list: (bitmap, (left, top, right, bottom)) tuples, left to right; bitmaps are uint8 0/255
+    """
+    rows = ink.any(axis=1)
+    if not rows.any():
+        return []
+
+    # Pick the row band with the most ink as the text line
+    bands = []
+    start = None
+    for y, has_ink in enumerate(np.append(rows, False)):
+        if has_ink and start is None:
+            start = y
+        elif not has_ink and start is not None:
+            bands.append((start, y))
+            start = None
+    top, bottom = max(bands, key=lambda band: ink[band[0]:band[1]].sum())
+    line = ink[top:bottom]
+
+    glyphs = []
+    cols = line.any(axis=0)
+    start = None
+    for x, has_ink in enumerate(np.append(cols, False)):
+        if has_ink and start is None:
+            start = x
+        elif not has_ink and start is not None:
+            part = line[:, start:x]
+            if part.sum() >= min_pixels:
+                ys = np.flatnonzero(part.any(axis=1))
+                bitmap = part[ys[0]:ys[-1] + 1].astype(np.uint8) * 255
+                glyphs.append((bitmap, (start, top + ys[0], x, top + ys[-1] + 1)))
+            start = None
+    return glyphs
+
+
+def _resize_mask(bitmap, size):
+    """Resizes a uint8 bitmap to (width, height) and returns it as float32 in 0..1."""
+    image = Image.fromarray(bitmap, 'L').resize(size, Image.Resampling.BILINEAR)
+    return np.asarray(image, dtype=np.float32) / 255.0
+
+
+class GlyphRenderCache:
+    """
+    Bounded LRU cache of glyph bitmaps rendered at a given pixel size.
+    Keyed by (font_path, char, pixel_size); freetype faces are cached per font.
+    """
+    def __init__(self, max_glyphs=4096, max_faces=64):
+        self.max_glyphs = max_glyphs
+        self.max_faces = max_faces
+        self._glyphs = OrderedDict()
+        self._faces = OrderedDict()
+
+    def _face(self, font_path):
+        face = self._faces.get(font_path)
+        if face is None:
+            face = open_freetype_face(font_path)
+            self._faces[font_path] = face
+            if len(self._faces) > self.max_faces:
+                self._faces.popitem(last=False)
+        else:
+            self._faces.move_to_end(font_path)
+        return face
+
+    def get(self, font_path, char, pixel_size):
+        """Returns the rendered glyph cropped to its ink box (uint8), or None if the glyph is missing."""
+        key = (font_path, char, pixel_size)
+        if key in self._glyphs:
+            self._glyphs.move_to_end(key)
+            return self._glyphs[key]
+
+        bitmap = None
+        try:
+            face = self._face(font_path)
+            if face.get_char_index(char):
+                face.set_pixel_sizes(0, pixel_size)
+                face.load_char(char, freetype.FT_LOAD_RENDER)
+                glyph = face.glyph.bitmap
+                if glyph.width and glyph.rows:
+                    pitch = abs(glyph.pitch)
+                    buffer = np.frombuffer(bytes(glyph.buffer), dtype=np.uint8)
+                    bitmap = buffer[:glyph.rows * pitch].reshape((glyph.rows, pitch))[:, :glyph.width].copy()
+        except Exception as e:
+            logger.debug(f"Could not render '{char}' of {font_path}: {e}")
+
+        self._glyphs[key] = bitmap
+        if len(self._glyphs) > self.max_glyphs:
+            self._glyphs.popitem(last=False)
+        return bitmap
+
+
+class FontIdentifier:
+    """
+    Ranks catalog fonts by how well they match the glyphs in an image.
+
+    Stage 1 compares normalized glyph cells with the GlyphSignatureIndex for all fonts
+    (vectorized, chunked). Stage 2 renders the glyphs of the best candidates at the
+    size found in the image and compares them pixel by pixel.
+
+    Only fonts in the index are ranked. With the index complete, identification takes
+    well under a second for 50k fonts; filling a cold index is the expensive part
+    (see glyph_signatures.SIGNATURE_COST_MS) and is done beforehand, in slices with a
+    progress window, by EventManager.update_glyph_signatures().
+    """
+    def __init__(self, signature_index, render_cache=None):
+        self.signature_index = signature_index
+        self.render_cache = render_cache if render_cache is not None else GlyphRenderCache()
+
+    def _glyph_chars(self, glyphs, text):
+        """Maps segmented glyphs to characters of the given text, or None per glyph if unknown."""
+        if not text:
+            return [None] * len(glyphs)
+        chars = [c for c in text if not c.isspace()]
+        if len(chars) != len(glyphs):
+            logger.info(f"Text has {len(chars)} characters but {len(glyphs)} glyphs were found, "
+                        "ignoring the text for glyph matching")
+            return [None] * len(glyphs)
+        return chars
+
+    def coarse_scores(self, cells, chars):
+        """
+        Mean distance of the glyph cells to every indexed font.
+
+        Args:
+            cells (np.ndarray): (g, cell * cell) float32 glyph cells
+            chars (list): Known character per glyph or None
+
+        Returns:
+            tuple: (scores (n,), best_char_rows (n, g)) - the signature char matched per glyph
+        """
+        index = self.signature_index
+        n = len(index)
+        char_rows = [index.chars.find(c) if c else -1 for c in chars]
+        cell_norms = np.einsum('ij,ij->i', cells, cells)
+        scores = np.empty(n, dtype=np.float32)
+        best_chars = np.empty((n, len(cells)), dtype=np.int16)
+
+        for start in range(0, n, COARSE_CHUNK_SIZE):
+            block = index.matrix[start:start + COARSE_CHUNK_SIZE].astype(np.float32)  # (b, chars, d)
+            block_norms = np.einsum('bcd,bcd->bc', block, block)
+            # (b, chars, g) squared distances of every glyph to every signature cell
+            dist = block_norms[:, :, None] - 2.0 * np.einsum('bcd,gd->bcg', block, cells) + cell_norms[None, None, :]
+            dist = np.maximum(dist, 0.0)
+
+            best = dist.argmin(axis=1)  # (b, g) best matching signature char per glyph
+            for g, row in enumerate(char_rows):
+                if row >= 0:
+                    best[:, g] = row
+            glyph_dist = np.take_along_axis(dist, best[:, None, :], axis=1)[:, 0, :]
+            scores[start:start + len(block)] = np.sqrt(glyph_dist).mean(axis=1)
+            best_chars[start:start + len(block)] = best
+        return scores, best_chars
+
+    def refine_score(self, font_path, glyphs, chars):
+        """Pixel-level dissimilarity (0 = identical) between the image glyphs and the font's rendering."""
+        total = 0.0
+        for (bitmap, _), char in zip(glyphs, chars):
+            height, width = bitmap.shape
+            rendered = self.render_cache.get(font_path, char, max(4, height))
+            if rendered is None:
+                total += 1.0
+                continue
+            size = (REFINE_CELL, REFINE_CELL)
+            a = _resize_mask(bitmap, size)
+            b = _resize_mask(rendered, size)
+            # Aspect ratio differences are as telling as shape differences
+            aspect_penalty = abs(np.log((width / height) / (rendered.shape[1] / rendered.shape[0])))
+            total += float(np.abs(a - b).mean()) + 0.25 * min(aspect_penalty, 1.0)
+        return float(total) / max(1, len(glyphs))
+
+    def identify(self, image_path, text=None, top_n=20, refine_candidates=200):
+        """
+        Identifies the font used in an image.
+
+        Args:
+            image_path (str): Path to a PNG (or any image Pillow can read)
+            text (str): Optional text shown in the image, improves matching
+            top_n (int): Number of results
+            refine_candidates (int): Number of coarse candidates rendered and compared pixel by pixel
+
+        Returns:
+            list: (font_path, score) tuples, best match first (lower score is better)
+        """
+        index = self.signature_index
+        if len(index) == 0:
+            return []
+
+        glyphs = segment_glyphs(load_ink_image(image_path))
+        if not glyphs:
+            logger.info(f"No glyphs found in {image_path}")
+            return []
+        chars = self._glyph_chars(glyphs, text)
+        cells = np.stack([fit_bitmap_to_cell(bitmap, index.cell).ravel() for bitmap, _ in glyphs]).astype(np.float32)
+
+        scores, best_chars = self.coarse_scores(cells, chars)
+        count = min(refine_candidates, len(scores))
+        candidates = np.argpartition(scores, count - 1)[:count]
+
+        results = []
+        for row in candidates:
+            glyph_chars = [c if c else index.chars[best_chars[row, g]] for g, c in enumerate(chars)]
+            font_path = index.paths[row]
+            results.append((font_path, self.refine_score(font_path, glyphs, glyph_chars)))
+        results.sort(key=lambda item: item[1])
+        return results[:top_n]
+#
@@ -1,47 +1,122 @@
 # font_info.py
 
+import io
 import os
+import re
+import sys
+import logging
+import itertools
 import freetype
-from uuid import uuid4
+from .font_file_access import open_face, open_reader
+
+logger = logging.getLogger(__name__)
+
+# Shared by all fonts, see get_font_styles()
+FONT_STYLES = ("Regular", "Bold", "Italic", "Bold Italic")
+
+# Font files picked up by the scanner; collections hold several faces, each a catalog entry of its own
+COLLECTION_EXTENSIONS = ('.ttc', '.otc')
+FONT_EXTENSIONS = ('.ttf', '.otf') + COLLECTION_EXTENSIONS
+_FACE_SUFFIX = re.compile(r'#(\d+)$')
+
+# Session-wide font ids; they identify fonts in the font table and are not persisted
+_font_ids = itertools.count(1)
+
+
+def new_font_id(count=1):
+    """A new font id; with count, the first of count consecutive ids."""
+    first = next(_font_ids)
+    for _ in range(count - 1):
+        next(_font_ids)
+    return first
+
+
+def font_key(file_path, face_index=0):
+    """
+    Catalog key of a face, used as FontInfo.font_path and wherever fonts are referenced
+    (categories, notes, the database): the file path, with "#<face index>" appended
+    for the faces after the first one of a collection.
+    """
+    return f"{file_path}#{face_index}" if face_index else file_path
+
+
+def split_font_key(font_path):
+    """(file path, face index) of a key made by font_key(); plain paths are face 0."""
+    match = _FACE_SUFFIX.search(font_path)
+    if match and font_path[:match.start()].lower().endswith(COLLECTION_EXTENSIONS):
+        return font_path[:match.start()], int(match.group(1))
+    return font_path, 0
+
+
+def open_freetype_face(font_path):
+    """freetype face of a catalog key (font_path of a FontInfo), for fonts on disk and in archives."""
+    return open_face(*split_font_key(font_path))
+
+
+def intern_text(text):
+    """Interns repeated short strings (names, styles, licenses) so equal values share one object."""
+    return sys.intern(text) if isinstance(text, str) else text
 
 
 class FontInfo:
-    def __init__(self, font_path):
-        self.id = str(uuid4())  # Unique identifier
-        self.font_path = os.path.abspath(os.path.expanduser(font_path))
+    # No per-instance __dict__: at 100k fonts the slots save a lot of memory
+    __slots__ = ('id', 'font_path', 'face_index', 'font_file', 'font_name', 'font_family', 'font_style', 'font_styles',
+                 'user_note', 'license', 'font_info', 'metrics', 'font_root', 'origin')
+
+    def __init__(self, font_path, face_index=0, face=None):
+        self.id = new_font_id()  # Unique identifier (int)
+        self.face_index = face_index  # Face in a font collection, 0 for single font files
+        self.font_path = font_key(os.path.abspath(os.path.expanduser(font_path)), face_index)
         self.font_file = os.path.basename(self.font_path)
-        self.font_name = self.get_font_name()
-        self.font_family = self.get_font_family()
-        self.font_style = self.get_font_style()
+        if face is None:
+            face = self.open_face()
+        self.font_name = intern_text(self.get_font_name(face))
+        self.font_family = intern_text(self.get_font_family(face))
+        self.font_style = intern_text(self.get_font_style(face))
         self.font_styles = self.get_font_styles()
         self.user_note = ""      # New attribute for user notes
         self.license = ""        # New attribute for license information
         self.font_info = ""      # New attribute for font description
+        self.metrics = {}        # Numeric metrics (weight, width, x-height, ...), see font_metrics.py
+        self.font_root = ""      # Search path the font was found under, set by FontManager.classify_font
+        self.origin = ""         # 'system' or 'user', set by FontManager.classify_font
+
+    @property
+    def file_path(self):
+        """Path of the font file; differs from font_path for the faces after the first of a collection."""
+        return split_font_key(self.font_path)[0] if self.face_index else self.font_path
+
+    def open_face(self):
+        """A freetype face of this font, None if the file can't be read."""
+        try:
+            return open_face(self.file_path, self.face_index)
+        except Exception:
+            return None
 
-    def get_font_name(self):
+    def get_font_name(self, face=None):
         try:
-            face = freetype.Face(self.font_path)
+            face = face or open_face(self.file_path, self.face_index)
             return face.family_name.decode('utf-8') if face.family_name else "Unknown"
         except Exception:
             return "Unknown"
 
-    def get_font_family(self):
+    def get_font_family(self, face=None):
         try:
-            face = freetype.Face(self.font_path)
+            face = face or open_face(self.file_path, self.face_index)
             return face.style_name.decode('utf-8') if face.style_name else "Regular"
         except Exception:
             return "Regular"
 
-    def get_font_style(self):
+    def get_font_style(self, face=None):
         try:
-            face = freetype.Face(self.font_path)
+            face = face or open_face(self.file_path, self.face_index)
             return face.style_name.decode('utf-8') if face.style_name else "Regular"
         except Exception:
             return "Regular"
 
     def get_font_styles(self):
         # This can be expanded to retrieve actual styles if needed
-        return ["Regular", "Bold", "Italic", "Bold Italic"]
+        return FONT_STYLES
 
     def extract_font_info(self):
         """Extracts font description from the font file."""
@@ -49,13 +124,13 @@ class FontInfo:
             # This is a placeholder. Actual implementation depends on the font file's metadata.
             # For example, using fontTools:
             from fontTools.ttLib import TTFont
-            font = TTFont(self.font_path)
+            font = TTFont(open_reader(self.file_path), fontNumber=self.face_index)
             name = ""
             for record in font['name'].names:
                 if record.nameID == 4:  # Full font name
                     name = record.string.decode('utf-8', errors='ignore')
                     break
-            self.font_info = name if name else "Not avail."
+            self.font_info = intern_text(name) if name else "Not avail."
         except Exception:
             self.font_info = "Not avail."
 
@@ -65,16 +140,74 @@ class FontInfo:
             # This is a placeholder. Actual implementation depends on the font file's metadata.
             # For example, using fontTools:
             from fontTools.ttLib import TTFont
-            font = TTFont(self.font_path)
+            font = TTFont(open_reader(self.file_path), fontNumber=self.face_index)
             license = ""
             for record in font['name'].names:
                 if record.nameID == 13:  # License Description
                     license = record.string.decode('utf-8', errors='ignore')
                     break
-            self.license = license if license else "Not avail."
+            self.license = intern_text(license) if license else "Not avail."
         except Exception:
             self.license = "Not avail."
 
+    def extract_metrics(self, font=None):
+        """Extracts numeric metrics (OS/2, post, head, maxp) from the font file."""
+        try:
+            from .font_metrics import extract_font_metrics
+            if font is None:
+                from fontTools.ttLib import TTFont
+                font = TTFont(open_reader(self.file_path), lazy=True, fontNumber=self.face_index)
+            self.metrics = extract_font_metrics(font)
+        except Exception:
+            self.metrics = {}
+
+    def extract_metadata(self, font=None, buffer=None):
+        """
+        Extracts description, license and metrics, reading the font file only once.
+        The tables are decoded by the sfnt reader straight from the file mapping;
+        fontTools only parses the fonts the reader rejects.
+
+        Args:
+            font: The opened fontTools TTFont of this face, if any
+            buffer: Content of the font file if it was read already (archive members)
+        """
+        if font is None:
+            from .sfnt_reader import SfntFont, SfntError
+            try:
+                sfnt = SfntFont(buffer, self.face_index) if buffer is not None else SfntFont.open(self.font_path)
+                name, license, metrics = sfnt.name(4), sfnt.name(13), sfnt.metrics()
+            except SfntError as e:
+                logger.debug(f"sfnt reader failed on {self.font_path}, using fontTools: {e}")
+            else:
+                self.font_info = intern_text(name) if name else "Not avail."
+                self.license = intern_text(license) if license else "Not avail."
+                self.metrics = metrics
+                return
+        try:
+            if font is None:
+                from fontTools.ttLib import TTFont
+                source = io.BytesIO(buffer) if buffer is not None else open_reader(self.file_path)
+                font = TTFont(source, lazy=True, fontNumber=self.face_index)
+        except Exception:
+            self.font_info = "Not avail."
+            self.license = "Not avail."
+            self.metrics = {}
+            return
+
+        name = ""
+        license = ""
+        try:
+            for record in font['name'].names:
+                if record.nameID == 4 and not name:  # Full font name
+                    name = record.toUnicode(errors='ignore')
+                elif record.nameID == 13 and not license:  # License Description
+                    license = record.toUnicode(errors='ignore')
+        except Exception:
+            pass
+        self.font_info = intern_text(name) if name else "Not avail."
+        self.license = intern_text(license) if license else "Not avail."
+        self.extract_metrics(font)
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -82,23 +215,70 @@ class FontInfo:
             'font_file': self.font_file,
             'font_family': self.font_family,
             'font_style': self.font_style,
-            'font_styles': self.font_styles,
+            'font_styles': list(self.font_styles),
             'font_path': self.font_path,
+            'face_index': self.face_index,
             'user_note': self.user_note,
             'license': self.license,
-            'font_info': self.font_info
+            'font_info': self.font_info,
+            'metrics': self.metrics,
+            'font_root': self.font_root,
+            'origin': self.origin
         }
 
     @staticmethod
     def from_dict(data):
-        fi = FontInfo(data['font_path'])
-        fi.id = data.get('id', str(uuid4()))
-        fi.font_name = data.get('font_name', fi.get_font_name())
-        fi.font_file = data.get('font_file', fi.font_file)
-        fi.font_family = data.get('font_family', fi.get_font_family())
-        fi.font_style = data.get('font_style', fi.get_font_style())
-        fi.font_styles = data.get('font_styles', fi.get_font_styles())
+        # Skip __init__: the font file is only opened for values missing in data,
+        # which keeps loading a large catalog fast. Stored ids are replaced by session ids.
+        fi = FontInfo.__new__(FontInfo)
+        fi.font_path = os.path.abspath(os.path.expanduser(data['font_path']))
+        fi.face_index = data.get('face_index') or split_font_key(fi.font_path)[1]
+        fi.id = new_font_id()
+        fi.font_file = data.get('font_file') or os.path.basename(fi.font_path)
+        fi.font_name = intern_text(data['font_name'] if 'font_name' in data else fi.get_font_name())
+        fi.font_family = intern_text(data['font_family'] if 'font_family' in data else fi.get_font_family())
+        fi.font_style = intern_text(data['font_style'] if 'font_style' in data else fi.get_font_style())
+        styles = tuple(data['font_styles']) if data.get('font_styles') else FONT_STYLES
+        fi.font_styles = FONT_STYLES if styles == FONT_STYLES else styles
         fi.user_note = data.get('user_note', "")
-        fi.license = data.get('license', "")
-        fi.font_info = data.get('font_info', "")
+        fi.license = intern_text(data.get('license', ""))
+        fi.font_info = intern_text(data.get('font_info', ""))
+        fi.metrics = data.get('metrics', {})
+        fi.font_root = intern_text(data.get('font_root', ""))
+        fi.origin = intern_text(data.get('origin', ""))
         return fi
+
+
+def _freetype_face(file_path, data, face_index):
+    try:
+        return freetype.Face(io.BytesIO(data), face_index) if data is not None else open_face(file_path, face_index)
+    except Exception as e:
+        logger.debug(f"Cannot open face {face_index} of {file_path} with freetype: {e}")
+        return None
+
+
+def load_font_faces(file_path, data=None):
+    """
+    FontInfo objects, with metadata, of every face of a font file (num_faces of the
+    freetype face; one for single font files). The metadata of all faces is read
+    from the one file mapping (or data) by the sfnt reader.
+
+    Args:
+        file_path (str): Path of the font file, or virtual path of a font in an archive
+        data (bytes): Content of the file if it was read already (archive members)
+
+    Returns:
+        list: FontInfo objects, empty if the file can't be read
+    """
+    file_path = os.path.abspath(os.path.expanduser(file_path))
+    first_face = _freetype_face(file_path, data, 0)
+    if first_face is None and file_path.lower().endswith(COLLECTION_EXTENSIONS):
+        logger.warning(f"Cannot read font collection {file_path}")
+        return []
+    fonts = []
+    for face_index in range(first_face.num_faces if first_face is not None else 1):
+        face = first_face if face_index == 0 else _freetype_face(file_path, data, face_index)
+        fi = FontInfo(file_path, face_index, face)
+        fi.extract_metadata(buffer=data)
+        fonts.append(fi)
+    return fonts
@@ -3,12 +3,30 @@
 
 import os
 import json
+import time
 import logging
-from .font_info import FontInfo
+from contextlib import contextmanager
+import numpy as np
+from .font_info import FontInfo, FONT_EXTENSIONS, COLLECTION_EXTENSIONS, font_key, split_font_key
 from .font_category import FontCategory
+from .glyph_signatures import GlyphSignatureIndex
+from .font_coverage import CoverageCache
+from .font_search_index import FontSearchIndex
+from .font_query import FontQuery, QueryResultCache
+from .font_snapshot import FontSnapshot, LazyFontList, write_snapshot
+from .font_columns import FontColumns
+from .font_content_index import ContentIndex
+from .font_archives import ARCHIVE_EXTENSIONS, font_exists, is_archive_path, iter_archive_fonts, split_archive_path
+from .font_parse_pool import ParseQuarantine, parse_in_process
+from .font_walker import DirectoryCache, FontDirectoryWalker, ScanPolicy, ScanStats, normalize_roots
+from .scan_checkpoint import ScanCancelled, ScanCheckpoint
 
 logger = logging.getLogger(__name__)
 
+# Order in which a scan finds fonts: the fonts of categories first (needed for category work),
+# then the user's own paths, then the system paths
+SCAN_PHASES = ('categories', 'user', 'system')
+
 class FontManager:
     def __init__(self):
         self.font_paths_predefined = ['/usr/share/fonts/TTF']
@@ -17,7 +35,88 @@ class FontManager:
         self.fonts = []  # List of FontInfo objects
         self.categories = {}  # category_name: FontCategory instance
         self._font_paths_set = set()  # Helper set to track unique font paths
-        self._font_filenames_dict = {}  # Helper dict to track filenames and their paths
+        self.content_index = ContentIndex()  # Size, inode and content hashes of font files, see get_duplicate_report()
+        self.glyph_signatures = GlyphSignatureIndex()  # Per-font glyph signature vectors, filled on demand
+        self.coverage_cache = CoverageCache()  # Unicode coverage of the fonts for covers: queries, filled on demand
+        self.fonts_revision = 0  # Incremented whenever self.fonts changes, invalidates derived indexes
+        self._columns = None  # FontColumns (struct-of-arrays view) aligned with self.fonts, built on demand
+        self._metrics_table = None  # FontMetricsTable aligned with self.fonts, built on demand
+        self._search_index = None  # FontSearchIndex aligned with self.fonts, built on demand
+        self._query_cache = QueryResultCache()  # recent search box results for incremental search
+        self._origin_roots = None  # (paths key, [(normalized root, root, origin)], {directory: (root, origin)})
+        self._origins_key = None  # paths key the origins stored on the fonts were computed with
+        self._origin_masks = {}  # origin -> boolean mask aligned with self.fonts
+        self._change_listeners = []  # callables (event, details) informed about every catalog edit
+        self.change_count = 0  # Number of catalog edits so far
+        self.saved_change_count = 0  # change_count at the last save, see mark_clean()
+        self._pending_notes = {}  # font_path -> user note of fonts not loaded (yet), applied by add_font()
+        self.parse_pool = None  # FontParsePool isolating font parsing in worker processes; None parses in-process
+        self.parse_quarantine = ParseQuarantine()  # Files that crashed or hung a parser, skipped by scans
+        self.dir_cache = DirectoryCache(FONT_EXTENSIONS + ARCHIVE_EXTENSIONS)  # Listings of unchanged directories
+        self.scan_policies = {}  # search root (absolute path) -> ScanPolicy, for roots not walked with the defaults
+        self.scan_stats = {}  # search root (absolute path) -> ScanStats of its last scan
+        self.fontconfig = None  # FontconfigCatalog the fonts of system paths are taken from; None parses them
+        self.scan_checkpoint = ScanCheckpoint()  # Progress of the running scan, lets an interrupted one resume
+        self._scan_cancelled = False
+        self._running_scan = None  # generator of start_scan()
+
+    def add_change_listener(self, listener):
+        """
+        Register a callable listener(event, details) called after every catalog edit.
+
+        Events: 'font_added' (font), 'font_removed' (font_path), 'fonts_cleared',
+        'font_note_changed' (font or None if not loaded, font_path, note), 'category_added' (category), 'category_removed' (category),
+        'category_renamed' (old_label, category), 'category_updated' (category),
+        'category_fonts_added' (category, font_paths), 'category_font_removed' (category, font_path),
+        'category_font_replaced' (category, old_path, new_path; at the position of old_path),
+        'category_cleared' (category), 'paths_changed', 'catalog_replaced',
+        'batch_started' and 'batch_finished' around bulk operations such as a scan.
+        """
+        if listener not in self._change_listeners:
+            self._change_listeners.append(listener)
+
+    def remove_change_listener(self, listener):
+        if listener in self._change_listeners:
+            self._change_listeners.remove(listener)
+
+    @property
+    def dirty(self):
+        """True if the catalog was edited since the last save."""
+        return self.change_count != self.saved_change_count
+
+    def mark_clean(self, change_count):
+        """
+        Record that the state up to change_count was saved.
+        Only assigns attributes, so a background save thread may call it.
+        """
+        if change_count <= self.saved_change_count:
+            return
+        self.saved_change_count = change_count
+        if change_count == self.change_count:
+            for category in list(self.categories.values()):
+                category.dirty = False
+
+    def notify_change(self, event, **details):
+        """Inform the change listeners about a catalog edit; listener errors are logged, not raised."""
+        if event not in ('batch_started', 'batch_finished'):
+            self.change_count += 1
+            category = details.get('category')
+            if category is not None:
+                category.dirty = True
+        for listener in list(self._change_listeners):
+            try:
+                listener(event, details)
+            except Exception as e:
+                logger.error(f"Error in catalog change listener for '{event}': {e}")
+
+    @contextmanager
+    def batch_changes(self):
+        """Group the edits of a bulk operation, so listeners can write them in one go."""
+        self.notify_change('batch_started')
+        try:
+            yield
+        finally:
+            self.notify_change('batch_finished')
 
     def verify_paths(self, paths):
         """Verify the existence of given paths."""
@@ -32,85 +131,533 @@ class FontManager:
     def add_font(self, font_info):
         """Add a FontInfo object if its path is unique."""
         if font_info.font_path not in self._font_paths_set:
+            self.classify_font(font_info)
+            if font_info.font_path in self._pending_notes:
+                font_info.user_note = self._pending_notes.pop(font_info.font_path)
             self.fonts.append(font_info)
             self._font_paths_set.add(font_info.font_path)
+            self.fonts_changed()
+            self.notify_change('font_added', font=font_info)
             return True
         return False
 
+    def clear_fonts(self):
+        """Remove all fonts from the catalog; categories and notes are kept."""
+        self._keep_notes(self.fonts_with_notes())
+        self.fonts.clear()
+        self._font_paths_set = set()
+        self.content_index.clear()
+        self.fonts_changed()
+        self.notify_change('fonts_cleared')
+
+    def fonts_with_notes(self):
+        """The fonts that have a user note; fonts of a snapshot not decoded yet have none and stay undecoded."""
+        if isinstance(self.fonts, LazyFontList):
+            fonts = (self.fonts.peek(row) for row in range(len(self.fonts)))
+        else:
+            fonts = self.fonts
+        return [font for font in fonts if font is not None and font.user_note]
+
+    def _keep_notes(self, fonts):
+        """Keeps the notes of fonts leaving the font list by path, for when they are found again."""
+        for font in fonts:
+            if font.user_note:
+                self._pending_notes[font.font_path] = font.user_note
+
+    def fonts_changed(self):
+        """Invalidate indexes derived from self.fonts; called after every change of the font list."""
+        self.fonts_revision += 1
+        self._columns = None
+        self._metrics_table = None
+        self._search_index = None
+        self._origin_masks = {}
+
+    def _paths_key(self):
+        return (tuple(self.font_paths_predefined), tuple(self.font_paths_user))
+
+    def _get_origin_roots(self):
+        """Search roots with their origin, most specific first; rebuilt when the path lists change."""
+        key = self._paths_key()
+        if self._origin_roots is None or self._origin_roots[0] != key:
+            from .path_config import get_system_paths
+            # Predefined and platform font directories are system roots; a path in both lists stays system
+            candidates = ([(p, 'system') for p in self.font_paths_predefined] +
+                          [(p, 'system') for p in get_system_paths()] +
+                          [(p, 'user') for p in self.font_paths_user])
+            roots = {}
+            for path, origin in candidates:
+                root = os.path.abspath(os.path.expanduser(path))
+                roots.setdefault(os.path.normcase(root), (root, origin))
+            ordered = sorted(((norm, root, origin) for norm, (root, origin) in roots.items()),
+                             key=lambda item: len(item[0]), reverse=True)
+            self._origin_roots = (key, ordered, {})
+        return self._origin_roots[1], self._origin_roots[2]
+
+    def classify_font(self, font_info):
+        """Store the search root and origin ('system' or 'user') of a font on its FontInfo."""
+        roots, by_directory = self._get_origin_roots()
+        directory = os.path.dirname(font_info.font_path)
+        found = by_directory.get(directory)
+        if found is None:
+            # Fonts outside every search root (e.g. of a removed path) count as user fonts
+            found = ("", 'user')
+            normalized = os.path.normcase(directory)
+            for norm_root, root, origin in roots:
+                if normalized == norm_root or normalized.startswith(norm_root.rstrip(os.sep) + os.sep):
+                    found = (root, origin)
+                    break
+            by_directory[directory] = found
+        font_info.font_root, font_info.origin = found
+
+    def refresh_font_origins(self):
+        """Re-classify all fonts if the path lists changed since they were classified."""
+        key = self._paths_key()
+        if key == self._origins_key:
+            return
+        for font in self.fonts:
+            self.classify_font(font)
+        self._origins_key = key
+        self._origin_masks = {}
+        self._columns = None
+
+    def get_origin_mask(self, origin):
+        """Boolean NumPy mask over self.fonts of the fonts with the given origin ('system' or 'user')."""
+        mask = self._origin_masks.get(origin)
+        if mask is None or len(mask) != len(self.fonts):
+            mask = self.get_columns().mask_equal('origin', origin)
+            self._origin_masks[origin] = mask
+        return mask
+
+    def get_columns(self):
+        """Return the FontColumns (struct-of-arrays view) aligned with self.fonts, rebuilding it if the fonts changed."""
+        if self._columns is None or self._columns.size != len(self.fonts):
+            self._columns = FontColumns.from_fonts(self.fonts)
+        return self._columns
+
+    def get_metrics_table(self):
+        """Return the FontMetricsTable aligned with self.fonts, rebuilding it if the fonts changed."""
+        if self._metrics_table is None or self._metrics_table.size != len(self.fonts):
+            self._metrics_table = self.get_columns().metrics
+        return self._metrics_table
+
+    def font_table_values(self, rows):
+        """
+        Font table values (name, style, note, license, file, path, id) of the given rows,
+        read from the columns; fonts of a snapshot are not decoded for this.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        columns = self.get_columns()
+        values = columns.export(('font_name', 'font_style', 'license', 'font_file', 'font_path', 'id'), rows)
+        peek = self.fonts.peek if isinstance(self.fonts, LazyFontList) else self.fonts.__getitem__
+        notes = [getattr(peek(row), 'user_note', "") for row in rows.tolist()]
+        return [(name, style, note, license, file, path, font_id)
+                for (name, style, license, file, path, font_id), note in zip(values, notes)]
+
+    def get_search_index(self):
+        """Return the FontSearchIndex aligned with self.fonts, rebuilding it if the fonts changed."""
+        index = self._search_index
+        if index is None or index.revision != self.fonts_revision or index.size != len(self.fonts):
+            index = FontSearchIndex(self.fonts, self.get_metrics_table(), self.fonts_revision, self.get_columns(),
+                                    self.coverage_cache)
+            self._search_index = index
+        return index
+
+    def query_fonts(self, query_text):
+        """
+        Run a search box query (see font_query.py) against the catalog.
+
+        Refinements of recent queries are evaluated over the previous result only.
+
+        Returns:
+            np.ndarray: Sorted indexes into self.fonts of the matching fonts
+        """
+        query = FontQuery.parse(query_text, self.categories)
+        return self._query_cache.execute(query, self.get_search_index())
+
+    def fuzzy_query_fonts(self, query_text):
+        """
+        Typo tolerant variant of query_fonts: plain words are matched against font
+        names with bounded edit distance (see font_fuzzy_search.py), field terms filter as usual.
+
+        Returns:
+            tuple: (indexes into self.fonts ordered by relevance, dict index -> highlighted name)
+        """
+        from .font_fuzzy_search import FuzzyNameSearch
+        index = self.get_search_index()
+        words, rest = FontQuery.parse(query_text, self.categories).split_words()
+        rows = None if rest.is_empty else self._query_cache.execute(rest, index)
+        if not words:
+            return (index.all_rows() if rows is None else rows), {}
+        return FuzzyNameSearch(index).search(" ".join(words), rows)
+
     def search_fonts(self):
-        """Search for fonts in predefined and user-defined paths, handling duplicates."""
-        # Reset the filename tracking dictionary
-        self._font_filenames_dict = {}
-        
-        # Process system paths first
-        self._process_font_paths(self.font_paths_predefined, is_system=True)
-        
-        # Then process user paths
-        self._process_font_paths(self.font_paths_user, is_system=False)
+        """
+        Search for fonts in predefined and user-defined paths, handling duplicates;
+        runs the steps of scan_steps() at once. A scan started by start_scan() is
+        stopped first (and continued by this one, see scan_checkpoint.py).
+
+        Returns:
+            bool: True if the scan completed, False if it was cancelled
+        """
+        self.stop_scan()
+        steps = self.scan_steps()
+        with self.batch_changes():
+            while True:
+                try:
+                    next(steps)
+                except StopIteration as stop:
+                    return stop.value
+
+    def start_scan(self):
+        """
+        Starts a scan run step by step with next() (see scan_steps()), e.g. between
+        GUI events by background_scan.BackgroundScan; stop_scan() ends it early.
+        """
+        self.stop_scan()
+        self._running_scan = self.scan_steps()
+        return self._running_scan
+
+    def stop_scan(self):
+        """Ends the scan of start_scan(), if it is still running; its checkpoint is kept."""
+        if self._running_scan is not None:
+            self._running_scan.close()
+            self._running_scan = None
+
+    def scan_steps(self):
+        """
+        The scan as a generator, one step per processed file. Fonts are found in the order
+        of SCAN_PHASES: the fonts of categories that are not loaded yet, then the user
+        paths, then the system paths. Progress is checkpointed (see scan_checkpoint.py);
+        a scan stopped by cancel_scan() or by closing the generator keeps the fonts
+        found so far and is continued by the next one.
+
+        Yields:
+            str: Phase of the step (see SCAN_PHASES)
+
+        Returns:
+            bool: True if the scan completed, False if it was cancelled
+        """
+        # Every change of the path lists is followed by a scan
+        self.notify_change('paths_changed')
+
+        # Loaded fonts must be known by inode, so further links to them are recognized
+        self.index_font_files()
+
+        self._scan_cancelled = False
+        self.scan_checkpoint.begin(self._checkpoint_paths())
+        self.dir_cache.begin_scan()
+        phases = {
+            'categories': self._load_category_fonts(),
+            'user': self._process_font_paths(self.font_paths_user, is_system=False),
+            'system': self._process_font_paths(self.font_paths_predefined, is_system=True)
+        }
+        completed = False
+        try:
+            for phase in SCAN_PHASES:
+                for _ in phases[phase]:
+                    yield phase
+            completed = True
+        except ScanCancelled:
+            logger.info("Scan cancelled, the next scan continues it")
+        finally:
+            for steps in phases.values():
+                steps.close()
+            if completed:
+                self.dir_cache.end_scan()
+                self.scan_checkpoint.finish()
+            else:
+                # Entries of the directories not reached yet are kept
+                self.dir_cache.save()
+                self.scan_checkpoint.interrupt()
+            # Path lists may have changed since the loaded fonts were classified
+            self.refresh_font_origins()
+        return completed
+
+    def cancel_scan(self):
+        """Stops the running scan after the current file; may be called from the listeners it informs."""
+        self._scan_cancelled = True
+
+    def _checkpoint_paths(self):
+        return [list(self.font_paths_predefined), list(self.font_paths_user)]
+
+    def resume_interrupted_scan(self):
+        """
+        Adds the fonts found by a scan of the current paths that was interrupted in an
+        earlier session (see ScanCheckpoint), so they are usable before the next
+        search_fonts() continues that scan.
+
+        Returns:
+            int: Number of fonts added
+        """
+        fonts = self.scan_checkpoint.load()
+        if not fonts or self.scan_checkpoint.paths != self._checkpoint_paths():
+            return 0
+        added = 0
+        with self.batch_changes():
+            for fi in fonts:
+                if font_exists(fi.file_path) and self.add_font(fi):
+                    added += 1
+        logger.info(f"Restored {added} fonts of the interrupted scan")
+        return added
+
+    def _load_category_fonts(self):
+        """
+        Loads the font files of category entries that are not loaded yet and that the walk
+        of a search root would find (archive members are left to the walk); yields after each.
+        """
+        roots = sorted(self.verify_paths(self.font_paths_predefined + self.font_paths_user)[0], key=len, reverse=True)
+        file_paths = {split_font_key(font_path)[0] for category in self.categories.values()
+                      for font_path in category.fonts_list if not self.is_font_loaded(font_path)}
+        jobs = []
+        for file_path in sorted(file_paths):
+            if self.is_font_loaded(file_path) or is_archive_path(file_path):
+                continue
+            root = next((root for root in roots if file_path.startswith(root.rstrip(os.sep) + os.sep)), None)
+            if root is None:
+                continue
+            rel_path = os.path.relpath(file_path, root).replace(os.sep, '/')
+            if not self.get_scan_policy(root).allows(rel_path, FONT_EXTENSIONS):
+                continue
+            try:
+                st = os.stat(file_path)
+            except OSError:
+                continue
+            if self.parse_quarantine.is_quarantined(file_path, st):
+                continue
+            self.content_index.add(file_path, st)
+            jobs.append((file_path, None))
+        if not jobs:
+            return
+        stats = ScanStats()
+        yield from self._load_font_jobs(jobs, stats, walked=False)
+        logger.info(f"Loaded {stats.fonts_added} fonts of categories first")
 
     def _process_font_paths(self, paths, is_system=False):
-        """Process font paths, handling duplicates based on filenames."""
+        """
+        Process font paths, yielding after each file and while waiting for fc-list or parse_pool. Every file is recorded in the content index; further paths
+        of an already loaded file (hard links, symlinks) are skipped. Copies and files
+        sharing a name are loaded and reported by get_duplicate_report(). Every face of
+        a font collection (.ttc, .otc) becomes a font of its own, see font_info.font_key().
+        Zip archives under user paths are read as well, see _archive_font_jobs().
+        Directories are walked once even if roots overlap, see font_walker.py; the
+        listings of unchanged directories come from dir_cache. Each root is walked
+        with its ScanPolicy (see set_scan_policy()) and gets ScanStats in scan_stats.
+        Files are parsed by parse_pool if set, see _load_font_jobs(); the fonts of system
+        paths are taken from fontconfig's records if it has current ones, see _fontconfig_jobs().
+        """
         valid_paths, invalid_paths = self.verify_paths(paths)
         
         if invalid_paths:
             logger.warning(f"The following paths are invalid: {invalid_paths}")
-            
-        for path in valid_paths:
-            for root, _, files in os.walk(path):
-                for file in files:
-                    if file.lower().endswith(('.ttf', '.otf')):
-                        font_path = os.path.abspath(os.path.join(root, file))
-                        
-                        # Skip if this exact path is already loaded
-                        if self.is_font_loaded(font_path):
-                            continue
-                            
-                        # Convert filename to lowercase for comparison
-                        file_lower = file.lower()
-                        
-                        # Check if we've seen this filename before (case-insensitive)
-                        if file_lower in self._font_filenames_dict:
-                            existing_path = self._font_filenames_dict[file_lower]
-                            logger.info(f"Note: fontfile already in found fonts list (case-insensitive match), first font path: {existing_path}, second font path: {font_path}")
-                            continue
-                        
-                        # If it's a new filename, process it
-                        fi = FontInfo(font_path)
-                        fi.extract_font_info()
-                        fi.extract_license_info()
+
+        # fontconfig has parsed the system fonts already, see fontconfig_source.py
+        if is_system and valid_paths and self.fontconfig is not None:
+            yield from self.fontconfig.load_steps()
+
+        queued = set()  # Paths handed out, their fonts may not be loaded yet
+        visited = set()  # Directories walked, shared by the roots
+        for root in normalize_roots(valid_paths, keep_nested=self.scan_policies):
+            stats = ScanStats()
+            start = time.perf_counter()
+            jobs = self._font_file_jobs(root, is_system, queued, visited, stats)
+            if is_system and self.fontconfig is not None and self.fontconfig.records:
+                jobs = self._fontconfig_jobs(jobs, stats)
+            yield from self._load_font_jobs(jobs, stats)
+            self.scan_checkpoint.dir_done()
+            stats.seconds = time.perf_counter() - start
+            self.scan_stats[root] = stats
+            logger.info(f"Scanned {root}: {stats.summary()}")
+
+    def _font_file_jobs(self, root, is_system, queued, visited, stats):
+        """(file path, data) of the font files to load under root, in walk order; data is None for files on disk."""
+        extensions = FONT_EXTENSIONS if is_system else FONT_EXTENSIONS + ARCHIVE_EXTENSIONS
+        # Linked directories inside a search root are walked under their own path
+        walker = FontDirectoryWalker(extensions, cache=self.dir_cache, policy=self.get_scan_policy(root),
+                                     skip_link=self._is_scanned_path, visited=visited, stats=stats)
+        for directory, files in walker.walk(root):
+            if self.scan_checkpoint.skips(directory):
+                # Finished by the interrupted scan this one continues
+                continue
+            for file in files:
+                if file.lower().endswith(ARCHIVE_EXTENSIONS):
+                    yield from self._archive_font_jobs(os.path.abspath(os.path.join(directory, file)), queued)
+                elif file.lower().endswith(FONT_EXTENSIONS):
+                    font_path = os.path.abspath(os.path.join(directory, file))
+                    
+                    # Skip if this exact path is already loaded
+                    if font_path in queued or self.is_font_loaded(font_path):
+                        continue
                         
-                        if self.add_font(fi):
-                            self._font_filenames_dict[file_lower] = font_path
+                    try:
+                        st = os.stat(font_path)
+                    except OSError as e:
+                        logger.warning(f"Cannot read {font_path}: {e}")
+                        continue
+                    alias = next((p for p in self.content_index.same_file(font_path, st)
+                                  if p in queued or self.is_font_loaded(p)), None)
+                    self.content_index.add(font_path, st)
+                    if alias is not None:
+                        logger.debug(f"{font_path} is the same file as {alias}, skipped")
+                        continue
+                    if os.path.islink(font_path) and self._is_scanned_path(os.path.realpath(font_path)):
+                        # The target is loaded under its own path
+                        continue
+                    if self.parse_quarantine.is_quarantined(font_path, st):
+                        logger.debug(f"{font_path} is quarantined, skipped")
+                        continue
 
-    def to_dict(self):
-        """Serialize FontManager to a dictionary, ensuring unique font paths."""
-        unique_fonts = []
-        seen_paths = set()
+                    queued.add(font_path)
+                    yield font_path, None
+
+    def _archive_font_jobs(self, archive_path, queued):
+        """
+        The fonts inside a zip archive, loaded without extracting them: members are read
+        into memory and get the virtual path "<archive path>!/<member name>".
+        Members already loaded are not read again.
+        """
+        def skip(file_path):
+            return file_path in queued or self.is_font_loaded(file_path) or self.parse_quarantine.is_quarantined(file_path)
+
+        for file_path, data in iter_archive_fonts(archive_path, FONT_EXTENSIONS, skip=skip):
+            queued.add(file_path)
+            yield file_path, data
+
+    def _fontconfig_jobs(self, jobs, stats):
+        """
+        Adds the fonts of the (file path, data) jobs fontconfig has current records of
+        without parsing them, and passes the other jobs on. Jobs are pulled one at a time
+        by the parser, so the fonts are still added in walk order.
+        """
+        for file_path, data in jobs:
+            fonts = self.fontconfig.fonts(file_path) if data is None else None
+            if not fonts:
+                yield file_path, data
+                continue
+            stats.files_imported += 1
+            for fi in fonts:
+                charset = self.fontconfig.charsets.get(fi.font_path)
+                if charset is not None:
+                    self.coverage_cache.put(fi.font_path, charset.starts, charset.ends)
+                if self.add_font(fi):
+                    stats.fonts_added += 1
+                    self.scan_checkpoint.add_font(fi)
+            self._file_done(file_path)
+
+    def _load_font_jobs(self, jobs, stats=None, walked=True):
+        """
+        Parses and adds the fonts of (file path, data) jobs. With parse_pool, parsing runs
+        in worker processes: files that crash or hang a worker go to parse_quarantine.
+        Files parsed in this process are guarded by parse_quarantine as well, see
+        font_parse_pool.parse_in_process().
+        Raises ScanCancelled after the file during which cancel_scan() was called.
+        walked tells the checkpoint that the jobs come in walk order.
+
+        Yields:
+            str: Path of each processed file, None while waiting for parse_pool
+        """
+        stats = stats or ScanStats()
+        if self.parse_pool is None:
+            results = ((file_path, parse_in_process(file_path, data, self.parse_quarantine), None)
+                       for file_path, data in jobs)
+        else:
+            results = self.parse_pool.parse(jobs, self.parse_quarantine)
+        for result in results:
+            if result is None:
+                # Waiting for the parser processes
+                yield None
+                continue
+            file_path, fonts, failure = result
+            stats.files_parsed += 1
+            if failure is not None:
+                logger.warning(f"Quarantined {file_path}: parser {failure}")
+                self.parse_quarantine.add(file_path, failure)
+            for fi in fonts:
+                if self.add_font(fi):
+                    stats.fonts_added += 1
+                    self.scan_checkpoint.add_font(fi)
+            self._file_done(file_path, walked)
+            yield file_path
+
+    def _file_done(self, file_path, walked=True):
+        self.scan_checkpoint.file_done(file_path, walked)
+        if self._scan_cancelled:
+            raise ScanCancelled()
+
+    @staticmethod
+    def _root_key(path):
+        return os.path.abspath(os.path.expanduser(path))
+
+    def get_scan_policy(self, root):
+        """The ScanPolicy of a search root, a default one if none was set."""
+        return self.scan_policies.get(self._root_key(root)) or ScanPolicy()
+
+    def set_scan_policy(self, root, policy):
+        """
+        Sets how a search root is walked; loaded fonts under it the policy excludes are
+        removed (their category entries are kept). Newly included fonts are found by the
+        next search_fonts(), which also stores the policies with the path lists.
+        """
+        key = self._root_key(root)
+        if policy is None or policy.is_default:
+            self.scan_policies.pop(key, None)
+        else:
+            self.scan_policies[key] = policy
+        self.prune_excluded_fonts()
+
+    def prune_excluded_fonts(self):
+        """Remove the loaded fonts the ScanPolicy of their search root excludes; returns their number."""
+        excluded = set()
         for font in self.fonts:
-            if font.font_path not in seen_paths:
-                unique_fonts.append(font.to_dict())
-                seen_paths.add(font.font_path)
-            else:
-                logger.debug(f"Duplicate font path skipped during serialization: {font.font_path}")
+            policy = self.scan_policies.get(font.font_root)
+            if policy is None:
+                continue
+            extensions = FONT_EXTENSIONS + (ARCHIVE_EXTENSIONS if font.origin == 'user' else ())
+            rel_path = os.path.relpath(split_archive_path(font.file_path)[0], font.font_root).replace(os.sep, '/')
+            if not policy.allows(rel_path, extensions):
+                excluded.add(font.font_path)
+        self._remove_loaded_fonts(excluded)
+        if excluded:
+            logger.info(f"Removed {len(excluded)} fonts excluded by scan policies")
+        return len(excluded)
+
+    def _is_scanned_path(self, file_path):
+        """True if file_path lies under one of the search paths."""
+        for path in self.font_paths_predefined + self.font_paths_user:
+            root = os.path.realpath(os.path.expanduser(path))
+            if file_path.startswith(root.rstrip(os.sep) + os.sep):
+                return True
+        return False
+
+    def to_dict(self):
+        """
+        Serialize FontManager to a dictionary. Fonts are not part of it (they are rescanned
+        or come from the snapshot), their notes are kept by path; fonts are not decoded for this.
+        """
+        font_notes = dict(self._pending_notes)
+        font_notes.update((font.font_path, font.user_note) for font in self.fonts_with_notes())
 
         return {
-            'font_paths_predefined': self.font_paths_predefined,
-            'font_paths_user': self.font_paths_user,
+            'font_paths_predefined': list(self.font_paths_predefined),
+            'font_paths_user': list(self.font_paths_user),
+            'scan_policies': {root: policy.to_dict() for root, policy in self.scan_policies.items()},
             'categories': {
                 cat: self.categories[cat].to_dict()
                 for cat in self.categories
             },
+            'font_notes': font_notes,
         }
 
     def from_dict(self, data):
         """Deserialize FontManager from a dictionary, ensuring unique font paths."""
         self.font_paths_predefined = data.get('font_paths_predefined', ['/usr/share/fonts/TTF'])
         self.font_paths_user = data.get('font_paths_user', [])
+        self.scan_policies = {root: ScanPolicy.from_dict(policy)
+                              for root, policy in data.get('scan_policies', {}).items()}
         
         # Reset the font paths set and fonts list
         self._font_paths_set = set()
         self.fonts = []
-        self._font_filenames_dict = {}  # Reset filename tracking
+        self.content_index.clear()
 
         for f in data.get('fonts', []):
             font_path = os.path.abspath(os.path.expanduser(f.get('font_path', '')))
@@ -118,9 +665,14 @@ class FontManager:
                 fi = FontInfo.from_dict(f)
                 self.fonts.append(fi)
                 self._font_paths_set.add(font_path)
-                self._font_filenames_dict[os.path.basename(font_path).lower()] = font_path
             else:
                 logger.debug(f"Duplicate or invalid font path skipped: {font_path}")
+        self._pending_notes = {}
+        for font_path, note in data.get('font_notes', {}).items():
+            self.set_note_by_path(font_path, note, notify=False)
+        self._origins_key = None
+        self.refresh_font_origins()
+        self.fonts_changed()
 
         # Handle categories
         self.categories = {}
@@ -136,9 +688,55 @@ class FontManager:
                 self.categories[cat_label] = category
         else:
             logger.warning("'categories' has an unexpected format. Expected dict or list.")
+        self.notify_change('catalog_replaced')
+
+    def load_font_snapshot(self, file_path):
+        """
+        Replace the font list with the fonts of a binary snapshot (see font_snapshot.py),
+        decoded lazily on first access. Pending notes are applied to the fonts they belong to.
+
+        Returns:
+            int: Number of fonts loaded
+        """
+        fonts = LazyFontList(FontSnapshot(file_path))
+        paths = fonts.column('font_path')
+        fonts.index_paths(paths)
+        self.fonts = fonts
+        self._font_paths_set = set(paths)
+        self.content_index.clear()
+        for row, font_path in enumerate(paths):
+            if font_path in self._pending_notes:
+                fonts[row].user_note = self._pending_notes.pop(font_path)
+        # Stored origins are valid if the path lists did not change since
+        if fonts.snapshot.meta.get('paths_key') == [list(p) for p in self._paths_key()]:
+            self._origins_key = self._paths_key()
+        self.fonts_changed()
+        self.refresh_font_origins()
+        return len(fonts)
+
+    def save_font_snapshot(self, file_path):
+        """Write the font list to a binary snapshot; returns the number of fonts written."""
+        if isinstance(self.fonts, LazyFontList):
+            # All fonts are needed, and the mapped file is about to be replaced
+            self.fonts = self.fonts.materialize()
+        meta = {'paths_key': [list(p) for p in self._origins_key]} if self._origins_key else {}
+        return write_snapshot(file_path, self.fonts, meta)
+
+    def get_font_by_id(self, font_id):
+        """Retrieve FontInfo object by its id (int, or the string shown in the font table)."""
+        try:
+            font_id = int(font_id)
+        except (TypeError, ValueError):
+            return None
+        row = self.get_columns().row_of_id(font_id)
+        return None if row is None else self.fonts[row]
 
     def get_font_info_by_path(self, font_path):
         """Retrieve FontInfo object by its path."""
+        if font_path not in self._font_paths_set:
+            return None
+        if isinstance(self.fonts, LazyFontList):
+            return self.fonts.find_path(font_path)
         for font in self.fonts:
             if font.font_path == font_path:
                 return font
@@ -151,11 +749,81 @@ class FontManager:
             return
         category.generate_font_info_and_license(self)
         category.generate_preview_image(self)
+        self.notify_change('category_updated', category=category)
+
+    def category_changed(self, category_label):
+        """Announce an edit of category attributes (icon, image, ...) made on the FontCategory itself."""
+        category = self.categories.get(category_label)
+        if category:
+            self.notify_change('category_updated', category=category)
+
+    def set_category_installed(self, category_label, installed):
+        """Mark a category as installed into (or removed from) the font install path."""
+        category = self.categories.get(category_label)
+        if category:
+            category.is_installed = installed
+            self.notify_change('category_updated', category=category)
+
+    def set_font_note(self, font_info, note):
+        """Set the user note of a font."""
+        font_info.user_note = note
+        self.notify_change('font_note_changed', font=font_info, font_path=font_info.font_path, note=note)
+
+    def set_note_by_path(self, font_path, note, notify=True):
+        """Set the user note of a font by path; the note of a font that is not loaded is kept until it is."""
+        font_info = self.get_font_info_by_path(font_path) if font_path in self._font_paths_set else None
+        if font_info is None:
+            if note:
+                self._pending_notes[font_path] = note
+            else:
+                self._pending_notes.pop(font_path, None)
+            if notify:
+                self.notify_change('font_note_changed', font=None, font_path=font_path, note=note)
+        elif notify:
+            self.set_font_note(font_info, note)
+        else:
+            font_info.user_note = note
+
+    def add_category(self, category_label, image_path=""):
+        """Add a new, empty category; returns the existing one if the label is taken."""
+        if category_label in self.categories:
+            return self.categories[category_label]
+        category = FontCategory(category_label, image_path)
+        self.categories[category_label] = category
+        self.notify_change('category_added', category=category)
+        return category
+
+    def assign_fonts_to_category(self, category_label, fonts):
+        """
+        Add fonts to a category, skipping fonts that are already members.
+
+        Args:
+            category_label (str): Label of an existing category
+            fonts (list): FontInfo objects or font paths
+
+        Returns:
+            int: Number of fonts added
+        """
+        category = self.categories.get(category_label)
+        if not category:
+            return 0
+        members = set(category.fonts_list)
+        added = []
+        for font in fonts:
+            font_path = font if isinstance(font, str) else getattr(font, 'font_path', None)
+            if font_path and font_path not in members:
+                category.fonts_list.append(font_path)
+                members.add(font_path)
+                added.append(font_path)
+        if added:
+            self.notify_change('category_fonts_added', category=category, font_paths=added)
+        return len(added)
 
     def remove_category(self, category_label):
         """Remove a category by its label."""
         if category_label in self.categories:
-            del self.categories[category_label]
+            category = self.categories.pop(category_label)
+            self.notify_change('category_removed', category=category)
             return True
         return False
 
@@ -165,6 +833,7 @@ class FontManager:
             category = self.categories.pop(old_label)
             category.label = new_label
             self.categories[new_label] = category
+            self.notify_change('category_renamed', old_label=old_label, category=category)
             return True
         return False
 
@@ -172,6 +841,7 @@ class FontManager:
         """Update the image path for a category."""
         if category_label in self.categories:
             self.categories[category_label].image_path = new_image_path
+            self.notify_change('category_updated', category=self.categories[category_label])
             return True
         return False
 
@@ -179,19 +849,48 @@ class FontManager:
         """Remove a font from the manager."""
         font_info = self.get_font_info_by_path(font_path)
         if font_info:
+            self._keep_notes([font_info])
             self.fonts.remove(font_info)
             self._font_paths_set.remove(font_path)
-            filename = os.path.basename(font_path)
-            if filename in self._font_filenames_dict:
-                del self._font_filenames_dict[filename]
+            self.content_index.remove(font_path)
+            self.fonts_changed()
             
             # Remove from all categories
             for category in self.categories.values():
                 if font_path in category.fonts_list:
                     category.fonts_list.remove(font_path)
+                    self.notify_change('category_font_removed', category=category, font_path=font_path)
+            self.notify_change('font_removed', font_path=font_path)
             return True
         return False
 
+    def prune_missing_fonts(self):
+        """Remove fonts whose files no longer exist (e.g. of a catalog loaded from the database)."""
+        # Category members are kept, the font may only be temporarily unavailable
+        missing = [f for f in self.fonts if not font_exists(f.file_path)]
+        if not missing:
+            return 0
+        self._remove_loaded_fonts({f.font_path for f in missing})
+        logger.info(f"Removed {len(missing)} fonts whose files no longer exist")
+        return len(missing)
+
+    def _remove_loaded_fonts(self, font_paths):
+        """Remove fonts from the font list only; category members are kept."""
+        if not font_paths:
+            return
+        self._keep_notes(f for f in self.fonts_with_notes() if f.font_path in font_paths)
+        if isinstance(self.fonts, LazyFontList):
+            self.fonts.remove_paths(font_paths)
+        else:
+            self.fonts = [f for f in self.fonts if f.font_path not in font_paths]
+        self._font_paths_set -= font_paths
+        for font_path in font_paths:
+            self.content_index.remove(font_path)
+        self.fonts_changed()
+        with self.batch_changes():
+            for font_path in font_paths:
+                self.notify_change('font_removed', font_path=font_path)
+
     def get_fonts_in_category(self, category_label):
         """Get all FontInfo objects in a category."""
         if category_label not in self.categories:
@@ -210,6 +909,7 @@ class FontManager:
             category = self.categories[category_label]
             if font_path in category.fonts_list:
                 category.fonts_list.remove(font_path)
+                self.notify_change('category_font_removed', category=category, font_path=font_path)
                 self.update_category_info(category_label)
                 return True
         return False
@@ -218,25 +918,159 @@ class FontManager:
         """Remove all fonts from a category."""
         if category_label in self.categories:
             self.categories[category_label].fonts_list.clear()
+            self.notify_change('category_cleared', category=self.categories[category_label])
             self.update_category_info(category_label)
             return True
         return False
 
+    def index_font_files(self):
+        """Record the loaded fonts missing from the content index (e.g. loaded from a snapshot)."""
+        for font_path in self.get_columns().values('font_path'):
+            # Faces after the first of a collection share the file of face 0; fonts in archives have no file
+            if (font_path not in self.content_index and not split_font_key(font_path)[1]
+                    and not is_archive_path(font_path)):
+                self.content_index.add(font_path)
+
     def get_duplicate_fonts(self):
-        """Get a list of all duplicate fonts based on filename (case-insensitive)."""
-        duplicates = {}
-        for filename, path in self._font_filenames_dict.items():
-            all_paths = [f.font_path for f in self.fonts 
-                        if os.path.basename(f.font_path).lower() == filename]
-            if len(all_paths) > 1:
-                duplicates[filename] = all_paths
-        return duplicates
+        """
+        Get all loaded fonts with identical file content.
+
+        Returns:
+            dict: content digest (blake2b) -> list of font paths, one per distinct file
+        """
+        self.index_font_files()
+        return {digest: paths for digest, _, paths in
+                self.content_index.duplicate_groups(self._font_paths_set)}
+
+    def get_duplicate_report(self):
+        """
+        Duplicate analysis of the loaded fonts.
+
+        Returns:
+            dict: 'duplicates': [(digest, size, [paths])] identical files, most wasted space first,
+                  'name_conflicts': {lowercase file name: [paths]} same name, different content,
+                  'links': [('hardlink' or 'symlink', [paths])] paths of the same file
+        """
+        self.index_font_files()
+        return {
+            'duplicates': self.content_index.duplicate_groups(self._font_paths_set),
+            'name_conflicts': self.content_index.name_conflicts(self._font_paths_set),
+            'links': self.content_index.link_groups(),
+        }
+
+    def get_duplicate_groups(self, signatures=None):
+        """
+        Group the loaded fonts into exact duplicates and near-duplicates (same family,
+        style and version in different files that render alike), see font_duplicates.py.
+
+        Args:
+            signatures: GlyphSignatureIndex to compare glyphs with, self.glyph_signatures if None
+
+        Returns:
+            list: DuplicateGroup objects, most wasted space first
+        """
+        from .font_duplicates import DuplicateFinder
+        return DuplicateFinder(self, signatures).run()
+
+    def replace_font_in_categories(self, old_path, new_path, update_info=True):
+        """
+        Make every category that contains old_path contain new_path instead, at the same position.
+
+        Args:
+            update_info: Refresh the category info (preview) right away; callers replacing
+                         several fonts pass False and call update_category_info() once at the end
+
+        Returns:
+            list: Labels of the changed categories
+        """
+        labels = self.get_font_categories(old_path)
+        with self.batch_changes():
+            for label in labels:
+                category = self.categories[label]
+                position = category.fonts_list.index(old_path)
+                if new_path in category.fonts_list:
+                    del category.fonts_list[position]
+                    self.notify_change('category_font_removed', category=category, font_path=old_path)
+                else:
+                    category.fonts_list[position] = new_path
+                    self.notify_change('category_font_replaced', category=category, old_path=old_path,
+                                       new_path=new_path)
+                if update_info:
+                    self.update_category_info(label)
+        return labels
+
+    def resolve_duplicates(self, keep_path, duplicate_paths, quarantine_dir):
+        """
+        Keep one copy of a font: the duplicates are moved to quarantine_dir (below it
+        at their original path) and removed from the catalog, their category
+        references are replaced with keep_path. Moving a collection file removes all
+        its faces, their references go to the same face of keep_path; single faces
+        of a collection can't be moved.
+
+        Returns:
+            tuple: (moved paths, {path: error message} of files that could not be moved)
+        """
+        import shutil
+        moved, failed = [], {}
+        changed_categories = set()
+        with self.batch_changes():
+            for font_path in duplicate_paths:
+                if font_path == keep_path:
+                    continue
+                if split_font_key(font_path)[1]:
+                    failed[font_path] = "face of a font collection that holds other faces as well"
+                    continue
+                if is_archive_path(font_path):
+                    failed[font_path] = "font inside an archive"
+                    continue
+                target = os.path.join(quarantine_dir, os.path.splitdrive(font_path)[1].lstrip(os.sep))
+                try:
+                    os.makedirs(os.path.dirname(target), exist_ok=True)
+                    shutil.move(font_path, target)
+                except OSError as e:
+                    logger.warning(f"Cannot move {font_path} to quarantine: {e}")
+                    failed[font_path] = str(e)
+                    continue
+                faces = [font_path]
+                if font_path.lower().endswith(COLLECTION_EXTENSIONS):
+                    faces = [key for key in self._font_paths_set if split_font_key(key)[0] == font_path]
+                keep_file = split_font_key(keep_path)[0]
+                for face in faces:
+                    keep_face = font_key(keep_file, split_font_key(face)[1])
+                    changed_categories.update(self.replace_font_in_categories(face, keep_face, update_info=False))
+                    self._move_note(face, keep_face)
+                    self.remove_font(face)
+                moved.append(font_path)
+            for label in changed_categories:
+                self.update_category_info(label)
+        logger.info(f"Moved {len(moved)} duplicate fonts of {keep_path} to {quarantine_dir}")
+        return moved, failed
+
+    def get_note_by_path(self, font_path):
+        """User note of a font by path, also of fonts that are not loaded."""
+        if font_path in self._font_paths_set:
+            font_info = self.get_font_info_by_path(font_path)
+            return font_info.user_note if font_info else ""
+        return self._pending_notes.get(font_path, "")
+
+    def _move_note(self, old_path, new_path):
+        """Moves the note of a font to another one (appended to a different note it has)."""
+        note = self.get_note_by_path(old_path)
+        if not note:
+            return
+        kept = self.get_note_by_path(new_path)
+        if kept and note not in kept:
+            note = f"{kept}\n{note}"
+        elif kept:
+            note = kept
+        self.set_note_by_path(new_path, note)
+        self.set_note_by_path(old_path, "")
 
     def save_to_file(self, filepath):
         """Save the font manager state to a JSON file."""
         try:
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(self.to_dict(), f, indent=4, ensure_ascii=False)
+            from .utils import atomic_write
+            atomic_write(filepath, json.dumps(self.to_dict(), indent=4, ensure_ascii=False))
             return True
         except Exception as e:
             logger.error(f"Error saving font manager state: {e}")
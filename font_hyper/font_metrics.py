@@ -0,0 +1,150 @@
+# font_metrics.py
+# for license info (GPL3), see license.txt from font_hyper package
+
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+PANOSE_FIELDS = (
+    'bFamilyType', 'bSerifStyle', 'bWeight', 'bProportion', 'bContrast',
+    'bStrokeVariation', 'bArmStyle', 'bLetterForm', 'bMidline', 'bXHeight'
+)
+
+# Column name -> numpy dtype of FontMetricsTable (panose is stored separately as (n, 10) uint8)
+METRIC_COLUMNS = {
+    'weight': np.uint16,         # OS/2 usWeightClass
+    'width': np.uint8,           # OS/2 usWidthClass
+    'x_height': np.int16,        # OS/2 sxHeight, font units
+    'cap_height': np.int16,      # OS/2 sCapHeight, font units
+    'italic_angle': np.float32,  # post.italicAngle, degrees
+    'units_per_em': np.uint16,   # head.unitsPerEm
+    'glyph_count': np.uint32,    # maxp.numGlyphs
+    'fixed_pitch': np.bool_,     # post.isFixedPitch
+}
+
+
+def extract_font_metrics(font):
+    """
+    Reads numeric metrics from an opened fontTools TTFont.
+
+    Missing tables leave their values out of the result, so fonts without an
+    OS/2 table (old Mac fonts) still get head/post/maxp values; so do the
+    heights of OS/2 tables older than version 2.
+
+    Returns:
+        dict: Keys of METRIC_COLUMNS plus 'panose' (list of 10 ints)
+    """
+    metrics = {}
+    if 'OS/2' in font:
+        os2 = font['OS/2']
+        metrics['weight'] = int(os2.usWeightClass)
+        metrics['width'] = int(os2.usWidthClass)
+        # Only OS/2 version 2 and later have the heights
+        if getattr(os2, 'sxHeight', None) is not None:
+            metrics['x_height'] = int(os2.sxHeight)
+            metrics['cap_height'] = int(os2.sCapHeight)
+        panose = getattr(os2, 'panose', None)
+        if panose is not None:
+            metrics['panose'] = [int(getattr(panose, field, 0)) for field in PANOSE_FIELDS]
+    if 'post' in font:
+        metrics['italic_angle'] = float(font['post'].italicAngle)
+        metrics['fixed_pitch'] = bool(font['post'].isFixedPitch)
+    if 'head' in font:
+        metrics['units_per_em'] = int(font['head'].unitsPerEm)
+    if 'maxp' in font:
+        metrics['glyph_count'] = int(font['maxp'].numGlyphs)
+    return metrics
+
+
+class FontMetricsTable:
+    """
+    Columnar, NumPy-backed metrics of a font list; row i belongs to fonts[i].
+    Filters are evaluated as vectorized boolean masks. Values a font doesn't have
+    (no OS/2 table, fonts imported from fontconfig) are 0 in their column and False
+    in present[column], and never match a filter.
+    """
+    def __init__(self, size=0):
+        self.size = size
+        self.columns = {name: np.zeros(size, dtype=dtype) for name, dtype in METRIC_COLUMNS.items()}
+        self.panose = np.zeros((size, len(PANOSE_FIELDS)), dtype=np.uint8)
+        # Column name (or 'panose') -> rows that have the value
+        self.present = {name: np.zeros(size, dtype=bool) for name in (*METRIC_COLUMNS, 'panose')}
+
+    @property
+    def has_metrics(self):
+        """Rows with any metric."""
+        return np.logical_or.reduce(list(self.present.values()))
+
+    @classmethod
+    def from_fonts(cls, fonts):
+        """Builds the table from FontInfo objects (their .metrics dicts)."""
+        table = cls(len(fonts))
+        for row, font in enumerate(fonts):
+            metrics = getattr(font, 'metrics', None)
+            if not metrics:
+                continue
+            for name, column in table.columns.items():
+                value = metrics.get(name)
+                if value is not None:
+                    column[row] = value
+                    table.present[name][row] = True
+            panose = metrics.get('panose')
+            if panose:
+                table.panose[row] = panose[:len(PANOSE_FIELDS)]
+                table.present['panose'][row] = True
+        return table
+
+    def __getitem__(self, name):
+        if name == 'x_height_ratio':
+            return self._ratio('x_height')
+        if name == 'cap_height_ratio':
+            return self._ratio('cap_height')
+        if name.startswith('panose_'):
+            return self.panose[:, PANOSE_FIELDS.index(name[len('panose_'):])]
+        return self.columns[name]
+
+    def _ratio(self, name):
+        """A height column relative to units_per_em, so fonts with different em sizes compare."""
+        em = self.columns['units_per_em'].astype(np.float32)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(em > 0, self.columns[name] / em, 0.0)
+
+    def present_mask(self, name):
+        """Rows that have a value in the column of name (as accepted by __getitem__)."""
+        if name in ('x_height_ratio', 'cap_height_ratio'):
+            return self.present[name[:-len('_ratio')]] & self.present['units_per_em']
+        if name.startswith('panose_'):
+            return self.present['panose']
+        return self.present[name]
+
+    def range_mask(self, name, minimum=None, maximum=None):
+        """Rows whose column value lies in [minimum, maximum]; rows without the value never match."""
+        values = self[name]
+        mask = self.present_mask(name).copy()
+        if minimum is not None:
+            mask &= values >= minimum
+        if maximum is not None:
+            mask &= values <= maximum
+        return mask
+
+    def mask(self, filters):
+        """
+        Combines several filters into one boolean mask.
+
+        Args:
+            filters (dict): column name -> (min, max) range, or bool for flag columns,
+                            e.g. {'weight': (600, 900), 'fixed_pitch': True}
+
+        Returns:
+            np.ndarray: Boolean mask of length self.size (all True for no filters)
+        """
+        result = np.ones(self.size, dtype=bool)
+        for name, condition in (filters or {}).items():
+            if isinstance(condition, bool):
+                result &= self.present_mask(name) & (self[name].astype(bool) == condition)
+            else:
+                minimum, maximum = condition
+                result &= self.range_mask(name, minimum, maximum)
+        return result
+#
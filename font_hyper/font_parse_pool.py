@@ -0,0 +1,369 @@
+# font_parse_pool.py
+# for license info (GPL3), see license.txt from font_hyper package
+
+import os
+import json
+import time
+import logging
+import multiprocessing
+from collections import deque
+from contextlib import contextmanager
+from multiprocessing.connection import wait
+
+from .font_info import FontInfo, load_font_faces
+from .font_archives import is_archive_path, split_archive_path
+
+logger = logging.getLogger(__name__)
+
+# Defaults, the application uses the settings in path_config.py
+PARSE_WORKERS = 2
+PARSE_TIMEOUT_S = 10.0
+# Time a new worker process gets to import the parsers before it counts as broken
+STARTUP_TIMEOUT_S = 60.0
+# Longest wait for the workers before parse() yields None, so a scan run in slices stays responsive
+POLL_INTERVAL_S = 0.01
+# Files sent to a worker at once; results come back per file, so the timeout stays per file
+CHUNK_SIZE = 8
+
+# Why a file was quarantined
+REASON_TIMEOUT = "timeout"
+REASON_CRASH = "crash"
+# Marker of the file being parsed in the application process, next to the quarantine file
+PARSING_SUFFIX = ".parsing"
+
+
+def parse_in_process(file_path, data, quarantine=None):
+    """
+    load_font_faces() in this process, for when there are no worker processes. With a
+    ParseQuarantine, the file is recorded as being parsed first (see ParseQuarantine.parsing()),
+    so a font that crashes the application, or hangs it until it is killed, is
+    quarantined at the next start instead of taking it down again.
+    """
+    if quarantine is None:
+        return load_font_faces(file_path, data)
+    with quarantine.parsing(file_path):
+        return load_font_faces(file_path, data)
+
+
+def _worker_main(conn):
+    """Parser process: receives chunks of (file path, data), sends back the FontInfo dicts of each file."""
+    conn.send(('ready', None))
+    while True:
+        try:
+            chunk = conn.recv()
+        except EOFError:
+            return
+        if chunk is None:
+            return
+        for file_path, data in chunk:
+            try:
+                result = ('ok', [fi.to_dict() for fi in load_font_faces(file_path, data)])
+            except Exception as e:
+                result = ('error', f"{type(e).__name__}: {e}")
+            conn.send(result)
+
+
+class _Worker:
+    """One parser process and the jobs (index, file path, data) it was sent and has not answered yet."""
+    def __init__(self, context):
+        self.conn, child = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child,), name="font-parser", daemon=True)
+        self.process.start()
+        child.close()
+        self.started = False
+        self.deadline = time.monotonic() + STARTUP_TIMEOUT_S
+        self.pending = deque()
+
+    def send(self, jobs, timeout):
+        self.conn.send([(file_path, data) for _, file_path, data in jobs])
+        self.pending.extend(jobs)
+        if self.started:
+            self.deadline = time.monotonic() + timeout
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+            self.process.join(1.0)
+        except (OSError, ValueError):
+            pass
+        self.kill()
+
+    def kill(self):
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+
+class FontParsePool:
+    """
+    Parses font files (load_font_faces) in worker processes, so a font that crashes
+    freetype or fontTools, or makes them hang, takes down a worker instead of the
+    application. Every file gets timeout seconds once its worker starts on it; a
+    worker that dies or overruns is replaced, and the file it was on is reported
+    as failed. Workers are started on first use and kept for later scans. parse()
+    never waits for them longer than POLL_INTERVAL_S at a time, see BackgroundScan.
+    """
+    def __init__(self, workers=PARSE_WORKERS, timeout=PARSE_TIMEOUT_S):
+        self.workers = max(1, workers)
+        self.timeout = timeout
+        # Forking a process with a Tk main loop and threads is not safe, workers start fresh
+        self._context = multiprocessing.get_context('spawn')
+        self._workers = []
+        self.enabled = True  # False once worker processes failed to start
+
+    def close(self):
+        for worker in self._workers:
+            worker.stop()
+        self._workers = []
+
+    def _restart(self, worker):
+        worker.kill()
+        replacement = _Worker(self._context)
+        self._workers[self._workers.index(worker)] = replacement
+        return replacement
+
+    def parse(self, jobs, quarantine=None):
+        """
+        Parses font files in the workers; the job iterable is consumed as workers get idle.
+        If the worker processes can't be started, the files are parsed in this process,
+        guarded by quarantine (see parse_in_process()).
+
+        Args:
+            jobs: Iterable of (file path, data), data the content of the file if it was read already (archive members)
+            quarantine (ParseQuarantine): Quarantine of the scan, or None
+
+        Yields:
+            tuple: (file path, fonts, failure) in job order; fonts a list of FontInfo,
+                   failure None, REASON_TIMEOUT or REASON_CRASH. None when no result
+                   arrived within POLL_INTERVAL_S (the workers are still busy or starting).
+        """
+        jobs = iter(jobs)
+        if self.enabled:
+            while len(self._workers) < self.workers:
+                self._workers.append(_Worker(self._context))
+            if not (yield from self._parse_in_workers(jobs, quarantine)):
+                return
+            logger.error("Font parser processes failed, parsing in-process")
+            self.close()
+            self.enabled = False
+        for file_path, data in jobs:
+            yield file_path, parse_in_process(file_path, data, quarantine), None
+
+    def _parse_in_workers(self, jobs, quarantine):
+        """
+        The work of parse(); returns True if a worker process failed to start, after parsing
+        the files without a result in this process, with the rest of jobs left to the caller.
+        """
+        retries = deque()  # jobs of a replaced worker that it never answered
+        results = {}  # job index -> result, until the results before it are yielded
+        next_index = 0
+        next_result = 0
+        exhausted = False
+        failed = False
+
+        def outstanding():
+            unanswered = [job for worker in self._workers for job in worker.pending] + list(retries)
+            for worker in self._workers:
+                worker.pending.clear()
+            return sorted(unanswered, key=lambda job: job[0])
+
+        try:
+            while not failed:
+                for worker in list(self._workers):
+                    if worker.pending:
+                        continue
+                    chunk = [retries.popleft() for _ in range(min(CHUNK_SIZE, len(retries)))]
+                    while len(chunk) < CHUNK_SIZE and not exhausted:
+                        job = next(jobs, None)
+                        if job is None:
+                            exhausted = True
+                        else:
+                            chunk.append((next_index, *job))
+                            next_index += 1
+                    if not chunk:
+                        continue
+                    try:
+                        worker.send(chunk, self.timeout)
+                    except OSError as e:
+                        # The process is gone before it got the files
+                        worker.pending.clear()
+                        retries.extendleft(reversed(chunk))
+                        if not worker.started:
+                            logger.error(f"Font parser process failed to start: {e}")
+                            failed = True
+                            break
+                        self._restart(worker)
+                busy = [worker for worker in self._workers if worker.pending]
+                if failed or not busy:
+                    break
+
+                timeout = min(POLL_INTERVAL_S, min(worker.deadline for worker in busy) - time.monotonic())
+                ready = wait([worker.conn for worker in busy], max(0.0, timeout))
+                now = time.monotonic()
+                for worker in busy:
+                    if worker.conn in ready:
+                        try:
+                            status, value = worker.conn.recv()
+                        except (EOFError, OSError):
+                            status, value = 'died', None
+                        if status == 'ready':
+                            worker.started = True
+                            worker.deadline = now + self.timeout
+                            continue
+                        if status != 'died':
+                            index, file_path, _ = worker.pending.popleft()
+                            if status == 'error':
+                                logger.warning(f"Cannot read {file_path}: {value}")
+                            fonts = [FontInfo.from_dict(data) for data in value] if status == 'ok' else []
+                            results[index] = (file_path, fonts, None)
+                            worker.deadline = now + self.timeout
+                            continue
+                        reason = REASON_CRASH
+                    elif now >= worker.deadline:
+                        reason = REASON_TIMEOUT
+                    else:
+                        continue
+                    if not worker.started:
+                        logger.error(f"Font parser process failed to start ({reason})")
+                        failed = True
+                        break
+                    index, file_path, _ = worker.pending.popleft()
+                    logger.info(f"Parsing {file_path} failed ({reason}), restarting the parser process")
+                    results[index] = (file_path, [], reason)
+                    retries.extend(worker.pending)
+                    worker.pending.clear()
+                    self._restart(worker)
+
+                if next_result not in results:
+                    yield None
+                while next_result in results:
+                    yield results.pop(next_result)
+                    next_result += 1
+            if not failed:
+                return False
+            # Not a font problem: the processes can't run, the files without a result are parsed here
+            for index, file_path, data in outstanding():
+                results[index] = (file_path, parse_in_process(file_path, data, quarantine), None)
+            for index in sorted(results):
+                yield results[index]
+            return True
+        finally:
+            # Stopped early (or failed): answers still on their way would mix with the next scan
+            for worker in self._workers:
+                if worker.pending:
+                    worker.kill()
+            self._workers = [worker for worker in self._workers if not worker.pending]
+
+
+class ParseQuarantine:
+    """
+    Font files that crashed or hung a parser process, persisted as JSON. Scans skip
+    them until the file changes (size or mtime; for fonts in an archive, the archive).
+    Files parsed in the application process are guarded by parsing(), which leaves
+    the path in a marker file next to the JSON while the parse runs.
+    """
+    def __init__(self, file_path=None):
+        self.file_path = file_path
+        self.entries = {}  # font file path -> {'reason', 'size', 'mtime_ns', 'time'}
+
+    @property
+    def marker_path(self):
+        return self.file_path + PARSING_SUFFIX if self.file_path else None
+
+    @contextmanager
+    def parsing(self, file_path):
+        """
+        Records file_path as being parsed in this process until the block ends; if the
+        process dies first, load() quarantines it. The marker is rewritten per file but
+        not fsynced: it has to survive the process, not the system.
+        """
+        if not self.marker_path:
+            yield
+            return
+        try:
+            with open(self.marker_path, 'w', encoding='utf-8') as f:
+                f.write(file_path)
+        except OSError as e:
+            logger.debug(f"Cannot write {self.marker_path}: {e}")
+        try:
+            yield
+        finally:
+            try:
+                os.unlink(self.marker_path)
+            except OSError:
+                pass
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, file_path):
+        return file_path in self.entries
+
+    @staticmethod
+    def _stat(file_path):
+        return os.stat(split_archive_path(file_path)[0])
+
+    def is_quarantined(self, file_path, st=None):
+        """True if file_path is quarantined and did not change since."""
+        entry = self.entries.get(file_path)
+        if entry is None:
+            return False
+        try:
+            if st is None or is_archive_path(file_path):
+                st = self._stat(file_path)
+        except OSError:
+            return False
+        return (st.st_size, st.st_mtime_ns) == (entry['size'], entry['mtime_ns'])
+
+    def add(self, file_path, reason):
+        try:
+            st = self._stat(file_path)
+        except OSError:
+            return
+        self.entries[file_path] = {'reason': reason, 'size': st.st_size, 'mtime_ns': st.st_mtime_ns,
+                                   'time': time.time()}
+        self.save()
+
+    def remove(self, file_paths):
+        """Gives files another chance in the next scan."""
+        for file_path in file_paths:
+            self.entries.pop(file_path, None)
+        self.save()
+
+    def save(self):
+        if not self.file_path:
+            return False
+        try:
+            from .utils import atomic_write
+            atomic_write(self.file_path, json.dumps(self.entries, indent=1, sort_keys=True))
+            return True
+        except Exception as e:
+            logger.error(f"Error saving parse quarantine: {e}")
+            return False
+
+    def load(self, file_path):
+        """
+        Loads the quarantine list written by save(); later changes are saved to file_path.
+        A file whose in-process parse the last session didn't survive (see parsing()) is added.
+        """
+        self.file_path = file_path
+        loaded = False
+        try:
+            if os.path.exists(file_path):
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f)
+                loaded = True
+        except Exception as e:
+            logger.error(f"Error loading parse quarantine: {e}")
+        try:
+            with open(self.marker_path, 'r', encoding='utf-8') as f:
+                crashed = f.read()
+            os.unlink(self.marker_path)
+        except OSError:
+            crashed = ""
+        if crashed:
+            logger.warning(f"The last session ended while parsing {crashed}, quarantined")
+            self.add(crashed, REASON_CRASH)
+        return loaded
+#
@@ -0,0 +1,417 @@
+# font_query.py
+# for license info (GPL3), see license.txt from font_hyper package
+#
+# Query syntax of the search box, e.g.
+#   license:OFL style:bold weight>=700 covers:"€→" cat:Futuristic -path:/usr/share note:"client x"
+# Bare words search name, file and path; a leading '-' negates a term.
+
+import re
+import logging
+from collections import OrderedDict
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+TOKEN_RE = re.compile(
+    r'''\s*(?P<neg>-?)'''
+    r'''(?:(?P<field>[A-Za-z_]+)\s*(?P<op>>=|<=|!=|:|>|<|=)\s*)?'''
+    r'''(?:"(?P<dq>[^"]*)"?|'(?P<sq>[^']*)'?|(?P<word>[^\s"']+))'''
+)
+
+RANGE_RE = re.compile(r'^(-?[\d.]+)-(-?[\d.]+)$')
+
+TEXT_FIELDS = {
+    'name': 'name', 'family': 'name', 'file': 'file', 'path': 'path',
+    'style': 'style', 'license': 'license', 'lic': 'license', 'info': 'info',
+}
+
+NUMERIC_FIELDS = {
+    'weight': 'weight', 'width': 'width',
+    'xheight': 'x_height_ratio', 'x_height': 'x_height_ratio',
+    'capheight': 'cap_height_ratio', 'cap_height': 'cap_height_ratio', 'cap': 'cap_height_ratio',
+    'italic': 'italic_angle', 'angle': 'italic_angle',
+    'glyphs': 'glyph_count', 'upm': 'units_per_em',
+}
+
+FLAG_VALUES = {'yes': True, 'true': True, '1': True, 'no': False, 'false': False, '0': False}
+
+# Cost factors relative to a trigram lookup; used to order predicates with similar selectivity
+COST_INDEXED = 1.0
+COST_VERIFY = 4.0
+COST_RENDER = 200.0
+
+# Number of recent query results kept for incremental search and backspace
+QUERY_CACHE_SIZE = 16
+
+
+class Predicate:
+    """One term of a compiled query; subclasses know how to use the indexes."""
+    cost = COST_INDEXED
+    # Depends on data that changes without a new catalog revision (notes, categories)
+    volatile = False
+
+    def __init__(self, negate=False):
+        self.negate = negate
+
+    def implies(self, other):
+        """True if every row matching self also matches other."""
+        return type(self) is type(other) and repr(self) == repr(other)
+
+    def estimate(self, index):
+        """Estimated number of matching rows (used to pick the most selective predicate first)."""
+        return index.size
+
+    def evaluate(self, index, rows):
+        """Sorted subset of rows (or of all rows, if rows is None) matching the predicate."""
+        raise NotImplementedError
+
+    def __repr__(self):
+        return f"{'-' if self.negate else ''}{self.__class__.__name__}({self.describe()})"
+
+    def describe(self):
+        return ""
+
+
+class TextPredicate(Predicate):
+    """Substring match on a trigram-indexed field."""
+    def __init__(self, field, value, negate=False):
+        super().__init__(negate)
+        self.field = field
+        self.value = value.lower()
+
+    def implies(self, other):
+        if type(self) is not type(other) or self.field != other.field or self.negate != other.negate:
+            return False
+        # "helv" narrows "hel"; excluding "he" narrows excluding "hel"
+        return other.value in self.value if not self.negate else self.value in other.value
+
+    def estimate(self, index):
+        return index.trigram_index(self.field).estimate(self.value)
+
+    def evaluate(self, index, rows):
+        return index.trigram_index(self.field).search(self.value, rows)
+
+    def describe(self):
+        return f"{self.field}~{self.value!r}"
+
+
+class NotePredicate(Predicate):
+    """Substring match on user notes; notes change often and are verified directly."""
+    cost = COST_VERIFY
+    volatile = True
+
+    def __init__(self, value, negate=False):
+        super().__init__(negate)
+        self.value = value.lower()
+
+    def evaluate(self, index, rows):
+        rows = index.all_rows() if rows is None else rows
+        return np.array([r for r in rows if self.value in index.note(r).lower()], dtype=np.int32)
+
+    def describe(self):
+        return f"note~{self.value!r}"
+
+
+class RangePredicate(Predicate):
+    """Numeric comparison on a metrics column, evaluated as a vectorized mask."""
+    def __init__(self, column, minimum=None, maximum=None, exclude=None, negate=False):
+        super().__init__(negate)
+        self.column = column
+        self.minimum = minimum
+        self.maximum = maximum
+        self.exclude = exclude
+        self._mask = None
+
+    def mask(self, index):
+        if self._mask is None or len(self._mask) != index.size:
+            if index.metrics is None:
+                self._mask = np.zeros(index.size, dtype=bool)
+            else:
+                self._mask = index.metrics.range_mask(self.column, self.minimum, self.maximum)
+                if self.exclude is not None:
+                    self._mask &= index.metrics[self.column] != self.exclude
+        return self._mask
+
+    def estimate(self, index):
+        return int(np.count_nonzero(self.mask(index)))
+
+    def evaluate(self, index, rows):
+        mask = self.mask(index)
+        if rows is None:
+            return np.flatnonzero(mask).astype(np.int32)
+        return rows[mask[rows]]
+
+    def describe(self):
+        return f"{self.minimum}<={self.column}<={self.maximum}" + (f" != {self.exclude}" if self.exclude is not None else "")
+
+
+class FlagPredicate(RangePredicate):
+    """Boolean metrics column such as fixed_pitch."""
+    def __init__(self, column, value=True, negate=False):
+        super().__init__(column, negate=negate)
+        self.value = value
+
+    def mask(self, index):
+        if self._mask is None or len(self._mask) != index.size:
+            if index.metrics is None:
+                self._mask = np.zeros(index.size, dtype=bool)
+            else:
+                self._mask = index.metrics.mask({self.column: self.value})
+        return self._mask
+
+    def describe(self):
+        return f"{self.column}={self.value}"
+
+
+class CategoryPredicate(Predicate):
+    """Membership in a category (label matched case-insensitively)."""
+    volatile = True
+
+    def __init__(self, label, categories, negate=False):
+        super().__init__(negate)
+        self.label = label
+        wanted = label.lower()
+        self.font_paths = []
+        for category_label, category in (categories or {}).items():
+            if category_label.lower() == wanted:
+                self.font_paths = category.fonts_list
+                break
+        self._rows = None
+
+    def rows(self, index):
+        if self._rows is None:
+            self._rows = index.rows_of_paths(self.font_paths)
+        return self._rows
+
+    def estimate(self, index):
+        return len(self.font_paths)
+
+    def evaluate(self, index, rows):
+        members = self.rows(index)
+        if rows is None:
+            return members
+        return np.intersect1d(rows, members, assume_unique=True)
+
+    def describe(self):
+        return f"cat={self.label!r}"
+
+
+class CoversPredicate(Predicate):
+    """
+    Fonts having glyphs for all given characters, from the cached coverage of the fonts
+    (see font_coverage.py); fonts not cached yet need their file read, so it runs last.
+    """
+    cost = COST_RENDER
+
+    def __init__(self, chars, negate=False):
+        super().__init__(negate)
+        self.chars = "".join(dict.fromkeys(c for c in chars if not c.isspace()))
+
+    def evaluate(self, index, rows):
+        rows = index.all_rows() if rows is None else rows
+        return index.covers(rows, self.chars)
+
+    def describe(self):
+        return f"covers={self.chars!r}"
+
+
+def _parse_number(text):
+    return float(text) if '.' in text else int(text)
+
+
+def _numeric_predicate(column, op, value, negate):
+    """Builds a RangePredicate from 'weight>=700', 'weight:600-900' or 'weight:400'."""
+    range_match = RANGE_RE.match(value)
+    if op == ':' and range_match:
+        return RangePredicate(column, _parse_number(range_match.group(1)),
+                              _parse_number(range_match.group(2)), negate=negate)
+    number = _parse_number(value)
+    if op in (':', '='):
+        return RangePredicate(column, number, number, negate=negate)
+    if op == '!=':
+        return RangePredicate(column, exclude=number, negate=negate)
+    if op == '>=':
+        return RangePredicate(column, minimum=number, negate=negate)
+    if op == '<=':
+        return RangePredicate(column, maximum=number, negate=negate)
+    if op == '>':
+        step = 1 if isinstance(number, int) else 1e-6
+        return RangePredicate(column, minimum=number + step, negate=negate)
+    if op == '<':
+        step = 1 if isinstance(number, int) else 1e-6
+        return RangePredicate(column, maximum=number - step, negate=negate)
+    raise ValueError(f"Unsupported operator {op!r}")
+
+
+class FontQuery:
+    """
+    A parsed search box query.
+
+    compile() turns the terms into predicates, execute() runs them against a
+    FontSearchIndex: the most selective positive predicate produces the first
+    candidate set, every further predicate only looks at the remaining rows.
+    """
+    def __init__(self, text, predicates):
+        self.text = text
+        self.predicates = predicates
+
+    @classmethod
+    def parse(cls, text, categories=None):
+        predicates = []
+        for match in TOKEN_RE.finditer(text or ""):
+            negate = bool(match.group('neg'))
+            field = (match.group('field') or "").lower()
+            op = match.group('op')
+            value = next((v for v in (match.group('dq'), match.group('sq'), match.group('word')) if v is not None), "")
+            try:
+                predicate = cls._make_predicate(field, op, value, negate, categories)
+            except ValueError:
+                predicate = None
+            if predicate is None:
+                # Unknown field or malformed value: search the raw token as text
+                raw = match.group(0).strip().lstrip('-').strip('"\'')
+                predicate = TextPredicate('text', raw, negate) if raw else None
+            if predicate is not None:
+                predicates.append(predicate)
+        return cls(text, predicates)
+
+    @staticmethod
+    def _make_predicate(field, op, value, negate, categories):
+        if not field:
+            return TextPredicate('text', value, negate) if value else None
+        if field in TEXT_FIELDS and op == ':':
+            return TextPredicate(TEXT_FIELDS[field], value, negate)
+        if field in NUMERIC_FIELDS:
+            return _numeric_predicate(NUMERIC_FIELDS[field], op, value, negate)
+        if field == 'note' and op == ':':
+            return NotePredicate(value, negate)
+        if field in ('cat', 'category') and op == ':':
+            return CategoryPredicate(value, categories, negate)
+        if field == 'covers' and op == ':':
+            return CoversPredicate(value, negate)
+        if field in ('mono', 'monospace', 'fixed') and op == ':':
+            if value.lower() not in FLAG_VALUES:
+                raise ValueError(f"Not a flag value: {value!r}")
+            return FlagPredicate('fixed_pitch', FLAG_VALUES[value.lower()], negate)
+        if field == 'is' and op == ':':
+            if value.lower() in ('mono', 'monospace', 'fixed'):
+                return FlagPredicate('fixed_pitch', True, negate)
+            if value.lower() == 'italic':
+                return RangePredicate('italic_angle', exclude=0, negate=negate)
+        return None
+
+    def split_words(self):
+        """
+        Separates plain positive words from the other terms (used by the fuzzy search).
+
+        Returns:
+            tuple: (list of words, FontQuery with the remaining predicates)
+        """
+        words = []
+        rest = []
+        for predicate in self.predicates:
+            if isinstance(predicate, TextPredicate) and predicate.field == 'text' and not predicate.negate:
+                words.append(predicate.value)
+            else:
+                rest.append(predicate)
+        return words, FontQuery(self.text, rest)
+
+    @property
+    def is_empty(self):
+        return not self.predicates
+
+    @property
+    def volatile(self):
+        return any(p.volatile for p in self.predicates)
+
+    @property
+    def key(self):
+        """Normalized form of the query, independent of spacing and quoting."""
+        return tuple(sorted(repr(p) for p in self.predicates))
+
+    def refines(self, other):
+        """True if the result of self is a subset of the result of other (e.g. "helv" refines "hel")."""
+        return all(any(p.implies(q) for p in self.predicates) for q in other.predicates)
+
+    def plan(self, index):
+        """
+        Orders the predicates for execution.
+
+        Returns:
+            list: (predicate, estimate) pairs; positive predicates by estimate * cost,
+                  then negated ones, expensive file-reading predicates last
+        """
+        positive = [(p, p.estimate(index)) for p in self.predicates if not p.negate]
+        negative = [(p, p.estimate(index)) for p in self.predicates if p.negate]
+        positive.sort(key=lambda item: item[1] * item[0].cost)
+        negative.sort(key=lambda item: item[0].cost)
+        return positive + negative
+
+    def execute(self, index, rows=None):
+        """
+        Runs the query.
+
+        Args:
+            index (FontSearchIndex): Index of the current font list
+            rows (np.ndarray): Optional sorted rows known to contain all matches,
+                               e.g. the result of a query this one refines
+
+        Returns:
+            np.ndarray: Sorted rows of matching fonts (all rows for an empty query)
+        """
+        for predicate, estimate in self.plan(index):
+            if rows is not None and len(rows) == 0:
+                break
+            if predicate.negate:
+                current = index.all_rows() if rows is None else rows
+                matched = predicate.evaluate(index, current)
+                rows = np.setdiff1d(current, matched, assume_unique=True)
+            else:
+                rows = predicate.evaluate(index, rows)
+        return index.all_rows() if rows is None else rows
+
+
+class QueryResultCache:
+    """
+    Results of recent queries, for incremental search while typing.
+
+    A query that refines a cached one ("hel" -> "helv") is only evaluated over the
+    rows of the smallest such result; repeating a cached query (backspace) costs
+    nothing. Entries are dropped when the index revision changes; queries on notes
+    or categories are not cached since those change without a new revision.
+    """
+    def __init__(self, max_entries=QUERY_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # query key -> (FontQuery, rows)
+        self._revision = None
+
+    def clear(self):
+        self._entries.clear()
+
+    def execute(self, query, index):
+        """Runs query against index, reusing cached results where possible."""
+        if self._revision != index.revision:
+            self._entries.clear()
+            self._revision = index.revision
+        if query.is_empty or query.volatile:
+            return query.execute(index)
+
+        key = query.key
+        cached = self._entries.get(key)
+        if cached is not None:
+            self._entries.move_to_end(key)
+            return cached[1]
+
+        base = None
+        for previous, rows in self._entries.values():
+            if (base is None or len(rows) < len(base)) and query.refines(previous):
+                base = rows
+        if base is not None:
+            logger.debug(f"Narrowing search over {len(base)} of {index.size} rows")
+        rows = query.execute(index, base)
+
+        self._entries[key] = (query, rows)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return rows
+#
@@ -0,0 +1,221 @@
+# font_search_index.py
+# for license info (GPL3), see license.txt from font_hyper package
+
+import logging
+from collections import defaultdict
+import numpy as np
+
+from .font_coverage import CoverageCache
+
+logger = logging.getLogger(__name__)
+
+EMPTY_ROWS = np.zeros(0, dtype=np.int32)
+
+
+def trigrams(text):
+    """Set of all 3-character substrings of text."""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class TrigramIndex:
+    """
+    Maps every trigram of a list of lowercase strings to the rows containing it.
+
+    Postings are kept per distinct value (license texts, styles and folders repeat
+    a lot), substring queries of 3+ characters intersect the postings of their
+    trigrams and only verify the remaining distinct values.
+    """
+    def __init__(self, value_of_row, values):
+        self.values = values
+        self.value_of_row = value_of_row
+        self.value_counts = np.bincount(value_of_row, minlength=len(self.values))
+
+        postings = defaultdict(list)
+        for value_id, text in enumerate(self.values):
+            for trigram in trigrams(text):
+                postings[trigram].append(value_id)
+        self.postings = {trigram: np.array(ids, dtype=np.int32) for trigram, ids in postings.items()}
+
+    @classmethod
+    def from_strings(cls, strings):
+        """Index of a list of lowercase strings, one per row."""
+        value_ids = {}
+        ids = np.fromiter((value_ids.setdefault(text, len(value_ids)) for text in strings),
+                          dtype=np.int32, count=len(strings))
+        return cls(ids, list(value_ids))
+
+    @classmethod
+    def from_column(cls, codes, dictionary):
+        """Index of a dictionary-encoded column (see font_columns.py); values are lowercased."""
+        used, value_of_row = np.unique(codes, return_inverse=True)
+        return cls(value_of_row.astype(np.int32), [dictionary[code].lower() for code in used.tolist()])
+
+    def __len__(self):
+        return len(self.value_of_row)
+
+    def posting(self, trigram):
+        return self.postings.get(trigram, EMPTY_ROWS)
+
+    def estimate(self, substring):
+        """Upper bound of the number of rows containing substring, without verifying."""
+        if len(substring) < 3:
+            return len(self.value_of_row)
+        return min(int(self.value_counts[self.posting(t)].sum()) for t in trigrams(substring))
+
+    def matching_values(self, substring):
+        """Ids of the distinct values containing substring."""
+        if len(substring) < 3:
+            candidates = range(len(self.values))
+        else:
+            lists = sorted((self.posting(t) for t in trigrams(substring)), key=len)
+            candidates = lists[0]
+            for ids in lists[1:]:
+                if len(candidates) == 0:
+                    break
+                candidates = np.intersect1d(candidates, ids, assume_unique=True)
+        values = self.values
+        return np.array([i for i in candidates if substring in values[i]], dtype=np.int32)
+
+    def search(self, substring, rows=None):
+        """
+        Rows whose string contains substring.
+
+        Args:
+            substring (str): Lowercase substring
+            rows (np.ndarray): Optional candidate rows to restrict the search to
+
+        Returns:
+            np.ndarray: Sorted matching rows
+        """
+        if rows is not None and len(rows) < self.estimate(substring):
+            # Verifying the given candidates is cheaper than walking the postings
+            values, value_of_row = self.values, self.value_of_row
+            return np.array([row for row in rows if substring in values[value_of_row[row]]], dtype=np.int32)
+
+        matched = np.zeros(len(self.values), dtype=bool)
+        matched[self.matching_values(substring)] = True
+        if rows is None:
+            return np.flatnonzero(matched[self.value_of_row]).astype(np.int32)
+        return rows[matched[self.value_of_row[rows]]]
+
+
+class FontSearchIndex:
+    """
+    Search structures over a font list; row i belongs to fonts[i].
+
+    Trigram indexes are built lazily per field, from the dictionary-encoded
+    columns (see font_columns.py) when given. The index is a snapshot:
+    FontManager.get_search_index() replaces it when the font list changes.
+    """
+    # field -> function returning the searchable text of a FontInfo
+    FIELDS = {
+        # The file name is part of the path, so name + path covers name, file and path
+        'text': lambda f: f"{f.font_name}\0{f.font_path}",
+        'name': lambda f: f.font_name,
+        'file': lambda f: f.font_file,
+        'path': lambda f: f.font_path,
+        'style': lambda f: f.font_style,
+        'license': lambda f: f.license,
+        'info': lambda f: f.font_info,
+    }
+    # field -> FontInfo attribute of the fields with a column of their own
+    FIELD_ATTRIBUTES = {
+        'name': 'font_name',
+        'file': 'font_file',
+        'path': 'font_path',
+        'style': 'font_style',
+        'license': 'license',
+        'info': 'font_info',
+    }
+
+    def __init__(self, fonts, metrics_table=None, revision=0, columns=None, coverage=None):
+        # With columns, fonts may be a lazily decoded list, which is not copied (and decoded) here
+        self.fonts = fonts if columns is not None else list(fonts)
+        self.size = len(self.fonts)
+        self.metrics = metrics_table
+        self.revision = revision
+        self.columns = columns
+        self.coverage = coverage if coverage is not None else CoverageCache()  # character coverage of the fonts
+        self._strings = {}
+        self._trigrams = {}
+        self._row_of_path = None
+        self._coverage_rows = None  # CoverageCache row of each font row, -2 where not looked up yet
+
+    def all_rows(self):
+        return np.arange(self.size, dtype=np.int32)
+
+    def field_strings(self, field):
+        """Lowercase strings of a field, one per font."""
+        strings = self._strings.get(field)
+        if strings is None:
+            if self.columns is not None and field == 'text':
+                strings = [f"{name}\0{path}".lower() for name, path in
+                           zip(self.columns.values('font_name'), self.columns.values('font_path'))]
+            elif self.columns is not None:
+                strings = [text.lower() for text in self.columns.values(self.FIELD_ATTRIBUTES[field])]
+            else:
+                getter = self.FIELDS[field]
+                strings = [(getter(f) or "").lower() for f in self.fonts]
+            self._strings[field] = strings
+        return strings
+
+    def value(self, attribute, row):
+        """A FontInfo attribute of the font in row, without decoding the font if there are columns."""
+        if self.columns is not None and attribute in self.columns.codes:
+            return self.columns.dictionaries[attribute][int(self.columns.codes[attribute][row])]
+        return getattr(self.fonts[row], attribute)
+
+    def note(self, row):
+        """User note of the font in row; fonts not decoded yet have none."""
+        peek = getattr(self.fonts, 'peek', None)
+        font = peek(row) if peek is not None else self.fonts[row]
+        return getattr(font, 'user_note', "") or ""
+
+    def trigram_index(self, field):
+        index = self._trigrams.get(field)
+        if index is None:
+            attribute = self.FIELD_ATTRIBUTES.get(field)
+            if self.columns is not None and attribute is not None:
+                index = TrigramIndex.from_column(self.columns.codes[attribute], self.columns.dictionaries[attribute])
+            else:
+                index = TrigramIndex.from_strings(self.field_strings(field))
+            self._trigrams[field] = index
+            logger.debug(f"Built trigram index for '{field}' with {len(index.postings)} trigrams")
+        return index
+
+    def row_of_path(self, font_path):
+        if self._row_of_path is None:
+            paths = (self.columns.values('font_path') if self.columns is not None
+                     else [f.font_path for f in self.fonts])
+            self._row_of_path = {path: row for row, path in enumerate(paths)}
+        return self._row_of_path.get(font_path)
+
+    def rows_of_paths(self, font_paths):
+        """Sorted rows of the given font paths; unknown paths are skipped."""
+        rows = [self.row_of_path(p) for p in font_paths]
+        return np.unique(np.array([r for r in rows if r is not None], dtype=np.int32))
+
+    def covers(self, rows, chars):
+        """
+        The rows whose font has glyphs for all chars. Coverage comes from the CoverageCache;
+        fonts not in it yet have their cmap read once, for this and later sessions.
+
+        Returns:
+            np.ndarray: Sorted matching rows
+        """
+        rows = np.asarray(rows, dtype=np.int32)
+        if self._coverage_rows is None:
+            self._coverage_rows = np.full(self.size, -2, dtype=np.int64)
+        cache_rows = self._coverage_rows[rows]
+        unknown = cache_rows == -2
+        if unknown.any():
+            lookup = rows[unknown]
+            if self.columns is not None:
+                paths = self.columns.values('font_path', lookup)
+            else:
+                paths = [self.fonts[row].font_path for row in lookup.tolist()]
+            found = self.coverage.rows(paths)
+            self._coverage_rows[lookup] = found
+            cache_rows[unknown] = found
+        return rows[self.coverage.covers(cache_rows, chars)]
+#
@@ -0,0 +1,339 @@
+# font_snapshot.py
+# for license info (GPL3), see license.txt from font_hyper package
+
+import json
+import mmap
+import struct
+import logging
+from collections.abc import MutableSequence
+import numpy as np
+from .font_info import FontInfo, new_font_id, split_font_key
+from .font_metrics import METRIC_COLUMNS, PANOSE_FIELDS
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"FHSNAP\0\0"
+VERSION = 2
+# magic, version, record count, string count, record size, length of the JSON meta block
+HEADER = struct.Struct('<8sIIIII')
+
+# FontInfo string attributes, stored as ids into the string table
+# (user notes are edited often and saved with contents.json, see FontManager.to_dict;
+# ids are assigned per session)
+STRING_FIELDS = ('font_name', 'font_file', 'font_family', 'font_style', 'font_path',
+                 'license', 'font_info', 'font_root', 'origin')
+METRIC_NAMES = tuple(METRIC_COLUMNS)
+
+# One fixed-width record per font; bit i of metric_mask is set if METRIC_NAMES[i] is present
+RECORD_DTYPE = np.dtype(
+    [(name, '<u4') for name in STRING_FIELDS] +
+    [('metric_mask', '<u2'), ('has_panose', 'u1')] +
+    [(name, np.dtype(dtype).newbyteorder('<')) for name, dtype in METRIC_COLUMNS.items()] +
+    [('panose', 'u1', (len(PANOSE_FIELDS),))]
+)
+
+
+def _align(position, alignment=8):
+    return (position + alignment - 1) // alignment * alignment
+
+
+def encode_snapshot(fonts, meta=None):
+    """
+    Encodes FontInfo objects into the snapshot format:
+
+        header | JSON meta | records (RECORD_DTYPE) | string offsets (uint64, count + 1) | UTF-8 blob
+
+    Sections start at 8 byte boundaries. Every distinct string is stored once.
+
+    Returns:
+        bytes: The snapshot file content
+    """
+    fonts = list(fonts)
+    interned = {}
+    records = np.zeros(len(fonts), dtype=RECORD_DTYPE)
+    for field in STRING_FIELDS:
+        records[field] = [interned.setdefault(getattr(f, field, "") or "", len(interned)) for f in fonts]
+
+    metric_bits = {name: 1 << i for i, name in enumerate(METRIC_NAMES)}
+    for row, font in enumerate(fonts):
+        metrics = getattr(font, 'metrics', None)
+        if not metrics:
+            continue
+        record = records[row]
+        mask = 0
+        for name, value in metrics.items():
+            if name in metric_bits and value is not None:
+                record[name] = value
+                mask |= metric_bits[name]
+        record['metric_mask'] = mask
+        panose = metrics.get('panose')
+        if panose:
+            record['panose'] = panose
+            record['has_panose'] = 1
+
+    encoded = [text.encode('utf-8') for text in interned]
+    offsets = np.zeros(len(encoded) + 1, dtype='<u8')
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    meta_bytes = json.dumps(meta or {}).encode('utf-8')
+
+    parts = [HEADER.pack(MAGIC, VERSION, len(fonts), len(encoded), RECORD_DTYPE.itemsize, len(meta_bytes)),
+             meta_bytes]
+    position = HEADER.size + len(meta_bytes)
+    for section in (records.tobytes(), offsets.tobytes()):
+        padding = _align(position) - position
+        parts.append(b"\0" * padding)
+        parts.append(section)
+        position += padding + len(section)
+    parts.extend(encoded)
+    return b"".join(parts)
+
+
+def write_snapshot(file_path, fonts, meta=None):
+    """Writes a snapshot of fonts to file_path atomically; returns the number of fonts."""
+    from .utils import atomic_write
+    data = encode_snapshot(fonts, meta)
+    atomic_write(file_path, data)
+    return HEADER.unpack_from(data)[2]
+
+
+class FontSnapshot:
+    """
+    A memory-mapped snapshot file. Records and string offsets are NumPy views on the
+    mapping, so opening reads no records; strings are decoded (once per distinct
+    string) and FontInfo objects built only when asked for. Loading still reads the
+    path column of every record (see FontManager.load_font_snapshot()).
+    """
+    def __init__(self, file_path):
+        self.file_path = file_path
+        with open(file_path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, count, string_count, record_size, meta_length = HEADER.unpack_from(self._mmap)
+            if magic != MAGIC or version != VERSION or record_size != RECORD_DTYPE.itemsize:
+                raise ValueError(f"{file_path} is not a font snapshot of version {VERSION}")
+            position = HEADER.size
+            self.meta = json.loads(bytes(self._mmap[position:position + meta_length]))
+            position = _align(position + meta_length)
+            self.records = np.frombuffer(self._mmap, dtype=RECORD_DTYPE, count=count, offset=position)
+            position = _align(position + count * record_size)
+            self._offsets = np.frombuffer(self._mmap, dtype='<u8', count=string_count + 1, offset=position)
+            self._blob_start = position + (string_count + 1) * 8
+            if self._blob_start + int(self._offsets[-1]) > len(self._mmap):
+                raise ValueError(f"{file_path} is truncated")
+        except Exception:
+            self.close()
+            raise
+        self._strings = {}  # string id -> str
+
+    def __len__(self):
+        return len(self.records)
+
+    def string(self, string_id):
+        text = self._strings.get(string_id)
+        if text is None:
+            start = self._blob_start + int(self._offsets[string_id])
+            end = self._blob_start + int(self._offsets[string_id + 1])
+            text = self._mmap[start:end].decode('utf-8')
+            self._strings[string_id] = text
+        return text
+
+    def strings(self, string_ids):
+        """Decodes a list of string ids, each distinct string once."""
+        strings = self._strings
+        missing = set(string_ids).difference(strings)
+        if missing:
+            blob, base, offsets = self._mmap, self._blob_start, self._offsets
+            for string_id in missing:
+                strings[string_id] = blob[base + int(offsets[string_id]):
+                                          base + int(offsets[string_id + 1])].decode('utf-8')
+        return [strings[string_id] for string_id in string_ids]
+
+    def string_buffers(self):
+        """(offsets, data) of the string table, Arrow style; data is a view on the mapping."""
+        end = self._blob_start + int(self._offsets[-1])
+        return self._offsets, memoryview(self._mmap)[self._blob_start:end]
+
+    def column(self, field):
+        """Values of a string field for all records."""
+        return self.strings(self.records[field].tolist())
+
+    def font(self, row, font_id=None):
+        """Builds the FontInfo of a record."""
+        record = self.records[row]
+        fi = FontInfo.__new__(FontInfo)
+        fi.id = new_font_id() if font_id is None else font_id
+        for field in STRING_FIELDS:
+            setattr(fi, field, self.string(int(record[field])))
+        fi.face_index = split_font_key(fi.font_path)[1]
+        fi.font_styles = fi.get_font_styles()
+        fi.user_note = ""
+        metrics = {}
+        mask = int(record['metric_mask'])
+        for i, name in enumerate(METRIC_NAMES):
+            if mask & (1 << i):
+                metrics[name] = record[name].item()
+        if record['has_panose']:
+            metrics['panose'] = record['panose'].tolist()
+        fi.metrics = metrics
+        return fi
+
+    def close(self):
+        self.records = None
+        self._offsets = None
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                # NumPy views handed out are still alive, the mapping goes with them
+                pass
+            self._mmap = None
+
+
+class LazyFontList(MutableSequence):
+    """
+    List of FontInfo objects backed by a FontSnapshot: fonts are decoded on first
+    access and cached. Supports the list operations FontManager uses; slices and
+    comparisons work on decoded fonts.
+    """
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+        self._items = [None] * len(snapshot)  # FontInfo, or None while not decoded
+        self._rows = list(range(len(snapshot)))  # snapshot record of each position
+        # Ids are handed out up front, so they are known before the fonts are decoded
+        first_id = new_font_id(len(snapshot))
+        self._ids = list(range(first_id, first_id + len(snapshot)))
+        self._positions = None  # font path -> position, see index_paths()
+        self.pristine = True  # positions still equal the snapshot records
+
+    def __len__(self):
+        return len(self._items)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        font = self._items[index]
+        if font is None:
+            font = self.snapshot.font(self._rows[index], self._ids[index])
+            self._items[index] = font
+        return font
+
+    def peek(self, index):
+        """The font at index if it is decoded already, else None."""
+        return self._items[index]
+
+    def __setitem__(self, index, font):
+        if isinstance(index, slice):
+            raise TypeError("LazyFontList does not support slice assignment")
+        self._items[index] = font
+        self._rows[index] = None
+        self._ids[index] = font.id
+        self._positions = None
+        self.pristine = False
+
+    def __delitem__(self, index):
+        del self._items[index]
+        del self._rows[index]
+        del self._ids[index]
+        self._positions = None
+        self.pristine = False
+
+    def insert(self, index, font):
+        length = len(self._items)
+        self._items.insert(index, font)
+        self._rows.insert(index, None)
+        self._ids.insert(index, font.id)
+        if self._positions is not None:
+            if index >= length:
+                # Appending keeps the positions of the other fonts
+                self._positions[font.font_path] = length
+            else:
+                self._positions = None
+        self.pristine = False
+
+    def __iter__(self):
+        for i in range(len(self._items)):
+            yield self[i]
+
+    def remove(self, font):
+        # Decoded objects only: an undecoded font cannot be the given object
+        for i, item in enumerate(self._items):
+            if item is font:
+                del self[i]
+                return
+        raise ValueError("font not in list")
+
+    def clear(self):
+        self._items = []
+        self._rows = []
+        self._ids = []
+        self._positions = None
+        self.pristine = False
+
+    def remove_paths(self, font_paths):
+        """Removes the fonts with the given paths in one pass, without decoding the others."""
+        paths = self.column('font_path')
+        keep = [i for i, path in enumerate(paths) if path not in font_paths]
+        if len(keep) == len(self._items):
+            return
+        self._items = [self._items[i] for i in keep]
+        self._rows = [self._rows[i] for i in keep]
+        self._ids = [self._ids[i] for i in keep]
+        self.index_paths([paths[i] for i in keep])
+        self.pristine = False
+
+    def decoded_count(self):
+        return sum(1 for item in self._items if item is not None)
+
+    def column(self, field):
+        """A field of every font, read from the snapshot for fonts not decoded yet."""
+        if field == 'id':
+            return list(self._ids)
+        if field not in STRING_FIELDS:
+            # Not stored (user notes): undecoded fonts have the default
+            return [getattr(item, field) if item is not None else "" for item in self._items]
+        if self.snapshot.records is None:
+            return [getattr(item, field) for item in self._items]
+        ids = self.snapshot.records[field][[row for row in self._rows if row is not None]]
+        stored = iter(self.snapshot.strings(ids.tolist()))
+        values = []
+        for item, row in zip(self._items, self._rows):
+            value = next(stored) if row is not None else None
+            # Decoded fonts may have been edited since
+            values.append(value if item is None else getattr(item, field))
+        return values
+
+    def index_paths(self, paths=None):
+        """
+        Builds the path -> position dict find_path() uses, from paths if given (the
+        'font_path' column). Appending fonts keeps it, other edits of the list drop it.
+        """
+        if paths is None:
+            paths = self.column('font_path')
+        self._positions = {path: i for i, path in enumerate(paths)}
+
+    def _position(self, font_path):
+        i = self._positions.get(font_path)
+        # A decoded font may have been given another path since the dict was built
+        if i is None or (self._items[i] is not None and self._items[i].font_path != font_path):
+            return None
+        return i
+
+    def find_path(self, font_path):
+        """The font with the given path, decoding only that one; None if not in the list."""
+        fresh = self._positions is None
+        if fresh:
+            self.index_paths()
+        i = self._position(font_path)
+        if i is None and not fresh:
+            self.index_paths()
+            i = self._position(font_path)
+        return None if i is None else self[i]
+
+    def materialize(self):
+        """Decodes all fonts and releases the snapshot; returns a plain list."""
+        fonts = list(self)
+        self._rows = [None] * len(fonts)
+        self.pristine = False
+        self.snapshot.close()
+        return fonts
+#
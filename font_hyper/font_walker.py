@@ -0,0 +1,336 @@
+# font_walker.py
+# for license info (GPL3), see license.txt from font_hyper package
+
+import os
+import re
+import json
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Directories modified this recently are listed again by the next scan: an entry
+# added within the same mtime tick as the listing would not change the mtime
+RACY_MTIME_NS = 2 * 1000 ** 3
+
+
+def normalize_roots(paths, keep_nested=()):
+    """
+    Search roots without duplicates and without roots inside another root (compared by
+    real path, so a root reached through a symlink counts too), in their original order.
+    Nested roots in keep_nested (e.g. with a ScanPolicy of their own) are kept and moved
+    before their enclosing root, so their directories are walked as part of them.
+    """
+    real_paths = []
+    for path in paths:
+        path = os.path.abspath(os.path.expanduser(path))
+        real_paths.append((path, os.path.realpath(path)))
+
+    def inside(real, other):
+        return real != other and real.startswith(other.rstrip(os.sep) + os.sep)
+
+    roots = []
+    for path, real in real_paths:
+        nested = any(inside(real, other) for _, other in real_paths)
+        if (not nested or path in keep_nested) and all(real != kept_real for _, kept_real in roots):
+            roots.append((path, real))
+    for root in [root for root in roots if any(inside(root[1], other) for _, other in roots)]:
+        roots.remove(root)
+        enclosing = next((i for i, (_, other) in enumerate(roots) if inside(root[1], other)), len(roots))
+        roots.insert(enclosing, root)
+    return [path for path, _ in roots]
+
+
+def _glob_regex(pattern):
+    """Regex of a gitignore-style glob: * and ? stay within a path segment, ** spans segments."""
+    out = []
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith('**/', i):
+            out.append('(?:.*/)?')
+            i += 3
+        elif pattern.startswith('**', i):
+            out.append('.*')
+            i += 2
+        elif pattern[i] == '*':
+            out.append('[^/]*')
+            i += 1
+        elif pattern[i] == '?':
+            out.append('[^/]')
+            i += 1
+        elif pattern[i] == '[' and pattern.find(']', i + 2) != -1:
+            end = pattern.find(']', i + 2)
+            body = pattern[i + 1:end]
+            out.append('[' + ('^' + body[1:] if body.startswith('!') else body).replace('\\', '\\\\') + ']')
+            i = end + 1
+        else:
+            out.append(re.escape(pattern[i]))
+            i += 1
+    return ''.join(out)
+
+
+class ExcludeRule:
+    """
+    One gitignore-style pattern: "name" matches at any depth, a pattern with a "/"
+    is relative to the root, a trailing "/" matches only directories and a leading
+    "!" includes again what an earlier rule excluded.
+    """
+    def __init__(self, pattern):
+        self.pattern = pattern
+        self.negate = pattern.startswith('!')
+        pattern = pattern[1:] if self.negate else pattern
+        self.dir_only = pattern.endswith('/')
+        pattern = pattern.rstrip('/')
+        anchored = '/' in pattern
+        regex = _glob_regex(pattern.lstrip('/'))
+        self.regex = re.compile((regex if anchored else '(?:.*/)?' + regex) + r'\Z')
+
+    def matches(self, rel_path, is_dir):
+        return (is_dir or not self.dir_only) and self.regex.match(rel_path) is not None
+
+
+class ScanPolicy:
+    """
+    How a search root is walked: exclude patterns (gitignore-style, relative to the
+    root; excluded directories are never descended), the deepest directory level
+    entered below the root (None for no limit), whether symlinked directories are
+    followed, and the file extensions picked up (None for all font files and archives).
+    """
+    def __init__(self, exclude=(), max_depth=None, follow_links=True, extensions=None):
+        self.exclude = [line.strip() for line in exclude if line.strip() and not line.strip().startswith('#')]
+        self.max_depth = max_depth
+        self.follow_links = follow_links
+        self.extensions = tuple(ext.lower() if ext.startswith('.') else '.' + ext.lower()
+                                for ext in extensions) if extensions else None
+        self._rules = [ExcludeRule(pattern) for pattern in self.exclude]
+
+    @property
+    def is_default(self):
+        return not self.exclude and self.max_depth is None and self.follow_links and self.extensions is None
+
+    def excludes(self, rel_path, is_dir):
+        """True if the last rule matching rel_path (with "/" separators) excludes it."""
+        excluded = False
+        for rule in self._rules:
+            if rule.matches(rel_path, is_dir):
+                excluded = not rule.negate
+        return excluded
+
+    def file_extensions(self, extensions):
+        """The extensions of a scan narrowed down to the ones of this policy."""
+        return extensions if self.extensions is None else tuple(ext for ext in extensions if ext in self.extensions)
+
+    def allows(self, rel_path, extensions):
+        """True if a walk with this policy picks up the file rel_path (relative to the root, "/" separators)."""
+        parts = rel_path.split('/')
+        if self.max_depth is not None and len(parts) - 1 > self.max_depth:
+            return False
+        if not rel_path.lower().endswith(self.file_extensions(extensions)):
+            return False
+        for depth in range(1, len(parts)):
+            if self.excludes('/'.join(parts[:depth]), True):
+                return False
+        return not self.excludes(rel_path, False)
+
+    def to_dict(self):
+        return {
+            'exclude': list(self.exclude),
+            'max_depth': self.max_depth,
+            'follow_links': self.follow_links,
+            'extensions': list(self.extensions) if self.extensions is not None else None
+        }
+
+    @staticmethod
+    def from_dict(data):
+        return ScanPolicy(data.get('exclude', ()), data.get('max_depth'), data.get('follow_links', True),
+                          data.get('extensions'))
+
+
+class ScanStats:
+    """What the last scan of a search root did."""
+    __slots__ = ('files_seen', 'files_parsed', 'files_imported', 'fonts_added', 'dirs_listed', 'dirs_cached',
+                 'dirs_excluded', 'seconds')
+
+    def __init__(self):
+        self.files_seen = 0  # font and archive files found by the walk
+        self.files_parsed = 0  # files (and archive members) handed to the parser
+        self.files_imported = 0  # files taken from fontconfig's records instead
+        self.fonts_added = 0
+        self.dirs_listed = 0
+        self.dirs_cached = 0  # unchanged directories taken from the DirectoryCache
+        self.dirs_excluded = 0  # directories not entered (exclude patterns, max depth)
+        self.seconds = 0.0
+
+    def summary(self):
+        imported = f", {self.files_imported} from fontconfig" if self.files_imported else ""
+        return (f"{self.files_seen} files seen, {self.files_parsed} parsed{imported}, {self.fonts_added} fonts added, "
+                f"{self.dirs_listed + self.dirs_cached} directories ({self.dirs_cached} unchanged, "
+                f"{self.dirs_excluded} excluded), {self.seconds:.2f} s")
+
+
+class DirectoryCache:
+    """
+    Listings of scanned directories by mtime: the subdirectories and the files with
+    one of extensions (font files and archives) of each. A directory whose mtime is
+    unchanged is not listed again; its files are taken from here (and skipped if
+    loaded already). Entries of directories no scan reached are dropped by
+    end_scan(). Persisted as JSON.
+    """
+    def __init__(self, extensions, file_path=None):
+        self.extensions = tuple(extensions)
+        self.file_path = file_path
+        self.entries = {}  # directory -> [mtime_ns, subdirectory names, names of linked ones, file names]
+        self._seen = None
+
+    def __len__(self):
+        return len(self.entries)
+
+    def begin_scan(self):
+        self._seen = set()
+
+    def end_scan(self):
+        """Drops the directories not reached since begin_scan() and saves the cache."""
+        if self._seen is not None:
+            self.entries = {path: entry for path, entry in self.entries.items() if path in self._seen}
+            self._seen = None
+        self.save()
+
+    def get(self, path, mtime_ns):
+        """(subdirectories, linked subdirectories, files) of a directory listed at mtime_ns, None otherwise."""
+        if self._seen is not None:
+            self._seen.add(path)
+        entry = self.entries.get(path)
+        if entry is None or entry[0] != mtime_ns:
+            return None
+        return entry[1], entry[2], entry[3]
+
+    def put(self, path, mtime_ns, dirs, links, files):
+        if time.time_ns() - mtime_ns < RACY_MTIME_NS:
+            self.entries.pop(path, None)
+            return
+        self.entries[path] = [mtime_ns, dirs, links, files]
+
+    def clear(self):
+        self.entries = {}
+
+    def save(self):
+        if not self.file_path:
+            return False
+        try:
+            from .utils import atomic_write
+            data = {'extensions': list(self.extensions), 'dirs': self.entries}
+            atomic_write(self.file_path, json.dumps(data, separators=(',', ':')))
+            return True
+        except Exception as e:
+            logger.error(f"Error saving directory cache: {e}")
+            return False
+
+    def load(self, file_path):
+        """Loads the cache written by save(); later saves go to file_path."""
+        self.file_path = file_path
+        try:
+            if not os.path.exists(file_path):
+                return False
+            with open(file_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if tuple(data.get('extensions', ())) != self.extensions:
+                logger.info("Directory cache lists other file types, ignoring it")
+                return False
+            self.entries = data['dirs']
+            return True
+        except Exception as e:
+            logger.error(f"Error loading directory cache: {e}")
+            self.entries = {}
+            return False
+
+
+class FontDirectoryWalker:
+    """
+    Walks a search root with os.scandir, top-down like os.walk, yielding the font
+    files of each directory. The root's ScanPolicy is applied while walking:
+    excluded directories and those below max_depth are not entered at all.
+    Symlinked directories are followed (if the policy allows) unless skip_link
+    rejects their target; every directory is entered once, by (st_dev, st_ino),
+    which also stops symlink cycles; pass the same visited set to the walkers
+    of several roots to share this. With a DirectoryCache, unchanged directories
+    are not listed again.
+    """
+    def __init__(self, extensions, cache=None, policy=None, skip_link=None, visited=None, stats=None):
+        self.policy = policy or ScanPolicy()
+        self.extensions = self.policy.file_extensions(tuple(extensions))  # lowercase file extensions reported
+        self.cache = cache
+        self.skip_link = skip_link  # predicate on the real path of a linked directory, True skips it
+        self.visited = visited if visited is not None else set()  # (st_dev, st_ino) of the directories entered
+        self.stats = stats or ScanStats()
+
+    def _list(self, path):
+        # A cache shared by walkers lists the files of all of them
+        extensions = self.cache.extensions if self.cache is not None else self.extensions
+        dirs, links, files = [], [], []
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir():
+                        dirs.append(entry.name)
+                        if entry.is_symlink():
+                            links.append(entry.name)
+                    elif entry.name.lower().endswith(extensions):
+                        files.append(entry.name)
+                except OSError:
+                    continue
+        return dirs, links, files
+
+    def walk(self, root):
+        """
+        Yields:
+            tuple: (directory path, names of the font files in it)
+        """
+        policy = self.policy
+        stack = [(root, "", 0)]  # (path, path relative to the root with "/" separators, depth)
+        while stack:
+            path, rel_dir, depth = stack.pop()
+            try:
+                st = os.stat(path)
+            except OSError as e:
+                logger.warning(f"Cannot read directory {path}: {e}")
+                continue
+            key = (st.st_dev, st.st_ino)
+            if key in self.visited:
+                continue
+            self.visited.add(key)
+
+            listing = self.cache.get(path, st.st_mtime_ns) if self.cache is not None else None
+            if listing is None:
+                try:
+                    listing = self._list(path)
+                except OSError as e:
+                    logger.warning(f"Cannot read directory {path}: {e}")
+                    continue
+                self.stats.dirs_listed += 1
+                if self.cache is not None:
+                    self.cache.put(path, st.st_mtime_ns, *listing)
+            else:
+                self.stats.dirs_cached += 1
+            dirs, links, files = listing
+
+            prefix = rel_dir + "/" if rel_dir else ""
+            files = [name for name in files
+                     if name.lower().endswith(self.extensions) and not policy.excludes(prefix + name, False)]
+            self.stats.files_seen += len(files)
+            yield path, files
+
+            links = set(links)
+            for name in reversed(dirs):
+                if (policy.max_depth is not None and depth >= policy.max_depth) or policy.excludes(prefix + name, True):
+                    self.stats.dirs_excluded += 1
+                    continue
+                subdir = os.path.join(path, name)
+                if name in links and not self._follow(subdir):
+                    continue
+                stack.append((subdir, prefix + name, depth + 1))
+
+    def _follow(self, link_path):
+        if not self.policy.follow_links:
+            return False
+        return self.skip_link is None or not self.skip_link(os.path.realpath(link_path))
+#
@@ -0,0 +1,273 @@
+# fontconfig_source.py
+# for license info (GPL3), see license.txt from font_hyper package
+
+import os
+import re
+import time
+import shutil
+import logging
+import threading
+import subprocess
+
+from .font_info import FontInfo, COLLECTION_EXTENSIONS, font_key
+from .font_file_access import font_buffer, face_count
+from .sfnt_reader import CharacterMap
+
+logger = logging.getLogger(__name__)
+
+FC_LIST_COMMAND = 'fc-list'
+FC_LIST_TIMEOUT_S = 60.0
+# Longest wait for fc-list per step of load_steps()
+LOAD_POLL_S = 0.01
+# One record per line, fields separated by tabs (fontconfig copies these characters as they are);
+# [0] picks the first value of lists like "DejaVu Sans,DejaVu Sans Condensed"
+FC_LIST_FIELDS = ('file', 'index', 'family[0]', 'style[0]', 'fullname[0]', 'weight', 'width', 'spacing', 'charset')
+FC_LIST_FORMAT = "\t".join(f"%{{{field}}}" for field in FC_LIST_FIELDS) + "\n"
+
+# fontconfig caches are validated by directory mtime: a font file written after its directory
+# last changed (rewritten in place) may be listed with stale data and is parsed instead
+STALE_MARGIN_NS = 2 * 1000 ** 3
+
+# fontconfig weight -> OS/2 usWeightClass, interpolated in between like FcWeightToOpenType()
+FC_WEIGHTS = ((0, 100), (40, 200), (50, 300), (55, 350), (75, 380), (80, 400), (100, 500), (180, 600),
+              (200, 700), (205, 800), (210, 900), (215, 1000))
+# fontconfig width (percent of normal) of each OS/2 usWidthClass 1..9
+FC_WIDTHS = (50, 62.5, 75, 87.5, 100, 112.5, 125, 150, 200)
+FC_MONO = 100  # spacing of monospaced fonts; dual (90) and proportional (0) are not fixed pitch
+# Named instances of variable fonts are listed with index (instance << 16) | face index
+FC_INSTANCE_SHIFT = 16
+
+_NUMBER = re.compile(r'-?\d+(?:\.\d+)?')
+
+
+def _covered(range_index, codepoint):
+    return 1
+
+
+def _number(text):
+    """The value of a plain number field, None for empty fields and ranges ("[100 900]", variable fonts)."""
+    if not text or text.startswith('['):
+        return None
+    match = _NUMBER.match(text)
+    return float(match.group()) if match else None
+
+
+def fc_weight_to_opentype(weight):
+    """OS/2 usWeightClass of a fontconfig weight."""
+    for (fc_low, ot_low), (fc_high, ot_high) in zip(FC_WEIGHTS, FC_WEIGHTS[1:]):
+        if weight <= fc_high:
+            weight = max(weight, fc_low)
+            return int(round(ot_low + (ot_high - ot_low) * (weight - fc_low) / (fc_high - fc_low)))
+    return FC_WEIGHTS[-1][1]
+
+
+def fc_width_to_opentype(width):
+    """OS/2 usWidthClass (1..9) of a fontconfig width, the nearest class."""
+    return min(range(len(FC_WIDTHS)), key=lambda i: abs(FC_WIDTHS[i] - width)) + 1
+
+
+def parse_charset(text):
+    """
+    Coverage of a fontconfig charset in its text form, hexadecimal codepoints and
+    ranges separated by spaces ("20-7e a0-17f 2020"), as a CharacterMap; None if
+    the text can't be parsed.
+    """
+    starts, ends = [], []
+    try:
+        for token in text.split():
+            low, _, high = token.partition('-')
+            starts.append(int(low, 16))
+            ends.append(int(high or low, 16))
+    except ValueError:
+        return None
+    if not starts or starts != sorted(starts):
+        return None
+    return CharacterMap(starts, ends, _covered)
+
+
+class FontconfigRecord:
+    """One face as listed by fc-list."""
+    __slots__ = ('file', 'index', 'family', 'style', 'fullname', 'weight', 'width', 'spacing', 'charset')
+
+    def __init__(self, file, index, family, style, fullname, weight, width, spacing, charset):
+        self.file = file
+        self.index = index
+        self.family = family
+        self.style = style
+        self.fullname = fullname
+        self.weight = weight  # fontconfig scale, None for variable fonts
+        self.width = width
+        self.spacing = spacing
+        self.charset = charset  # text form, parsed by parse_charset()
+
+    @staticmethod
+    def from_line(line):
+        """The record of one line of FC_LIST_FORMAT output, None for lines to skip."""
+        fields = line.rstrip('\n').split('\t')
+        if len(fields) != len(FC_LIST_FIELDS) or not fields[0] or not fields[2]:
+            return None
+        file, index, family, style, fullname, weight, width, spacing, charset = fields
+        index = int(_number(index) or 0)
+        if index >> FC_INSTANCE_SHIFT:
+            # Named instances of a variable font share its file and face
+            return None
+        return FontconfigRecord(file, index, family, style or "Regular", fullname, _number(weight),
+                                _number(width), _number(spacing), charset)
+
+    def metrics(self):
+        """
+        The metrics of the face (see font_metrics.py): the OS/2, head, post and maxp tables
+        are read with the sfnt reader; weight and width are fontconfig's, which has them for
+        the named instances of variable fonts too. Only fontconfig's weight, width and fixed
+        pitch if the face can't be read that way.
+        """
+        from .sfnt_reader import SfntFont, SfntError
+        try:
+            metrics = SfntFont(font_buffer(self.file), self.index & ((1 << FC_INSTANCE_SHIFT) - 1)).metrics()
+        except (OSError, SfntError) as e:
+            logger.debug(f"Cannot read the metrics of {self.file}: {e}")
+            metrics = {}
+        metrics.setdefault('fixed_pitch', (self.spacing or 0) >= FC_MONO)
+        if self.weight is not None:
+            metrics['weight'] = fc_weight_to_opentype(self.weight)
+        if self.width is not None:
+            metrics['width'] = fc_width_to_opentype(self.width)
+        return metrics
+
+    def to_font_info(self):
+        """
+        FontInfo of the face without parsing the font file: names from fontconfig, the
+        metrics from a few small tables (see metrics()). fontconfig has no license text,
+        which is "Not avail." as for fonts without one.
+        """
+        return FontInfo.from_dict({
+            'font_path': font_key(self.file, self.index),
+            'face_index': self.index,
+            'font_name': self.family,
+            'font_family': self.style,
+            'font_style': self.style,
+            'font_info': self.fullname or "Not avail.",
+            'license': "Not avail.",
+            'metrics': self.metrics()
+        })
+
+
+class FontconfigCatalog:
+    """
+    The system fonts as already parsed by fontconfig: load() runs fc-list once and
+    reads its records (load_steps() does so in a thread, for scans run in slices),
+    fonts() turns the records of a font file into FontInfo objects.
+    Scans use it for system paths, see FontManager._fontconfig_jobs(); files fontconfig
+    doesn't list, or may list with stale data, are parsed as usual. The charsets of the
+    listed faces (catalog key -> CharacterMap) go into the coverage cache of the search.
+    """
+    def __init__(self, command=FC_LIST_COMMAND, timeout=FC_LIST_TIMEOUT_S):
+        self.command = command
+        self.timeout = timeout
+        self.records = {}  # font file path -> [FontconfigRecord] by face index
+        self.charsets = {}  # catalog key -> CharacterMap of the faces handed out by fonts()
+        self._dir_mtimes = {}
+        self._loader = None  # Thread of load_steps()
+
+    def available(self):
+        return shutil.which(self.command) is not None
+
+    def load(self):
+        """
+        Runs fc-list once and reads its records.
+
+        Returns:
+            bool: True if fontconfig listed fonts
+        """
+        self.records = {}
+        self._dir_mtimes = {}
+        start = time.perf_counter()
+        try:
+            process = subprocess.run([self.command, '--format', FC_LIST_FORMAT], stdout=subprocess.PIPE,
+                                     stderr=subprocess.DEVNULL, encoding='utf-8', errors='surrogateescape',
+                                     timeout=self.timeout)
+        except (OSError, subprocess.SubprocessError) as e:
+            logger.warning(f"fc-list failed ({e}), system fonts are parsed")
+            return False
+        if process.returncode != 0:
+            logger.warning(f"fc-list exited with status {process.returncode}, system fonts are parsed")
+            return False
+
+        seen = set()
+        for line in process.stdout.split('\n'):
+            record = FontconfigRecord.from_line(line)
+            if record is None or (record.file, record.index) in seen:
+                continue
+            seen.add((record.file, record.index))
+            self.records.setdefault(os.path.abspath(record.file), []).append(record)
+        for records in self.records.values():
+            records.sort(key=lambda record: record.index)
+        logger.info(f"fontconfig listed {len(seen)} faces of {len(self.records)} files "
+                    f"in {time.perf_counter() - start:.2f} s")
+        return bool(self.records)
+
+    def load_steps(self):
+        """
+        load() in a thread, as a generator that yields while fc-list runs, so a scan run
+        on the GUI thread (see background_scan.py) is never blocked by it for long. A load
+        still running for a closed generator is waited for instead of starting another.
+
+        Returns:
+            bool: True if fontconfig listed fonts
+        """
+        if self._loader is None or not self._loader.is_alive():
+            self._loader = threading.Thread(target=self.load, name="fc-list", daemon=True)
+            self._loader.start()
+        while True:
+            self._loader.join(LOAD_POLL_S)
+            if not self._loader.is_alive():
+                return bool(self.records)
+            yield
+
+    def _dir_mtime_ns(self, directory):
+        mtime_ns = self._dir_mtimes.get(directory)
+        if mtime_ns is None:
+            mtime_ns = self._dir_mtimes[directory] = os.stat(directory).st_mtime_ns
+        return mtime_ns
+
+    def is_current(self, file_path):
+        """True if the records of file_path can be trusted: listed, and not written after its directory."""
+        if file_path not in self.records:
+            return False
+        try:
+            mtime_ns = os.stat(file_path).st_mtime_ns
+            return mtime_ns <= self._dir_mtime_ns(os.path.dirname(file_path)) + STALE_MARGIN_NS
+        except OSError:
+            return False
+
+    @staticmethod
+    def _lists_all_faces(file_path, records):
+        try:
+            count = face_count(font_buffer(file_path))
+        except Exception as e:
+            logger.debug(f"Cannot read the faces of {file_path}: {e}")
+            return False
+        return [record.index for record in records] == list(range(count))
+
+    def fonts(self, file_path):
+        """
+        FontInfo objects of every face of a font file, from its fontconfig records.
+
+        Returns:
+            list: FontInfo objects, None if fontconfig has no current data of the file
+        """
+        if not self.is_current(file_path):
+            return None
+        records = self.records[file_path]
+        if file_path.lower().endswith(COLLECTION_EXTENSIONS) and not self._lists_all_faces(file_path, records):
+            # Faces of a collection fontconfig skipped, the parser reads them all
+            return None
+        fonts = []
+        for record in records:
+            fi = record.to_font_info()
+            charset = parse_charset(record.charset)
+            if charset is not None:
+                self.charsets[fi.font_path] = charset
+            fonts.append(fi)
+        return fonts
+#
@@ -0,0 +1,266 @@
+# glyph_signatures.py
+# for license info (GPL3), see license.txt from font_hyper package
+
+import io
+import os
+import time
+import logging
+import numpy as np
+import freetype
+from PIL import Image
+from .font_info import open_freetype_face, split_font_key
+from .font_archives import split_archive_path
+
+logger = logging.getLogger(__name__)
+
+# Glyphs rendered into every signature; chosen to separate common design traits
+# (serifs, x-height, stroke contrast, rounded vs. square shapes, descenders)
+SIGNATURE_CHARS = "abdegkmnorstyAGMQRS&2"
+# Each glyph is cropped to its ink box and fitted into a CELL x CELL grayscale cell
+SIGNATURE_CELL = 12
+# Pixel size used when rendering glyphs before they are scaled down into a cell
+SIGNATURE_RENDER_SIZE = 48
+# Rough cost of computing one signature (open the font, render the glyphs), for time estimates;
+# a cold cache over 50k fonts takes minutes, later runs only compute new and changed fonts
+SIGNATURE_COST_MS = 7
+
+
+def signature_time_estimate(count):
+    """Human readable estimate of the time to compute count signatures."""
+    seconds = count * SIGNATURE_COST_MS / 1000
+    return f"about {seconds / 60:.0f} min" if seconds >= 90 else f"about {max(1, round(seconds))} s"
+
+
+def fit_bitmap_to_cell(bitmap, cell=SIGNATURE_CELL):
+    """
+    Crops a grayscale bitmap to its ink box and fits it centered into a square cell.
+
+    Args:
+        bitmap (np.ndarray): 2D uint8 array, 0 = background
+        cell (int): Edge length of the resulting cell
+
+    Returns:
+        np.ndarray: uint8 array of shape (cell, cell), all zero if the bitmap has no ink
+    """
+    result = np.zeros((cell, cell), dtype=np.uint8)
+    if bitmap.size == 0:
+        return result
+    rows = np.flatnonzero(bitmap.any(axis=1))
+    cols = np.flatnonzero(bitmap.any(axis=0))
+    if rows.size == 0 or cols.size == 0:
+        return result
+    cropped = bitmap[rows[0]:rows[-1] + 1, cols[0]:cols[-1] + 1]
+
+    # Pad to a square so the glyph keeps its aspect ratio
+    height, width = cropped.shape
+    side = max(height, width)
+    square = np.zeros((side, side), dtype=np.uint8)
+    top = (side - height) // 2
+    left = (side - width) // 2
+    square[top:top + height, left:left + width] = cropped
+
+    image = Image.fromarray(square, 'L').resize((cell, cell), Image.Resampling.BILINEAR)
+    return np.asarray(image, dtype=np.uint8)
+
+
+def render_glyph_cell(face, char, cell=SIGNATURE_CELL):
+    """Renders a single character of a freetype face into a signature cell."""
+    if face.get_char_index(char) == 0:
+        return np.zeros((cell, cell), dtype=np.uint8)
+    face.load_char(char, freetype.FT_LOAD_RENDER)
+    bitmap = face.glyph.bitmap
+    if bitmap.width == 0 or bitmap.rows == 0:
+        return np.zeros((cell, cell), dtype=np.uint8)
+    pitch = abs(bitmap.pitch)
+    buffer = np.frombuffer(bytes(bitmap.buffer), dtype=np.uint8)
+    buffer = buffer[:bitmap.rows * pitch].reshape((bitmap.rows, pitch))[:, :bitmap.width]
+    return fit_bitmap_to_cell(buffer, cell)
+
+
+def compute_glyph_signature(font_path, chars=SIGNATURE_CHARS, cell=SIGNATURE_CELL):
+    """
+    Computes the glyph signature of a font file.
+
+    Args:
+        font_path (str): Path to the font file (a catalog key for faces of collections and fonts in archives)
+        chars (str): Characters to render
+        cell (int): Cell edge length
+
+    Returns:
+        np.ndarray: uint8 array of shape (len(chars), cell * cell), or None if the font can't be rendered
+    """
+    try:
+        face = open_freetype_face(font_path)
+        face.set_pixel_sizes(0, SIGNATURE_RENDER_SIZE)
+        signature = np.zeros((len(chars), cell * cell), dtype=np.uint8)
+        for i, char in enumerate(chars):
+            signature[i] = render_glyph_cell(face, char, cell).ravel()
+        return signature
+    except Exception as e:
+        logger.debug(f"Could not compute glyph signature for {font_path}: {e}")
+        return None
+
+
+def font_file_stamp(font_path):
+    """(size, mtime_ns) of the file a font is read from (for fonts in an archive, the archive); None if it is gone."""
+    try:
+        st = os.stat(split_archive_path(split_font_key(font_path)[0])[0])
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+class GlyphSignatureIndex:
+    """
+    Stores glyph signatures of many fonts in one contiguous uint8 matrix.
+    Rows are addressed by font path; the matrix grows by doubling its capacity.
+    Each row keeps the size and mtime of the font file it was computed from, so a
+    replaced file gets a new signature.
+    """
+    def __init__(self, chars=SIGNATURE_CHARS, cell=SIGNATURE_CELL):
+        self.chars = chars
+        self.cell = cell
+        self.paths = []  # row -> font path
+        self._rows = {}  # font path -> row
+        self._matrix = np.zeros((0, len(chars), cell * cell), dtype=np.uint8)
+        self._stamps = np.zeros((0, 2), dtype=np.int64)  # row -> (size, mtime_ns) of the font file
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __contains__(self, font_path):
+        return font_path in self._rows
+
+    @property
+    def matrix(self):
+        """Signatures of all indexed fonts, shape (n, len(chars), cell * cell)."""
+        return self._matrix[:len(self.paths)]
+
+    @property
+    def vector_size(self):
+        return len(self.chars) * self.cell * self.cell
+
+    def vectors(self, start=0, stop=None):
+        """Flattened uint8 signature vectors for the rows start..stop."""
+        stop = len(self.paths) if stop is None else stop
+        return self._matrix[start:stop].reshape(stop - start, self.vector_size)
+
+    def row_of(self, font_path):
+        return self._rows.get(font_path)
+
+    def get(self, font_path):
+        row = self._rows.get(font_path)
+        return None if row is None else self._matrix[row]
+
+    def add(self, font_path, signature, stamp=None):
+        """Adds or replaces the signature of a font; stamp is font_file_stamp() of its file, read if None."""
+        row = self._rows.get(font_path)
+        if row is None:
+            row = len(self.paths)
+            if row >= self._matrix.shape[0]:
+                capacity = max(64, self._matrix.shape[0] * 2)
+                grown = np.zeros((capacity,) + self._matrix.shape[1:], dtype=np.uint8)
+                grown[:row] = self._matrix[:row]
+                self._matrix = grown
+                grown_stamps = np.zeros((capacity, 2), dtype=np.int64)
+                grown_stamps[:row] = self._stamps[:row]
+                self._stamps = grown_stamps
+            self.paths.append(font_path)
+            self._rows[font_path] = row
+        self._matrix[row] = signature
+        self._stamps[row] = stamp or font_file_stamp(font_path) or (-1, -1)
+
+    def is_current(self, font_path, stamp):
+        """True if font_path is indexed and its file still has the given stamp."""
+        row = self._rows.get(font_path)
+        return row is not None and stamp is not None and tuple(self._stamps[row].tolist()) == stamp
+
+    def missing_count(self, font_paths):
+        """Number of font_paths without any signature (replaced files are not counted, that needs a stat each)."""
+        return sum(1 for font_path in font_paths if font_path not in self._rows)
+
+    def update_steps(self, font_paths):
+        """
+        Computes the signatures of the fonts that are not indexed or whose file changed,
+        one font per step, so the caller can spread the work (see EventManager.update_glyph_signatures).
+
+        Args:
+            font_paths: List of catalog keys
+
+        Yields:
+            tuple: (done, total) after each font
+        """
+        total = len(font_paths)
+        added = 0
+        start = time.perf_counter()
+        for i, font_path in enumerate(font_paths):
+            stamp = font_file_stamp(font_path)
+            if stamp is not None and not self.is_current(font_path, stamp):
+                signature = compute_glyph_signature(font_path, self.chars, self.cell)
+                if signature is not None:
+                    self.add(font_path, signature, stamp)
+                    added += 1
+            yield i + 1, total
+        if added:
+            logger.info(f"Computed {added} new glyph signatures in {time.perf_counter() - start:.1f} s "
+                        f"({len(self)} indexed)")
+        return added
+
+    def update_from_fonts(self, fonts, progress_callback=None):
+        """
+        Computes signatures for all fonts that are not indexed yet or whose file changed, at once.
+
+        Args:
+            fonts: Iterable of FontInfo objects
+            progress_callback: Optional callable(done, total)
+
+        Returns:
+            int: Number of signatures added
+        """
+        steps = self.update_steps([font.font_path for font in fonts])
+        while True:
+            try:
+                done, total = next(steps)
+            except StopIteration as stop:
+                return stop.value
+            if progress_callback:
+                progress_callback(done, total)
+
+    def save(self, file_path):
+        """Saves the index to a .npz file, atomically."""
+        from .utils import atomic_write
+        try:
+            buffer = io.BytesIO()
+            np.savez(buffer,
+                     matrix=self.matrix,
+                     stamps=self._stamps[:len(self.paths)],
+                     paths=np.array(self.paths, dtype=str),
+                     chars=np.array(self.chars),
+                     cell=np.array(self.cell))
+            atomic_write(file_path, buffer.getvalue())
+            return True
+        except Exception as e:
+            logger.error(f"Error saving glyph signatures: {e}")
+            return False
+
+    def load(self, file_path):
+        """Loads the index from a .npz file written by save(); ignores files with other settings."""
+        try:
+            if not os.path.exists(file_path):
+                return False
+            with np.load(file_path) as data:
+                if 'stamps' not in data.files or data['paths'].dtype.kind != 'U':
+                    logger.info("Glyph signature cache has an old format, ignoring it")
+                    return False
+                if str(data['chars']) != self.chars or int(data['cell']) != self.cell:
+                    logger.info("Glyph signature cache uses other settings, ignoring it")
+                    return False
+                self._matrix = data['matrix'].copy()
+                self._stamps = data['stamps'].astype(np.int64)
+                self.paths = data['paths'].tolist()
+            self._rows = {path: row for row, path in enumerate(self.paths)}
+            return True
+        except Exception as e:
+            logger.error(f"Error loading glyph signatures: {e}")
+            return False
+#
@@ -0,0 +1,137 @@
+# gui_category_suggestions.py
+# for license info (GPL3), see license.txt from font_hyper package
+
+import tkinter as tk
+from tkinter import ttk, messagebox, simpledialog
+import os
+import logging
+
+from .category_suggestions import CategorySuggestion
+
+logger = logging.getLogger(__name__)
+
+
+class CategorySuggestionsDialog:
+    """
+    Review window for category suggestions.
+    Suggestions can be accepted/rejected and renamed before they are applied.
+    """
+    def __init__(self, parent, suggester, on_applied=None, width=700, height=450):
+        self.parent = parent
+        self.suggester = suggester
+        self.on_applied = on_applied
+        self.item_suggestions = {}  # treeview item -> CategorySuggestion
+
+        self.window = tk.Toplevel(parent)
+        self.window.title("Category Suggestions - Review")
+        self.window.geometry(f"{width}x{height}")
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+        self.setup_ui()
+        self.populate()
+
+    def setup_ui(self):
+        """Creates the suggestions treeview and the action buttons."""
+        frame = ttk.Frame(self.window)
+        frame.grid(row=0, column=0, sticky="nsew", padx=10, pady=(10, 0))
+        frame.columnconfigure(0, weight=1)
+        frame.rowconfigure(0, weight=1)
+
+        self.tree = ttk.Treeview(frame, columns=("use", "kind", "count", "note"),
+                                 show='tree headings', selectmode='extended')
+        self.tree.heading("#0", text="Category / Font")
+        self.tree.heading("use", text="Apply")
+        self.tree.heading("kind", text="Kind")
+        self.tree.heading("count", text="Fonts")
+        self.tree.heading("note", text="Note")
+        self.tree.column("#0", width=280, anchor='w')
+        self.tree.column("use", width=50, anchor='center', stretch=False)
+        self.tree.column("kind", width=70, anchor='center', stretch=False)
+        self.tree.column("count", width=50, anchor='center', stretch=False)
+        self.tree.column("note", width=220, anchor='w')
+        self.tree.grid(row=0, column=0, sticky="nsew")
+        self.tree.bind('<Double-1>', lambda e: self.toggle_selected())
+
+        vsb = ttk.Scrollbar(frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=vsb.set)
+        vsb.grid(row=0, column=1, sticky='ns')
+
+        button_frame = ttk.Frame(self.window)
+        button_frame.grid(row=1, column=0, pady=10)
+        buttons = [
+            ("Toggle Apply", self.toggle_selected),
+            ("Rename", self.rename_selected),
+            ("Apply Accepted", self.apply),
+            ("Close", self.close)
+        ]
+        for col, (text, command) in enumerate(buttons):
+            ttk.Button(button_frame, text=text, command=command).grid(row=0, column=col, padx=4)
+
+        self.window.columnconfigure(0, weight=1)
+        self.window.rowconfigure(0, weight=1)
+
+    def populate(self):
+        """Fills the treeview with one row per suggestion and its fonts as children."""
+        self.tree.delete(*self.tree.get_children())
+        self.item_suggestions.clear()
+        for suggestion in self.suggester.suggestions:
+            item = self.tree.insert('', 'end', text=suggestion.label, open=False, values=(
+                "Yes" if suggestion.accepted else "No",
+                suggestion.kind,
+                len(suggestion.font_paths),
+                suggestion.note
+            ))
+            self.item_suggestions[item] = suggestion
+            for font_path, score in zip(suggestion.font_paths, suggestion.scores):
+                self.tree.insert(item, 'end', text=os.path.basename(font_path),
+                                 values=("", "", "", f"distance {score:.0f}"))
+
+    def _selected_suggestions(self):
+        suggestions = []
+        for item in self.tree.selection():
+            parent = self.tree.parent(item) or item
+            suggestion = self.item_suggestions.get(parent)
+            if suggestion and suggestion not in suggestions:
+                suggestions.append(suggestion)
+        return suggestions
+
+    def toggle_selected(self):
+        """Toggles whether the selected suggestions will be applied."""
+        for suggestion in self._selected_suggestions():
+            suggestion.accepted = not suggestion.accepted
+        for item, suggestion in self.item_suggestions.items():
+            self.tree.set(item, "use", "Yes" if suggestion.accepted else "No")
+
+    def rename_selected(self):
+        """Asks for a new label for a suggested new category."""
+        suggestions = self._selected_suggestions()
+        if len(suggestions) != 1 or suggestions[0].kind != CategorySuggestion.KIND_NEW:
+            messagebox.showwarning("Selection Error", "Select one suggested new category to rename.",
+                                   parent=self.window)
+            return
+        suggestion = suggestions[0]
+        label = simpledialog.askstring("Rename Suggestion", "Category name:",
+                                       initialvalue=suggestion.label, parent=self.window)
+        if label and label.strip():
+            suggestion.label = label.strip()
+            for item, sug in self.item_suggestions.items():
+                if sug is suggestion:
+                    self.tree.item(item, text=suggestion.label)
+
+    def apply(self):
+        """Applies accepted suggestions to the font manager."""
+        try:
+            assigned = self.suggester.apply()
+            logger.info(f"Applied category suggestions, {assigned} fonts assigned")
+            if self.on_applied:
+                self.on_applied()
+            messagebox.showinfo("Success", f"Assigned {assigned} fonts to categories.", parent=self.window)
+            self.close()
+        except Exception as e:
+            logger.error(f"Error applying category suggestions: {str(e)}")
+            messagebox.showerror("Apply Error", f"An error occurred while applying suggestions:\n{str(e)}",
+                                 parent=self.window)
+
+    def close(self):
+        self.window.destroy()
+        self.window = None
+#
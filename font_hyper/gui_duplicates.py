@@ -0,0 +1,205 @@
+# gui_duplicates.py
+# for license info (GPL3), see license.txt from font_hyper package
+
+import tkinter as tk
+from tkinter import ttk, messagebox
+import os
+import logging
+
+from .font_duplicates import DuplicateGroup
+
+logger = logging.getLogger(__name__)
+
+
+def format_size(size):
+    """File size in bytes as a short human readable text."""
+    for unit in ("B", "KiB", "MiB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GiB"
+
+
+class DuplicatesDialog:
+    """
+    Report of duplicate font files, one row per group with its files as children.
+    The kept file of a group can be chosen; the copies of marked groups are moved
+    to the quarantine directory and their category references point to the kept file.
+    """
+    def __init__(self, parent, font_manager, groups, quarantine_dir, on_resolved=None, width=820, height=480):
+        self.parent = parent
+        self.font_manager = font_manager
+        self.groups = groups
+        self.quarantine_dir = quarantine_dir
+        self.on_resolved = on_resolved
+        self.item_groups = {}  # treeview item of a group -> DuplicateGroup
+        self.item_paths = {}  # treeview item of a file -> font path
+
+        self.window = tk.Toplevel(parent)
+        self.window.title("Duplicate Fonts - Report")
+        self.window.geometry(f"{width}x{height}")
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+        self.setup_ui()
+        self.populate()
+
+    def setup_ui(self):
+        """Creates the summary line, the groups treeview and the action buttons."""
+        self.summary = ttk.Label(self.window, anchor='w')
+        self.summary.grid(row=0, column=0, sticky="ew", padx=10, pady=(10, 0))
+
+        frame = ttk.Frame(self.window)
+        frame.grid(row=1, column=0, sticky="nsew", padx=10, pady=(6, 0))
+        frame.columnconfigure(0, weight=1)
+        frame.rowconfigure(0, weight=1)
+
+        self.tree = ttk.Treeview(frame, columns=("resolve", "kind", "size", "categories", "note"),
+                                 show='tree headings', selectmode='extended')
+        self.tree.heading("#0", text="Font / File")
+        self.tree.heading("resolve", text="Resolve")
+        self.tree.heading("kind", text="Kind")
+        self.tree.heading("size", text="Wasted / Size")
+        self.tree.heading("categories", text="Categories")
+        self.tree.heading("note", text="Note")
+        self.tree.column("#0", width=330, anchor='w')
+        self.tree.column("resolve", width=60, anchor='center', stretch=False)
+        self.tree.column("kind", width=60, anchor='center', stretch=False)
+        self.tree.column("size", width=90, anchor='e', stretch=False)
+        self.tree.column("categories", width=75, anchor='center', stretch=False)
+        self.tree.column("note", width=180, anchor='w')
+        self.tree.grid(row=0, column=0, sticky="nsew")
+        self.tree.bind('<Double-1>', lambda e: self.toggle_selected())
+
+        vsb = ttk.Scrollbar(frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=vsb.set)
+        vsb.grid(row=0, column=1, sticky='ns')
+
+        button_frame = ttk.Frame(self.window)
+        button_frame.grid(row=2, column=0, pady=10)
+        buttons = [
+            ("Toggle Resolve", self.toggle_selected),
+            ("Mark All Exact", self.mark_exact),
+            ("Keep Selected File", self.keep_selected),
+            ("Resolve Marked", self.resolve),
+            ("Close", self.close)
+        ]
+        for col, (text, command) in enumerate(buttons):
+            ttk.Button(button_frame, text=text, command=command).grid(row=0, column=col, padx=4)
+
+        self.window.columnconfigure(0, weight=1)
+        self.window.rowconfigure(1, weight=1)
+
+    def populate(self):
+        """Fills the treeview with one row per group and its files as children; the kept file comes first."""
+        self.tree.delete(*self.tree.get_children())
+        self.item_groups.clear()
+        self.item_paths.clear()
+        for group in self.groups:
+            item = self.tree.insert('', 'end', text=group.label, open=False, values=(
+                "Yes" if group.accepted else "No",
+                group.kind,
+                format_size(group.wasted_bytes),
+                "",
+                f"{len(group.font_paths)} files"
+            ))
+            self.item_groups[item] = group
+            distances = dict(zip(group.font_paths, group.distances))
+            for font_path in [group.keep] + group.duplicate_paths:
+                if font_path == group.keep:
+                    note = "keep"
+                elif group.kind == DuplicateGroup.KIND_NEAR and distances.get(font_path) is not None:
+                    note = f"glyph distance {distances[font_path]:.1f}"
+                else:
+                    note = ""
+                child = self.tree.insert(item, 'end', text=font_path, values=(
+                    "", "",
+                    format_size(group.sizes.get(font_path, 0)),
+                    len(self.font_manager.get_font_categories(font_path)),
+                    note
+                ))
+                self.item_paths[child] = font_path
+        self.update_summary()
+
+    def update_summary(self):
+        wasted = sum(group.wasted_bytes for group in self.groups)
+        exact = sum(1 for group in self.groups if group.kind == DuplicateGroup.KIND_EXACT)
+        self.summary.configure(text=f"{exact} exact and {len(self.groups) - exact} near-duplicate groups, "
+                                    f"{format_size(wasted)} in copies. Copies are moved to {self.quarantine_dir}")
+
+    def _selected_groups(self):
+        groups = []
+        for item in self.tree.selection():
+            parent = self.tree.parent(item) or item
+            group = self.item_groups.get(parent)
+            if group and group not in groups:
+                groups.append(group)
+        return groups
+
+    def _refresh_marks(self):
+        for item, group in self.item_groups.items():
+            self.tree.set(item, "resolve", "Yes" if group.accepted else "No")
+
+    def toggle_selected(self):
+        """Toggles whether the selected groups will be resolved."""
+        for group in self._selected_groups():
+            group.accepted = not group.accepted
+        self._refresh_marks()
+
+    def mark_exact(self):
+        """Marks all groups of identical files."""
+        for group in self.groups:
+            if group.kind == DuplicateGroup.KIND_EXACT:
+                group.accepted = True
+        self._refresh_marks()
+
+    def keep_selected(self):
+        """Makes the selected file the one kept of its group."""
+        selection = [item for item in self.tree.selection() if item in self.item_paths]
+        if len(selection) != 1:
+            messagebox.showwarning("Selection Error", "Select one file to keep.", parent=self.window)
+            return
+        group = self.item_groups[self.tree.parent(selection[0])]
+        group.keep = self.item_paths[selection[0]]
+        group.accepted = True
+        self.populate()
+
+    def resolve(self):
+        """Keeps one file per marked group and moves the others to the quarantine directory."""
+        marked = [group for group in self.groups if group.accepted]
+        if not marked:
+            messagebox.showinfo("Info", "No groups are marked to resolve.", parent=self.window)
+            return
+        files = sum(len(group.duplicate_paths) for group in marked)
+        if not messagebox.askyesno("Resolve Duplicates",
+                                   f"Move {files} files of {len(marked)} groups to\n{self.quarantine_dir}\n"
+                                   f"and point their categories to the kept files?", parent=self.window):
+            return
+        try:
+            moved, failed = [], {}
+            for group in marked:
+                group_moved, group_failed = self.font_manager.resolve_duplicates(
+                    group.keep, group.duplicate_paths, self.quarantine_dir)
+                moved.extend(group_moved)
+                failed.update(group_failed)
+                group.font_paths = [path for path in group.font_paths if path not in group_moved]
+            self.groups = [group for group in self.groups if len(group.font_paths) > 1]
+            for group in self.groups:
+                group.accepted = False
+            if self.on_resolved:
+                self.on_resolved()
+            self.populate()
+            if failed:
+                details = "\n".join(f"{os.path.basename(path)}: {error}" for path, error in list(failed.items())[:10])
+                messagebox.showwarning("Resolve Duplicates",
+                                       f"Moved {len(moved)} files, {len(failed)} could not be moved:\n{details}",
+                                       parent=self.window)
+            else:
+                messagebox.showinfo("Success", f"Moved {len(moved)} files to quarantine.", parent=self.window)
+        except Exception as e:
+            logger.error(f"Error resolving duplicates: {str(e)}")
+            messagebox.showerror("Resolve Error", f"An error occurred while resolving duplicates:\n{str(e)}",
+                                 parent=self.window)
+
+    def close(self):
+        self.window.destroy()
+        self.window = None
+#
@@ -0,0 +1,110 @@
+# gui_font_health.py
+# for license info (GPL3), see license.txt from font_hyper package
+
+import time
+import tkinter as tk
+from tkinter import ttk, messagebox
+import logging
+
+from .gui_duplicates import format_size
+
+logger = logging.getLogger(__name__)
+
+
+class FontHealthDialog:
+    """
+    Report of the font files that crashed or hung a parser process during a scan
+    (see font_parse_pool.ParseQuarantine). Selected files can be given another
+    chance: they leave the quarantine and are parsed again by the next scan.
+    """
+    def __init__(self, parent, quarantine, on_retry=None, width=760, height=400):
+        self.parent = parent
+        self.quarantine = quarantine
+        self.on_retry = on_retry
+        self.item_paths = {}  # treeview item -> font file path
+
+        self.window = tk.Toplevel(parent)
+        self.window.title("Font Health - Report")
+        self.window.geometry(f"{width}x{height}")
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+        self.setup_ui()
+        self.populate()
+
+    def setup_ui(self):
+        """Creates the summary line, the files treeview and the action buttons."""
+        self.summary = ttk.Label(self.window, anchor='w')
+        self.summary.grid(row=0, column=0, sticky="ew", padx=10, pady=(10, 0))
+
+        frame = ttk.Frame(self.window)
+        frame.grid(row=1, column=0, sticky="nsew", padx=10, pady=(6, 0))
+        frame.columnconfigure(0, weight=1)
+        frame.rowconfigure(0, weight=1)
+
+        self.tree = ttk.Treeview(frame, columns=("reason", "size", "time", "status"),
+                                 show='tree headings', selectmode='extended')
+        self.tree.heading("#0", text="File")
+        self.tree.heading("reason", text="Reason")
+        self.tree.heading("size", text="Size")
+        self.tree.heading("time", text="Quarantined")
+        self.tree.heading("status", text="Status")
+        self.tree.column("#0", width=360, anchor='w')
+        self.tree.column("reason", width=70, anchor='center', stretch=False)
+        self.tree.column("size", width=80, anchor='e', stretch=False)
+        self.tree.column("time", width=130, anchor='center', stretch=False)
+        self.tree.column("status", width=90, anchor='center', stretch=False)
+        self.tree.grid(row=0, column=0, sticky="nsew")
+
+        vsb = ttk.Scrollbar(frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=vsb.set)
+        vsb.grid(row=0, column=1, sticky='ns')
+
+        button_frame = ttk.Frame(self.window)
+        button_frame.grid(row=2, column=0, pady=10)
+        buttons = [
+            ("Retry Selected", self.retry_selected),
+            ("Close", self.close)
+        ]
+        for col, (text, command) in enumerate(buttons):
+            ttk.Button(button_frame, text=text, command=command).grid(row=0, column=col, padx=4)
+
+        self.window.columnconfigure(0, weight=1)
+        self.window.rowconfigure(1, weight=1)
+
+    def populate(self):
+        """Fills the treeview with one row per quarantined file, the most recent first."""
+        self.tree.delete(*self.tree.get_children())
+        self.item_paths.clear()
+        entries = sorted(self.quarantine.entries.items(), key=lambda item: item[1].get('time', 0), reverse=True)
+        for file_path, entry in entries:
+            # A changed file is parsed again by the next scan
+            status = "skipped" if self.quarantine.is_quarantined(file_path) else "changed"
+            item = self.tree.insert('', 'end', text=file_path, values=(
+                entry.get('reason', ""),
+                format_size(entry.get('size', 0)),
+                time.strftime("%Y-%m-%d %H:%M", time.localtime(entry.get('time', 0))),
+                status
+            ))
+            self.item_paths[item] = file_path
+        self.summary.configure(text=f"{len(entries)} font files crashed or hung the font parser "
+                                    f"and are skipped by scans until they change.")
+
+    def retry_selected(self):
+        """Removes the selected files from the quarantine and rescans."""
+        file_paths = [self.item_paths[item] for item in self.tree.selection() if item in self.item_paths]
+        if not file_paths:
+            messagebox.showwarning("Selection Error", "Select the files to retry.", parent=self.window)
+            return
+        try:
+            self.quarantine.remove(file_paths)
+            if self.on_retry:
+                self.on_retry()
+            self.populate()
+        except Exception as e:
+            logger.error(f"Error retrying quarantined fonts: {str(e)}")
+            messagebox.showerror("Retry Error", f"An error occurred while retrying the files:\n{str(e)}",
+                                 parent=self.window)
+
+    def close(self):
+        self.window.destroy()
+        self.window = None
+#
@@ -4,11 +4,13 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog, colorchooser
 import logging
-import os
 import traceback
+from collections import OrderedDict
 import freetype
 import numpy as np
 from PIL import Image, ImageTk, ImageDraw, ImageColor
+from .font_archives import font_exists
+from .font_file_access import open_face
 
 logger = logging.getLogger(__name__)
 
@@ -40,7 +42,10 @@ class FontTableRenderFrame(ttk.LabelFrame):
         self.use_auto_hinting = True
         self.use_kerning = True
         self.font_size = 36
-        self.font_path = '/usr/share/fonts/TTF/DejaVuSans.ttf'
+        self.font_path = '/usr/share/fonts/TTF/DejaVuSans.ttf'  # font file rendered
+        self.face_index = 0  # face in font_path, for font collections
+        self._faces = OrderedDict()  # (font file, face index) -> freetype face, most recently used last
+        self.max_cached_faces = 16
         self.photo = None
         self.logging_enabled = tk.BooleanVar(value=False)
         self.setup_logging()
@@ -234,9 +239,9 @@ class FontTableRenderFrame(ttk.LabelFrame):
             if selected_fonts:
                 font_info = selected_fonts[0]
                 display_text = f"{font_info.font_name} -- {font_info.font_style} -- Size: {self.font_size}"
-            elif self.font_path and os.path.isfile(self.font_path):
+            elif self.font_path and font_exists(self.font_path):
                 try:
-                    face = freetype.Face(self.font_path)
+                    face = self.get_face()
                     font_name = face.family_name.decode('utf-8') if face.family_name else "Unknown"
                     font_style = face.style_name.decode('utf-8') if face.style_name else "Regular"
                     display_text = f"{font_name} -- {font_style} -- Size: {self.font_size}"
@@ -252,14 +257,28 @@ class FontTableRenderFrame(ttk.LabelFrame):
             logger.exception("Error changing font size")
             messagebox.showerror("Font Size Error", f"Error changing font size: {str(e)}")
 
+    def get_face(self):
+        """The freetype face of the current font, cached per (font file, face index)."""
+        key = (self.font_path, self.face_index)
+        face = self._faces.get(key)
+        if face is None:
+            # Over the shared mapping of the font file (archive members: the bounded in-memory cache)
+            face = open_face(self.font_path, self.face_index)
+            self._faces[key] = face
+            if len(self._faces) > self.max_cached_faces:
+                self._faces.popitem(last=False)
+        else:
+            self._faces.move_to_end(key)
+        return face
+
     def render_text_on_canvas(self):
         """Render text on the canvas using current settings."""
         text = self.render_entry.get()
         try:
-            if not self.font_path or not os.path.isfile(self.font_path):
+            if not self.font_path or not font_exists(self.font_path):
                 raise FileNotFoundError(f"Font file not found: {self.font_path}")
 
-            face = freetype.Face(self.font_path)
+            face = self.get_face()
             load_flags = freetype.FT_LOAD_RENDER
 
             if self.use_lcd_rendering:
@@ -424,7 +443,8 @@ class FontTableRenderFrame(ttk.LabelFrame):
         """Update the current font display and rendering."""
         try:
             if font_info:
-                self.font_path = font_info.font_path
+                self.font_path = font_info.file_path
+                self.face_index = font_info.face_index
                 display_text = f"{font_info.font_name} -- {font_info.font_style} -- Size: {self.font_size}"
             else:
                 display_text = f"-- -- -- Size: {self.font_size}"
@@ -14,6 +14,7 @@ from .menu_setup import MenuManager
 from .treeviews_and_treeview_events import TreeviewManager
 from .gui_paths_categories import PathsCategoriesFrame
 from .gui_font_table_render import FontTableRenderFrame
+from .background_scan import BackgroundScan
 from .shortcuts import ShortcutManager
 from .utils import focus_next
 
@@ -101,6 +102,7 @@ class FontHyperGUI:
         self.top_row_visible = True
         self.fonts_in_category_mapping = {}
         self.category_icons = {}
+        self.metrics_filters = {}  # Range filters on font metrics, see gui_metrics_filter.py
 
     def create_base_frames(self):
         """Creates the basic frame structure needed by managers."""
@@ -240,6 +242,7 @@ class FontHyperGUI:
         # Buttons
         buttons = [
             ("Clear Text", self.event_manager.clear_search),
+            ("Metrics Filter", self.event_manager.open_metrics_filter),
             ("Hide Sys Fonts", self.event_manager.toggle_hide_sys_fonts),
             ("Hide User Fonts", self.event_manager.hide_user_fonts)
         ]
@@ -252,6 +255,12 @@ class FontHyperGUI:
             elif text == "Hide User Fonts":
                 self.hide_user_fonts_button = btn
 
+        # Typo tolerant search, ranked by relevance
+        self.fuzzy_search_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(search_frame, text="Fuzzy", variable=self.fuzzy_search_var,
+                        command=self.event_manager.filter_fonts).grid(
+            row=0, column=len(buttons) + 2, padx=2, pady=2)
+
         search_frame.columnconfigure(1, weight=1)
 
 
@@ -283,15 +292,23 @@ class FontHyperGUI:
         
 
     def initial_data_load(self):
-        """Performs initial font search and populates treeviews."""
-        self.font_manager.search_fonts()
+        """Populates treeviews and starts the initial font search in the background."""
+        from .path_config import SCAN_SLICE_MS
         self.treeview_manager.populate_font_table()
         self.treeview_manager.populate_categories()
+        self.background_scan = BackgroundScan(self.root, self.font_manager, self.on_scan_progress, SCAN_SLICE_MS)
+        self.background_scan.start()
+
+    def on_scan_progress(self, phase):
+        """Shows the fonts found by the background scan after each of its phases."""
+        self.treeview_manager.populate_font_table()
+        category_label = self.treeview_manager.get_selected_category()
+        if category_label:
+            self.treeview_manager.populate_fonts_in_category(category_label)
 
     def on_exit(self):
         """Handle application exit."""
-        self.state_manager.save_state()
-        self.root.destroy()
+        self.state_manager.on_exit()
 
     # Delegate methods to event_manager
     def copy_font_name(self):
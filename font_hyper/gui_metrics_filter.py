@@ -0,0 +1,100 @@
+# gui_metrics_filter.py
+# for license info (GPL3), see license.txt from font_hyper package
+
+import tkinter as tk
+from tkinter import ttk, messagebox
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class MetricsFilterDialog:
+    """
+    Dialog for range filters on font metrics (weight, width, x-height, ...).
+    The resulting filter dict is stored in gui.metrics_filters and applied by EventManager.filter_fonts.
+    """
+    # (column name, label, value type)
+    RANGE_FIELDS = [
+        ('weight', "Weight (100-900)", int),
+        ('width', "Width class (1-9)", int),
+        ('x_height_ratio', "x-Height / em", float),
+        ('cap_height_ratio', "Cap Height / em", float),
+        ('italic_angle', "Italic Angle", float),
+        ('glyph_count', "Glyph Count", int),
+    ]
+
+    def __init__(self, parent, gui):
+        self.parent = parent
+        self.gui = gui
+        self.entries = {}
+
+        self.window = tk.Toplevel(parent)
+        self.window.title("Metrics Filter")
+        self.window.transient(parent)
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+        self.setup_ui()
+
+    def setup_ui(self):
+        """Creates one min/max entry pair per range field plus flag checkboxes."""
+        frame = ttk.Frame(self.window, padding=10)
+        frame.grid(row=0, column=0, sticky="nsew")
+        ttk.Label(frame, text="Min").grid(row=0, column=1)
+        ttk.Label(frame, text="Max").grid(row=0, column=2)
+
+        filters = getattr(self.gui, 'metrics_filters', {}) or {}
+        for row, (name, label, _) in enumerate(self.RANGE_FIELDS, start=1):
+            ttk.Label(frame, text=label).grid(row=row, column=0, sticky="w", padx=4, pady=2)
+            minimum, maximum = filters.get(name, (None, None))
+            pair = []
+            for col, value in enumerate((minimum, maximum), start=1):
+                entry = ttk.Entry(frame, width=8)
+                entry.grid(row=row, column=col, padx=2, pady=2)
+                if value is not None:
+                    entry.insert(0, str(value))
+                pair.append(entry)
+            self.entries[name] = pair
+
+        self.fixed_pitch_var = tk.BooleanVar(value=filters.get('fixed_pitch') is True)
+        ttk.Checkbutton(frame, text="Monospace only", variable=self.fixed_pitch_var).grid(
+            row=len(self.RANGE_FIELDS) + 1, column=0, columnspan=3, sticky="w", padx=4, pady=4)
+
+        button_frame = ttk.Frame(self.window)
+        button_frame.grid(row=1, column=0, pady=(0, 10))
+        ttk.Button(button_frame, text="Apply", command=self.apply).grid(row=0, column=0, padx=4)
+        ttk.Button(button_frame, text="Reset", command=self.reset).grid(row=0, column=1, padx=4)
+        ttk.Button(button_frame, text="Close", command=self.close).grid(row=0, column=2, padx=4)
+
+    def read_filters(self):
+        """Parses the entries into a filter dict for FontMetricsTable.mask()."""
+        filters = {}
+        for name, _, value_type in self.RANGE_FIELDS:
+            values = []
+            for entry in self.entries[name]:
+                text = entry.get().strip()
+                values.append(value_type(text) if text else None)
+            if values[0] is not None or values[1] is not None:
+                filters[name] = tuple(values)
+        if self.fixed_pitch_var.get():
+            filters['fixed_pitch'] = True
+        return filters
+
+    def apply(self):
+        try:
+            self.gui.metrics_filters = self.read_filters()
+        except ValueError as e:
+            messagebox.showwarning("Input Error", f"Invalid number: {e}", parent=self.window)
+            return
+        logger.debug(f"Metrics filters set to {self.gui.metrics_filters}")
+        self.gui.event_manager.filter_fonts()
+
+    def reset(self):
+        for pair in self.entries.values():
+            for entry in pair:
+                entry.delete(0, tk.END)
+        self.fixed_pitch_var.set(False)
+        self.apply()
+
+    def close(self):
+        self.window.destroy()
+        self.window = None
+#
@@ -82,6 +82,10 @@ class PathsCategoriesFrame(ttk.Frame):
                                              command=self.remove_user_path)
         self.remove_user_path_btn.pack(fill=tk.X, padx=5, pady=5)
 
+        self.scan_options_btn = ttk.Button(path_actions_frame, text="Scan Options",
+                                         command=self.edit_scan_policy)
+        self.scan_options_btn.pack(fill=tk.X, padx=5, pady=5)
+
         self.scan_fonts_btn = ttk.Button(path_actions_frame, text="Scan for Fonts", 
                                        command=self.scan_for_fonts)
         self.scan_fonts_btn.pack(fill=tk.X, padx=5, pady=(5, 10))
@@ -128,7 +132,7 @@ class PathsCategoriesFrame(ttk.Frame):
                     self.user_list.delete(index)
                     logger.info(f"Removed user path: {path}")
 
-            self.font_manager.fonts.clear()
+            self.font_manager.clear_fonts()
             self.font_manager.search_fonts()
             self.main_window.treeview_manager.populate_font_table()
             
@@ -136,6 +140,21 @@ class PathsCategoriesFrame(ttk.Frame):
             logger.error(f"Error removing user path: {str(e)}")
             messagebox.showerror("Error", f"An error occurred while removing the path:\n{str(e)}")
 
+    def edit_scan_policy(self):
+        """Opens the scan options (exclude patterns, depth, symlinks, extensions) of the selected path."""
+        from .gui_scan_policy import ScanPolicyDialog
+        try:
+            selected = ([self.user_list.get(i) for i in self.user_list.curselection()] +
+                        [self.predefined_list.get(i) for i in self.predefined_list.curselection()])
+            if len(selected) != 1:
+                messagebox.showwarning("Selection Error", "Select one font path.")
+                return
+            ScanPolicyDialog(self.main_window.root, self.font_manager, selected[0],
+                             on_saved=self.main_window.treeview_manager.populate_font_table)
+        except Exception as e:
+            logger.error(f"Error opening scan options: {str(e)}")
+            messagebox.showerror("Error", f"An error occurred while opening the scan options:\n{str(e)}")
+
     def scan_for_fonts(self):
         """Initiates a font scan across all paths."""
         try:
@@ -167,7 +186,7 @@ class PathsCategoriesFrame(ttk.Frame):
                     confirm = messagebox.askyesno("Confirm Deletion",
                                                f"Delete category '{category_label}', are you sure?")
                     if confirm:
-                        del self.font_manager.categories[category_label]
+                        self.font_manager.remove_category(category_label)
                         self.main_window.categories_treeview.delete(item)
                         logger.info(f"Removed category: {category_label}")
                 else:
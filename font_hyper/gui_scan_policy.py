@@ -0,0 +1,113 @@
+# gui_scan_policy.py
+# for license info (GPL3), see license.txt from font_hyper package
+
+import tkinter as tk
+from tkinter import ttk, messagebox
+import logging
+
+from .font_walker import ScanPolicy
+
+logger = logging.getLogger(__name__)
+
+
+class ScanPolicyDialog:
+    """
+    Dialog for the ScanPolicy of one search root: exclude patterns (gitignore-style,
+    one per line), max depth, symlink following and file extensions; shows the
+    statistics of the root's last scan. Saving applies the policy and rescans.
+    """
+    def __init__(self, parent, font_manager, root_path, on_saved=None):
+        self.parent = parent
+        self.font_manager = font_manager
+        self.root_path = root_path
+        self.on_saved = on_saved
+
+        self.window = tk.Toplevel(parent)
+        self.window.title(f"Scan Options - {root_path}")
+        self.window.transient(parent)
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+        self.setup_ui()
+
+    def setup_ui(self):
+        """Creates the policy fields, the statistics line and the buttons."""
+        policy = self.font_manager.get_scan_policy(self.root_path)
+        frame = ttk.Frame(self.window, padding=10)
+        frame.grid(row=0, column=0, sticky="nsew")
+        frame.columnconfigure(1, weight=1)
+        frame.rowconfigure(0, weight=1)
+
+        ttk.Label(frame, text="Exclude patterns\n(one per line)").grid(row=0, column=0, sticky="nw", padx=4, pady=2)
+        self.exclude_text = tk.Text(frame, width=40, height=8, wrap=tk.NONE)
+        self.exclude_text.grid(row=0, column=1, sticky="nsew", padx=4, pady=2)
+        self.exclude_text.insert('1.0', "\n".join(policy.exclude))
+
+        ttk.Label(frame, text="Max depth").grid(row=1, column=0, sticky="w", padx=4, pady=2)
+        self.depth_entry = ttk.Entry(frame, width=8)
+        self.depth_entry.grid(row=1, column=1, sticky="w", padx=4, pady=2)
+        if policy.max_depth is not None:
+            self.depth_entry.insert(0, str(policy.max_depth))
+
+        ttk.Label(frame, text="Extensions").grid(row=2, column=0, sticky="w", padx=4, pady=2)
+        self.extensions_entry = ttk.Entry(frame, width=30)
+        self.extensions_entry.grid(row=2, column=1, sticky="w", padx=4, pady=2)
+        if policy.extensions is not None:
+            self.extensions_entry.insert(0, " ".join(policy.extensions))
+
+        self.follow_links_var = tk.BooleanVar(value=policy.follow_links)
+        ttk.Checkbutton(frame, text="Follow symlinked directories", variable=self.follow_links_var).grid(
+            row=3, column=0, columnspan=2, sticky="w", padx=4, pady=4)
+
+        ttk.Label(frame, text="Empty max depth and extensions mean no limit; e.g. node_modules/, *.bak, /build",
+                  foreground="gray").grid(row=4, column=0, columnspan=2, sticky="w", padx=4)
+
+        stats = self.font_manager.scan_stats.get(self.font_manager._root_key(self.root_path))
+        ttk.Label(frame, text=f"Last scan: {stats.summary()}" if stats else "Not scanned in this session").grid(
+            row=5, column=0, columnspan=2, sticky="w", padx=4, pady=(8, 0))
+
+        button_frame = ttk.Frame(self.window)
+        button_frame.grid(row=1, column=0, pady=(0, 10))
+        ttk.Button(button_frame, text="Save and Scan", command=self.save).grid(row=0, column=0, padx=4)
+        ttk.Button(button_frame, text="Reset", command=self.reset).grid(row=0, column=1, padx=4)
+        ttk.Button(button_frame, text="Close", command=self.close).grid(row=0, column=2, padx=4)
+
+        self.window.columnconfigure(0, weight=1)
+        self.window.rowconfigure(0, weight=1)
+
+    def read_policy(self):
+        """Parses the fields into a ScanPolicy; raises ValueError for an invalid depth."""
+        depth = self.depth_entry.get().strip()
+        max_depth = int(depth) if depth else None
+        if max_depth is not None and max_depth < 0:
+            raise ValueError(depth)
+        extensions = self.extensions_entry.get().replace(",", " ").split()
+        return ScanPolicy(self.exclude_text.get('1.0', tk.END).splitlines(), max_depth,
+                          self.follow_links_var.get(), extensions or None)
+
+    def save(self):
+        try:
+            policy = self.read_policy()
+        except ValueError as e:
+            messagebox.showwarning("Input Error", f"Invalid max depth: {e}", parent=self.window)
+            return
+        try:
+            self.font_manager.set_scan_policy(self.root_path, policy)
+            self.font_manager.search_fonts()
+            if self.on_saved:
+                self.on_saved()
+            logger.info(f"Scan policy of {self.root_path} set to {policy.to_dict()}")
+            self.close()
+        except Exception as e:
+            logger.error(f"Error applying scan policy: {str(e)}")
+            messagebox.showerror("Error", f"An error occurred while applying the scan options:\n{str(e)}",
+                                 parent=self.window)
+
+    def reset(self):
+        self.exclude_text.delete('1.0', tk.END)
+        self.depth_entry.delete(0, tk.END)
+        self.extensions_entry.delete(0, tk.END)
+        self.follow_links_var.set(True)
+
+    def close(self):
+        self.window.destroy()
+        self.window = None
+#
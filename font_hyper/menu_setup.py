@@ -101,6 +101,9 @@ class MenuManager:
                         command=self.event_manager.install_category_fonts)
         menu.add_command(label="Remove Category Fonts (K)",
                         command=self.event_manager.remove_category_fonts)
+        menu.add_separator()
+        menu.add_command(label="Suggest Categories...",
+                        command=self.event_manager.suggest_categories)
         
         return menu
         
@@ -113,6 +116,13 @@ class MenuManager:
         menu.add_command(label="Update System Font Cache (U)",
                         command=self.event_manager.update_sys_cache_fonts)
         menu.add_separator()
+        menu.add_command(label="Identify Font from Image...",
+                        command=self.event_manager.identify_font_from_image)
+        menu.add_command(label="Duplicate Fonts Report...",
+                        command=self.event_manager.show_duplicate_report)
+        menu.add_command(label="Font Health Report...",
+                        command=self.event_manager.show_font_health_report)
+        menu.add_separator()
         menu.add_command(label="Export Category List",
                         command=self.export_category_list)
         menu.add_command(label="Export Font List",
@@ -300,15 +310,18 @@ License: GPL-3.0
             if not filepath:
                 return
 
+            # Sorted and read as columns, see font_columns.py
+            font_manager = self.gui.font_manager
+            rows = font_manager.get_columns().order('font_name')
             with open(filepath, 'w') as f:
                 f.write("Font List\n")
                 f.write("=" * 50 + "\n\n")
-                for font in sorted(self.gui.font_manager.fonts, key=lambda x: x.font_name):
-                    f.write(f"Name: {font.font_name}\n")
-                    f.write(f"Style: {font.font_style}\n")
-                    f.write(f"File: {font.font_file}\n")
-                    if font.user_note:
-                        f.write(f"Note: {font.user_note}\n")
+                for name, style, note, _, file, _, _ in font_manager.font_table_values(rows):
+                    f.write(f"Name: {name}\n")
+                    f.write(f"Style: {style}\n")
+                    f.write(f"File: {file}\n")
+                    if note:
+                        f.write(f"Note: {note}\n")
                     f.write("-" * 30 + "\n")
 
             logger.info(f"Font list exported to: {filepath}")
@@ -76,6 +76,64 @@ config_base_path_bsd = "~/.config/"  # BSD typically follows Linux XDG conventio
 # Application specific config directory name
 APP_CONFIG_DIR = "font_hyper_conf"
 
+# Catalog storage in the config directory:
+# "json" keeps categories and notes in contents.json, with the autosave, the edit journal and the font
+# snapshot below; "sqlite" (opt-in) keeps fonts, categories and notes in CATALOG_DB_FILE and writes every
+# edit in its own transaction instead, without those three: its fonts are all built at startup.
+# contents.json is imported into a new database once, and a database is read when there is no contents.json
+CATALOG_BACKEND = "json"
+CATALOG_DB_FILE = "catalog.sqlite3"
+
+# With the json backend, contents.json is saved in the background this long after the last edit (0 disables)
+AUTOSAVE_DELAY_MS = 3000
+
+# With the json backend, catalog edits are appended to JOURNAL_FILE next to contents.json and replayed
+# on top of it at startup; the log is fsynced every JOURNAL_SYNC_BATCH entries or JOURNAL_SYNC_DELAY_MS
+# after an edit, and compacted into a new contents.json once it exceeds JOURNAL_COMPACT_BYTES
+JOURNAL_ENABLED = True
+JOURNAL_FILE = "contents.journal"
+JOURNAL_SYNC_BATCH = 16
+JOURNAL_SYNC_DELAY_MS = 1000
+JOURNAL_COMPACT_BYTES = 1024 * 1024
+
+# With the json backend, the scanned fonts are kept in this binary snapshot (see font_snapshot.py),
+# memory-mapped and decoded lazily at startup instead of rescanning every font file ("" disables)
+FONT_SNAPSHOT_FILE = "fonts.snapshot"
+
+# Duplicate font files removed with the duplicate report are moved here (in the config directory),
+# one subdirectory per resolution, mirroring their original paths
+QUARANTINE_DIR = "quarantine"
+
+# Scans parse font files in this many worker processes, so a font that crashes or hangs freetype or
+# fontTools can't take the application down (0 parses in the application process). A file that crashes
+# its worker or takes longer than PARSE_TIMEOUT_S seconds is listed in PARSE_QUARANTINE_FILE (in the
+# config directory) and skipped by later scans until it changes, see Tools > Font Health Report
+PARSE_WORKERS = 2
+PARSE_TIMEOUT_S = 10
+PARSE_QUARANTINE_FILE = "parse_quarantine.json"
+
+# Listings of the scanned directories by mtime (in the config directory); rescans skip
+# listing directories that did not change ("" keeps the listings for the session only)
+SCAN_DIR_CACHE_FILE = "scan_dirs.json"
+
+# Unicode coverage of the fonts (in the config directory), read once per font file for covers: queries
+# and kept across sessions, see font_coverage.py ("" keeps it for the session only)
+COVERAGE_CACHE_FILE = "coverage.npz"
+
+# Scans take the fonts of the system paths from fontconfig (one fc-list call) where it has
+# current records of them instead of parsing the files; user paths are always parsed
+FONTCONFIG_IMPORT = True
+
+# Scans checkpoint the fonts found and the directories finished every SCAN_CHECKPOINT_FILES files to
+# SCAN_CHECKPOINT_FILE (in the config directory); a scan interrupted by closing, a crash or cancelling
+# is continued by the next start, whose font list has the fonts found so far at once ("" disables it)
+SCAN_CHECKPOINT_FILE = "scan_checkpoint.jsonl"
+SCAN_CHECKPOINT_FILES = 200
+
+# The startup scan runs between GUI events in slices of this many milliseconds, finding the fonts
+# of categories first, then those of the user paths, then the system fonts (see background_scan.py)
+SCAN_SLICE_MS = 50
+
 def get_system_paths():
     """Returns appropriate system font paths based on platform."""
     import platform
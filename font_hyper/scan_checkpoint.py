@@ -0,0 +1,173 @@
+# scan_checkpoint.py
+# for license info (GPL3), see license.txt from font_hyper package
+
+import os
+import json
+import time
+import logging
+
+from .font_info import FontInfo
+from .font_archives import split_archive_path
+
+logger = logging.getLogger(__name__)
+
+# Defaults, the application uses the settings in path_config.py
+CHECKPOINT_FILES = 200
+
+
+class ScanCancelled(Exception):
+    """Raised inside a scan stopped by FontManager.cancel_scan(); its checkpoint is kept."""
+
+
+class ScanCheckpoint:
+    """
+    Progress of the running scan, appended to a JSON lines file every `every` parsed
+    files: the fonts added since the last checkpoint and the directories whose files
+    are all processed. The first line names the scanned paths and the start time.
+
+    A completed scan removes the file. If it is still there at the next start, the
+    scan was interrupted (closed, crashed or cancelled): load() reads the fonts it
+    got, which are usable at once, and the next scan of the same paths continues it,
+    skipping the finished directories that did not change since (see skips()).
+    Without a file_path nothing is written.
+    """
+    def __init__(self, file_path=None, every=CHECKPOINT_FILES):
+        self.file_path = file_path
+        self.every = every
+        self.paths = None  # [predefined paths, user paths] of the checkpointed scan
+        self.started_ns = None  # time.time_ns() the checkpointed scan started
+        self.done_dirs = set()  # finished directories of the interrupted scan
+        self._file = None
+        self._fonts = []  # font dicts not written yet
+        self._dirs = []  # finished directories not written yet
+        self._current_dir = None  # directory of the last processed file
+        self._files = 0  # files processed since the last checkpoint
+
+    def load(self, file_path=None):
+        """
+        Reads the checkpoint of an interrupted scan; a torn last line (crash mid-write) ends it.
+
+        Returns:
+            list: FontInfo objects the interrupted scan had added, empty if there is none
+        """
+        self.file_path = file_path or self.file_path
+        self.paths, self.started_ns, self.done_dirs = None, None, set()
+        if not self.file_path or not os.path.exists(self.file_path):
+            return []
+        fonts = []
+        try:
+            with open(self.file_path, 'r', encoding='utf-8') as f:
+                for line_number, line in enumerate(f, 1):
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        logger.warning(f"Scan checkpoint is damaged at line {line_number}, ignoring the rest")
+                        break
+                    if line_number == 1:
+                        self.paths = entry.get('paths')
+                        self.started_ns = entry.get('started_ns')
+                        continue
+                    fonts.extend(FontInfo.from_dict(font) for font in entry.get('fonts', ()))
+                    self.done_dirs.update(entry.get('dirs', ()))
+        except Exception as e:
+            logger.error(f"Error reading scan checkpoint: {e}")
+            self.paths, self.started_ns, self.done_dirs = None, None, set()
+            return []
+        if self.started_ns is None:
+            return []
+        logger.info(f"Interrupted scan found: {len(fonts)} fonts, {len(self.done_dirs)} finished directories")
+        return fonts
+
+    def begin(self, paths):
+        """
+        Starts checkpointing a scan of paths ([predefined paths, user paths]). The
+        checkpoint of an interrupted scan of the same paths is continued, any other one
+        is discarded.
+        """
+        self._fonts, self._dirs, self._current_dir, self._files = [], [], None, 0
+        if not self.file_path:
+            return
+        resume = self.started_ns is not None and self.paths == paths and os.path.exists(self.file_path)
+        try:
+            if resume:
+                self._file = open(self.file_path, 'a', encoding='utf-8')
+                logger.info(f"Resuming the interrupted scan, {len(self.done_dirs)} directories are finished")
+            else:
+                self.paths, self.started_ns, self.done_dirs = paths, time.time_ns(), set()
+                self._file = open(self.file_path, 'w', encoding='utf-8')
+                self._write({'paths': paths, 'started_ns': self.started_ns})
+        except OSError as e:
+            logger.error(f"Cannot write scan checkpoint: {e}")
+            self._file = None
+
+    def skips(self, directory):
+        """True if the interrupted scan finished directory and it did not change since that scan started."""
+        if directory not in self.done_dirs:
+            return False
+        try:
+            return os.stat(directory).st_mtime_ns < self.started_ns
+        except OSError:
+            return False
+
+    def add_font(self, font_info):
+        if self._file is not None:
+            self._fonts.append(font_info.to_dict())
+
+    def file_done(self, file_path, walked=True):
+        """
+        Counts a processed file (parsed, failed or taken from fontconfig). Walked files
+        come in walk order, so the directory of the previous one is finished when it
+        changes; files loaded out of that order (walked False) finish no directory.
+        """
+        if self._file is None:
+            return
+        directory = os.path.dirname(split_archive_path(file_path)[0])
+        if walked and directory != self._current_dir:
+            self.dir_done()
+            self._current_dir = directory
+        self._files += 1
+        if self._files >= self.every:
+            self.checkpoint()
+
+    def dir_done(self):
+        """Marks the directory of the last processed file finished (at the end of a search root)."""
+        if self._current_dir is not None:
+            self._dirs.append(self._current_dir)
+            self._current_dir = None
+
+    def checkpoint(self):
+        """Appends the fonts and finished directories since the last checkpoint and syncs the file."""
+        if self._file is None or not (self._fonts or self._dirs):
+            return
+        self._write({'fonts': self._fonts, 'dirs': self._dirs})
+        self._fonts, self._dirs, self._files = [], [], 0
+
+    def _write(self, entry):
+        try:
+            self._file.write(json.dumps(entry, ensure_ascii=False, separators=(',', ':')) + '\n')
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        except (OSError, ValueError) as e:
+            logger.error(f"Error writing scan checkpoint: {e}")
+
+    def interrupt(self):
+        """Writes the last checkpoint of a scan that stops unfinished; the next scan continues it."""
+        if self._file is not None:
+            self.checkpoint()
+            self._file.close()
+            self._file = None
+
+    def finish(self):
+        """Ends a completed scan: the checkpoint is removed."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self.paths, self.started_ns, self.done_dirs = None, None, set()
+        if self.file_path:
+            try:
+                os.remove(self.file_path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.error(f"Cannot remove scan checkpoint: {e}")
+#
@@ -0,0 +1,305 @@
+# sfnt_reader.py
+# for license info (GPL3), see license.txt from font_hyper package
+
+import struct
+import logging
+from bisect import bisect_right
+import numpy as np
+
+from .font_info import split_font_key
+from .font_file_access import font_buffer, read_table_directory
+
+logger = logging.getLogger(__name__)
+
+NAME_HEADER = struct.Struct('>HHH')  # format, count, stringOffset
+NAME_RECORD = struct.Struct('>6H')  # platformID, encodingID, languageID, nameID, length, offset
+CMAP_HEADER = struct.Struct('>HH')  # version, numTables
+CMAP_RECORD = struct.Struct('>HHI')  # platformID, encodingID, offset
+
+# Text encodings of name records by (platform, encoding); records of other encodings are skipped
+NAME_ENCODINGS = {
+    (0, None): 'utf_16_be',  # Unicode platform, any encoding
+    (3, 0): 'utf_16_be',  # Windows symbol
+    (3, 1): 'utf_16_be',  # Windows Unicode BMP
+    (3, 10): 'utf_16_be',  # Windows Unicode full repertoire
+    (1, 0): 'mac_roman',
+    (1, 1): 'shift_jis',
+    (1, 2): 'big5',
+    (1, 3): 'euc_kr',
+    (1, 25): 'gb2312',
+}
+ENGLISH_LANGUAGES = {(1, 0), (3, 0x409)}  # (platform, language) of US English
+
+# cmap subtables used for character lookups, best first: (platform, encoding, format)
+CMAP_PREFERENCE = [(3, 10, 12), (0, 6, 12), (0, 4, 12), (3, 1, 4), (0, 3, 4),
+                   (0, 2, 4), (0, 1, 4), (0, 0, 4), (3, 0, 4)]
+
+
+class SfntError(ValueError):
+    """Data the reader does not handle; callers fall back to fontTools or freetype."""
+
+
+def merge_ranges(ranges):
+    """Sorted, disjoint (starts, ends) lists of inclusive codepoint ranges, adjacent ranges joined."""
+    starts, ends = [], []
+    for start, end in sorted(ranges):
+        if ends and start <= ends[-1] + 1:
+            ends[-1] = max(ends[-1], end)
+        else:
+            starts.append(start)
+            ends.append(end)
+    return starts, ends
+
+
+def _true_runs(mask, first):
+    """Inclusive (start, end) ranges of the runs of True in a boolean array, numbered from first."""
+    edges = np.flatnonzero(np.diff(np.concatenate(([False], mask, [False])).astype(np.int8)))
+    return [(first + int(a), first + int(b) - 1) for a, b in zip(edges[0::2], edges[1::2])]
+
+
+def _fixed(value):
+    """16.16 fixed-point number to float."""
+    return value / 65536.0
+
+
+def _name_rank(platform, encoding, language):
+    """Preference of a name record, lower is better: English Windows/Unicode first, then Mac English."""
+    if platform in (0, 3):
+        return 0 if platform == 0 or (platform, language) in ENGLISH_LANGUAGES else 2
+    if platform == 1:
+        return 1 if (platform, language) in ENGLISH_LANGUAGES else 3
+    return 4
+
+
+class CharacterMap:
+    """Lookups in one cmap subtable (format 4 or 12), decoded into sorted range arrays."""
+    def __init__(self, starts, ends, glyph_of):
+        self.starts = starts
+        self.ends = ends
+        self._glyph_of = glyph_of  # (range index, codepoint) -> glyph id
+
+    def glyph_index(self, codepoint):
+        """Glyph id of a Unicode codepoint, 0 if the font has no glyph for it."""
+        i = bisect_right(self.starts, codepoint) - 1
+        if i < 0 or codepoint > self.ends[i]:
+            return 0
+        return self._glyph_of(i, codepoint)
+
+    def __contains__(self, char):
+        return self.glyph_index(ord(char) if isinstance(char, str) else char) != 0
+
+    def covers(self, chars):
+        return all(self.glyph_index(ord(c)) for c in chars)
+
+
+class SfntFont:
+    """
+    Minimal reader of a TrueType/OpenType face for scanning: the table directory and
+    the name, OS/2, head, post, maxp and cmap (format 4/12) tables are decoded with
+    struct straight from the font buffer (the shared file mapping), nothing else.
+    Anything unexpected raises SfntError.
+    """
+    def __init__(self, buffer, face_index=0):
+        self.buffer = buffer
+        try:
+            self.tables = read_table_directory(buffer, face_index)
+        except ValueError as e:
+            raise SfntError(str(e)) from e
+        self._names = None
+
+    @classmethod
+    def open(cls, font_path):
+        """Reader of a font by its catalog key (collection faces and archive members included)."""
+        file_path, face_index = split_font_key(font_path)
+        try:
+            return cls(font_buffer(file_path), face_index)
+        except (OSError, ValueError) as e:
+            raise SfntError(f"Cannot read {file_path}: {e}") from e
+
+    def _table(self, tag, min_length):
+        """Offset of a table, None if the face has none; SfntError if it is shorter than min_length."""
+        entry = self.tables.get(tag)
+        if entry is None:
+            return None
+        offset, length = entry
+        if length < min_length:
+            raise SfntError(f"'{tag}' table too short ({length} bytes)")
+        return offset
+
+    def _unpack(self, fmt, offset):
+        try:
+            return struct.unpack_from(fmt, self.buffer, offset)
+        except struct.error as e:
+            raise SfntError(str(e)) from e
+
+    def _decode_names(self):
+        names = {}  # name id -> (rank, text)
+        offset = self._table('name', NAME_HEADER.size)
+        if offset is None:
+            return names
+        _, count, string_offset = self._unpack(NAME_HEADER.format, offset)
+        storage = offset + string_offset
+        end = offset + self.tables['name'][1]
+        for i in range(count):
+            platform, encoding, language, name_id, length, text_offset = self._unpack(
+                NAME_RECORD.format, offset + NAME_HEADER.size + i * NAME_RECORD.size)
+            codec = NAME_ENCODINGS.get((platform, None if platform == 0 else encoding))
+            if codec is None:
+                continue
+            rank = _name_rank(platform, encoding, language)
+            if name_id in names and names[name_id][0] <= rank:
+                continue
+            start = storage + text_offset
+            if start + length > end:
+                continue
+            try:
+                text = bytes(self.buffer[start:start + length]).decode(codec)
+            except UnicodeDecodeError:
+                continue
+            names[name_id] = (rank, text)
+        return names
+
+    def name(self, name_id):
+        """Text of a name table entry (e.g. 4 full name, 5 version, 13 license), "" if missing."""
+        if self._names is None:
+            self._names = self._decode_names()
+        entry = self._names.get(name_id)
+        return entry[1] if entry else ""
+
+    def metrics(self):
+        """
+        Numeric metrics, the same as font_metrics.extract_font_metrics() gives for a fontTools TTFont.
+
+        Returns:
+            dict: Keys of METRIC_COLUMNS plus 'panose' (list of 10 ints), only for tables present
+        """
+        metrics = {}
+        offset = self._table('OS/2', 42)
+        if offset is not None:
+            version, = self._unpack('>H', offset)
+            metrics['weight'], metrics['width'] = self._unpack('>HH', offset + 4)
+            if version >= 2 and self.tables['OS/2'][1] >= 90:
+                metrics['x_height'], metrics['cap_height'] = self._unpack('>hh', offset + 86)
+            metrics['panose'] = list(self._unpack('>10B', offset + 32))
+        offset = self._table('post', 16)
+        if offset is not None:
+            italic_angle, = self._unpack('>i', offset + 4)
+            fixed_pitch, = self._unpack('>I', offset + 12)
+            metrics['italic_angle'] = _fixed(italic_angle)
+            metrics['fixed_pitch'] = bool(fixed_pitch)
+        offset = self._table('head', 54)
+        if offset is not None:
+            metrics['units_per_em'], = self._unpack('>H', offset + 18)
+        offset = self._table('maxp', 6)
+        if offset is not None:
+            metrics['glyph_count'], = self._unpack('>H', offset + 4)
+        return metrics
+
+    def font_revision(self):
+        """head.fontRevision, None without a head table."""
+        offset = self._table('head', 54)
+        return None if offset is None else _fixed(self._unpack('>i', offset + 4)[0])
+
+    def _cmap_subtable(self):
+        """(format, offset) of the best Unicode cmap subtable (see CMAP_PREFERENCE), None if there is none."""
+        offset = self._table('cmap', CMAP_HEADER.size)
+        if offset is None:
+            return None
+        _, count = self._unpack(CMAP_HEADER.format, offset)
+        candidates = {}
+        for i in range(count):
+            platform, encoding, sub_offset = self._unpack(CMAP_RECORD.format, offset + CMAP_HEADER.size + i * CMAP_RECORD.size)
+            fmt, = self._unpack('>H', offset + sub_offset)
+            candidates.setdefault((platform, encoding, fmt), offset + sub_offset)
+        for key in CMAP_PREFERENCE:
+            if key in candidates:
+                return key[2], candidates[key]
+        return None
+
+    def cmap(self):
+        """CharacterMap of the best Unicode subtable (see CMAP_PREFERENCE), None if there is none."""
+        subtable = self._cmap_subtable()
+        if subtable is None:
+            return None
+        fmt, offset = subtable
+        return self._format_12(offset) if fmt == 12 else self._format_4(offset)
+
+    def coverage(self):
+        """
+        The codepoints with a glyph in the subtable cmap() reads, as sorted, disjoint
+        ranges: (starts, ends) lists, both inclusive. None if there is no Unicode cmap.
+        """
+        subtable = self._cmap_subtable()
+        if subtable is None:
+            return None
+        fmt, offset = subtable
+        ranges = self._coverage_12(offset) if fmt == 12 else self._coverage_4(offset)
+        return merge_ranges(ranges)
+
+    def _coverage_4(self, offset):
+        seg_count = self._unpack('>H', offset + 6)[0] // 2
+        ends = self._unpack(f'>{seg_count}H', offset + 14)
+        starts = self._unpack(f'>{seg_count}H', offset + 16 + 2 * seg_count)
+        deltas = self._unpack(f'>{seg_count}H', offset + 16 + 4 * seg_count)
+        range_offsets_at = offset + 16 + 6 * seg_count
+        range_offsets = self._unpack(f'>{seg_count}H', range_offsets_at)
+        ranges = []
+        for i, (start, end, delta, range_offset) in enumerate(zip(starts, ends, deltas, range_offsets)):
+            if start > end or start == 0xFFFF:
+                continue
+            if range_offset == 0:
+                # Glyph (codepoint + delta) & 0xFFFF, zero for one codepoint at most
+                hole = -delta & 0xFFFF
+                if start <= hole <= end:
+                    ranges.extend(r for r in ((start, hole - 1), (hole + 1, end)) if r[0] <= r[1])
+                else:
+                    ranges.append((start, end))
+                continue
+            address = range_offsets_at + 2 * i + range_offset
+            if address + 2 * (end - start + 1) > len(self.buffer):
+                raise SfntError("cmap format 4 glyph array out of bounds")
+            glyphs = np.frombuffer(self.buffer, dtype='>u2', count=end - start + 1, offset=address).astype(np.int64)
+            covered = (glyphs != 0) & ((glyphs + delta) & 0xFFFF != 0)
+            ranges.extend(_true_runs(covered, start))
+        return ranges
+
+    def _coverage_12(self, offset):
+        group_count, = self._unpack('>I', offset + 12)
+        values = self._unpack(f'>{3 * group_count}I', offset + 16)
+        ranges = []
+        for start, end, first_glyph in zip(values[0::3], values[1::3], values[2::3]):
+            # Only the first codepoint of a group can map to glyph 0
+            start += first_glyph == 0
+            if start <= end:
+                ranges.append((start, end))
+        return ranges
+
+    def _format_4(self, offset):
+        seg_count = self._unpack('>H', offset + 6)[0] // 2
+        ends = list(self._unpack(f'>{seg_count}H', offset + 14))
+        starts = list(self._unpack(f'>{seg_count}H', offset + 16 + 2 * seg_count))
+        deltas = self._unpack(f'>{seg_count}H', offset + 16 + 4 * seg_count)
+        range_offsets_at = offset + 16 + 6 * seg_count
+        range_offsets = self._unpack(f'>{seg_count}H', range_offsets_at)
+
+        def glyph_of(i, codepoint):
+            if range_offsets[i] == 0:
+                return (codepoint + deltas[i]) & 0xFFFF
+            # idRangeOffset counts from its own position in the idRangeOffset array
+            address = range_offsets_at + 2 * i + range_offsets[i] + 2 * (codepoint - starts[i])
+            glyph, = self._unpack('>H', address)
+            return (glyph + deltas[i]) & 0xFFFF if glyph else 0
+
+        # Segments are sorted by end code; the final 0xFFFF segment maps nothing
+        if starts != sorted(starts) or any(s > e for s, e in zip(starts, ends)):
+            raise SfntError("unsorted cmap format 4 segments")
+        return CharacterMap(starts, ends, glyph_of)
+
+    def _format_12(self, offset):
+        group_count, = self._unpack('>I', offset + 12)
+        values = self._unpack(f'>{3 * group_count}I', offset + 16)
+        starts, ends, first_glyphs = list(values[0::3]), list(values[1::3]), values[2::3]
+        if starts != sorted(starts):
+            raise SfntError("unsorted cmap format 12 groups")
+        return CharacterMap(starts, ends, lambda i, codepoint: first_glyphs[i] + codepoint - starts[i])
+#
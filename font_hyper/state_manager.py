@@ -2,6 +2,8 @@
 
 import os
 import json
+import hashlib
+import threading
 import tkinter as tk
 from tkinter import filedialog, messagebox
 import traceback
@@ -20,24 +22,223 @@ class StateManager:
         self.font_manager = gui.font_manager
         
         # Update to use path_config
-        from .path_config import get_config_path
+        from .path_config import (get_config_path, CATALOG_BACKEND, CATALOG_DB_FILE, AUTOSAVE_DELAY_MS,
+                                  JOURNAL_ENABLED, JOURNAL_FILE, JOURNAL_SYNC_BATCH, JOURNAL_SYNC_DELAY_MS,
+                                  JOURNAL_COMPACT_BYTES, FONT_SNAPSHOT_FILE, PARSE_WORKERS, PARSE_TIMEOUT_S,
+                                  PARSE_QUARANTINE_FILE, SCAN_DIR_CACHE_FILE, FONTCONFIG_IMPORT,
+                                  SCAN_CHECKPOINT_FILE, SCAN_CHECKPOINT_FILES, COVERAGE_CACHE_FILE)
         self.config_dir = get_config_path()
         self.saves_dir = os.path.join(self.config_dir, "saves")
         self.contents_file = os.path.join(self.config_dir, "contents.json")
         os.makedirs(self.saves_dir, exist_ok=True)
-        
-    def save_state(self):
-        """Saves the current application state to contents.json."""
+
+        # SQLite catalog, see font_catalog_db.py; None with the json backend
+        self.catalog_db_file = os.path.join(self.config_dir, CATALOG_DB_FILE)
+        self.catalog_db = None
+        if CATALOG_BACKEND == "sqlite":
+            self.open_catalog_db()
+
+        # contents.json writes (explicit saves and autosave thread)
+        self._write_lock = threading.Lock()
+        self._saved_digest = None  # hash of the contents.json text last read or written
+        self._saved_count = -1  # FontManager.change_count of the last written snapshot
+
+        # Binary font snapshot (json backend), written on save when the font list changed
+        self.font_snapshot_file = os.path.join(self.config_dir, FONT_SNAPSHOT_FILE) if FONT_SNAPSHOT_FILE else None
+        self._snapshot_revision = None  # FontManager.fonts_revision of the fonts in the snapshot file
+
+        # Scans parse fonts in worker processes; files that crashed or hung them are skipped, see font_parse_pool.py
+        self.font_manager.parse_quarantine.load(os.path.join(self.config_dir, PARSE_QUARANTINE_FILE))
+        if PARSE_WORKERS > 0:
+            from .font_parse_pool import FontParsePool
+            self.font_manager.parse_pool = FontParsePool(PARSE_WORKERS, PARSE_TIMEOUT_S)
+        if SCAN_DIR_CACHE_FILE:
+            self.font_manager.dir_cache.load(os.path.join(self.config_dir, SCAN_DIR_CACHE_FILE))
+        self.coverage_cache_file = os.path.join(self.config_dir, COVERAGE_CACHE_FILE) if COVERAGE_CACHE_FILE else None
+        if self.coverage_cache_file:
+            self.font_manager.coverage_cache.load(self.coverage_cache_file)
+        if FONTCONFIG_IMPORT:
+            from .fontconfig_source import FontconfigCatalog
+            fontconfig = FontconfigCatalog()
+            if fontconfig.available():
+                self.font_manager.fontconfig = fontconfig
+        if SCAN_CHECKPOINT_FILE:
+            from .scan_checkpoint import ScanCheckpoint
+            self.font_manager.scan_checkpoint = ScanCheckpoint(os.path.join(self.config_dir, SCAN_CHECKPOINT_FILE),
+                                                               SCAN_CHECKPOINT_FILES)
+
+        # Edit journal next to contents.json (json backend), see edit_journal.py
+        self.journal_file = os.path.join(self.config_dir, JOURNAL_FILE)
+        self.journal = None
+        if self.catalog_db is None and JOURNAL_ENABLED:
+            from .edit_journal import EditJournal
+            try:
+                self.journal = EditJournal(self.journal_file, root=self.root, sync_batch=JOURNAL_SYNC_BATCH,
+                                           sync_delay_ms=JOURNAL_SYNC_DELAY_MS,
+                                           compact_bytes=JOURNAL_COMPACT_BYTES,
+                                           on_compact=self.compact_journal)
+            except Exception as e:
+                traceback.print_exc()
+                logger.error(f"Error opening edit journal, saving contents.json instead: {str(e)}")
+
+        # The database stores every edit itself, contents.json is saved in the background;
+        # with the journal, edits are durable once logged and snapshots are only written to compact it
+        self.autosave = None
+        if self.catalog_db is None and (AUTOSAVE_DELAY_MS > 0 or self.journal is not None):
+            from .autosave import AutosaveWorker
+            self.autosave = AutosaveWorker(self.root, self, AUTOSAVE_DELAY_MS, listen=self.journal is None)
+
+    def open_catalog_db(self):
+        """Opens the catalog database, importing contents.json into a new one."""
+        from .font_catalog_db import CatalogDatabase
+        try:
+            self.catalog_db = CatalogDatabase(self.catalog_db_file)
+            if self.catalog_db.is_empty() and os.path.exists(self.contents_file):
+                logger.info(f"Importing {self.contents_file} into {self.catalog_db_file}")
+                self.catalog_db.import_json(self.contents_file)
+        except Exception as e:
+            traceback.print_exc()
+            logger.error(f"Error opening catalog database, falling back to contents.json: {str(e)}")
+            self.catalog_db = None
+
+    def read_saved_state(self):
+        """
+        Reads the saved state from the catalog database or contents.json.
+
+        Returns:
+            dict: State in the contents.json format, or None if nothing was saved yet
+        """
+        if self.catalog_db is not None:
+            return None if self.catalog_db.is_empty() else self.catalog_db.export_dict()
+        if os.path.exists(self.contents_file):
+            with open(self.contents_file, 'r') as f:
+                text = f.read()
+            self._saved_digest = hashlib.blake2b(text.encode('utf-8')).hexdigest()
+            return json.loads(text)
+        if os.path.exists(self.catalog_db_file):
+            # Switched from the sqlite backend, the next save writes contents.json
+            from .font_catalog_db import CatalogDatabase
+            logger.info(f"Reading the catalog from {self.catalog_db_file}")
+            catalog_db = CatalogDatabase(self.catalog_db_file)
+            try:
+                return None if catalog_db.is_empty() else catalog_db.export_dict()
+            finally:
+                catalog_db.close()
+        return None
+
+    def apply_saved_state(self, data):
+        """
+        Loads saved state into the FontManager, followed by the journal entries newer than it;
+        the database and the journal listen only to later edits.
+        """
+        if self.catalog_db is not None:
+            if self.catalog_db.font_manager is not None:
+                self.catalog_db.detach()
+        self.font_manager.from_dict(data)
+        if self.catalog_db is None:
+            self.load_font_snapshot()
+        if self.journal is not None:
+            self.journal.replay(self.font_manager, data.get('journal_seq', 0))
+        self.attach_storage()
+        if self.catalog_db is not None:
+            # Fonts are stored in the database, drop those whose files are gone
+            self.font_manager.prune_missing_fonts()
+        self.font_manager.mark_clean(self.font_manager.change_count)
+        # Fonts a scan interrupted in the last session had found, that scan is continued by the next one
+        self.font_manager.resume_interrupted_scan()
+
+    def load_font_snapshot(self):
+        """Loads the fonts of the last session from the binary snapshot, if there is a usable one."""
+        if not self.font_snapshot_file or not os.path.exists(self.font_snapshot_file):
+            return
         try:
-            data = self.font_manager.to_dict()
-            # Save render frame settings
-            data['render_text'] = self.gui.font_table_render_frame.render_entry.get()
-            data['font_color'] = self.gui.font_table_render_frame.font_color
+            count = self.font_manager.load_font_snapshot(self.font_snapshot_file)
+            self._snapshot_revision = self.font_manager.fonts_revision
+            logger.info(f"Loaded {count} fonts from {self.font_snapshot_file}")
+        except Exception as e:
+            # The fonts are rescanned instead
+            logger.warning(f"Ignoring font snapshot {self.font_snapshot_file}: {str(e)}")
+
+    def save_font_snapshot(self):
+        """Writes the binary font snapshot if the font list changed since it was loaded or written."""
+        if not self.font_snapshot_file or self._snapshot_revision == self.font_manager.fonts_revision:
+            return
+        count = self.font_manager.save_font_snapshot(self.font_snapshot_file)
+        self._snapshot_revision = self.font_manager.fonts_revision
+        logger.debug(f"Wrote {count} fonts to {self.font_snapshot_file}")
+
+    def build_state_snapshot(self):
+        """
+        The state to save, as plain dicts with copied lists, so it can be
+        serialized on another thread while the GUI goes on editing.
+        """
+        data = self.font_manager.to_dict()
+        # Save render frame settings
+        data['render_text'] = self.gui.font_table_render_frame.render_entry.get()
+        data['font_color'] = self.gui.font_table_render_frame.font_color
+        if self.journal is not None:
+            # Journal entries up to here are contained in the snapshot
+            data['journal_seq'] = self.journal.seq
+        return data
+
+    def write_state_file(self, data, change_count=None):
+        """
+        Writes a state snapshot to contents.json atomically; may run on the autosave thread.
 
-            with open(self.contents_file, 'w') as f:
-                json.dump(data, f, indent=4)
+        Args:
+            data (dict): Snapshot from build_state_snapshot()
+            change_count (int): FontManager.change_count the snapshot was taken at
 
-            logger.debug("State saved successfully")
+        Returns:
+            bool: False if the write was skipped (content unchanged or a newer snapshot was written)
+        """
+        from .utils import atomic_write
+        text = json.dumps(data, indent=4)
+        digest = hashlib.blake2b(text.encode('utf-8')).hexdigest()
+        with self._write_lock:
+            if change_count is not None and change_count < self._saved_count:
+                return False
+            written = digest != self._saved_digest
+            if written:
+                atomic_write(self.contents_file, text)
+                self._saved_digest = digest
+            else:
+                logger.debug("State unchanged, save skipped")
+            if change_count is not None:
+                self._saved_count = change_count
+                self.font_manager.mark_clean(change_count)
+            if self.journal is not None and 'journal_seq' in data:
+                self.journal.discard_through(data['journal_seq'])
+        return written
+
+    def attach_storage(self):
+        """Lets the catalog database or the edit journal record the edits from now on."""
+        if self.catalog_db is not None and self.catalog_db.font_manager is None:
+            self.catalog_db.attach(self.font_manager)
+        if self.journal is not None and self.journal.font_manager is None:
+            self.journal.attach(self.font_manager)
+
+    def compact_journal(self):
+        """Writes a new contents.json in the background, which lets the journal drop its entries."""
+        if self.autosave is not None:
+            self.root.after_idle(lambda: self.autosave.save_snapshot(force=True))
+
+    def save_state(self):
+        """Saves the current application state to the catalog database or contents.json."""
+        try:
+            if self.catalog_db is not None:
+                # Catalog edits are already stored, only the render settings are left
+                with self.catalog_db.transaction():
+                    self.catalog_db.set_meta('render_text', self.gui.font_table_render_frame.render_entry.get())
+                    self.catalog_db.set_meta('font_color', self.gui.font_table_render_frame.font_color)
+                self.font_manager.mark_clean(self.font_manager.change_count)
+                logger.debug("State saved successfully")
+                return
+
+            change_count = self.font_manager.change_count
+            if self.write_state_file(self.build_state_snapshot(), change_count):
+                logger.debug("State saved successfully")
+            self.save_font_snapshot()
             #messagebox.showinfo("Success", "Settings saved successfully.")
 
         except Exception as e:
@@ -58,13 +259,9 @@ class StateManager:
             )
             
             if file_path:
-                data = self.font_manager.to_dict()
-                data['render_text'] = self.gui.font_table_render_frame.render_entry.get()
-                data['font_color'] = self.gui.font_table_render_frame.font_color
-                
-                with open(file_path, 'w') as f:
-                    json.dump(data, f, indent=4)
-                    
+                from .utils import atomic_write
+                atomic_write(file_path, json.dumps(self.build_state_snapshot(), indent=4))
+
                 messagebox.showinfo("Success", "State saved successfully.")
                 
         except Exception as e:
@@ -72,12 +269,11 @@ class StateManager:
             messagebox.showerror("Save Error", f"An error occurred while saving state:\n{str(e)}")
 
     def load_state(self):
-        """Loads application state from contents.json."""
+        """Loads application state from the catalog database or contents.json."""
         try:
-            if os.path.exists(self.contents_file):
-                with open(self.contents_file, 'r') as f:
-                    data = json.load(f)
-                    self.font_manager.from_dict(data)
+            data = self.read_saved_state()
+            if data is not None:
+                self.apply_saved_state(data)
 
                 # Load render frame settings
                 render_text = data.get('render_text', "Sample Text")
@@ -97,6 +293,7 @@ class StateManager:
 
             else:
                 logger.info("No saved state file found")
+                self.attach_storage()
                 self.font_manager.search_fonts()
                 self.gui.treeview_manager.populate_font_table()
                 self.gui.treeview_manager.populate_categories()
@@ -140,13 +337,6 @@ class StateManager:
                 else:
                     self.gui.treeview_manager.clear_fonts_in_category()
 
-                # Update font notes and licenses
-                for font in self.font_manager.fonts:
-                    for item in self.gui.font_table_tree.get_children():
-                        if self.gui.font_table_tree.set(item, "id") == font.id:
-                            self.gui.font_table_tree.set(item, "user_note", font.user_note)
-                            self.gui.font_table_tree.set(item, "license", font.license)
-
                 messagebox.showinfo("Success", "State loaded successfully.")
                 
         except Exception as e:
@@ -156,11 +346,10 @@ class StateManager:
     def load_state_on_startup(self):
         """Loads the initial application state when starting up."""
         try:
-            if os.path.exists(self.contents_file):
-                with open(self.contents_file, 'r') as f:
-                    data = json.load(f)
-                    self.font_manager.from_dict(data)
-                    
+            data = self.read_saved_state()
+            if data is not None:
+                self.apply_saved_state(data)
+
                 render_text = data.get('render_text', "Sample Text")
                 font_color = data.get('font_color', "#000000")
                 self.gui.font_table_render_frame.render_entry.delete(0, tk.END)
@@ -172,13 +361,6 @@ class StateManager:
                 self.gui.treeview_manager.populate_font_table()
                 self.gui.treeview_manager.populate_categories()
 
-                # Update font notes and licenses
-                for font in self.font_manager.fonts:
-                    for item in self.gui.font_table_tree.get_children():
-                        if self.gui.font_table_tree.set(item, "id") == font.id:
-                            self.gui.font_table_tree.set(item, "user_note", font.user_note)
-                            self.gui.font_table_tree.set(item, "license", font.license)
-
                 # Handle category selection
                 selected_items = self.gui.categories_treeview.selection()
                 if selected_items:
@@ -188,7 +370,9 @@ class StateManager:
                     self.gui.treeview_manager.clear_fonts_in_category()
 
             else:
-                self.font_manager.search_fonts()
+                # The fonts are found by the background scan of FontHyperGUI.initial_data_load()
+                self.attach_storage()
+                self.font_manager.resume_interrupted_scan()
                 self.gui.treeview_manager.populate_font_table()
                 self.gui.treeview_manager.populate_categories()
                 
@@ -201,7 +385,18 @@ class StateManager:
     def on_exit(self):
         """Handles application exit by saving state."""
         try:
+            # A scan still running is continued at the next start, see scan_checkpoint.py
+            self.font_manager.stop_scan()
+            if self.autosave is not None:
+                # The final save below is written synchronously
+                self.autosave.stop(flush=False)
             self.save_state()
+            if self.coverage_cache_file and self.font_manager.coverage_cache.dirty:
+                self.font_manager.coverage_cache.save(self.coverage_cache_file)
+            if self.journal is not None:
+                self.journal.close()
+            if self.font_manager.parse_pool is not None:
+                self.font_manager.parse_pool.close()
             self.root.destroy()
         except Exception as e:
             traceback.print_exc()
@@ -10,6 +10,10 @@ from PIL import Image, ImageTk
 
 logger = logging.getLogger(__name__)
 
+# Visible columns of the font table; the fuzzy search shows "match" after the font name
+FONT_TABLE_DISPLAY_COLUMNS = ("font_name", "font_style", "user_note", "license", "font_file", "font_path", "id")
+FONT_TABLE_FUZZY_DISPLAY_COLUMNS = ("font_name", "match", "font_style", "user_note", "license", "font_file", "font_path", "id")
+
 class TreeviewManager:
     """
     Manages all treeviews in the application, handling their creation,
@@ -44,7 +48,8 @@ class TreeviewManager:
             ("license", "License", 150),
             ("font_file", "Font File", 150),
             ("font_path", "Font Path", 200),
-            ("id", "Id", 0)
+            ("id", "Id", 0),
+            ("match", "Match", 200)
         ]
 
         # Create and configure the Treeview
@@ -60,8 +65,9 @@ class TreeviewManager:
             self.font_table_tree.heading(col, text=text)
             self.font_table_tree.column(col, width=width, anchor=tk.W, stretch=False)
 
-        # Hide ID column
+        # Hide ID column; the Match column is only shown by the fuzzy search
         self.font_table_tree.column("id", width=0, stretch=False)
+        self.font_table_tree.configure(displaycolumns=FONT_TABLE_DISPLAY_COLUMNS)
 
         # Setup scrollbars
         self.setup_scrollbars_FFT(self.gui.font_table_frame, self.font_table_tree, 
@@ -213,7 +219,7 @@ class TreeviewManager:
             for item in selected:
                 values = self.font_table_tree.item(item, 'values')
                 font_id = values[6]  # "id" is the 7th column
-                font = next((f for f in self.font_manager.fonts if f.id == font_id), None)
+                font = self.font_manager.get_font_by_id(font_id)
                 if font:
                     fonts.append(font)
             return fonts
@@ -403,9 +409,9 @@ class TreeviewManager:
 
                 # Update FontInfo instance
                 font_id = self.font_table_tree.set(row_id, "id")
-                font_info = next((f for f in self.font_manager.fonts if f.id == font_id), None)
+                font_info = self.font_manager.get_font_by_id(font_id)
                 if font_info:
-                    font_info.user_note = new_value
+                    self.font_manager.set_font_note(font_info, new_value)
                     logger.debug(f"Updated user_note for {font_info.font_name} to '{new_value}'")
                 else:
                     logger.error(f"FontInfo with id {font_id} not found")
@@ -502,18 +508,10 @@ class TreeviewManager:
         """Populate the font table with all fonts."""
         try:
             self.font_table_tree.delete(*self.font_table_tree.get_children())
-            
-            for font in self.font_manager.fonts:
-                self.font_table_tree.insert('', 'end', values=(
-                    font.font_name,
-                    font.font_style,
-                    font.user_note,
-                    font.license,
-                    font.font_file,
-                    font.font_path,
-                    font.id
-                ))
-                
+
+            for values in self.font_manager.font_table_values(range(len(self.font_manager.fonts))):
+                self.font_table_tree.insert('', 'end', values=values)
+
             logger.debug(f"Populated font table with {len(self.font_manager.fonts)} fonts")
             
         except Exception as e:
@@ -611,6 +609,7 @@ class TreeviewManager:
                 category = next((cat for cat in self.font_manager.categories.values() 
                                if cat.idx == category_id), None)
                 if category and category.set_icon_from_file(file_path):
+                    self.font_manager.category_changed(category.label)
                     # Update treeview with display icon
                     if hasattr(category, '_display_icon'):
                         self.categories_treeview.item(item, image=category._display_icon)
@@ -3,6 +3,8 @@
 
 from PIL import Image, ImageTk
 import os
+import stat
+import tempfile
 import logging
 
 import tkinter as tk
@@ -79,4 +81,38 @@ def focus_next(event):
     return "break"  # Prevents default handling
 
 
-    
+def atomic_write(file_path, text, encoding='utf-8'):
+    """
+    Writes text (str, or bytes for binary files) to file_path atomically: a temp file
+    in the same directory is written, fsynced and renamed over the target, so a crash
+    leaves either the old or the new file, never a partial one.
+    """
+    directory = os.path.dirname(os.path.abspath(file_path))
+    fd, temp_path = tempfile.mkstemp(prefix=os.path.basename(file_path) + '.', suffix='.tmp', dir=directory)
+    try:
+        if isinstance(text, bytes):
+            f = os.fdopen(fd, 'wb')
+        else:
+            f = os.fdopen(fd, 'w', encoding=encoding)
+        with f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp creates the file with mode 0600, keep the mode of the file being replaced
+        mode = stat.S_IMODE(os.stat(file_path).st_mode) if os.path.exists(file_path) else 0o644
+        os.chmod(temp_path, mode)
+        os.replace(temp_path, file_path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+
+    # Make the rename itself durable (directories cannot be opened on Windows)
+    if hasattr(os, 'O_DIRECTORY'):
+        dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
@@ -0,0 +1,79 @@
+# bench_fontinfo_memory.py
+# Per-font memory of FontInfo, compared with the former layout
+# (per-instance __dict__, uuid4 string ids, a styles list per font, no interning).
+#
+# usage: PYTHONPATH=. python misc/bench_fontinfo_memory.py [number of fonts]
+
+import sys
+import tracemalloc
+from uuid import uuid4
+
+from font_hyper.font_info import FontInfo
+
+FAMILIES = ["Noto Sans", "Noto Serif", "DejaVu Sans", "Liberation Mono", "Source Code Pro"]
+STYLES = ["Regular", "Bold", "Italic", "Bold Italic", "Light", "Medium"]
+LICENSE = "This Font Software is licensed under the SIL Open Font License, Version 1.1."
+
+
+class LegacyFontInfo:
+    """FontInfo as it was laid out before __slots__."""
+    def __init__(self, data):
+        self.id = str(uuid4())
+        self.font_path = data['font_path']
+        self.font_file = data['font_file']
+        self.font_name = data['font_name']
+        self.font_family = data['font_family']
+        self.font_style = data['font_style']
+        self.font_styles = ["Regular", "Bold", "Italic", "Bold Italic"]
+        self.user_note = ""
+        self.license = data['license']
+        self.font_info = data['font_info']
+        self.metrics = {}
+        self.font_root = data['font_root']
+        self.origin = data['origin']
+
+
+def font_records(count):
+    """Font data as it comes from the parser: every string is a fresh object."""
+    for i in range(count):
+        family = FAMILIES[i % len(FAMILIES)]
+        style = STYLES[i % len(STYLES)]
+        yield {
+            'font_path': f"/usr/share/fonts/collection/{i:06d}/{family.replace(' ', '')}-{style}.ttf",
+            'font_file': f"{family.replace(' ', '')}-{style}.ttf",
+            # Built at runtime like decoded name table strings, so equal values are separate objects
+            'font_name': "".join([family]),
+            'font_family': "".join([style]),
+            'font_style': "".join([style]),
+            'license': "".join([LICENSE]),
+            'font_info': f"{family} {style}",
+            'font_root': "".join(["/usr/share/fonts"]),
+            'origin': "".join(["system"]),
+        }
+
+
+def measure(build, count):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    fonts = [build(data) for data in font_records(count)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+    return fonts, allocated
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    _, legacy_bytes = measure(LegacyFontInfo, count)
+    fonts, slim_bytes = measure(FontInfo.from_dict, count)
+
+    print(f"{count} fonts")
+    print(f"  sys.getsizeof of one instance: legacy {sys.getsizeof(LegacyFontInfo(next(font_records(1))))} "
+          f"+ __dict__, slots {sys.getsizeof(fonts[0])}")
+    print(f"  legacy FontInfo: {legacy_bytes / count:8.0f} bytes/font, {legacy_bytes / 2**20:7.1f} MiB total")
+    print(f"  slots  FontInfo: {slim_bytes / count:8.0f} bytes/font, {slim_bytes / 2**20:7.1f} MiB total")
+    print(f"  saved: {100 * (1 - slim_bytes / legacy_bytes):.0f}%")
+
+
+if __name__ == '__main__':
+    main()
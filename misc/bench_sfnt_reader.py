@@ -0,0 +1,70 @@
+# bench_sfnt_reader.py
+# Per-file time of reading scan metadata (full name, license, metrics) with the
+# sfnt reader, compared with the former fontTools path; also checks both agree.
+#
+# usage: PYTHONPATH=. python misc/bench_sfnt_reader.py [font directory] [rounds]
+
+import os
+import sys
+import time
+
+from fontTools.ttLib import TTFont
+
+from font_hyper.font_file_access import open_reader
+from font_hyper.font_metrics import extract_font_metrics
+from font_hyper.sfnt_reader import SfntFont, SfntError
+
+
+def font_files(directory):
+    for root, _, files in os.walk(directory):
+        for name in sorted(files):
+            if name.lower().endswith(('.ttf', '.otf')):
+                yield os.path.join(root, name)
+
+
+def read_fonttools(file_path):
+    font = TTFont(open_reader(file_path), lazy=True)
+    names = font['name']
+    return names.getDebugName(4) or "", names.getDebugName(13) or "", extract_font_metrics(font)
+
+
+def read_sfnt(file_path):
+    sfnt = SfntFont.open(file_path)
+    return sfnt.name(4), sfnt.name(13), sfnt.metrics()
+
+
+def measure(read, files, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for file_path in files:
+            read(file_path)
+    return (time.perf_counter() - start) / (rounds * len(files))
+
+
+def main():
+    directory = sys.argv[1] if len(sys.argv) > 1 else "/usr/share/fonts"
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    files = []
+    for file_path in font_files(directory):
+        try:
+            expected = read_fonttools(file_path)
+        except Exception:
+            continue
+        try:
+            if read_sfnt(file_path) != expected:
+                print(f"differs: {file_path}")
+        except SfntError as e:
+            print(f"sfnt reader falls back to fontTools: {file_path}: {e}")
+        files.append(file_path)
+    if not files:
+        print(f"no readable fonts under {directory}")
+        return
+    fonttools = measure(read_fonttools, files, rounds)
+    sfnt = measure(read_sfnt, files, rounds)
+    print(f"{len(files)} fonts, {rounds} rounds")
+    print(f"fontTools:   {fonttools * 1e6:8.1f} us per file")
+    print(f"sfnt reader: {sfnt * 1e6:8.1f} us per file ({fonttools / sfnt:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+# conftest.py
+# for license info (GPL3), see license.txt from font_hyper package
+
+import os
+import sys
+import pytest
+
+# Tests import the package from the repository, not from an installed copy
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _glyph():
+    from fontTools.pens.ttGlyphPen import TTGlyphPen
+    pen = TTGlyphPen(None)
+    pen.moveTo((50, 0))
+    pen.lineTo((50, 500))
+    pen.lineTo((400, 500))
+    pen.closePath()
+    return pen.glyph()
+
+
+def build_ttf(font_path, family="Test Sans", style="Regular", chars="ABC", weight=400, italic_angle=0.0,
+              units_per_em=1000, os2_version=4, fixed_pitch=False):
+    """Writes a small TrueType font with a glyph for each of chars; returns its path."""
+    from fontTools.fontBuilder import FontBuilder
+    names = ['.notdef'] + [f"uni{ord(char):04X}" for char in chars]
+    builder = FontBuilder(units_per_em, isTTF=True)
+    builder.setupGlyphOrder(names)
+    builder.setupCharacterMap({ord(char): f"uni{ord(char):04X}" for char in chars})
+    builder.setupGlyf({name: _glyph() for name in names})
+    builder.setupHorizontalMetrics({name: (500, 50) for name in names})
+    builder.setupHorizontalHeader(ascent=800, descent=-200)
+    builder.setupNameTable({'familyName': family, 'styleName': style})
+    builder.setupOS2(version=os2_version, usWeightClass=weight, sxHeight=480, sCapHeight=700)
+    builder.setupPost(italicAngle=italic_angle, isFixedPitch=int(fixed_pitch))
+    builder.save(font_path)
+    return str(font_path)
+
+
+def make_font_info(font_path, **attributes):
+    """FontInfo of a font file that doesn't have to exist; attributes override the defaults."""
+    from font_hyper.font_info import FontInfo
+    data = {'font_path': str(font_path), 'font_name': "Test Sans", 'font_family': "Regular",
+            'font_style': "Regular", 'license': "Not avail.", 'font_info': "Not avail.", 'metrics': {}}
+    data.update(attributes)
+    return FontInfo.from_dict(data)
+
+
+@pytest.fixture
+def ttf(tmp_path):
+    """build_ttf() writing into the test's temporary directory: ttf(name, **options)."""
+    return lambda name="test.ttf", **options: build_ttf(tmp_path / name, **options)
+
+
+@pytest.fixture
+def font_info():
+    return make_font_info
+
+
+@pytest.fixture
+def font_manager():
+    from font_hyper.font_manager import FontManager
+    return FontManager()
@@ -0,0 +1,119 @@
+# test_edit_journal.py
+# for license info (GPL3), see license.txt from font_hyper package
+
+import json
+import pytest
+
+from font_hyper.edit_journal import EditJournal
+from font_hyper.font_manager import FontManager
+
+PATHS = ["/fonts/a.ttf", "/fonts/b.ttf", "/fonts/c.ttf"]
+
+
+@pytest.fixture
+def journal_path(tmp_path):
+    return str(tmp_path / "journal.jsonl")
+
+
+def catalog(font_info):
+    font_manager = FontManager()
+    for path in PATHS:
+        font_manager.add_font(font_info(path))
+    return font_manager
+
+
+def edit(font_manager):
+    font_manager.add_category("Old")
+    font_manager.assign_fonts_to_category("Old", PATHS)
+    font_manager.rename_category("Old", "Display")
+    font_manager.remove_font_from_category("Display", "/fonts/a.ttf")
+    font_manager.add_category("Scratch")
+    font_manager.remove_category("Scratch")
+    font_manager.set_note_by_path("/fonts/b.ttf", "body text")
+    font_manager.font_paths_user = ["/home/fonts"]
+    font_manager.notify_change('paths_changed')
+
+
+def test_replay_restores_the_edits(journal_path, font_info):
+    font_manager = catalog(font_info)
+    journal = EditJournal(journal_path)
+    journal.attach(font_manager)
+    edit(font_manager)
+    journal.close()
+
+    restored = catalog(font_info)
+    reopened = EditJournal(journal_path)
+    assert reopened.replay(restored) == len(reopened.read_entries())
+    assert list(restored.categories) == ["Display"]
+    assert restored.categories["Display"].fonts_list == ["/fonts/b.ttf", "/fonts/c.ttf"]
+    assert restored.get_font_info_by_path("/fonts/b.ttf").user_note == "body text"
+    assert restored.font_paths_user == ["/home/fonts"]
+    reopened.close()
+
+
+def test_sequence_numbers_continue_after_reopening(journal_path):
+    journal = EditJournal(journal_path)
+    assert [journal.record({'op': 'clear_category', 'label': "X"}) for _ in range(3)] == [1, 2, 3]
+    journal.close()
+
+    reopened = EditJournal(journal_path)
+    assert reopened.seq == 3
+    assert reopened.record({'op': 'clear_category', 'label': "X"}) == 4
+    assert [entry['seq'] for entry in reopened.read_entries(after_seq=2)] == [3, 4]
+    reopened.close()
+
+
+def test_replaced_member_keeps_its_position(journal_path, font_info):
+    font_manager = catalog(font_info)
+    font_manager.add_category("Display")
+    font_manager.assign_fonts_to_category("Display", PATHS)
+    journal = EditJournal(journal_path)
+    journal.attach(font_manager)
+    font_manager.replace_font_in_categories("/fonts/a.ttf", "/fonts/d.ttf")
+    journal.close()
+
+    restored = catalog(font_info)
+    restored.add_category("Display")
+    restored.assign_fonts_to_category("Display", PATHS)
+    EditJournal(journal_path).replay(restored)
+    assert restored.categories["Display"].fonts_list == ["/fonts/d.ttf", "/fonts/b.ttf", "/fonts/c.ttf"]
+
+
+def test_torn_last_line_ends_the_log(journal_path):
+    journal = EditJournal(journal_path)
+    journal.record({'op': 'add_category', 'label': "Kept"})
+    journal.close()
+    with open(journal_path, 'a', encoding='utf-8') as f:
+        f.write('{"op": "add_category", "label": "Torn"')
+
+    reopened = EditJournal(journal_path)
+    assert [entry['label'] for entry in reopened.read_entries()] == ["Kept"]
+    assert reopened.seq == 1
+    reopened.close()
+
+
+def test_discard_through_keeps_newer_entries(journal_path):
+    compactions = []
+    journal = EditJournal(journal_path, compact_bytes=200, on_compact=lambda: compactions.append(journal.seq))
+    for number in range(5):
+        journal.record({'op': 'add_category', 'label': f"Category {number}"})
+    # Requested once until the snapshot is written
+    assert len(compactions) == 1
+
+    journal.discard_through(3)
+    assert [entry['seq'] for entry in journal.read_entries()] == [4, 5]
+    assert journal.record({'op': 'clear_category', 'label': "Category 4"}) == 6
+    journal.close()
+    with open(journal_path, encoding='utf-8') as f:
+        assert [json.loads(line)['seq'] for line in f] == [4, 5, 6]
+
+
+def test_loaded_catalog_requests_a_snapshot(journal_path, font_info):
+    compactions = []
+    font_manager = catalog(font_info)
+    journal = EditJournal(journal_path, on_compact=lambda: compactions.append(True))
+    journal.attach(font_manager)
+    font_manager.from_dict(font_manager.to_dict())
+    journal.close()
+    assert compactions == [True]
+    assert EditJournal(journal_path).read_entries() == []
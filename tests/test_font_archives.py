@@ -0,0 +1,86 @@
+# test_font_archives.py
+# for license info (GPL3), see license.txt from font_hyper package
+
+import os
+import zipfile
+import pytest
+
+from font_hyper import font_archives
+from font_hyper.font_archives import (ExtractedFonts, FontBytesCache, archive_member_path, font_source,
+                                      iter_archive_fonts, split_archive_path)
+from font_hyper.font_manager import FontManager
+
+
+@pytest.fixture
+def archive(tmp_path, ttf):
+    """tmp_path/fonts/pack.zip holding Sans/Regular.ttf, Serif/Regular.ttf and a readme."""
+    os.makedirs(tmp_path / "fonts")
+    archive_path = str(tmp_path / "fonts" / "pack.zip")
+    with zipfile.ZipFile(archive_path, 'w', zipfile.ZIP_DEFLATED) as f:
+        f.write(ttf("sans.ttf", family="Pack Sans"), "Sans/Regular.ttf")
+        f.write(ttf("serif.ttf", family="Pack Serif"), "Serif/Regular.ttf")
+        f.writestr("README.txt", "not a font")
+    return archive_path
+
+
+def test_virtual_paths():
+    file_path = archive_member_path("/fonts/pack.zip", "Sans/Regular.ttf")
+    assert file_path == "/fonts/pack.zip!/Sans/Regular.ttf"
+    assert split_archive_path(file_path) == ("/fonts/pack.zip", "Sans/Regular.ttf")
+    assert split_archive_path("/fonts/plain.ttf") == ("/fonts/plain.ttf", None)
+
+
+def test_iter_archive_fonts(archive, monkeypatch):
+    members = dict(iter_archive_fonts(archive, ('.ttf',)))
+    assert sorted(members) == [f"{archive}!/Sans/Regular.ttf", f"{archive}!/Serif/Regular.ttf"]
+    assert all(data.startswith(b"\0\1\0\0") for data in members.values())
+    skipped = dict(iter_archive_fonts(archive, ('.ttf',), skip=lambda path: "Sans" in path))
+    assert list(skipped) == [f"{archive}!/Serif/Regular.ttf"]
+
+    monkeypatch.setattr(font_archives, 'MAX_MEMBER_BYTES', 100)
+    assert list(iter_archive_fonts(archive, ('.ttf',))) == []
+    with pytest.raises(OSError):
+        FontBytesCache().get(f"{archive}!/Sans/Regular.ttf")
+
+
+def test_member_cache_is_bounded(archive):
+    cache = FontBytesCache(max_bytes=3000)
+    sans, serif = f"{archive}!/Sans/Regular.ttf", f"{archive}!/Serif/Regular.ttf"
+    assert cache.get(sans) == font_source(sans).read()
+    cache.get(serif)
+    assert cache.size <= 3000
+    cache.put("/big!/x.ttf", b"\0" * 4000)
+    assert "/big!/x.ttf" not in cache._data
+    with pytest.raises(OSError):
+        cache.get(f"{archive}!/Missing.ttf")
+
+
+def test_scan_reads_archives_of_user_paths(archive):
+    font_manager = FontManager()
+    font_manager.font_paths_predefined = []
+    font_manager.font_paths_user = [os.path.dirname(archive)]
+    assert font_manager.search_fonts()
+    assert sorted(fi.font_name for fi in font_manager.fonts) == ["Pack Sans", "Pack Serif"]
+    assert font_manager.get_font_info_by_path(f"{archive}!/Serif/Regular.ttf") is not None
+
+
+def test_extracted_fonts(tmp_path, archive):
+    dest_dir = str(tmp_path / "installed")
+    os.makedirs(dest_dir)
+    with open(os.path.join(dest_dir, "Regular.ttf"), 'w') as f:
+        f.write("someone else's font")
+
+    extracted = ExtractedFonts(dest_dir)
+    sans, serif = f"{archive}!/Sans/Regular.ttf", f"{archive}!/Serif/Regular.ttf"
+    # Members sharing a name get numbered names, other files are left alone
+    assert os.path.basename(extracted.extract(sans)) == "Regular-2.ttf"
+    assert os.path.basename(extracted.extract(serif)) == "Regular-3.ttf"
+    assert extracted.extract(sans) is None
+    assert extracted.save()
+
+    reloaded = ExtractedFonts(dest_dir)
+    assert reloaded.find(serif) == os.path.join(dest_dir, "Regular-3.ttf")
+    assert reloaded.remove(sans) and not reloaded.remove(sans)
+    assert reloaded.remove(serif)
+    assert reloaded.save()
+    assert sorted(os.listdir(dest_dir)) == ["Regular.ttf"]
@@ -0,0 +1,116 @@
+# test_font_catalog_db.py
+# for license info (GPL3), see license.txt from font_hyper package
+
+import sqlite3
+import pytest
+
+from font_hyper.font_catalog_db import CatalogDatabase, SCHEMA_VERSION
+from font_hyper.font_manager import FontManager
+
+
+@pytest.fixture
+def db(tmp_path):
+    catalog_db = CatalogDatabase(str(tmp_path / "catalog.sqlite3"))
+    yield catalog_db
+    catalog_db.close()
+
+
+METRICS = {'weight': 700, 'width': 5, 'units_per_em': 1000, 'italic_angle': -11.5, 'fixed_pitch': True,
+           'panose': [2, 11, 6, 4, 2, 2, 2, 2, 2, 4]}
+
+
+def test_round_trip(db, font_manager, font_info):
+    font_manager.add_font(font_info("/fonts/a.ttf", font_name="Alpha", metrics=METRICS))
+    font_manager.add_font(font_info("/fonts/b.ttf", font_name="Beta", metrics={'weight': 400}))
+    font_manager.add_category("Display")
+    font_manager.assign_fonts_to_category("Display", ["/fonts/b.ttf", "/fonts/a.ttf"])
+    font_manager.set_note_by_path("/fonts/a.ttf", "headline")
+    font_manager.font_paths_user = ["/home/fonts"]
+    db.save_font_manager(font_manager)
+
+    data = db.export_dict()
+    assert [f['font_path'] for f in data['fonts']] == ["/fonts/a.ttf", "/fonts/b.ttf"]
+    assert data['fonts'][0]['metrics'] == METRICS
+    # Values a font doesn't have stay missing, see FontMetricsTable.present
+    assert data['fonts'][1]['metrics'] == {'weight': 400}
+    assert data['font_notes'] == {"/fonts/a.ttf": "headline"}
+    assert data['categories']['Display']['fonts_list'] == ["/fonts/b.ttf", "/fonts/a.ttf"]
+    assert data['font_paths_user'] == ["/home/fonts"]
+
+    loaded = FontManager()
+    loaded.from_dict(data)
+    assert loaded.get_font_info_by_path("/fonts/a.ttf").user_note == "headline"
+    assert loaded.categories['Display'].fonts_list == ["/fonts/b.ttf", "/fonts/a.ttf"]
+
+
+def test_edits_are_written_through_the_listener(db, font_manager, font_info):
+    db.attach(font_manager)
+    with font_manager.batch_changes():
+        for name in "abc":
+            font_manager.add_font(font_info(f"/fonts/{name}.ttf"))
+    font_manager.add_category("Old")
+    font_manager.assign_fonts_to_category("Old", ["/fonts/a.ttf", "/fonts/b.ttf", "/fonts/c.ttf"])
+    font_manager.rename_category("Old", "New")
+    font_manager.set_font_note(font_manager.get_font_info_by_path("/fonts/c.ttf"), "note")
+    font_manager.remove_font_from_category("New", "/fonts/a.ttf")
+
+    data = db.export_dict()
+    assert [f['font_path'] for f in data['fonts']] == ["/fonts/a.ttf", "/fonts/b.ttf", "/fonts/c.ttf"]
+    assert list(data['categories']) == ["New"]
+    assert db.fonts_in_category("New") == ["/fonts/b.ttf", "/fonts/c.ttf"]
+    assert db.categories_of_font("/fonts/c.ttf") == ["New"]
+    assert data['font_notes'] == {"/fonts/c.ttf": "note"}
+
+    font_manager.remove_category("New")
+    assert db.export_dict()['categories'] == {}
+
+
+def test_notes_outlive_removed_fonts(db, font_manager, font_info):
+    db.attach(font_manager)
+    font_manager.add_font(font_info("/fonts/a.ttf"))
+    font_manager.set_note_by_path("/fonts/a.ttf", "keep me")
+    font_manager.remove_font("/fonts/a.ttf")
+    assert db.export_dict()['fonts'] == []
+    assert db.export_dict()['font_notes'] == {"/fonts/a.ttf": "keep me"}
+
+    # Found again by a later scan
+    font_manager.add_font(font_info("/fonts/a.ttf"))
+    assert font_manager.get_font_info_by_path("/fonts/a.ttf").user_note == "keep me"
+
+
+def test_replaced_member_keeps_its_position(db, font_manager, font_info):
+    db.attach(font_manager)
+    font_manager.add_category("Set")
+    font_manager.assign_fonts_to_category("Set", ["/fonts/a.ttf", "/fonts/b.ttf", "/fonts/c.ttf"])
+    font_manager.replace_font_in_categories("/fonts/b.ttf", "/fonts/b-copy.ttf", update_info=False)
+    assert font_manager.categories['Set'].fonts_list == ["/fonts/a.ttf", "/fonts/b-copy.ttf", "/fonts/c.ttf"]
+    assert db.fonts_in_category("Set") == ["/fonts/a.ttf", "/fonts/b-copy.ttf", "/fonts/c.ttf"]
+
+    # The kept font is a member already: the duplicate just goes
+    font_manager.replace_font_in_categories("/fonts/a.ttf", "/fonts/c.ttf", update_info=False)
+    assert db.fonts_in_category("Set") == ["/fonts/b-copy.ttf", "/fonts/c.ttf"]
+
+
+def test_schema_1_notes_are_migrated(tmp_path):
+    db_path = str(tmp_path / "catalog.sqlite3")
+    connection = sqlite3.connect(db_path)
+    connection.executescript("""
+        CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+        INSERT INTO meta VALUES ('schema_version', '1');
+        CREATE TABLE fonts (font_path TEXT PRIMARY KEY, id TEXT NOT NULL, font_file TEXT NOT NULL,
+                            font_name TEXT, font_family TEXT, font_style TEXT, font_styles TEXT,
+                            license TEXT, font_info TEXT);
+        INSERT INTO fonts VALUES ('/fonts/a.ttf', '1', 'a.ttf', 'A', 'Regular', 'Regular', '[]', '', '');
+        CREATE TABLE notes (font_path TEXT PRIMARY KEY REFERENCES fonts (font_path) ON DELETE CASCADE,
+                            note TEXT NOT NULL);
+        INSERT INTO notes VALUES ('/fonts/a.ttf', 'old note');
+    """)
+    connection.close()
+
+    db = CatalogDatabase(db_path)
+    try:
+        assert db.get_meta('schema_version') == SCHEMA_VERSION
+        db.delete_font("/fonts/a.ttf")
+        assert db.export_dict()['font_notes'] == {"/fonts/a.ttf": "old note"}
+    finally:
+        db.close()
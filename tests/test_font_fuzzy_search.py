@@ -0,0 +1,78 @@
+# test_font_fuzzy_search.py
+# for license info (GPL3), see license.txt from font_hyper package
+
+import pytest
+
+from font_hyper.font_fuzzy_search import fuzzy_find, highlight, match_positions, max_typos
+
+NAMES = ["Helvetica", "Helvetica Neue", "Garamond", "EB Garamond", "Futura", "Comic Sans"]
+
+
+def levenshtein_infix(pattern, text):
+    """Smallest edit distance of pattern to any substring of text, the slow way."""
+    return min(edit_distance(pattern, text[i:j]) for i in range(len(text) + 1) for j in range(i, len(text) + 1))
+
+
+def edit_distance(a, b):
+    row = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        previous, row[0] = row[0], i
+        for j, cb in enumerate(b, 1):
+            previous, row[j] = row[j], min(row[j] + 1, row[j - 1] + 1, previous + (ca != cb))
+    return row[-1]
+
+
+@pytest.fixture
+def catalog(font_manager, font_info):
+    font_manager.fonts = [font_info(f"/fonts/{i}.ttf", font_name=name, license="OFL" if i % 2 else "Commercial")
+                          for i, name in enumerate(NAMES)]
+    font_manager.fonts_changed()
+    return font_manager
+
+
+def found(catalog, query):
+    rows, _ = catalog.fuzzy_query_fonts(query)
+    return [catalog.fonts[row].font_name for row in rows]
+
+
+def test_max_typos():
+    assert [max_typos("x" * n) for n in (3, 4, 6, 7, 12)] == [0, 1, 1, 2, 2]
+
+
+@pytest.mark.parametrize('pattern, text', [("garamond", "eb garamond"), ("garmond", "eb garamond"),
+                                           ("helvtica", "helvetica neue"), ("futrua", "comic sans"),
+                                           ("abc", "xaxbxc"), ("", "text")])
+def test_fuzzy_find_distance(pattern, text):
+    expected = levenshtein_infix(pattern, text)
+    result = fuzzy_find(pattern, text, 2)
+    if expected > 2:
+        assert result is None
+    else:
+        assert result[0] == expected
+
+
+def test_match_positions_and_highlight():
+    distance, end = fuzzy_find("garmond", "eb garamond", 1)
+    start, positions = match_positions("garmond", "eb garamond", end, 1)
+    assert (distance, start) == (1, 3)
+    assert highlight("EB Garamond", positions) == "EB [Gar]a[mond]"
+
+
+def test_typos_are_tolerated_and_ranked(catalog):
+    assert found(catalog, "garmond") == ["Garamond", "EB Garamond"]
+    assert found(catalog, "helvtica") == ["Helvetica", "Helvetica Neue"]
+    assert found(catalog, "helvetica neu") == ["Helvetica Neue"]
+    # Short words must match exactly
+    assert found(catalog, "eb") == ["EB Garamond"]
+    assert found(catalog, "xyzzy") == []
+
+
+def test_exact_name_first(catalog):
+    assert found(catalog, "helvetica")[0] == "Helvetica"
+    rows, highlights = catalog.fuzzy_query_fonts("comc sans")
+    assert highlights[rows[0]] == "[Com]ic [Sans]"
+
+
+def test_field_terms_still_filter(catalog):
+    assert found(catalog, "garmond license:OFL") == ["EB Garamond"]
+    assert found(catalog, "license:OFL") == ["Helvetica Neue", "EB Garamond", "Comic Sans"]
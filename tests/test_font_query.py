@@ -0,0 +1,151 @@
+# test_font_query.py
+# for license info (GPL3), see license.txt from font_hyper package
+
+import os
+import numpy as np
+import pytest
+
+from font_hyper.font_query import FontQuery, TextPredicate, RangePredicate, QueryResultCache
+from font_hyper.font_coverage import CoverageCache
+
+
+@pytest.fixture
+def catalog(font_manager, font_info):
+    fonts = [
+        font_info("/fonts/sans/Acme-Regular.ttf", font_name="Acme Sans", font_style="Regular", license="SIL OFL 1.1",
+                  metrics={'weight': 400, 'width': 5, 'units_per_em': 1000, 'x_height': 500, 'italic_angle': 0.0,
+                           'glyph_count': 300, 'fixed_pitch': False}),
+        font_info("/fonts/sans/Acme-BoldItalic.ttf", font_name="Acme Sans", font_style="Bold Italic",
+                  license="SIL OFL 1.1",
+                  metrics={'weight': 700, 'width': 5, 'units_per_em': 1000, 'x_height': 520, 'italic_angle': -12.0,
+                           'glyph_count': 300, 'fixed_pitch': False}),
+        font_info("/fonts/mono/Coder.ttf", font_name="Coder Mono", font_style="Regular", license="Apache License",
+                  metrics={'weight': 400, 'width': 5, 'units_per_em': 2048, 'italic_angle': 0.0,
+                           'glyph_count': 900, 'fixed_pitch': True}),
+        # Only what fontconfig knows, see fontconfig_source.py
+        font_info("/usr/share/fonts/System.ttf", font_name="System Serif", font_style="Italic",
+                  metrics={'weight': 400, 'width': 5}),
+    ]
+    font_manager.fonts = fonts
+    font_manager.fonts_changed()
+    return font_manager
+
+
+def names(catalog, query):
+    return [f"{catalog.fonts[row].font_name} {catalog.fonts[row].font_style}" for row in catalog.query_fonts(query)]
+
+
+def test_parse_fields_operators_and_quotes():
+    query = FontQuery.parse('license:OFL -style:"bold italic" weight>=700 xheight:0.4-0.6 acme')
+    predicates = query.predicates
+    assert [type(p) for p in predicates] == [TextPredicate, TextPredicate, RangePredicate, RangePredicate,
+                                             TextPredicate]
+    assert (predicates[0].field, predicates[0].value, predicates[0].negate) == ('license', 'ofl', False)
+    assert (predicates[1].field, predicates[1].value, predicates[1].negate) == ('style', 'bold italic', True)
+    assert (predicates[2].column, predicates[2].minimum, predicates[2].maximum) == ('weight', 700, None)
+    assert (predicates[3].column, predicates[3].minimum, predicates[3].maximum) == ('x_height_ratio', 0.4, 0.6)
+    assert query.split_words()[0] == ['acme']
+
+
+def test_unknown_field_and_malformed_value_search_as_text():
+    predicates = FontQuery.parse('foo:bar weight>=heavy').predicates
+    assert [(p.field, p.value) for p in predicates] == [('text', 'foo:bar'), ('text', 'weight>=heavy')]
+
+
+def test_key_ignores_spacing_and_order():
+    assert FontQuery.parse('weight>=700  acme').key == FontQuery.parse('acme weight >= 700').key
+
+
+def test_refines():
+    assert FontQuery.parse('acme sans').refines(FontQuery.parse('acme'))
+    assert FontQuery.parse('helv').refines(FontQuery.parse('hel'))
+    assert not FontQuery.parse('hel').refines(FontQuery.parse('helv'))
+
+
+def test_text_and_negation(catalog):
+    assert names(catalog, 'license:ofl') == ["Acme Sans Regular", "Acme Sans Bold Italic"]
+    assert names(catalog, 'acme -style:italic') == ["Acme Sans Regular"]
+    assert names(catalog, 'path:/fonts/mono') == ["Coder Mono Regular"]
+
+
+def test_numeric_ranges_and_flags(catalog):
+    assert names(catalog, 'weight>=700') == ["Acme Sans Bold Italic"]
+    assert names(catalog, 'weight:400') == ["Acme Sans Regular", "Coder Mono Regular", "System Serif Italic"]
+    assert names(catalog, 'xheight:0.51-0.53') == ["Acme Sans Bold Italic"]
+    assert names(catalog, 'is:mono') == ["Coder Mono Regular"]
+    assert names(catalog, 'mono:no') == ["Acme Sans Regular", "Acme Sans Bold Italic"]
+    assert names(catalog, 'is:italic') == ["Acme Sans Bold Italic"]
+
+
+def test_missing_metrics_never_match(catalog):
+    # The fontconfig font has weight and width only
+    assert "System Serif Italic" not in names(catalog, 'glyphs<=10000')
+    assert "System Serif Italic" not in names(catalog, 'upm:0')
+    assert "System Serif Italic" not in names(catalog, 'italic:0')
+    assert "System Serif Italic" not in names(catalog, 'xheight<=1')
+    assert names(catalog, 'upm:0') == []
+
+
+def test_category_and_note(catalog):
+    category = catalog.add_category("Code")
+    catalog.assign_fonts_to_category("Code", ["/fonts/mono/Coder.ttf"])
+    assert category.fonts_list == ["/fonts/mono/Coder.ttf"]
+    assert names(catalog, 'cat:code') == ["Coder Mono Regular"]
+    catalog.set_font_note(catalog.fonts[0], "Client logo")
+    assert names(catalog, 'note:"client"') == ["Acme Sans Regular"]
+
+
+def test_plan_puts_selective_predicates_first(catalog):
+    index = catalog.get_search_index()
+    query = FontQuery.parse('-style:bold weight:400 path:mono')
+    plan = [predicate.describe() for predicate, _ in query.plan(index)]
+    assert plan[0] == FontQuery.parse('path:mono').predicates[0].describe()
+    assert plan[-1] == FontQuery.parse('style:bold').predicates[0].describe()
+
+
+def test_result_cache_matches_full_evaluation(catalog):
+    index = catalog.get_search_index()
+    cache = QueryResultCache()
+    for text in ('a', 'ac', 'acm', 'acme', 'acme s', 'acme', 'ac', 'acme -style:bold'):
+        query = FontQuery.parse(text)
+        assert np.array_equal(cache.execute(query, index), query.execute(index))
+
+
+def test_covers(tmp_path, font_manager, font_info, ttf):
+    latin = ttf("latin.ttf", chars="ABC")
+    euro = ttf("euro.ttf", chars="AB€")
+    font_manager.fonts = [font_info(latin), font_info(euro), font_info(tmp_path / "gone.ttf")]
+    font_manager.fonts_changed()
+    assert font_manager.query_fonts('covers:A').tolist() == [0, 1]
+    assert font_manager.query_fonts('covers:"B€"').tolist() == [1]
+    assert font_manager.query_fonts('-covers:€').tolist() == [0, 2]
+
+
+def test_coverage_cache_round_trip(tmp_path, ttf):
+    latin = ttf("latin.ttf", chars="ABC")
+    euro = ttf("euro.ttf", chars="AB€")
+    cache = CoverageCache()
+    rows = cache.rows([latin, euro, str(tmp_path / "gone.ttf")])
+    assert rows[2] == -1
+    assert cache.covers(rows, "AB").tolist() == [True, True, False]
+    assert cache.save(str(tmp_path / "coverage.npz"))
+
+    loaded = CoverageCache()
+    assert loaded.load(str(tmp_path / "coverage.npz"))
+    assert len(loaded) == 2 and not loaded.dirty
+    rows = loaded.rows([latin, euro])
+    assert loaded.covers(rows, "€").tolist() == [False, True]
+    assert not loaded.dirty  # read from the cache, not the fonts
+
+
+def test_coverage_cache_rereads_changed_font(tmp_path, ttf):
+    font_path = ttf("font.ttf", chars="AB")
+    cache = CoverageCache()
+    cache.rows([font_path])
+    cache.save(str(tmp_path / "coverage.npz"))
+
+    ttf("font.ttf", chars="ABCDEFG")
+    os.utime(font_path, ns=(1, 1))  # a different mtime, even on coarse clocks
+    loaded = CoverageCache()
+    loaded.load(str(tmp_path / "coverage.npz"))
+    assert loaded.covers(loaded.rows([font_path]), "G").tolist() == [True]
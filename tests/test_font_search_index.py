@@ -0,0 +1,41 @@
+# test_font_search_index.py
+# for license info (GPL3), see license.txt from font_hyper package
+
+import numpy as np
+
+from font_hyper.font_search_index import TrigramIndex, trigrams
+
+STRINGS = ["dejavu sans", "dejavu serif", "noto sans", "dejavu sans", "fira code", "go"]
+
+
+def brute_force(substring, rows=None):
+    rows = range(len(STRINGS)) if rows is None else rows
+    return [row for row in rows if substring in STRINGS[row]]
+
+
+def test_trigrams():
+    assert trigrams("sans") == {"san", "ans"}
+    assert trigrams("go") == set()
+
+
+def test_distinct_values_are_indexed_once():
+    index = TrigramIndex.from_strings(STRINGS)
+    assert len(index) == 6
+    assert len(index.values) == 5
+    assert index.value_counts[index.value_of_row[0]] == 2
+    assert index.estimate("sans") == 3
+
+
+def test_search_matches_brute_force():
+    index = TrigramIndex.from_strings(STRINGS)
+    for substring in ("sans", "dejavu s", "a", "go", "o", "serif", "xyz", ""):
+        assert index.search(substring).tolist() == brute_force(substring)
+        # Restricted to candidate rows, either by verifying them or through the postings
+        rows = np.array([1, 3, 5], dtype=np.int32)
+        assert index.search(substring, rows).tolist() == brute_force(substring, [1, 3, 5])
+
+
+def test_from_column_lowercases_the_dictionary():
+    index = TrigramIndex.from_column(np.array([2, 0, 2]), ["Noto Sans", "unused", "DejaVu Serif"])
+    assert index.values == ["noto sans", "dejavu serif"]
+    assert index.search("serif").tolist() == [0, 2]
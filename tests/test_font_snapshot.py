@@ -0,0 +1,112 @@
+# test_font_snapshot.py
+# for license info (GPL3), see license.txt from font_hyper package
+
+import pytest
+
+from font_hyper.font_snapshot import HEADER, FontSnapshot, LazyFontList, encode_snapshot, write_snapshot
+from font_hyper.font_manager import FontManager
+
+METRICS = {'weight': 700, 'width': 5, 'units_per_em': 2048, 'x_height': 1024, 'italic_angle': -12.0,
+           'fixed_pitch': True, 'panose': [2, 11, 6, 4, 2, 2, 2, 2, 2, 4]}
+
+
+@pytest.fixture
+def fonts(font_info):
+    return [font_info("/fonts/a.ttf", font_name="Alpha", font_family="Alpha", metrics=METRICS),
+            font_info("/fonts/b.ttf", font_name="Bêta Ünicode", font_family="Alpha", metrics={'weight': 300}),
+            font_info("/fonts/c.ttc#1", font_name="Gamma", font_family="Gamma", license="OFL")]
+
+
+@pytest.fixture
+def snapshot_path(tmp_path, fonts):
+    file_path = str(tmp_path / "fonts.snapshot")
+    assert write_snapshot(file_path, fonts, {'paths_key': [["/fonts", "user"]]}) == 3
+    return file_path
+
+
+def test_round_trip(snapshot_path, fonts):
+    snapshot = FontSnapshot(snapshot_path)
+    assert snapshot.meta == {'paths_key': [["/fonts", "user"]]}
+    for row, font in enumerate(fonts):
+        decoded = snapshot.font(row)
+        for field in ('font_name', 'font_family', 'font_style', 'font_path', 'font_file', 'license'):
+            assert getattr(decoded, field) == getattr(font, field)
+        # Only the metrics the font has come back
+        assert decoded.metrics == font.metrics
+    assert snapshot.font(2).face_index == 1
+    snapshot.close()
+
+
+def test_strings_are_stored_once(fonts):
+    data = encode_snapshot(fonts + fonts)
+    magic, version, count, string_count, record_size, meta_length = HEADER.unpack_from(data)
+    assert count == 6
+    assert string_count == HEADER.unpack_from(encode_snapshot(fonts))[3]
+
+
+def test_damaged_files_are_rejected(tmp_path, snapshot_path):
+    garbage = tmp_path / "garbage.snapshot"
+    garbage.write_bytes(b"not a snapshot" * 10)
+    with pytest.raises(ValueError):
+        FontSnapshot(str(garbage))
+    with open(snapshot_path, 'rb') as f:
+        data = f.read()
+    truncated = tmp_path / "truncated.snapshot"
+    truncated.write_bytes(data[:-4])
+    with pytest.raises(ValueError):
+        FontSnapshot(str(truncated))
+
+
+def test_fonts_are_decoded_on_access(snapshot_path):
+    fonts = LazyFontList(FontSnapshot(snapshot_path))
+    assert fonts.column('font_name') == ["Alpha", "Bêta Ünicode", "Gamma"]
+    assert fonts.decoded_count() == 0
+    assert fonts.find_path("/fonts/b.ttf").font_name == "Bêta Ünicode"
+    assert fonts.decoded_count() == 1
+    # The same object on every access, with the id handed out at load
+    assert fonts[1] is fonts.find_path("/fonts/b.ttf")
+    assert fonts.column('id')[1] == fonts[1].id
+    assert fonts.find_path("/fonts/missing.ttf") is None
+
+
+def test_edits_keep_find_path_right(snapshot_path, font_info):
+    fonts = LazyFontList(FontSnapshot(snapshot_path))
+    fonts.append(font_info("/fonts/d.ttf", font_name="Delta"))
+    assert fonts.find_path("/fonts/d.ttf").font_name == "Delta"
+    del fonts[0]
+    assert fonts.find_path("/fonts/a.ttf") is None
+    assert fonts.find_path("/fonts/c.ttc#1").font_name == "Gamma"
+    # A decoded font renamed in place is found under its new path only
+    fonts[0].font_path = "/fonts/renamed.ttf"
+    assert fonts.find_path("/fonts/b.ttf") is None
+    assert fonts.find_path("/fonts/renamed.ttf") is fonts[0]
+    assert fonts.column('font_path') == ["/fonts/renamed.ttf", "/fonts/c.ttc#1", "/fonts/d.ttf"]
+    assert not fonts.pristine
+
+
+def test_remove_paths_decodes_nothing(snapshot_path):
+    fonts = LazyFontList(FontSnapshot(snapshot_path))
+    fonts.remove_paths({"/fonts/a.ttf", "/fonts/c.ttc#1"})
+    assert fonts.decoded_count() == 0
+    assert fonts.column('font_path') == ["/fonts/b.ttf"]
+    assert fonts.find_path("/fonts/b.ttf").metrics == {'weight': 300}
+
+
+def test_font_manager_round_trip(tmp_path, fonts):
+    font_manager = FontManager()
+    for font in fonts:
+        font_manager.add_font(font)
+    file_path = str(tmp_path / "fonts.snapshot")
+    font_manager._origins_key = font_manager._paths_key()
+    assert font_manager.save_font_snapshot(file_path) == 3
+
+    loaded = FontManager()
+    loaded.set_note_by_path("/fonts/c.ttc#1", "pending")
+    assert loaded.load_font_snapshot(file_path) == 3
+    assert isinstance(loaded.fonts, LazyFontList)
+    assert loaded.get_font_info_by_path("/fonts/c.ttc#1").user_note == "pending"
+    assert loaded.query_fonts("weight>=500").tolist() == [0]
+
+    # Saving over the mapped file decodes the list first
+    assert loaded.save_font_snapshot(file_path) == 3
+    assert [f.font_name for f in loaded.fonts] == ["Alpha", "Bêta Ünicode", "Gamma"]
@@ -0,0 +1,96 @@
+# test_fontconfig_source.py
+# for license info (GPL3), see license.txt from font_hyper package
+
+import os
+import stat
+
+from font_hyper.fontconfig_source import (FontconfigCatalog, FontconfigRecord, fc_weight_to_opentype,
+                                          fc_width_to_opentype, parse_charset)
+
+
+def line(file, index="0", family="Test Sans", style="Bold", fullname="Test Sans Bold", weight="200",
+         width="100", spacing="", charset="41-43"):
+    return "\t".join((file, index, family, style, fullname, weight, width, spacing, charset)) + "\n"
+
+
+def fake_fc_list(directory, output, status=0):
+    """An executable standing in for fc-list, printing output whatever its arguments."""
+    script = os.path.join(directory, "fc-list")
+    with open(script, 'w', encoding='utf-8') as f:
+        f.write(f"#!/bin/sh\ncat <<'EOF'\n{output}EOF\nexit {status}\n")
+    os.chmod(script, os.stat(script).st_mode | stat.S_IXUSR)
+    return script
+
+
+def test_record_from_line():
+    record = FontconfigRecord.from_line(line("/fonts/a.ttc", index="2", style="", weight="80", spacing="100"))
+    assert (record.file, record.index, record.family, record.style) == ("/fonts/a.ttc", 2, "Test Sans", "Regular")
+    assert (record.weight, record.width, record.spacing) == (80.0, 100.0, 100.0)
+    # Variable fonts list weight ranges
+    assert FontconfigRecord.from_line(line("/fonts/v.ttf", weight="[0 210]")).weight is None
+    # Named instances, records without family and garbage are skipped
+    assert FontconfigRecord.from_line(line("/fonts/v.ttf", index=str((3 << 16) | 1))) is None
+    assert FontconfigRecord.from_line(line("/fonts/a.ttf", family="")) is None
+    assert FontconfigRecord.from_line("Fontconfig warning: ignoring UTF-8\n") is None
+
+
+def test_weight_and_width_conversion():
+    assert [fc_weight_to_opentype(weight) for weight in (0, 50, 80, 90, 200, 210, 250)] == \
+        [100, 300, 400, 450, 700, 900, 1000]
+    assert [fc_width_to_opentype(width) for width in (50, 87, 100, 150, 300)] == [1, 4, 5, 8, 9]
+
+
+def test_parse_charset():
+    charset = parse_charset("20-7e a0-17f 2020")
+    assert "A" in charset and "†" in charset and "\x80" not in charset
+    assert charset.covers("Aé") and not charset.covers("A‡")
+    assert parse_charset("7e 20") is None
+    assert parse_charset("20-xyz") is None
+    assert parse_charset("") is None
+
+
+def test_font_info_reads_the_metrics_fontconfig_lacks(ttf):
+    font_path = ttf(weight=400, os2_version=4)
+    fi = FontconfigRecord.from_line(line(font_path, weight="200", spacing="100")).to_font_info()
+    assert (fi.font_path, fi.font_name, fi.font_style) == (font_path, "Test Sans", "Bold")
+    assert fi.license == "Not avail." and fi.font_info == "Test Sans Bold"
+    # Weight and width are fontconfig's, the rest comes from the font tables
+    assert fi.metrics['weight'] == 700 and fi.metrics['width'] == 5
+    assert fi.metrics['units_per_em'] == 1000 and fi.metrics['x_height'] == 480
+    assert fi.metrics['fixed_pitch'] is False
+
+
+def test_font_info_of_an_unreadable_file(tmp_path):
+    record = FontconfigRecord.from_line(line(str(tmp_path / "gone.ttf"), width="", spacing="100"))
+    # Only what fontconfig knows, no metric the font may not have
+    assert record.metrics() == {'weight': 700, 'fixed_pitch': True}
+
+
+def test_catalog_load(tmp_path, ttf):
+    font_path = ttf("listed.ttf")
+    output = line(font_path) + line(font_path) + line(font_path, index=str(1 << 16)) + "\n"
+    catalog = FontconfigCatalog(command=fake_fc_list(str(tmp_path), output))
+    assert catalog.load()
+    assert [record.index for record in catalog.records[font_path]] == [0]
+
+    fonts = catalog.fonts(font_path)
+    assert [fi.font_path for fi in fonts] == [font_path]
+    assert catalog.charsets[font_path].covers("ABC")
+    assert catalog.fonts(str(tmp_path / "unlisted.ttf")) is None
+
+
+def test_catalog_load_steps(tmp_path, ttf):
+    font_path = ttf("listed.ttf")
+    catalog = FontconfigCatalog(command=fake_fc_list(str(tmp_path), line(font_path)))
+    steps = catalog.load_steps()
+    try:
+        while True:
+            next(steps)
+    except StopIteration as stop:
+        assert stop.value is True
+    assert font_path in catalog.records
+
+
+def test_catalog_load_failure(tmp_path):
+    assert not FontconfigCatalog(command=fake_fc_list(str(tmp_path), "", status=1)).load()
+    assert not FontconfigCatalog(command=str(tmp_path / "missing-fc-list")).load()
@@ -0,0 +1,101 @@
+# test_scan_checkpoint.py
+# for license info (GPL3), see license.txt from font_hyper package
+
+import os
+import pytest
+
+from font_hyper.font_manager import FontManager
+from font_hyper.scan_checkpoint import ScanCheckpoint
+
+
+@pytest.fixture
+def font_dirs(tmp_path, ttf):
+    """tmp_path/fonts with a/one.ttf, a/two.ttf and b/three.ttf."""
+    for name in ("a/one.ttf", "a/two.ttf", "b/three.ttf"):
+        os.makedirs(tmp_path / "fonts" / os.path.dirname(name), exist_ok=True)
+        ttf(f"fonts/{name}", family=os.path.basename(name))
+    return str(tmp_path / "fonts")
+
+
+def scanner(font_dirs, checkpoint_path):
+    font_manager = FontManager()
+    font_manager.font_paths_predefined = []
+    font_manager.font_paths_user = [font_dirs]
+    font_manager.scan_checkpoint = ScanCheckpoint(checkpoint_path, every=1)
+    return font_manager
+
+
+def interrupted_scan(font_manager, files):
+    """Runs the scan of font_manager and cancels it after files files; returns what the scan returned."""
+    steps = font_manager.scan_steps()
+    processed = 0
+    try:
+        while True:
+            next(steps)
+            processed += 1
+            if processed == files - 1:
+                # Takes effect after the next file
+                font_manager.cancel_scan()
+    except StopIteration as stop:
+        return stop.value
+
+
+def test_interrupted_scan_is_continued(tmp_path, ttf, font_dirs):
+    checkpoint_path = str(tmp_path / "scan.checkpoint")
+    assert interrupted_scan(scanner(font_dirs, checkpoint_path), 3) is False
+    assert os.path.exists(checkpoint_path)
+
+    font_manager = scanner(font_dirs, checkpoint_path)
+    assert font_manager.resume_interrupted_scan() == 3
+    # Moving on to the second directory finished the first one, which didn't change since
+    done, = font_manager.scan_checkpoint.done_dirs
+    assert os.path.dirname(done) == font_dirs
+    assert font_manager.scan_checkpoint.skips(done)
+
+    ttf("fonts/b/four.ttf")
+    assert font_manager.search_fonts() is True
+    assert sorted(os.path.basename(fi.font_path) for fi in font_manager.fonts) == \
+        ["four.ttf", "one.ttf", "three.ttf", "two.ttf"]
+    assert not os.path.exists(checkpoint_path)
+
+
+def test_checkpoint_of_other_paths_is_ignored(tmp_path, font_dirs):
+    checkpoint_path = str(tmp_path / "scan.checkpoint")
+    interrupted_scan(scanner(font_dirs, checkpoint_path), 2)
+
+    font_manager = scanner(font_dirs, checkpoint_path)
+    font_manager.font_paths_user = [os.path.join(font_dirs, "b")]
+    assert font_manager.resume_interrupted_scan() == 0
+    assert font_manager.search_fonts() is True
+    assert [os.path.basename(fi.font_path) for fi in font_manager.fonts] == ["three.ttf"]
+
+
+def test_changed_directories_are_scanned_again(tmp_path, font_dirs):
+    directory = os.path.join(font_dirs, "a")
+    checkpoint = ScanCheckpoint(str(tmp_path / "scan.checkpoint"))
+    checkpoint.begin([[], [font_dirs]])
+    checkpoint.file_done(os.path.join(directory, "one.ttf"))
+    checkpoint.dir_done()
+    checkpoint.interrupt()
+
+    checkpoint = ScanCheckpoint(str(tmp_path / "scan.checkpoint"))
+    checkpoint.load()
+    assert checkpoint.skips(directory)
+    st = os.stat(directory)
+    os.utime(directory, ns=(st.st_atime_ns, checkpoint.started_ns + 1))
+    assert not checkpoint.skips(directory)
+
+
+def test_torn_last_line_ends_the_checkpoint(tmp_path, font_info):
+    checkpoint_path = str(tmp_path / "scan.checkpoint")
+    checkpoint = ScanCheckpoint(checkpoint_path, every=1)
+    checkpoint.begin([[], ["/fonts"]])
+    checkpoint.add_font(font_info("/fonts/a/one.ttf"))
+    checkpoint.file_done("/fonts/a/one.ttf")
+    checkpoint.interrupt()
+    with open(checkpoint_path, 'a', encoding='utf-8') as f:
+        f.write('{"fonts":[{"font_path":"/fonts/a/tw')
+
+    checkpoint = ScanCheckpoint(checkpoint_path)
+    assert [fi.font_path for fi in checkpoint.load()] == ["/fonts/a/one.ttf"]
+    assert checkpoint.paths == [[], ["/fonts"]]
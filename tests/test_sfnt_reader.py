@@ -0,0 +1,67 @@
+# test_sfnt_reader.py
+# for license info (GPL3), see license.txt from font_hyper package
+
+import pytest
+from fontTools.ttLib import TTCollection, TTFont
+
+from font_hyper.font_metrics import extract_font_metrics
+from font_hyper.sfnt_reader import SfntError, SfntFont, merge_ranges
+
+
+def read(font_path, face_index=0):
+    with open(font_path, 'rb') as f:
+        return SfntFont(f.read(), face_index)
+
+
+@pytest.mark.parametrize('os2_version', [1, 4])
+def test_metrics_match_fonttools(ttf, os2_version):
+    font_path = ttf(weight=700, italic_angle=-11.5, units_per_em=2048, os2_version=os2_version, fixed_pitch=True)
+    metrics = read(font_path).metrics()
+    assert metrics == extract_font_metrics(TTFont(font_path))
+    # Heights are in OS/2 from version 2 on
+    assert ('x_height' in metrics) == (os2_version >= 2)
+    assert metrics['weight'] == 700 and metrics['italic_angle'] == -11.5 and metrics['fixed_pitch']
+
+
+def test_names(ttf):
+    font = read(ttf(family="Reader Sans", style="Bold"))
+    assert font.name(1) == "Reader Sans"
+    assert font.name(2) == "Bold"
+    assert font.name(13) == ""
+
+
+@pytest.mark.parametrize('chars', ["ABCZ", "AB€\U0001F600"])
+def test_cmap_matches_fonttools(ttf, chars):
+    font_path = ttf(chars=chars)
+    cmap = read(font_path).cmap()
+    font = TTFont(font_path)
+    glyph_ids = {name: i for i, name in enumerate(font.getGlyphOrder())}
+    for codepoint, glyph_name in font.getBestCmap().items():
+        assert cmap.glyph_index(codepoint) == glyph_ids[glyph_name]
+    assert cmap.glyph_index(ord("Y")) == 0
+    assert cmap.covers(chars) and "Y" not in cmap
+
+
+def test_coverage_ranges(ttf):
+    assert read(ttf(chars="ABCZ")).coverage() == ([0x41, 0x5A], [0x43, 0x5A])
+    assert read(ttf(chars="A\U0001F600\U0001F601")).coverage() == ([0x41, 0x1F600], [0x41, 0x1F601])
+    assert merge_ranges([(5, 6), (1, 3), (4, 4), (9, 9)]) == ([1, 9], [6, 9])
+
+
+def test_collection_faces(tmp_path, ttf):
+    collection = TTCollection()
+    collection.fonts = [TTFont(ttf("a.ttf", family="First")), TTFont(ttf("b.ttf", family="Second", weight=900))]
+    font_path = str(tmp_path / "both.ttc")
+    collection.save(font_path)
+    assert read(font_path, 1).name(1) == "Second"
+    assert read(font_path, 1).metrics()['weight'] == 900
+    assert SfntFont.open(font_path + "#0").name(1) == "First"
+    with pytest.raises(SfntError):
+        read(font_path, 2)
+
+
+def test_garbage_raises_sfnt_error(tmp_path):
+    with pytest.raises(SfntError):
+        SfntFont(b"\0\1\0\0" + b"\xff" * 8)
+    with pytest.raises(SfntError):
+        SfntFont.open(str(tmp_path / "missing.ttf"))